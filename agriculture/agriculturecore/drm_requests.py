@@ -13,25 +13,35 @@
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
 import json
-import re
+import threading
+import time
 import xml.etree.ElementTree as et
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from xml.etree.ElementTree import ParseError
+from xml.parsers import expat
 
 from devicecloud import DeviceCloud, DeviceCloudHttpException
 from devicecloud.monitor import MonitorAPI
 from devicecloud.monitor_tcp import TCPClientManager
 from devicecloud.sci import DeviceTarget
+from devicecloud.streams import ROLLUP_INTERVAL_DAY, ROLLUP_INTERVAL_HALF, ROLLUP_INTERVAL_HOUR, \
+    ROLLUP_INTERVAL_MONTH, ROLLUP_INTERVAL_WEEK, ROLLUP_METHOD_AVERAGE
+from devicecloud.util import isoformat
+from django.db import DatabaseError, close_old_connections
 from django.http import JsonResponse
+import numpy as np
 
 from login.auth import DeviceCloudUser
 from agriculturecore import models, views
-from agriculturecore.models import SmartFarm, IrrigationController, IrrigationStation
+from agriculturecore.downsampling import METHOD_LTTB, METHOD_MIN_MAX, align, downsample
+from agriculturecore.models import SmartFarm, IrrigationController, IrrigationStation, StationLocation
 
 TAG_MAIN_CONTROLLER = "main_controller"
 
 PARAM_DATA = "data"
 PARAM_MAC_ADDR = "mac_addr"
+PARAM_POINTS = "points"
 PARAM_SELECTED = "selected"
 
 DATA_SEPARATOR = "@@"
@@ -69,8 +79,22 @@ ID_TANK = "tank"
 
 ID_ERROR = "error"
 
-REGEX_DEV_REQUEST_RESPONSE = ".*<device_request .*>(.*)<\\/device_request>.*"
-REGEX_DO_CMD_RESPONSE = ".*<do_command target=[^>]*>(.*)<\\/do_command>.*"
+ID_ALIGN = "align"
+ID_INTERVAL = "interval"
+ID_SERIES = "series"
+ID_STREAM = "stream"
+ID_TIMESTAMPS = "timestamps"
+
+ERROR_INVALID_HISTORY = "Invalid history request."
+ERROR_NOT_NUMERIC = "The stream values are not numeric."
+
+TAG_DEVICE = "device"
+TAG_DEVICE_REQUEST = "device_request"
+TAG_DO_COMMAND = "do_command"
+TAG_ERROR = "error"
+TAG_ERROR_DESC = "desc"
+TAG_ERROR_HINT = "hint"
+TAG_RADIO_COMMAND = "radio_command"
 
 TARGET_ZIGBEE = "zigbee"
 TARGET_SET_STATON_VALVE = "set_station_valve"
@@ -87,6 +111,27 @@ PREFIX_STATION = "ST_"
 STREAM_FORMAT_CONTROLLER = "{}/{}"
 STREAM_FORMAT = "{}/{}/{}"
 
+HISTORY_DEFAULT_POINTS = 500
+HISTORY_MAX_POINTS = 2000
+HISTORY_MAX_SERIES = 60
+HISTORY_MAX_WORKERS = 8
+HISTORY_MIN_POINTS = 10
+HISTORY_PAGE_SIZE = 1000
+
+# Downsampling method of the streams that do not use LTTB.
+HISTORY_METHODS = {ID_VALVE: METHOD_MIN_MAX}
+
+# Rollup intervals of DRM and their approximate length in seconds.
+ROLLUP_INTERVALS = ((ROLLUP_INTERVAL_HALF, 1800), (ROLLUP_INTERVAL_HOUR, 3600), (ROLLUP_INTERVAL_DAY, 86400),
+                    (ROLLUP_INTERVAL_WEEK, 604800), (ROLLUP_INTERVAL_MONTH, 2592000))
+
+STATION_LOCATIONS_TTL = 86400
+
+STATIONS_MAX_WORKERS = 4
+STATIONS_MIN_DISCOVERY_INTERVAL = 60
+STATIONS_REDISCOVERY_INTERVAL = 300
+
+WS_DATA_POINTS = "/ws/DataPoint/{}"
 WS_REMOVE_MONITOR = "/ws/Monitor/{}"
 
 monitor_managers = {}
@@ -146,6 +191,25 @@ def get_device_cloud_session(session):
                        base_url=user_serialized.server)
 
 
+def get_account_id(session):
+    """
+    Returns a string identifying the DRM account of the given session.
+
+    Args:
+         session (:class:`.SessionStore`): The Django session containing the
+            user and server of the DRM account.
+
+    Returns:
+        String: The account identifier, `None` if there is no user in the
+            session.
+    """
+    user = session.get("user")
+    if user is None:
+        return None
+    user_serialized = DeviceCloudUser.from_json(json.loads(user))
+    return "%s@%s" % (user_serialized.username, user_serialized.server)
+
+
 def check_ajax_request(request):
     """
     Checks whether the given AJAX request is valid and the user is
@@ -176,9 +240,21 @@ def get_exception_response(e):
     Returns:
         A JSON response with the details of the exception.
     """
-    return JsonResponse({ID_ERROR: ("Error in the DRM request: {}.".format(e.response.text)
-                                    if isinstance(e, DeviceCloudHttpException) else str(e))},
-                        status=400)
+    return JsonResponse({ID_ERROR: get_exception_message(e)}, status=400)
+
+
+def get_exception_message(e):
+    """
+    Returns the error message contained in the given exception.
+
+    Args:
+        e (:class:`.Exception`): The exception.
+
+    Returns:
+        String: The error message.
+    """
+    return ("Error in the DRM request: {}.".format(e.response.text)
+            if isinstance(e, DeviceCloudHttpException) else str(e))
 
 
 def send_device_request(request, target):
@@ -241,11 +317,8 @@ def send_request(dc, device_id, target, data=None):
         raise DeviceCloudHttpException(resp)
 
     # Find and return the response (if any).
-    re_search = re.search(REGEX_DEV_REQUEST_RESPONSE, resp.text, re.IGNORECASE)
-    if re_search:
-        return re_search.group(1)
-
-    return None
+    answer = _get_single_device_response(parse_sci_response(resp.text, TAG_DEVICE_REQUEST))
+    return answer.payload if answer is not None else None
 
 
 def send_do_command(dc, device_id, target, data=None):
@@ -278,11 +351,43 @@ def send_do_command(dc, device_id, target, data=None):
         raise DeviceCloudHttpException(resp)
 
     # Find and return the response (if any).
-    re_search = re.search(REGEX_DO_CMD_RESPONSE, resp.text, re.IGNORECASE)
-    if re_search:
-        return re_search.group(1)
+    answer = _get_single_device_response(parse_sci_response(resp.text, TAG_DO_COMMAND, xml_payload=True))
+    return answer.payload if answer is not None else None
 
-    return None
+
+def parse_sci_response(text, payload_tag=None, xml_payload=False):
+    """
+    Parses an SCI response in a single pass, extracting the payload and the
+    error of each device.
+
+    Args:
+        text (String): the SCI response.
+        payload_tag (String, optional): the tag of the element whose content
+            is the payload of each device (`device_request`, `do_command`...).
+        xml_payload (Boolean, optional): `True` to return the payload as the
+            XML of the children of the payload element, `False` to return
+            its text.
+
+    Returns:
+        Dictionary: the :class:`.SCIDeviceResponse` of each device ID. Errors
+            reported outside any device are stored with the `None` key.
+    """
+    return SCIResponseParser(payload_tag, xml_payload).parse(text)
+
+
+def _get_single_device_response(responses):
+    """
+    Returns the response of the only device targeted by an SCI request or,
+    if there is none or the request failed as a whole, the response outside
+    any device.
+    """
+    response = responses.get(None)
+    if response is not None and response.error is not None:
+        return response
+    for device_id, device_response in responses.items():
+        if device_id is not None:
+            return device_response
+    return response
 
 
 def get_farms(request):
@@ -386,6 +491,9 @@ def get_stations(request, device_id, request_locations=False):
     Returns the list of Irrigation Stations associated to the device with the
     given ID.
 
+    The stations are read from the topology cache, which is rediscovered in
+    the background.
+
     Args:
         request (:class:`.WSGIRequest`): The request used to generate the
             Device Cloud instance.
@@ -397,107 +505,142 @@ def get_stations(request, device_id, request_locations=False):
     Returns:
         list: A list with the Irrigation Stations associated to the device
             with the given ID.
+
+    Raises:
+        DeviceCloudHttpException: if there is any error discovering the
+            stations for the first time.
     """
-    # Initialize variables.
-    stations = []
-    dc = get_device_cloud(request)
+    return get_stations_cache().get(get_account_id(request.session), get_device_cloud(request), device_id,
+                                    request_locations)
 
-    # Generate the 'do_command' data.
-    do_cmd_data = DO_CMD_XBEE_DISCOVER
 
-    # Send the 'do_command' and get the answer.
-    try:
-        response = send_do_command(dc, device_id, TARGET_ZIGBEE, do_cmd_data)
-    except DeviceCloudHttpException as e:
-        raise e
+def discover_stations(dc, device_id):
+    """
+    Discovers the XBee network of the device with the given ID and returns
+    its irrigation stations.
 
-    # Parse the answer and generate the irrigation stations.
+    Args:
+        dc (:class:`.DeviceCloud`): the Device Cloud instance.
+        device_id (String): the device ID of the DRM device to get its
+            associated Irrigation Stations.
+
+    Returns:
+        List: the normalized MAC address and name of each station, `None` if
+            the answer is not valid.
+
+    Raises:
+        DeviceCloudHttpException: if there is any error sending the request.
+    """
+    # Send the 'do_command' and get the answer.
+    response = send_do_command(dc, device_id, TARGET_ZIGBEE, DO_CMD_XBEE_DISCOVER)
     if response is None:
-        return stations
+        return None
 
     try:
         xml_response = et.fromstring(response)
-        for xbee_device in xml_response.findall("device"):
-            # Get the name of the XBee device.
-            name = xbee_device.find("node_id").text
-            if name is None or not name.startswith(PREFIX_STATION):
-                continue
+    except ParseError:
+        return None
 
-            # Get the MAC address of the XBee device.
-            ext_addr = xbee_device.find("ext_addr").text
-            if ext_addr is None:
-                continue
+    stations = []
+    for xbee_device in xml_response.findall("device"):
+        # Get the name of the XBee device.
+        name = xbee_device.findtext("node_id")
+        if name is None or not name.startswith(PREFIX_STATION):
+            continue
 
-            address = normalize_mac(ext_addr)
+        # Get the MAC address of the XBee device.
+        ext_addr = xbee_device.findtext("ext_addr")
+        if ext_addr is None:
+            continue
 
-            # Instantiate the irrigation station.
-            station = IrrigationStation(address, name)
+        stations.append((normalize_mac(ext_addr), name))
 
-            # Get the geo-location of the XBee device.
-            latitude = None
-            longitude = None
-            locations = request.session.get("locations")
+    return stations
 
-            # If the location of this stations is in the session, return it from there.
-            if address in locations:
-                latitude = locations[address][SETTING_LAT]
-                longitude = locations[address][SETTING_LON]
-            elif request_locations:
-                # Obtain the location from DRM.
-                try:
-                    latitude = float(get_xbee_setting(dc, device_id, station.address, SETTING_LAT))
-                    longitude = float(get_xbee_setting(dc, device_id, station.address, SETTING_LON))
-                    if latitude is not None and longitude is not None:
-                        locations[address] = {}
-                        locations[address][SETTING_LAT] = latitude
-                        locations[address][SETTING_LON] = longitude
-                except Exception as e:
-                    print(e)
-                    continue
-
-            if latitude is not None and longitude is not None:
-                station.location = (latitude, longitude)
-
-            # Add the station to the list.
-            stations.append(station)
-    except ParseError:
-        return stations
 
-    return stations
+def read_station_locations(dc, device_id, addresses, locations):
+    """
+    Reads the geo-location of the given stations that are not in the given
+    locations and adds them.
 
+    The locations are taken from the database when possible. The rest are
+    read from the stations with a single 'do_command' and stored.
 
-def get_xbee_setting(dc, device_id, xbee_addr, setting):
+    Args:
+        dc (:class:`.DeviceCloud`): the Device Cloud instance.
+        device_id (String): the device ID of the DRM device that owns the
+            stations.
+        addresses (List): the MAC addresses of the stations.
+        locations (Dictionary): the latitude and longitude of each station,
+            by MAC address.
     """
-    Returns the value of the setting from the given XBee device.
+    missing = [address for address in addresses if address not in locations]
+    if not missing:
+        return
+
+    stored = get_station_locations_cache().get(missing)
+    locations.update(stored)
+    missing = [address for address in missing if address not in stored]
+    if not missing:
+        return
+
+    try:
+        values = get_xbee_settings(dc, device_id, [(address, setting) for address in missing
+                                                   for setting in (SETTING_LAT, SETTING_LON)])
+    except DeviceCloudHttpException as e:
+        print(e)
+        return
+
+    read = {}
+    for address in missing:
+        try:
+            read[address] = (float(values[(address, SETTING_LAT)]), float(values[(address, SETTING_LON)]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    get_station_locations_cache().store(read)
+    locations.update(read)
+
+
+def get_xbee_settings(dc, device_id, settings):
+    """
+    Returns the value of the given settings of the XBee devices, reading all
+    of them with a single 'do_command'.
 
     Args:
         dc (:class:`.DeviceCloud`): the Device Cloud instance.
         device_id (String): the device ID of the DRM device that owns the
-            XBee device.
-        xbee_addr (String): the MAC address of the XBee device to read the
-            setting from. Must follow this format: XX:XX:XX:XX:XX:XX:XX:XX!
-        setting (String): the XBee setting to read.
+            XBee devices.
+        settings (List): the MAC address of the XBee device and the name of
+            the setting to read, as tuples.
 
     Returns:
-        String: the value of the XBee setting.
+        Dictionary: the value of each setting that could be read, by the
+            requested MAC address and setting tuple.
+
+    Raises:
+        DeviceCloudHttpException: if there is any error sending the request.
     """
     # Generate the 'do_command' data.
-    do_cmd_data = DO_CMD_XBEE_SETTING.format(xbee_addr, setting, FORMAT_STRING)
+    do_cmd_data = "".join(DO_CMD_XBEE_SETTING.format(address, setting, FORMAT_STRING)
+                          for address, setting in settings)
     # Send the 'do_command' and get the answer.
-    try:
-        response = send_do_command(dc, device_id, TARGET_ZIGBEE, do_cmd_data)
-    except DeviceCloudHttpException as e:
-        raise e
-
+    response = send_do_command(dc, device_id, TARGET_ZIGBEE, do_cmd_data)
     if response is None:
-        return
+        return {}
+
+    # The answer contains one 'radio_command' per setting, in order.
     try:
-        xml_response = et.fromstring(response)
-        if xml_response.find("error") is not None:
-            return None
-        return xml_response.text
+        answers = et.fromstring("<{0}>{1}</{0}>".format(TAG_DO_COMMAND, response)).findall(TAG_RADIO_COMMAND)
     except ParseError:
-        return None
+        return {}
+
+    values = {}
+    for (address, setting), answer in zip(settings, answers):
+        if answer.find(TAG_ERROR) is not None or answer.text is None:
+            continue
+        # The echoed address may not have the requested format.
+        values[(address, setting)] = answer.text.strip()
+    return values
 
 
 def set_valve_value(request, controller_id, station_id, value):
@@ -553,13 +696,17 @@ def normalize_mac(mac_address):
     return mac_address.replace(":", "").replace("!", "")
 
 
-def get_data_points(request, stream_name):
+def get_data_points(request, stream_name, method=METHOD_LTTB):
     """
     Returns the list of data points in JSON format of the given data stream.
 
+    The request may contain the number of points to return, usually the
+    width of the chart. Longer series are downsampled to that number.
+
     Args:
         request (:class:`.WSGIRequest`): the AJAX request.
         stream_name (String): the data stream name.
+        method (String, optional): the downsampling method.
 
     Returns:
         A JSON with the data points or the error.
@@ -576,37 +723,232 @@ def get_data_points(request, stream_name):
         request.POST[PARAM_DATA]) if PARAM_DATA in request.POST else 1
     mac_addr = request.POST[
         PARAM_MAC_ADDR] if PARAM_MAC_ADDR in request.POST else None
+    points = get_history_points(request.POST.get(PARAM_POINTS))
 
     if mac_addr is None:
         stream_id = "{}/{}".format(device_id, stream_name)
     else:
         stream_id = "{}/{}/{}".format(device_id, mac_addr, stream_name)
 
-    strm = dc.streams.get_stream(stream_id)
-    datapoints = []
-
-    # Establish rollup values for requests exceeding 1 hour.
-    rollup_interval = None
-    rollup_method = None
-    if interval != 1:
-        rollup_method = "average"
-        if interval == 24:  # Day -> 48 samples
-            rollup_interval = "half"
-        elif interval == 168:  # Week -> 168 samples
-            rollup_interval = "hour"
-        elif interval == 720:  # Month -> 31 samples
-            rollup_interval = "day"
-    for dp in strm.read(
-            start_time=(datetime.now(timezone.utc) - timedelta(hours=interval)),
-            newest_first=False,
-            rollup_interval=rollup_interval,
-            rollup_method=rollup_method):
-        datapoints.append({"timestamp": dp.get_timestamp().timestamp() * 1000,
-                           "data": dp.get_data()})
+    try:
+        datapoints = read_history(dc, stream_id, interval, points, method)
+    except DeviceCloudHttpException as e:
+        # The stream does not exist until the first sample is uploaded.
+        if e.response.status_code == 404:
+            datapoints = []
+        else:
+            return get_exception_response(e)
 
     return JsonResponse({"data": datapoints}, status=200)
 
 
+def get_history_points(value):
+    """
+    Returns the number of points to return for a chart.
+
+    Args:
+        value (String): the requested number of points, `None` to use the
+            default one.
+
+    Returns:
+        Integer: the number of points, within the allowed limits.
+    """
+    try:
+        points = int(float(value))
+    except (TypeError, ValueError):
+        return HISTORY_DEFAULT_POINTS
+    return min(max(points, HISTORY_MIN_POINTS), HISTORY_MAX_POINTS)
+
+
+def get_rollup_interval(seconds, points):
+    """
+    Returns the DRM rollup interval that gives a number of samples closest
+    to the given number of points over the given time window.
+
+    Args:
+        seconds (Integer): the length of the time window in seconds.
+        points (Integer): the number of points to return.
+
+    Returns:
+        String: the rollup interval, `None` to read the raw data points if
+            no rollup gives at least half of the points.
+    """
+    best = None
+    best_distance = None
+    for rollup_interval, length in ROLLUP_INTERVALS:
+        samples = seconds / length
+        if samples < points / 2:
+            break
+        distance = abs(np.log(samples / points))
+        if best_distance is None or distance < best_distance:
+            best = rollup_interval
+            best_distance = distance
+    return best
+
+
+def read_history(dc, stream_id, hours, points, method=METHOD_LTTB):
+    """
+    Reads the data points of the given stream of the last hours, reduced to
+    the given number of points.
+
+    The DRM rollup closest to the number of points is read, and the result
+    is downsampled if it still has more points than requested. The series
+    downsampled with `METHOD_MIN_MAX` are read raw, so their extremes are
+    not averaged.
+
+    Args:
+        dc (:class:`.DeviceCloud`): the Device Cloud instance.
+        stream_id (String): the data stream ID.
+        hours (Integer): the number of hours to read.
+        points (Integer): the maximum number of points to return.
+        method (String, optional): the downsampling method.
+
+    Returns:
+        List: the timestamp, in milliseconds, and value of each data point.
+
+    Raises:
+        DeviceCloudHttpException: if there is any error sending the request.
+    """
+    timestamps, values = _read_history_data_points(dc, stream_id, hours, points,
+                                                   rollup=method != METHOD_MIN_MAX)
+
+    try:
+        data = np.asarray(values, dtype=np.float64)
+    except ValueError:
+        # Series that are not numeric are returned as they are.
+        return [{"timestamp": timestamp, "data": value} for timestamp, value in zip(timestamps, values)]
+
+    timestamps, data = downsample(np.asarray(timestamps, dtype=np.float64), data, points, method)
+    return [{"timestamp": timestamp, "data": value} for timestamp, value in zip(timestamps.tolist(), data.tolist())]
+
+
+def get_history(request):
+    """
+    Returns the data points of several data streams in a single response.
+
+    The request data is a JSON with the list of series to read, each one
+    with the stream name, the interval in hours and, optionally, the MAC
+    address of the irrigation station and the number of points. The series are read concurrently.
+    If 'align' is set, all the series are averaged on a shared grid of
+    timestamps with the number of points of the request.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+        A JSON with the data points or the error of each series, in the
+            order of the request.
+    """
+    # Check if the AJAX request is valid.
+    error = check_ajax_request(request)
+    if error is not None:
+        return error
+
+    try:
+        data = json.loads(request.POST[PARAM_DATA])
+        specs = data[ID_SERIES]
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({ID_ERROR: ERROR_INVALID_HISTORY}, status=400)
+    if not isinstance(specs, list) or not 0 < len(specs) <= HISTORY_MAX_SERIES \
+            or not all(isinstance(spec, dict) and ID_STREAM in spec for spec in specs):
+        return JsonResponse({ID_ERROR: ERROR_INVALID_HISTORY}, status=400)
+
+    dc = get_device_cloud(request)
+    device_id = request.POST[views.PARAM_CONTROLLER_ID]
+    points = get_history_points(data.get(PARAM_POINTS))
+    aligned = bool(data.get(ID_ALIGN))
+
+    executor = get_history_executor()
+    futures = [executor.submit(_read_history_series, dc, device_id, spec, points, aligned) for spec in specs]
+    series = [future.result() for future in futures]
+
+    if not aligned:
+        return JsonResponse({ID_SERIES: series}, status=200)
+
+    # Align the series that could be read.
+    valid = [entry for entry in series if ID_ERROR not in entry]
+    methods = [HISTORY_METHODS.get(spec[ID_STREAM], METHOD_LTTB)
+               for spec, entry in zip(specs, series) if ID_ERROR not in entry]
+    timestamps, values = align([entry.pop("data") for entry in valid], points, methods)
+    for entry, entry_values in zip(valid, values):
+        entry["data"] = [None if np.isnan(value) else value for value in entry_values.tolist()]
+    return JsonResponse({ID_TIMESTAMPS: timestamps.tolist(), ID_SERIES: series}, status=200)
+
+
+def _read_history_series(dc, device_id, spec, points, aligned):
+    """
+    Reads a series of a history request.
+
+    Returns:
+        Dictionary: the data points of the series, as arrays of timestamps
+            and values if it will be aligned, or the error.
+    """
+    stream_name = spec[ID_STREAM]
+    mac_addr = spec.get(PARAM_MAC_ADDR)
+    if mac_addr is None:
+        stream_id = STREAM_FORMAT_CONTROLLER.format(device_id, stream_name)
+    else:
+        stream_id = STREAM_FORMAT.format(device_id, mac_addr, stream_name)
+    hours = int(spec.get(ID_INTERVAL) or 1)
+    try:
+        if not aligned:
+            series_points = get_history_points(spec.get(PARAM_POINTS, points))
+            return {"data": read_history(dc, stream_id, hours, series_points,
+                                         HISTORY_METHODS.get(stream_name, METHOD_LTTB))}
+        timestamps, values = _read_history_data_points(
+            dc, stream_id, hours, points, rollup=HISTORY_METHODS.get(stream_name) != METHOD_MIN_MAX)
+        return {"data": (np.asarray(timestamps, dtype=np.float64), np.asarray(values, dtype=np.float64))}
+    except DeviceCloudHttpException as e:
+        # The stream does not exist until the first sample is uploaded.
+        if e.response.status_code == 404:
+            return {"data": [] if not aligned else (np.empty(0), np.empty(0))}
+        return {ID_ERROR: get_exception_message(e)}
+    except ValueError:
+        return {ID_ERROR: ERROR_NOT_NUMERIC}
+    except Exception as e:
+        return {ID_ERROR: str(e)}
+
+
+def _read_history_data_points(dc, stream_id, hours, points, rollup=True):
+    """
+    Reads the data points of the given stream of the last hours, using the
+    DRM rollup closest to the given number of points unless `rollup` is
+    `False`.
+
+    Returns:
+        Tuple: the list of timestamps, in milliseconds, and the list of
+            values.
+    """
+    params = {"timeline": "client", "order": "ascending", "size": HISTORY_PAGE_SIZE,
+              "startTime": isoformat(datetime.now(timezone.utc) - timedelta(hours=hours))}
+    rollup_interval = get_rollup_interval(hours * 3600, points) if rollup else None
+    if rollup_interval is not None:
+        params["rollupInterval"] = rollup_interval
+        params["rollupMethod"] = ROLLUP_METHOD_AVERAGE
+
+    timestamps = []
+    values = []
+    while True:
+        result = dc.get_connection().get_json(WS_DATA_POINTS.format(stream_id), params=params)
+        for item in result.get("items", []):
+            timestamps.append(_get_data_point_timestamp(item))
+            values.append(item["data"])
+        if int(result["resultSize"]) < HISTORY_PAGE_SIZE or "pageCursor" not in result:
+            break
+        params["pageCursor"] = result["pageCursor"]
+    return timestamps, values
+
+
+def _get_data_point_timestamp(item):
+    """
+    Returns the timestamp in milliseconds of the given data point JSON.
+    """
+    # Raw data points may only include the timestamp in ISO format.
+    if "timestamp" in item:
+        return int(item["timestamp"])
+    return datetime.fromisoformat(item["timestampISO"].replace("Z", "+00:00")).timestamp() * 1000
+
+
 def get_general_farm_status(request, device_id, stations):
     """
     Obtains the status of the farm.
@@ -747,6 +1089,7 @@ def subscribe_valves(session, farm_name, consumer):
     dc = get_device_cloud_session(session)
     if dc is None:
         return -1
+    account = get_account_id(session)
 
     global monitor_managers
 
@@ -766,9 +1109,13 @@ def subscribe_valves(session, farm_name, consumer):
         stream_id = json_data["Document"]["Msg"]["DataPoint"]["streamId"]
         valve = json_data["Document"]["Msg"]["DataPoint"]["data"]
 
+        # Rediscover the stations if an unknown one reports data.
+        parts = stream_id.split("/")
+        if len(parts) == 3:
+            get_stations_cache().check_station(account, dc, parts[0], parts[1])
+
         # Only process data streams for any valve.
         if stream_id.endswith(ID_VALVE):
-            parts = stream_id.split("/")
             device = parts[1] if len(parts) == 3 else ID_TANK
             consumer.send(text_data=json.dumps({"device": device, "value": valve}))
 
@@ -811,6 +1158,162 @@ def unsubscribe_valves(session, monitor_id):
         print(e)
 
 
+class SCIDeviceResponse:
+    """
+    Payload and error of a device in an SCI response.
+    """
+
+    def __init__(self, device_id):
+        """
+        Class constructor. Instantiates a new ``SCIDeviceResponse``.
+
+        Args:
+            device_id (String): the ID of the device, `None` for the errors
+                outside any device.
+        """
+        self.device_id = device_id
+        self.payload = None
+        self.error = None
+        self.error_id = None
+
+
+class SCIResponseParser:
+    """
+    Single pass parser of SCI responses.
+
+    The response goes through the expat parser once, without building a
+    tree: the text of the payloads and errors is collected by the element
+    handlers and XML payloads are sliced from the response using the parser
+    offsets, so the time is linear in the size of the response.
+    """
+
+    def __init__(self, payload_tag=None, xml_payload=False):
+        """
+        Class constructor. Instantiates a new ``SCIResponseParser``.
+
+        Args:
+            payload_tag (String, optional): the tag of the element whose
+                content is the payload of each device.
+            xml_payload (Boolean, optional): `True` to return the payload as
+                XML, `False` to return its text.
+        """
+        self._payload_tag = payload_tag
+        self._xml_payload = xml_payload
+        self._data = None
+        self._parser = None
+        self._responses = None
+        self._device_id = None
+        self._payload_depth = 0
+        self._payload_start = 0
+        self._payload_text = None
+        self._error = None
+        self._error_field = None
+
+    def parse(self, text):
+        """
+        Parses the given SCI response.
+
+        Args:
+            text (String): the SCI response.
+
+        Returns:
+            Dictionary: the :class:`.SCIDeviceResponse` of each device ID.
+        """
+        self._data = text.encode("utf-8") if isinstance(text, str) else text
+        self._responses = {}
+        self._device_id = None
+        self._payload_depth = 0
+        self._error = None
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._parser.CharacterDataHandler = self._character_data
+        try:
+            self._parser.Parse(self._data, True)
+        except expat.ExpatError:
+            # Not a valid SCI response, return what was extracted so far.
+            pass
+        finally:
+            self._data = None
+            self._parser = None
+        return self._responses
+
+    def _get_response(self):
+        """
+        Returns the response of the current device.
+        """
+        response = self._responses.get(self._device_id)
+        if response is None:
+            response = self._responses[self._device_id] = SCIDeviceResponse(self._device_id)
+        return response
+
+    def _start_element(self, name, attrs):
+        if self._payload_depth:
+            if name == self._payload_tag:
+                self._payload_depth += 1
+        elif name == self._payload_tag:
+            self._payload_depth = 1
+            if self._xml_payload:
+                # The payload starts after the end of the start tag.
+                self._payload_start = self._data.index(b">", self._parser.CurrentByteIndex) + 1
+            else:
+                self._payload_text = []
+        elif name == TAG_DEVICE and "id" in attrs:
+            self._device_id = attrs["id"]
+            self._get_response()
+
+        if name == TAG_ERROR and self._error is None:
+            self._error = {"id": attrs.get("id"), TAG_ERROR: [], TAG_ERROR_DESC: None, TAG_ERROR_HINT: None}
+            self._error_field = TAG_ERROR
+        elif self._error is not None and name in (TAG_ERROR_DESC, TAG_ERROR_HINT):
+            self._error[name] = []
+            self._error_field = name
+
+    def _end_element(self, name):
+        if self._payload_depth and name == self._payload_tag:
+            self._payload_depth -= 1
+            if not self._payload_depth:
+                if self._xml_payload:
+                    end = max(self._parser.CurrentByteIndex, self._payload_start)
+                    payload = self._data[self._payload_start:end].decode("utf-8")
+                else:
+                    payload = "".join(self._payload_text)
+                    self._payload_text = None
+                self._get_response().payload = payload
+        elif name == TAG_DEVICE and not self._payload_depth:
+            self._device_id = None
+
+        if self._error is not None:
+            if name == TAG_ERROR:
+                response = self._get_response()
+                # Keep the first error of each device.
+                if response.error is None:
+                    response.error_id = self._error["id"]
+                    response.error = self._get_error_message()
+                self._error = None
+                self._error_field = None
+            elif name in (TAG_ERROR_DESC, TAG_ERROR_HINT):
+                self._error_field = TAG_ERROR
+
+    def _character_data(self, data):
+        if self._payload_text is not None:
+            self._payload_text.append(data)
+        if self._error_field is not None:
+            self._error[self._error_field].append(data)
+
+    def _get_error_message(self):
+        """
+        Returns the message of the current error, built from its description
+        and hint or, if it has none, from its text.
+        """
+        if self._error[TAG_ERROR_DESC] is None:
+            return "".join(self._error[TAG_ERROR]).strip()
+        desc = "".join(self._error[TAG_ERROR_DESC])
+        hint = "".join(self._error[TAG_ERROR_HINT] or [])
+        return "%s: %s" % (desc, hint) if hint else desc
+
+
 class MonitorManager(MonitorAPI):
     """
     Class used to manage the use of Device Cloud monitors.
@@ -818,3 +1321,257 @@ class MonitorManager(MonitorAPI):
     def __init__(self, conn):
         MonitorAPI.__init__(self, conn)
         self._tcp_client_manager = TCPClientManager(self._conn, secure=False)
+
+
+class StationsCache:
+    """
+    Cache of the XBee topology of the irrigation controllers: the name,
+    address and location of their stations, indexed by account and
+    controller.
+
+    Topologies older than the rediscovery interval are still returned while
+    they are discovered again in the background. Stations that report data
+    but are not in the topology trigger a discovery, at most once every
+    minimum discovery interval. The ones still missing after a discovery do
+    not trigger more until the topology is rediscovered.
+    """
+
+    def __init__(self, interval=STATIONS_REDISCOVERY_INTERVAL, min_interval=STATIONS_MIN_DISCOVERY_INTERVAL):
+        """
+        Class constructor. Instantiates a new ``StationsCache``.
+
+        Args:
+            interval (Integer): Seconds after which a topology is
+                rediscovered.
+            min_interval (Integer): Minimum seconds between the discoveries
+                of a controller triggered by unknown stations.
+        """
+        self._interval = interval
+        self._min_interval = min_interval
+        self._entries = {}
+        self._key_locks = {}
+        self._refreshing = set()
+        self._triggered = {}
+        self._pending = {}
+        self._unknown = {}
+        self._lock = threading.Lock()
+
+    def get(self, account, dc, controller_id, request_locations=False):
+        """
+        Returns the stations of the given controller, discovering them if
+        they are not cached.
+
+        Args:
+            account (String): The account identifier.
+            dc (:class:`.DeviceCloud`): the Device Cloud instance.
+            controller_id (String): the device ID of the controller.
+            request_locations (Boolean, optional): `True` to read the
+                locations of the stations that do not have one yet.
+
+        Returns:
+            List: List of :class:`.IrrigationStation`.
+
+        Raises:
+            DeviceCloudHttpException: if there is any error discovering the
+                stations.
+        """
+        key = (account, controller_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        if entry is None:
+            # Concurrent requests for the same controller wait for a single discovery.
+            with key_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._discover(key, dc, False)
+        elif time.monotonic() - entry[0] > self._interval:
+            self.refresh(account, dc, controller_id)
+
+        _, stations, locations = entry
+        if request_locations and any(address not in locations for address, _ in stations):
+            with key_lock:
+                read_station_locations(dc, controller_id, [address for address, _ in stations], locations)
+
+        irrigation_stations = []
+        for address, name in stations:
+            station = IrrigationStation(address, name)
+            if address in locations:
+                station.location = locations[address]
+            irrigation_stations.append(station)
+        return irrigation_stations
+
+    def check_station(self, account, dc, controller_id, address):
+        """
+        Discovers the stations of the given controller in the background if
+        the given station is missing from its cached topology, it was not
+        missing after the last discovery and the controller was not
+        discovered within the minimum discovery interval.
+
+        Args:
+            account (String): The account identifier.
+            dc (:class:`.DeviceCloud`): the Device Cloud instance.
+            controller_id (String): the device ID of the controller.
+            address (String): the normalized MAC address of the station.
+        """
+        key = (account, controller_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or any(address == station[0] for station in entry[1]) \
+                    or address in self._unknown.get(key, ()):
+                return
+            self._pending.setdefault(key, set()).add(address)
+            triggered = self._triggered.get(key)
+            if triggered is not None and time.monotonic() - triggered < self._min_interval:
+                return
+        self.refresh(account, dc, controller_id)
+
+    def refresh(self, account, dc, controller_id):
+        """
+        Discovers the stations of the given controller in the background,
+        unless they are already being discovered.
+
+        Args:
+            account (String): The account identifier.
+            dc (:class:`.DeviceCloud`): the Device Cloud instance.
+            controller_id (String): the device ID of the controller.
+        """
+        key = (account, controller_id)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self._triggered[key] = time.monotonic()
+        get_stations_executor().submit(self._refresh, key, dc)
+
+    def _refresh(self, key, dc):
+        """
+        Discovers the stations of the given key, including the locations of
+        the new ones.
+        """
+        try:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                self._discover(key, dc, True)
+        except Exception as e:
+            print(e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+            close_old_connections()
+
+    def _discover(self, key, dc, read_locations):
+        """
+        Discovers the stations of the given key and caches them, keeping the
+        known locations. Invalid answers are not cached.
+        """
+        stations = discover_stations(dc, key[1])
+        with self._lock:
+            entry = self._entries.get(key)
+        locations = dict(entry[2]) if entry is not None else {}
+        if stations is None:
+            return time.monotonic(), [], locations
+
+        if read_locations:
+            read_station_locations(dc, key[1], [address for address, _ in stations], locations)
+        entry = (time.monotonic(), stations, locations)
+        addresses = set(address for address, _ in stations)
+        with self._lock:
+            self._entries[key] = entry
+            # Remember the stations that reported data but were not discovered.
+            self._unknown[key] = (self._unknown.get(key, set()) | self._pending.pop(key, set())) - addresses
+        return entry
+
+
+class StationLocationsCache:
+    """
+    Cache of the geo-location of the irrigation stations, stored in the
+    database and indexed by the MAC address of the stations.
+    """
+
+    def __init__(self, ttl=STATION_LOCATIONS_TTL):
+        """
+        Class constructor. Instantiates a new ``StationLocationsCache``.
+
+        Args:
+            ttl (Integer): Seconds the stored locations are considered fresh.
+        """
+        self._ttl = ttl
+
+    def get(self, addresses):
+        """
+        Returns the stored locations of the given stations that are not too
+        old, so the moved stations are read again.
+
+        Args:
+            addresses (List): the MAC addresses of the stations.
+
+        Returns:
+            Dictionary: the latitude and longitude of each station found, by
+                MAC address.
+        """
+        try:
+            return {entry.address: (entry.latitude, entry.longitude)
+                    for entry in StationLocation.objects.filter(
+                        address__in=addresses, updated__gte=datetime.now(timezone.utc) - timedelta(seconds=self._ttl))}
+        except DatabaseError as e:
+            print(e)
+            return {}
+
+    def store(self, locations):
+        """
+        Stores the given locations.
+
+        Args:
+            locations (Dictionary): the latitude and longitude of each
+                station, by MAC address.
+        """
+        try:
+            for address, (latitude, longitude) in locations.items():
+                StationLocation.objects.update_or_create(
+                    address=address,
+                    defaults={"latitude": latitude, "longitude": longitude,
+                              "updated": datetime.now(timezone.utc)})
+        except DatabaseError as e:
+            print(e)
+
+
+def get_history_executor():
+    """
+    Returns the executor used to read the history series concurrently.
+    """
+    return history_executor
+
+
+def get_station_locations_cache():
+    """
+    Returns the station locations cache.
+    """
+    return station_locations_cache
+
+
+def get_stations_cache():
+    """
+    Returns the stations topology cache.
+    """
+    return stations_cache
+
+
+def get_stations_executor():
+    """
+    Returns the executor used to discover the stations in the background.
+    """
+    return stations_executor
+
+
+# Default global instance of the history executor.
+history_executor = ThreadPoolExecutor(max_workers=HISTORY_MAX_WORKERS, thread_name_prefix="history")
+# Default global instance of the station locations cache.
+station_locations_cache = StationLocationsCache()
+# Default global instance of the stations topology cache.
+stations_cache = StationsCache()
+# Default global instance of the stations executor.
+stations_executor = ThreadPoolExecutor(max_workers=STATIONS_MAX_WORKERS, thread_name_prefix="stations")
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.4 on 2026-10-19 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StationLocation',
+            fields=[
+                ('address', models.CharField(max_length=16, primary_key=True, serialize=False)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('updated', models.DateTimeField()),
+            ],
+        ),
+    ]
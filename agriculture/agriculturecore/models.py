@@ -12,6 +12,8 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
+from django.db import models
+
 SMART_FARM_PREFIX = "agri-"
 
 DEFAULT_LOCATION = (33.813980, -117.923089)  # Batuu (Star Wars Galaxy's Edge)
@@ -307,3 +309,15 @@ class IrrigationController:
             "location": self._location
         }
         return json_dict
+
+
+class StationLocation(models.Model):
+    """
+    Geo-location of an irrigation station, as last read from the LX and LY
+    settings of its XBee device.
+    """
+
+    address = models.CharField(max_length=16, primary_key=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    updated = models.DateTimeField()
@@ -12,6 +12,119 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
-from django.test import TestCase
+from devicecloud.streams import ROLLUP_INTERVAL_DAY, ROLLUP_INTERVAL_HOUR
+from django.test import SimpleTestCase
+import numpy as np
 
-# Create your tests here.
+from agriculturecore.downsampling import METHOD_LTTB, METHOD_MIN_MAX, align, downsample, lttb, min_max
+from agriculturecore.drm_requests import get_rollup_interval
+
+
+class LTTBTestCase(SimpleTestCase):
+
+    def test_returns_the_requested_points(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.sin(x / 50)
+        res_x, res_y = lttb(x, y, 100)
+        self.assertEqual(len(res_x), 100)
+        self.assertEqual(len(res_y), 100)
+        self.assertTrue(np.all(np.diff(res_x) > 0))
+
+    def test_keeps_the_first_and_last_points(self):
+        x = np.arange(500, dtype=np.float64)
+        y = np.random.default_rng(0).random(500)
+        res_x, res_y = lttb(x, y, 50)
+        self.assertEqual((res_x[0], res_y[0]), (x[0], y[0]))
+        self.assertEqual((res_x[-1], res_y[-1]), (x[-1], y[-1]))
+
+    def test_keeps_the_peaks(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.zeros(1000)
+        y[437] = 100
+        y[712] = -100
+        res_x, res_y = lttb(x, y, 20)
+        self.assertIn(437, res_x)
+        self.assertIn(712, res_x)
+
+    def test_returns_short_series_as_they_are(self):
+        x = np.arange(10, dtype=np.float64)
+        y = x * 2
+        res_x, res_y = lttb(x, y, 10)
+        self.assertIs(res_x, x)
+        self.assertIs(res_y, y)
+
+
+class MinMaxTestCase(SimpleTestCase):
+
+    def test_keeps_the_extremes_of_every_bucket(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.random.default_rng(1).random(1000)
+        res_x, res_y = min_max(x, y, 100)
+        self.assertLessEqual(len(res_x), 100)
+        self.assertTrue(np.all(np.diff(res_x) > 0))
+        for bucket in range(50):
+            selected = res_y[(res_x >= bucket * 20) & (res_x < (bucket + 1) * 20)]
+            values = y[bucket * 20:(bucket + 1) * 20]
+            self.assertEqual(selected.min(), values.min())
+            self.assertEqual(selected.max(), values.max())
+
+    def test_returns_only_original_values(self):
+        x = np.arange(300, dtype=np.float64)
+        y = np.tile([0.0, 1.0], 150)
+        res_x, res_y = downsample(x, y, 20, METHOD_MIN_MAX)
+        self.assertTrue(set(res_y.tolist()) <= {0.0, 1.0})
+        np.testing.assert_array_equal(y[res_x.astype(np.int64)], res_y)
+
+    def test_returns_short_series_as_they_are(self):
+        x = np.arange(10, dtype=np.float64)
+        res_x, res_y = min_max(x, x, 20)
+        self.assertIs(res_x, x)
+        self.assertIs(res_y, x)
+
+
+class AlignTestCase(SimpleTestCase):
+
+    def test_averages_every_bucket(self):
+        timestamps = np.array([0.0, 1.0, 2.0, 3.0])
+        values = np.array([1.0, 3.0, 5.0, 7.0])
+        grid, aligned = align([(timestamps, values)], 2)
+        np.testing.assert_array_equal(grid, [0.0, 1.5])
+        np.testing.assert_array_equal(aligned[0], [2.0, 6.0])
+
+    def test_fills_the_missing_buckets(self):
+        first = (np.array([0.0, 10.0]), np.array([1.0, 2.0]))
+        second = (np.array([10.0]), np.array([5.0]))
+        grid, aligned = align([first, second], 2)
+        np.testing.assert_array_equal(grid, [0.0, 5.0])
+        np.testing.assert_array_equal(aligned[0], [1.0, 2.0])
+        self.assertTrue(np.isnan(aligned[1][0]))
+        self.assertEqual(aligned[1][1], 5.0)
+
+    def test_keeps_the_values_of_min_max_series(self):
+        timestamps = np.array([0.0, 1.0, 2.0, 3.0])
+        values = np.array([0.0, 1.0, 1.0, 0.0])
+        grid, aligned = align([(timestamps, values), (timestamps, values)], 2, [METHOD_MIN_MAX, METHOD_LTTB])
+        np.testing.assert_array_equal(aligned[0], [1.0, 1.0])
+        np.testing.assert_array_equal(aligned[1], [0.5, 0.5])
+
+    def test_drops_the_empty_buckets(self):
+        timestamps = np.array([0.0, 1.0, 9.0, 10.0])
+        values = np.array([1.0, 1.0, 2.0, 2.0])
+        grid, aligned = align([(timestamps, values)], 10)
+        self.assertEqual(len(grid), 3)
+        self.assertFalse(np.any(np.isnan(aligned[0])))
+
+    def test_empty_series(self):
+        grid, aligned = align([(np.empty(0), np.empty(0))], 10)
+        self.assertEqual(len(grid), 0)
+        self.assertEqual(len(aligned[0]), 0)
+
+
+class RollupIntervalTestCase(SimpleTestCase):
+
+    def test_short_windows_are_read_raw(self):
+        self.assertIsNone(get_rollup_interval(24 * 3600, 500))
+
+    def test_closest_rollup_interval(self):
+        self.assertEqual(get_rollup_interval(30 * 86400, 500), ROLLUP_INTERVAL_HOUR)
+        self.assertEqual(get_rollup_interval(365 * 86400, 500), ROLLUP_INTERVAL_DAY)
@@ -40,6 +40,7 @@ urlpatterns = [
     path('ajax/get_temperature', views.get_temperature, name="get_temperature"),
     path('ajax/get_moisture', views.get_moisture, name="get_moisture"),
     path('ajax/get_valve', views.get_valve, name="get_valve"),
+    path('ajax/get_history', views.get_history_series, name="get_history"),
     path('ajax/verify_parameters', views.verify_parameters, name="verify_parameters"),
     path('ajax/check_farm_connection_status', views.check_farm_connection_status, name="check_farm_connection_status")
 ]
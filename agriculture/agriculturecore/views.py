@@ -530,7 +530,20 @@ def get_valve(request):
     Returns:
         A JSON with the list of data points or the error.
     """
-    return get_data_points(request, ID_VALVE)
+    return get_data_points(request, ID_VALVE, METHOD_MIN_MAX)
+
+
+def get_history_series(request):
+    """
+    Returns the data of several history series of the farm.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+        A JSON with the list of data points of each series or the error.
+    """
+    return get_history(request)
 
 
 def check_farm_connection_status(request):
@@ -42,7 +42,6 @@ def login(request):
         if dc is not None and dc.has_valid_credentials():
             user = DeviceCloudUser(server, username, password)
             request.session["user"] = user.to_json()
-            request.session["locations"] = {}
             request.session.modified = True
             return redirect_dest(request)
 
@@ -57,7 +56,6 @@ def logout(request):
 
     # Redirect to logout page.
     request.session["user"] = None
-    request.session["locations"] = None
     return render(request, "logout.html")
 
 
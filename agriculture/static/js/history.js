@@ -14,6 +14,9 @@
  * OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
  */
 
+// Maximum number of series of a history request (HISTORY_MAX_SERIES in the server).
+const HISTORY_MAX_SERIES = 60;
+
 const STATION_CHART_HTML = "" +
     "<div class='row justify-content-lg-center'>" +
     "   <div class='col-lg-12 col-xl-12'>" +
@@ -158,15 +161,13 @@ function drawAllCharts(refresh=false, showProgress=true) {
     if (!isHistoryShowing())
         return;
 
-    drawWindChart(refresh, showProgress);
-    drawRainChart(refresh, showProgress);
-    drawRadiationChart(refresh, showProgress);
-
-    for (macAddr in temperatureData) {
-        drawTemperatureChart(macAddr, refresh, showProgress);
-        drawMoistureChart(macAddr, refresh, showProgress);
-        drawValveChart(macAddr, refresh, showProgress);
-    }
+    var charts = ["wind", "rain", "radiation"].map(stream => ({"stream": stream, "macAddr": null}));
+    for (macAddr in temperatureData)
+        charts.push(...getStationCharts(macAddr));
+    if (refresh)
+        readCharts(charts, showProgress);
+    else
+        charts.forEach(chart => drawStreamChart(chart["stream"], chart["macAddr"]));
 
     // Repeat the task every minute.
     setTimeout(function() {
@@ -174,106 +175,169 @@ function drawAllCharts(refresh=false, showProgress=true) {
     }, 60000);
 }
 
-// Draws the wind chart.
-function drawWindChart(refresh=false, showProgress=false) {
-    if (refresh) {
+// Returns the charts of the given irrigation station.
+function getStationCharts(macAddr) {
+    return ["temperature", "moisture", "valve"].map(stream => ({"stream": stream, "macAddr": macAddr}));
+}
+
+// Returns the ID of the given chart.
+function getChartId(chart) {
+    if (chart["macAddr"] == null)
+        return chart["stream"] + "-chart";
+    return chart["stream"] + "-" + chart["macAddr"] + "-chart";
+}
+
+// Reads the data of the given charts in a single request and draws them.
+function readCharts(charts, showProgress=false) {
+    if (charts.length == 0)
+        return;
+    // Split the charts in requests the server accepts.
+    if (charts.length > HISTORY_MAX_SERIES) {
+        for (var i = 0; i < charts.length; i += HISTORY_MAX_SERIES)
+            readCharts(charts.slice(i, i + HISTORY_MAX_SERIES), showProgress);
+        return;
+    }
+
+    var series = [];
+    for (var chart of charts) {
+        var chartId = getChartId(chart);
         if (showProgress)
-            $("#wind-chart-loading").show();
-        $.post("/ajax/get_wind", getJsonData(windInterval), function(response) {
-            windData = response.data;
-            drawWindChart();
-            $("#wind-chart-loading").hide();
-        }).fail(function(response) {
-            processErrorResponse(response);
+            $("#" + chartId + "-loading").show();
+        var spec = {"stream": chart["stream"], "interval": getStreamInterval(chart["stream"], chart["macAddr"])};
+        if (chart["macAddr"] != null)
+            spec["mac_addr"] = chart["macAddr"];
+        var width = $("#" + chartId).width();
+        if (width > 0)
+            spec["points"] = Math.round(width);
+        series.push(spec);
+    }
+
+    $.post("/ajax/get_history", getJsonData(JSON.stringify({"series": series})), function(response) {
+        $.each(response["series"], function(k, result) {
+            var chart = charts[k];
+            $("#" + getChartId(chart) + "-loading").hide();
+            if (result["error"] != null) {
+                toastr.error(result["error"]);
+                return;
+            }
+            setStreamData(chart["stream"], chart["macAddr"], result["data"]);
+            drawStreamChart(chart["stream"], chart["macAddr"]);
         });
-    } else {
-        drawChart("wind-chart", windData, "Wind", "km/h", "#4F4F4F");
+    }).fail(function(response) {
+        processErrorResponse(response);
+    });
+}
+
+// Returns the interval of the chart of the given stream.
+function getStreamInterval(stream, macAddr) {
+    switch (stream) {
+        case "wind":
+            return windInterval;
+        case "rain":
+            return rainInterval;
+        case "radiation":
+            return radiationInterval;
+        case "temperature":
+            return temperatureInterval[macAddr];
+        case "moisture":
+            return moistureInterval[macAddr];
+        default:
+            return valveInterval[macAddr];
     }
 }
 
+// Stores the data of the chart of the given stream.
+function setStreamData(stream, macAddr, data) {
+    switch (stream) {
+        case "wind":
+            windData = data;
+            break;
+        case "rain":
+            rainData = data;
+            break;
+        case "radiation":
+            radiationData = data;
+            break;
+        case "temperature":
+            temperatureData[macAddr] = data;
+            break;
+        case "moisture":
+            moistureData[macAddr] = data;
+            break;
+        default:
+            valveData[macAddr] = data;
+    }
+}
+
+// Draws the chart of the given stream.
+function drawStreamChart(stream, macAddr) {
+    switch (stream) {
+        case "wind":
+            drawWindChart();
+            break;
+        case "rain":
+            drawRainChart();
+            break;
+        case "radiation":
+            drawRadiationChart();
+            break;
+        case "temperature":
+            drawTemperatureChart(macAddr);
+            break;
+        case "moisture":
+            drawMoistureChart(macAddr);
+            break;
+        default:
+            drawValveChart(macAddr);
+    }
+}
+
+// Draws the wind chart.
+function drawWindChart(refresh=false, showProgress=false) {
+    if (refresh)
+        readCharts([{"stream": "wind", "macAddr": null}], showProgress);
+    else
+        drawChart("wind-chart", windData, "Wind", "km/h", "#4F4F4F");
+}
+
 // Draws the rain chart.
 function drawRainChart(refresh=false, showProgress=false) {
-    if (refresh) {
-        if (showProgress)
-            $("#rain-chart-loading").show();
-        $.post("/ajax/get_rain", getJsonData(rainInterval), function(response) {
-            rainData = response.data;
-            drawRainChart();
-            $("#rain-chart-loading").hide();
-        }).fail(function(response) {
-            processErrorResponse(response);
-        });
-    } else {
+    if (refresh)
+        readCharts([{"stream": "rain", "macAddr": null}], showProgress);
+    else
         drawChart("rain-chart", rainData, "Rain", "mm", "#3399FF");
-    }
 }
 
 // Draws the radiation chart.
 function drawRadiationChart(refresh=false, showProgress=false) {
-    if (refresh) {
-        if (showProgress)
-            $("#radiation-chart-loading").show();
-        $.post("/ajax/get_radiation", getJsonData(radiationInterval), function(response) {
-            radiationData = response.data;
-            drawRadiationChart();
-            $("#radiation-chart-loading").hide();
-        }).fail(function(response) {
-            processErrorResponse(response);
-        });
-    } else {
+    if (refresh)
+        readCharts([{"stream": "radiation", "macAddr": null}], showProgress);
+    else
         drawChart("radiation-chart", radiationData, "Radiation", "W/m2", "#FFD500");
-    }
 }
 
 // Draws the temperature chart.
 function drawTemperatureChart(macAddr, refresh=false, showProgress=false) {
-    if (refresh) {
-        if (showProgress)
-            $("#temperature-" + macAddr + "-chart-loading").show();
-        $.post("/ajax/get_temperature", getJsonData(temperatureInterval[macAddr], macAddr), function(response) {
-            temperatureData[macAddr] = response.data;
-            drawTemperatureChart(macAddr);
-            $("#temperature-" + macAddr + "-chart-loading").hide();
-        }).fail(function(response) {
-            processErrorResponse(response);
-        });
-    } else {
+    if (refresh)
+        readCharts([{"stream": "temperature", "macAddr": macAddr}], showProgress);
+    else
         drawChart("temperature-" + macAddr + "-chart", temperatureData[macAddr], "Temperature", "ºC", "#FF0000");
-    }
 }
 
 // Draws the moisture chart.
 function drawMoistureChart(macAddr, refresh=false, showProgress=false) {
-    if (refresh) {
-        if (showProgress)
-            $("#moisture-" + macAddr + "-chart-loading").show();
-        $.post("/ajax/get_moisture", getJsonData(moistureInterval[macAddr], macAddr), function(response) {
-            moistureData[macAddr] = response.data;
-            drawMoistureChart(macAddr);
-            $("#moisture-" + macAddr + "-chart-loading").hide();
-        }).fail(function(response) {
-            processErrorResponse(response);
-        });
-    } else {
+    if (refresh)
+        readCharts([{"stream": "moisture", "macAddr": macAddr}], showProgress);
+    else
         drawChart("moisture-" + macAddr + "-chart", moistureData[macAddr], "Moisture", "%", "#33CC66");
-    }
 }
 
 // Draws the valve status chart.
 function drawValveChart(macAddr, refresh=false, showProgress=false) {
-    if (refresh) {
-        if (showProgress)
-            $("#valve-" + macAddr + "-chart-loading").show();
-        $.post("/ajax/get_valve", getJsonData(valveInterval[macAddr], macAddr), function(response) {
-            valveData[macAddr] = response.data;
-            drawValveChart(macAddr);
-            $("#valve-" + macAddr + "-chart-loading").hide();
-        }).fail(function(response) {
-            processErrorResponse(response);
-        });
-    } else {
+    if (refresh)
+        readCharts([{"stream": "valve", "macAddr": macAddr}], showProgress);
+    else
         drawChart("valve-" + macAddr + "-chart", valveData[macAddr], "Valve", "Closed/Open", "#0000CC");
-    }
 }
 
 // Draws the chart with the given data.
@@ -346,13 +410,13 @@ function drawStationsCharts() {
         }
         $("#stations-cards").html(html);
 
+        var charts = [];
         for (var station of stations) {
             var macAddr = normalizeMac(station["address"]);
             registerIntervalCallbacks(macAddr);
-            drawTemperatureChart(macAddr, true, true);
-            drawMoistureChart(macAddr, true, true);
-            drawValveChart(macAddr, true, true);
+            charts.push(...getStationCharts(macAddr));
         }
+        readCharts(charts, true);
     }).fail(function(response) {
         processErrorResponse(response);
     });
@@ -0,0 +1,364 @@
+# Copyright 2025, Digi International Inc.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""
+Benchmark of the ConnectCore web application against the fake Remote
+Manager service.
+
+The AJAX views are driven through the Django test client and the web
+socket consumers through the Channels communicator, all in process. For
+each scenario the p50 and p99 latencies and the Remote Manager requests
+per call are reported::
+
+    python bench_connectcore.py --fleet-size 500 --iterations 50 --latency sci=0.2:0.05
+
+Run it with the Python environment of the ConnectCore application.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR))
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "connectcore"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "connectcorecommon.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from connectcorecommon.asgi import application  # noqa: E402
+from fake_drm import DEFAULT_DEVICE_TYPE, FakeDRMConfig, FakeDRMServer, PUSH_OPEN_PORT, \
+    parse_endpoint_values  # noqa: E402
+from login.auth import DeviceCloudUser  # noqa: E402
+
+# Constants.
+CONTENT_TYPE_JSON = "application/json; charset=utf-8"
+
+AJAX_HEADERS = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+BENCH_USER = "benchmark"
+BENCH_PASSWORD = "benchmark"
+
+WS_TICK = 0.001
+WS_TIMEOUT = 10
+
+
+class Scenario:
+    """
+    Benchmark scenario: a named operation and its measurements.
+    """
+
+    def __init__(self, name, run):
+        """
+        Class constructor. Instantiates a new `Scenario` object.
+
+        Args:
+            name (String): Name of the scenario.
+            run (Function): Function that performs one operation. It
+                receives the iteration index and returns whether the
+                operation succeeded.
+        """
+        self.name = name
+        self.run = run
+        self.latencies = []
+        self.errors = 0
+        self.calls = {}
+
+
+def percentile(values, percent):
+    """
+    Returns the given percentile of the values (nearest rank).
+
+    Args:
+        values (List): The values.
+        percent (Float): The percentile, 0 to 100.
+
+    Returns:
+        Float: The percentile, `None` if there are no values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(percent / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def create_session(server_url):
+    """
+    Creates a logged in Django session for the fake Remote Manager.
+
+    Args:
+        server_url (String): The URL of the fake Remote Manager.
+
+    Returns:
+        String: The session key.
+    """
+    session = importlib.import_module(settings.SESSION_ENGINE).SessionStore()
+    session["user"] = DeviceCloudUser(server_url, BENCH_USER, BENCH_PASSWORD).to_json()
+    session["devices"] = {}
+    session.create()
+    return session.session_key
+
+
+def ajax_scenario(sessions, name, url, body):
+    """
+    Returns a scenario that posts the given AJAX request.
+
+    Args:
+        sessions (List): The session keys to use in turns.
+        name (String): Name of the scenario.
+        url (String): URL of the view.
+        body (Function): Returns the JSON body for the given iteration.
+
+    Returns:
+        :class:`.Scenario`: The scenario.
+    """
+    def run(iteration):
+        client = Client(raise_request_exception=False)
+        client.cookies[settings.SESSION_COOKIE_NAME] = sessions[iteration % len(sessions)]
+        resp = client.post(url, data=json.dumps(body(iteration)),
+                           content_type=CONTENT_TYPE_JSON, **AJAX_HEADERS)
+        return resp.status_code == 200 and "error" not in json.loads(resp.content or b"{}")
+
+    return Scenario(name, run)
+
+
+def ws_scenario(sessions, name, path, exchange):
+    """
+    Returns a scenario that opens the given web socket and runs an
+    exchange of messages.
+
+    Args:
+        sessions (List): The session keys to use in turns.
+        name (String): Name of the scenario.
+        path (Function): Returns the web socket path for the given iteration.
+        exchange (Coroutine function): Receives the communicator and
+            returns whether the exchange succeeded.
+
+    Returns:
+        :class:`.Scenario`: The scenario.
+    """
+    async def _run(ws_path, session_key):
+        communicator = WebsocketCommunicator(
+            application, ws_path,
+            headers=[(b"cookie", ("%s=%s" % (settings.SESSION_COOKIE_NAME, session_key)).encode())])
+        # The monitor callbacks send from their own threads, which do not
+        # wake up the event loop of the communicator; keep it spinning.
+        ticker = asyncio.ensure_future(_tick())
+        connected, _ = await communicator.connect(timeout=WS_TIMEOUT)
+        try:
+            return connected and await exchange(communicator)
+        finally:
+            await communicator.disconnect(timeout=WS_TIMEOUT)
+            ticker.cancel()
+
+    return Scenario(name, lambda iteration: asyncio.run(
+        _run(path(iteration), sessions[iteration % len(sessions)])))
+
+
+def build_scenarios(sessions, devices):
+    """
+    Returns the benchmark scenarios.
+
+    Args:
+        sessions (List): The session keys to use in turns.
+        devices (List): The IDs of the devices of the account.
+
+    Returns:
+        List: List of :class:`.Scenario`.
+    """
+    def device(iteration):
+        return devices[iteration % len(devices)]
+
+    def with_device(**extra):
+        return lambda iteration: dict(device_id=device(iteration), **extra)
+
+    scenarios = [
+        ajax_scenario(sessions, "get_devices", "/ajax/get_devices", lambda _: {}),
+        ajax_scenario(sessions, "get_devices (search)", "/ajax/get_devices", lambda _: {"search": "device-1"}),
+        ajax_scenario(sessions, "get_device_info", "/ajax/get_device_info", with_device()),
+        ajax_scenario(sessions, "get_device_status", "/ajax/get_device_status", with_device()),
+        ajax_scenario(sessions, "check_device_connection_status",
+                      "/ajax/check_device_connection_status", with_device()),
+        ajax_scenario(sessions, "history_cpu (day)", "/ajax/history_cpu", with_device(interval=24)),
+        ajax_scenario(sessions, "fs_list_directory", "/ajax/fs_list_directory",
+                      with_device(directory="/home")),
+        ajax_scenario(sessions, "get_sample_rate", "/ajax/get_sample_rate", with_device()),
+        ajax_scenario(sessions, "list_repo_files", "/ajax/list_repo_files",
+                      lambda _: {"device_type": DEFAULT_DEVICE_TYPE}),
+        ajax_scenario(sessions, "check_firmware_update_status",
+                      "/ajax/check_firmware_update_status", with_device()),
+        ajax_scenario(sessions, "get_data_usage", "/ajax/get_data_usage", with_device()),
+    ]
+
+    def cli_path(iteration):
+        client = Client(raise_request_exception=False)
+        client.cookies[settings.SESSION_COOKIE_NAME] = sessions[iteration % len(sessions)]
+        resp = client.post("/ajax/cli_init_session", data=json.dumps({"device_id": device(iteration)}),
+                           content_type=CONTENT_TYPE_JSON, **AJAX_HEADERS)
+        return "/ws/cli/%s/%s" % (device(iteration), json.loads(resp.content)["session_id"])
+
+    async def cli_exchange(communicator):
+        # Subscribe, wait for the prompt and measure an echoed command.
+        await communicator.send_to(text_data="subscribe")
+        await _receive_until(communicator, lambda message: message.get("bytes"))
+        await communicator.send_to(text_data=json.dumps({"type": "data", "data": "uname -a\r"}))
+        return await _receive_until(communicator, lambda message: message.get("bytes"))
+
+    async def push_exchange(communicator):
+        await communicator.send_to(text_data="subscribe")
+        return await _receive_until(communicator, lambda message: message.get("text"))
+
+    scenarios += [
+        ws_scenario(sessions, "ws cli (init + prompt + echo)", cli_path, cli_exchange),
+        ws_scenario(sessions, "ws datapoints (first push)",
+                    lambda iteration: "/ws/datapoints/%s" % device(iteration), push_exchange),
+        ws_scenario(sessions, "ws firmware progress (first state)",
+                    lambda iteration: "/ws/firmware_update_progress/%s" % device(iteration),
+                    lambda communicator: _receive_until(communicator, lambda message: message.get("text"))),
+    ]
+    return scenarios
+
+
+async def _tick():
+    """
+    Wakes up the running event loop every millisecond.
+    """
+    while True:
+        await asyncio.sleep(WS_TICK)
+
+
+async def _receive_until(communicator, condition):
+    """
+    Receives web socket messages until one matches the given condition.
+    """
+    deadline = time.monotonic() + WS_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            message = await communicator.receive_output(timeout=deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            return False
+        if message.get("type") == "websocket.close":
+            return False
+        if condition(message):
+            return True
+    return False
+
+
+def run_scenario(server, scenario, iterations, concurrency):
+    """
+    Runs the given scenario and records its latencies and Remote Manager
+    requests.
+
+    Args:
+        server (:class:`.FakeDRMServer`): The fake Remote Manager.
+        scenario (:class:`.Scenario`): The scenario to run.
+        iterations (Integer): Number of operations.
+        concurrency (Integer): Number of concurrent operations.
+    """
+    def timed(iteration):
+        start = time.perf_counter()
+        try:
+            success = scenario.run(iteration)
+        except (Exception, asyncio.CancelledError) as exc:
+            print("%s: %r" % (scenario.name, exc))
+            success = False
+        return time.perf_counter() - start, success
+
+    # Let background work of the previous scenario finish before counting.
+    time.sleep(0.5)
+    server.reset_stats()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for latency, success in executor.map(timed, range(iterations)):
+            scenario.latencies.append(latency)
+            scenario.errors += 0 if success else 1
+    scenario.calls = server.stats()
+
+
+def print_report(scenarios, iterations):
+    """
+    Prints the results of the scenarios.
+
+    Args:
+        scenarios (List): List of :class:`.Scenario`.
+        iterations (Integer): Number of operations of each scenario.
+    """
+    print("%-38s %6s %10s %10s %10s  %s" % ("scenario", "errors", "p50 (ms)", "p99 (ms)", "DRM/call",
+                                            "DRM requests per endpoint"))
+    for scenario in scenarios:
+        total = sum(scenario.calls.values())
+        calls = ", ".join("%s=%d" % item for item in sorted(scenario.calls.items()))
+        print("%-38s %6d %10.1f %10.1f %10.2f  %s" % (
+            scenario.name, scenario.errors, percentile(scenario.latencies, 50) * 1000,
+            percentile(scenario.latencies, 99) * 1000, total / iterations, calls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the ConnectCore web application.")
+    parser.add_argument("--fleet-size", type=int, default=50, help="number of devices")
+    parser.add_argument("--iterations", type=int, default=20, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent operations")
+    parser.add_argument("--latency", action="append", metavar="ENDPOINT=SECONDS[:JITTER]",
+                        help="Remote Manager endpoint latency (repeatable)")
+    parser.add_argument("--failure-rate", action="append", metavar="ENDPOINT=RATE",
+                        help="Remote Manager endpoint failure rate (repeatable)")
+    parser.add_argument("--push-interval", type=float, default=1.0, help="seconds between data point pushes")
+    parser.add_argument("--push-port", type=int, default=PUSH_OPEN_PORT, help="monitors push port")
+    parser.add_argument("--scenario", action="append", help="run only scenarios starting with this name")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    # The SQLite test database does not stand concurrent session updates.
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.cache"
+
+    config = FakeDRMConfig(fleet_size=args.fleet_size, latency=parse_endpoint_values(args.latency),
+                           failure_rate=parse_endpoint_values(args.failure_rate),
+                           push_interval=args.push_interval, seed=0)
+    server = FakeDRMServer(config, push_port=args.push_port)
+    server.start()
+    try:
+        # One session per concurrent operation, as if each were a different user.
+        sessions = [create_session(server.url) for _ in range(args.concurrency)]
+        devices = [device["devConnectwareId"] for device in server.devices]
+        scenarios = build_scenarios(sessions, devices)
+        if args.scenario:
+            scenarios = [scenario for scenario in scenarios
+                         if any(scenario.name.startswith(name) for name in args.scenario)]
+        for scenario in scenarios:
+            run_scenario(server, scenario, args.iterations, args.concurrency)
+        print_report(scenarios, args.iterations)
+    finally:
+        server.stop()
+    # Monitor and poll threads of the application are not daemonic.
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
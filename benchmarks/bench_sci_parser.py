@@ -0,0 +1,183 @@
+# Copyright 2025, Digi International Inc.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""
+Benchmark of the SCI response parser against the regular expressions it
+replaced, on multi-megabyte responses::
+
+    python bench_sci_parser.py --sizes 1,2,4,8 --regex-timeout 10
+
+The regular expressions run in a separate process that is stopped after
+``--regex-timeout`` seconds, since they backtrack quadratically when they
+do not match (for example, when the response is truncated). They also miss
+payloads that span several lines.
+
+Run it with the Python environment of the ConnectCore application.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "connectcore"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "connectcorecommon.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from connectcorecore.drm_requests import TAG_DEVICE_REQUEST, TAG_DO_COMMAND, \
+    parse_sci_response  # noqa: E402
+
+# Constants.
+DEVICE_ID = "00000000-00000000-0004F3FF-FF000000"
+
+MB = 1024 * 1024
+
+# Expressions used before the parser.
+REGEX_DEV_REQUEST_RESPONSE = ".*<device_request .*>(.*)<\\/device_request>.*"
+REGEX_DO_CMD_RESPONSE = ".*<do_command target=[^>]*>(.*)<\\/do_command>.*"
+REGEX_ERROR = ".*<error id=\"(.*)\">(.*)</error>.*"
+
+SCI_DEVICE = "<device id=\"{}\">{}</device>"
+SCI_REPLY = "<sci_reply version=\"1.0\"><{0}>{1}</{0}></sci_reply>"
+
+XBEE_DEVICE = "<device><ext_addr>00:13:A2:00:40:{:06X}!</ext_addr><node_id>ST_{}</node_id>" \
+              "<pan_id>0x1234</pan_id><profile_id>0xC105</profile_id></device>"
+
+
+def device_request_response(size, separator):
+    """
+    Returns a data service response with a JSON payload of the given size.
+    """
+    items = {}
+    length = 0
+    while length < size:
+        items["key_%d" % len(items)] = "v" * 64
+        length += 80
+    payload = json.dumps(items, indent=1 if separator else None)
+    answer = "<requests><device_request target_name=\"device_info\" status=\"0\">%s</device_request></requests>" \
+             % escape(payload)
+    return SCI_REPLY.format("data_service", SCI_DEVICE.format(DEVICE_ID, answer))
+
+
+def do_command_response(size):
+    """
+    Returns a 'do_command' response with the discovery of enough XBee
+    devices to reach the given size.
+    """
+    devices = []
+    length = 0
+    while length < size:
+        devices.append(XBEE_DEVICE.format(len(devices), len(devices)))
+        length += len(devices[-1])
+    answer = "<rci_reply version=\"1.1\"><do_command target=\"zigbee\"><discover>%s</discover>" \
+             "</do_command></rci_reply>" % "".join(devices)
+    return SCI_REPLY.format("send_message", SCI_DEVICE.format(DEVICE_ID, answer))
+
+
+def error_response(size):
+    """
+    Returns a 'send_message' response of many devices where the last one
+    reports an error.
+    """
+    devices = []
+    length = 0
+    while length < size:
+        device_id = "00000000-00000000-0004F3FF-%08X" % len(devices)
+        devices.append(SCI_DEVICE.format(device_id, "<rci_reply version=\"1.1\"><query_setting><system_monitor>"
+                                                    "<sample_rate>10</sample_rate><n_dp_upload>6</n_dp_upload>"
+                                                    "</system_monitor></query_setting></rci_reply>"))
+        length += len(devices[-1])
+    devices.append(SCI_DEVICE.format(DEVICE_ID, "<error id=\"2001\"><desc>Device Not Connected</desc></error>"))
+    return SCI_REPLY.format("send_message", "".join(devices))
+
+
+def run_regex(regex, text):
+    """
+    Searches the given expression in the given text, returning whether it
+    matched.
+    """
+    return re.search(regex, text, re.IGNORECASE) is not None
+
+
+def time_regex(pool, regex, text, timeout):
+    """
+    Returns the time the given expression takes to search the given text,
+    or `None` if it did not finish in time.
+    """
+    start = time.perf_counter()
+    result = pool.apply_async(run_regex, (regex, text))
+    try:
+        result.get(timeout)
+    except multiprocessing.TimeoutError:
+        return None
+    return time.perf_counter() - start
+
+
+def time_parser(text, payload_tag, xml_payload):
+    """
+    Returns the time the parser takes to parse the given text.
+    """
+    start = time.perf_counter()
+    parse_sci_response(text, payload_tag, xml_payload)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the SCI response parser.")
+    parser.add_argument("--sizes", default="1,2,4,8", help="comma separated response sizes in MB")
+    parser.add_argument("--regex-timeout", type=float, default=10, help="seconds to wait for each expression")
+    args = parser.parse_args()
+
+    cases = [
+        ("device_request", lambda size: device_request_response(size, False),
+         REGEX_DEV_REQUEST_RESPONSE, TAG_DEVICE_REQUEST, False),
+        ("device_request (multi-line)", lambda size: device_request_response(size, True),
+         REGEX_DEV_REQUEST_RESPONSE, TAG_DEVICE_REQUEST, False),
+        ("device_request (truncated)", lambda size: device_request_response(size, False)[:-64],
+         REGEX_DEV_REQUEST_RESPONSE, TAG_DEVICE_REQUEST, False),
+        ("do_command", do_command_response, REGEX_DO_CMD_RESPONSE, TAG_DO_COMMAND, True),
+        ("error (multi-device)", error_response, REGEX_ERROR, None, False),
+    ]
+
+    print("%-30s %8s %12s %12s" % ("case", "MB", "regex (s)", "parser (s)"))
+    pool = multiprocessing.Pool(1)
+    try:
+        for name, build, regex, payload_tag, xml_payload in cases:
+            for size in (float(value) for value in args.sizes.split(",")):
+                text = build(int(size * MB))
+                regex_time = time_regex(pool, regex, text, args.regex_timeout)
+                if regex_time is None:
+                    # Replace the process stuck in the expression.
+                    pool.terminate()
+                    pool = multiprocessing.Pool(1)
+                parser_time = time_parser(text, payload_tag, xml_payload)
+                print("%-30s %8.1f %12s %12.3f" % (name, len(text) / MB,
+                                                   "%.3f" % regex_time if regex_time is not None
+                                                   else "> %g" % args.regex_timeout, parser_time))
+    finally:
+        pool.terminate()
+
+
+if __name__ == "__main__":
+    main()
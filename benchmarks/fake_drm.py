@@ -0,0 +1,1226 @@
+# Copyright 2025, Digi International Inc.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""
+Local stand-in for Digi Remote Manager used to benchmark the web
+applications without a live account.
+
+It implements the subset of the Remote Manager API used by the demos:
+DeviceCore, DataStream/DataPoint, SCI (data_service, send_message,
+file_system, cli, reboot), Monitor (including the TCP push protocol),
+Schedule, Job, AlarmStatus and the v1 firmware, files, reports and alerts
+APIs. The fleet size, the latency and the failure rate of each endpoint
+are configurable, and every request is counted per endpoint.
+
+Monitors with a handlebars schema receive the JSON that the schemas of the
+applications render; the schemas themselves are not evaluated.
+
+Only the standard library is used, so the server can be run with the
+Python of any of the applications::
+
+    python fake_drm.py --port 8000 --fleet-size 200 --latency sci=0.5
+
+Then log in to the application using `http://127.0.0.1:8000` as server and
+any user name and password.
+"""
+
+import argparse
+import base64
+import fnmatch
+import json
+import math
+import random
+import re
+import socket
+import struct
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as et
+import zlib
+
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+from xml.sax.saxutils import escape, quoteattr
+
+# Constants.
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_XML = "text/xml"
+
+DEFAULT_DEVICE_TYPE = "ccimx93-dvk"
+DEFAULT_GROUPS = [""]
+DEFAULT_STREAMS = ["system_monitor/%s" % name for name in (
+    "wlan0/state", "wlan0/rx_bytes", "wlan0/tx_bytes",
+    "hci0/state", "hci0/rx_bytes", "hci0/tx_bytes",
+    "eth0/state", "eth0/rx_bytes", "eth0/tx_bytes",
+    "eth1/state", "eth1/rx_bytes", "eth1/tx_bytes",
+    "lo/state", "lo/rx_bytes", "lo/tx_bytes",
+    "uptime", "frequency", "cpu_temperature", "cpu_load",
+    "used_memory", "free_memory")]
+
+DEVICE_ID_FORMAT = "00000000-00000000-0004F3FF-FF%06X"
+
+ENDPOINT_ALL = "*"
+ENDPOINT_CONTROL = "_fake"
+
+ERROR_SIMULATED = "Simulated failure"
+
+FS_DIRS_PER_DIR = 4
+FS_FILES_PER_DIR = 16
+FS_FILE_SIZE = 4096
+FS_MAX_DEPTH = 3
+
+FW_UPDATE_DURATION = 60
+FW_VERSIONS = ["24.6.1.1", "24.9.1.2", "25.3.1.1"]
+
+PUSH_CONNECTION_REQUEST = 0x01
+PUSH_CONNECTION_RESPONSE = 0x02
+PUSH_OPEN_PORT = 3200
+PUSH_PUBLISH_MESSAGE = 0x03
+PUSH_STATUS_OK = 200
+PUSH_STATUS_UNAUTHORIZED = 403
+
+ROLLUP_SECONDS = {"half": 1800, "hour": 3600, "day": 86400, "week": 604800, "month": 2592000}
+
+SCI_ERROR = "<error id=\"2006\"><desc>%s</desc></error>"
+
+STATUS_ACTIVE = "active"
+STATUS_CANCELED = "canceled"
+STATUS_SUCCESSFUL = "successful"
+
+XBEE_NODE = "<device><ext_addr>00:13:A2:00:%02X:%06X!</ext_addr><node_id>ST_%d</node_id></device>"
+XBEE_NODES = 4
+
+
+class FakeDRMConfig:
+    """
+    Configuration of the fake Remote Manager service.
+
+    Latencies and failure rates are indexed by endpoint name: `DeviceCore`,
+    `DataStream`, `DataPoint`, `Monitor`, `Schedule`, `Job`, `AlarmStatus`,
+    `sci/<operation>` (i.e. `sci/cli`) and `v1/<api>` (i.e.
+    `v1/firmware_updates`). A prefix (`sci`, `v1`) applies to all the
+    endpoints below it and `*` to every endpoint.
+    """
+
+    def __init__(self, fleet_size=10, groups=None, device_type=DEFAULT_DEVICE_TYPE,
+                 streams=None, latency=None, failure_rate=None, push_interval=5.0,
+                 datapoint_period=60, fw_update_duration=FW_UPDATE_DURATION, seed=None):
+        """
+        Class constructor. Instantiates a new `FakeDRMConfig` object.
+
+        Args:
+            fleet_size (Integer): Number of devices of the account.
+            groups (List): Group paths the devices are distributed among.
+            device_type (String): Device type of the devices.
+            streams (List): Data streams of each device, relative to the
+                device ID.
+            latency (Dictionary): Latency of each endpoint, in seconds, as a
+                number or as a `(mean, jitter)` tuple.
+            failure_rate (Dictionary): Ratio (0 to 1) of failed requests of
+                each endpoint.
+            push_interval (Float): Seconds between data point pushes to the
+                active monitors, 0 to disable them.
+            datapoint_period (Integer): Seconds between the stored data points
+                of each stream.
+            fw_update_duration (Integer): Seconds a firmware update takes.
+            seed (Integer, optional): Seed of the random generator.
+        """
+        self.fleet_size = fleet_size
+        self.groups = list(groups) if groups else list(DEFAULT_GROUPS)
+        self.device_type = device_type
+        self.streams = list(streams) if streams else list(DEFAULT_STREAMS)
+        self.latency = dict(latency or {})
+        self.failure_rate = dict(failure_rate or {})
+        self.push_interval = push_interval
+        self.datapoint_period = datapoint_period
+        self.fw_update_duration = fw_update_duration
+        self.random = random.Random(seed)
+
+    def get_latency(self, endpoint):
+        """
+        Returns the latency to apply to a request of the given endpoint.
+
+        Args:
+            endpoint (String): The endpoint name.
+
+        Returns:
+            Float: The latency in seconds.
+        """
+        value = _lookup_endpoint(self.latency, endpoint, 0)
+        if isinstance(value, (tuple, list)):
+            mean, jitter = value
+            return max(0.0, self.random.uniform(mean - jitter, mean + jitter))
+        return float(value)
+
+    def should_fail(self, endpoint):
+        """
+        Returns whether a request of the given endpoint must fail.
+
+        Args:
+            endpoint (String): The endpoint name.
+
+        Returns:
+            Boolean: `True` if the request must fail, `False` otherwise.
+        """
+        rate = _lookup_endpoint(self.failure_rate, endpoint, 0)
+        return rate > 0 and self.random.random() < rate
+
+
+class FakeDRMServer:
+    """
+    Fake Remote Manager service: an HTTP server for the web services API and
+    a TCP server for the monitors push protocol.
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0, push_port=PUSH_OPEN_PORT):
+        """
+        Class constructor. Instantiates a new `FakeDRMServer` object.
+
+        Args:
+            config (:class:`.FakeDRMConfig`, optional): The configuration.
+            host (String, optional): Address to listen on.
+            port (Integer, optional): HTTP port, 0 to pick a free one.
+            push_port (Integer, optional): Monitors push port, `None` to
+                disable it. The Device Cloud library always connects to
+                port 3200.
+        """
+        self.config = config or FakeDRMConfig()
+        self._lock = threading.RLock()
+        self._stats = {}
+        self._devices = _build_fleet(self.config)
+        self._devices_by_id = {device["devConnectwareId"]: device for device in self._devices}
+        self._monitors = {}
+        self._next_monitor_id = 1000
+        self._cli_sessions = {}
+        self._fw_updates = {}
+        self._jobs = {}
+        self._block_id = 0
+        self._socket_locks = {}
+        self._stop = threading.Event()
+
+        self._http = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._http.daemon_threads = True
+        self._http.drm = self
+        self._push = None
+        if push_port is not None:
+            self._push = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._push.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._push.bind((host, push_port))
+            self._push.listen(64)
+        self._threads = []
+
+    @property
+    def url(self):
+        """
+        Returns the base URL of the server.
+
+        Returns:
+            String: The base URL.
+        """
+        host, port = self._http.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    @property
+    def devices(self):
+        """
+        Returns the devices of the account.
+
+        Returns:
+            List: The DeviceCore JSON of each device.
+        """
+        return self._devices
+
+    def start(self):
+        """
+        Starts serving in background threads.
+        """
+        targets = [self._http.serve_forever, self._push_datapoints]
+        if self._push is not None:
+            targets.append(self._accept_push_sessions)
+        for target in targets:
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Stops the server and closes all the push sessions.
+        """
+        self._stop.set()
+        self._http.shutdown()
+        self._http.server_close()
+        if self._push is not None:
+            self._push.close()
+        with self._lock:
+            for monitor in self._monitors.values():
+                for sock in monitor["sockets"]:
+                    _close_socket(sock)
+                monitor["sockets"] = []
+
+    def stats(self):
+        """
+        Returns the number of requests received per endpoint.
+
+        Returns:
+            Dictionary: The number of requests indexed by endpoint name.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        """
+        Resets the request counters.
+        """
+        with self._lock:
+            self._stats.clear()
+
+    def set_latency(self, endpoint, latency, jitter=0):
+        """
+        Sets the latency of the given endpoint.
+
+        Args:
+            endpoint (String): The endpoint name or prefix, `*` for all.
+            latency (Float): The mean latency in seconds.
+            jitter (Float, optional): The maximum deviation from the mean.
+        """
+        self.config.latency[endpoint] = (latency, jitter) if jitter else latency
+
+    def set_failure_rate(self, endpoint, rate):
+        """
+        Sets the failure rate of the given endpoint.
+
+        Args:
+            endpoint (String): The endpoint name or prefix, `*` for all.
+            rate (Float): Ratio (0 to 1) of failed requests.
+        """
+        self.config.failure_rate[endpoint] = rate
+
+    def count(self, endpoint):
+        """
+        Counts a request for the given endpoint.
+
+        Args:
+            endpoint (String): The endpoint name.
+        """
+        with self._lock:
+            self._stats[endpoint] = self._stats.get(endpoint, 0) + 1
+
+    def handle(self, method, path, query, body):
+        """
+        Serves a web services request.
+
+        Args:
+            method (String): The HTTP method.
+            path (String): The request path, without the `/ws/` prefix.
+            query (Dictionary): The query parameters.
+            body (Bytes): The request body.
+
+        Returns:
+            Tuple: Status code, content type and body of the response.
+        """
+        parts = [unquote(part) for part in path.split("/") if part]
+        if not parts:
+            return _not_found()
+        if parts[0] == "v1" and len(parts) > 1:
+            handler = getattr(self, "_v1_%s" % parts[1], None)
+            if handler is not None:
+                return handler(method, parts[2:], query, body)
+            return _not_found()
+        if parts[0] == "sci" and method == "POST":
+            return self._sci(body)
+        handler = getattr(self, "_ws_%s" % parts[0].lower(), None)
+        if handler is None:
+            return _not_found()
+        return handler(method, parts[1:], query, body)
+
+    def _ws_devicecore(self, method, parts, query, body):
+        if method == "POST":
+            return _xml("<result><location>DeviceCore/%d</location></result>" % len(self._devices))
+        if method != "GET":
+            return _xml("<result/>")
+        devices = self._devices
+        if parts:
+            devices = [device for device in devices if device["devConnectwareId"] == parts[0]]
+        condition = query.get("condition")
+        if condition:
+            devices = [device for device in devices if _match_condition(device, condition)]
+        orderby = query.get("orderby")
+        if orderby:
+            devices = sorted(devices, key=lambda device: str(device.get(orderby.split()[0], "")),
+                             reverse=orderby.lower().endswith(" desc"))
+        return _json(_page(devices, query))
+
+    def _ws_datastream(self, method, parts, query, body):
+        if method != "GET":
+            return _xml("<result/>")
+        prefix = "/".join(parts)
+        streams = []
+        for device in self._devices:
+            device_id = device["devConnectwareId"]
+            if prefix and not (device_id.startswith(prefix) or prefix.startswith(device_id + "/")):
+                continue
+            for stream in self.config.streams:
+                stream_id = "%s/%s" % (device_id, stream)
+                if prefix and not (stream_id == prefix or stream_id.startswith(prefix.rstrip("/") + "/")
+                                   or device_id.startswith(prefix)):
+                    continue
+                streams.append(self._stream_json(device_id, stream))
+        if not streams and prefix:
+            return _not_found()
+        return _json(_page(streams, query))
+
+    def _ws_datapoint(self, method, parts, query, body):
+        if method != "GET":
+            return _xml("<result/>")
+        stream_id = "/".join(parts)
+        device_id, _, stream = stream_id.partition("/")
+        if device_id not in self._devices_by_id or stream not in self.config.streams:
+            return _not_found()
+
+        now = time.time()
+        period = self.config.datapoint_period
+        rollup = ROLLUP_SECONDS.get(query.get("rollupInterval"))
+        step = rollup or period
+        start = _parse_time(query.get("startTime"), now - 3600)
+        end = _parse_time(query.get("endTime"), now)
+        first = math.ceil(start / step) * step
+        timestamps = []
+        timestamp = first
+        while timestamp <= end:
+            timestamps.append(timestamp)
+            timestamp += step
+        if query.get("order") == "descending":
+            timestamps.reverse()
+
+        offset = int(query.get("pageCursor") or 0)
+        size = int(query.get("size") or 1000)
+        items = []
+        for timestamp in timestamps[offset:offset + size]:
+            item = {
+                "id": "%s-%d" % (stream_id, timestamp),
+                "data": str(_stream_value(stream_id, timestamp)),
+                "timestampISO": _iso(timestamp),
+                "serverTimestampISO": _iso(timestamp),
+                "streamId": stream_id,
+            }
+            if rollup:
+                item["timestamp"] = str(int(timestamp * 1000))
+            items.append(item)
+        answer = {"resultSize": str(len(items)), "requestedSize": str(size), "items": items}
+        if offset + size < len(timestamps):
+            answer["pageCursor"] = str(offset + size)
+        return _json(answer)
+
+    def _ws_monitor(self, method, parts, query, body):
+        if method == "POST":
+            root = et.fromstring(body)
+            with self._lock:
+                monitor_id = self._next_monitor_id
+                self._next_monitor_id += 1
+                self._monitors[monitor_id] = {
+                    "monId": str(monitor_id),
+                    "monTopic": root.findtext("monTopic", ""),
+                    "monTransportType": root.findtext("monTransportType", "tcp"),
+                    "monFormatType": root.findtext("monFormatType", "json"),
+                    "monSchemaData": root.findtext("monSchemaData"),
+                    "monStatus": "INACTIVE",
+                    "sockets": [],
+                }
+            return _xml("<result><location>Monitor/%d</location></result>" % monitor_id, 201)
+        with self._lock:
+            if method == "DELETE":
+                monitor = self._monitors.pop(int(parts[0]), None) if parts else None
+                if monitor is None:
+                    return _not_found()
+                for sock in monitor["sockets"]:
+                    _close_socket(sock)
+                return _xml("<result/>")
+            monitors = [self._monitor_json(monitor) for monitor_id, monitor in sorted(self._monitors.items())
+                        if not parts or str(monitor_id) == parts[0]]
+        if parts and not monitors:
+            return _not_found()
+        return _json(_page(monitors, query))
+
+    def _ws_schedule(self, method, parts, query, body):
+        job_id = self.config.random.randint(1, 100000)
+        if method == "POST":
+            targets = [device.get("id") for device in et.fromstring(body).iter("device")]
+            with self._lock:
+                self._jobs[str(job_id)] = targets
+        return _xml("<result><location>Schedule/%d</location></result>" % job_id)
+
+    def _ws_job(self, method, parts, query, body):
+        # Only the "jobId in (...)" condition is supported. The jobs of
+        # disconnected devices stay in progress.
+        match = re.search(r"jobId in \(([^)]*)\)", query.get("condition") or "")
+        with self._lock:
+            job_ids = [job_id.strip() for job_id in match.group(1).split(",")] if match else list(self._jobs)
+            jobs = [{
+                "jobId": job_id,
+                "jobStatus": "2" if all(self._devices_by_id.get(device_id, {}).get("dpConnectionStatus") == "1"
+                                        for device_id in self._jobs[job_id]) else "1",
+            } for job_id in job_ids if job_id in self._jobs]
+        return _json(_page(jobs, query))
+
+    def _ws_alarmstatus(self, method, parts, query, body):
+        return _xml("<result/>")
+
+    def _sci(self, body):
+        try:
+            root = et.fromstring(body)
+        except et.ParseError:
+            return 400, CONTENT_TYPE_XML, b"<error>Invalid SCI request</error>"
+        operation = root[0]
+        targets = [device.get("id") for device in operation.iter("device")]
+        payload = [child for child in operation if child.tag != "targets"]
+        handler = getattr(self, "_sci_%s" % operation.tag)
+
+        replies = []
+        for device_id in targets:
+            device = self._devices_by_id.get(device_id)
+            if device is None:
+                reply = SCI_ERROR % "Device not found"
+            elif device["dpConnectionStatus"] != "1":
+                reply = SCI_ERROR % "Device not connected"
+            else:
+                reply = handler(device, payload)
+            replies.append("<device id=%s>%s</device>" % (quoteattr(device_id), reply))
+        return _xml("<sci_reply version=\"1.0\"><{0}>{1}</{0}></sci_reply>".format(
+            operation.tag, "".join(replies)))
+
+    def _sci_data_service(self, device, payload):
+        replies = []
+        for request in payload[0].iter("device_request") if payload else []:
+            target = request.get("target_name")
+            replies.append("<device_request target_name=%s status=\"0\">%s</device_request>"
+                           % (quoteattr(target), _device_request_answer(device, target, request.text)))
+        return "<requests>%s</requests>" % "".join(replies)
+
+    def _sci_send_message(self, device, payload):
+        replies = []
+        for request in payload[0] if payload else []:
+            if request.tag == "query_state":
+                replies.append("<query_state>%s</query_state>" % _rci_state(device))
+            elif request.tag == "query_setting" and request.find("remote_manager") is not None:
+                # One in ten devices polls at a different rate.
+                poll_rate = 60 if int(device["devConnectwareId"][-6:], 16) % 10 == 9 else 30
+                replies.append("<query_setting><remote_manager><MO>4</MO><DF>%d</DF>"
+                               "</remote_manager></query_setting>" % poll_rate)
+            elif request.tag == "query_setting":
+                replies.append("<query_setting><system_monitor><sample_rate>30</sample_rate>"
+                               "<n_dp_upload>10</n_dp_upload></system_monitor></query_setting>")
+            elif request.tag == "do_command" and request.get("target") == "zigbee":
+                replies.append("<do_command target=\"zigbee\">%s</do_command>" % _xbee_answer(device, request))
+            elif request.tag == "do_command":
+                replies.append("<do_command target=%s>%s</do_command>"
+                               % (quoteattr(request.get("target", "")), escape(json.dumps({"status": 0}))))
+            else:
+                replies.append("<%s/>" % request.tag)
+        return "<rci_reply version=\"1.1\">%s</rci_reply>" % "".join(replies)
+
+    def _sci_file_system(self, device, payload):
+        replies = []
+        for command in payload[0] if payload else []:
+            path = command.get("path", "/")
+            if command.tag == "ls":
+                replies.append("<ls hash=\"none\">%s</ls>" % _fs_listing(path))
+            elif command.tag == "get_file":
+                offset = int(command.get("offset") or 0)
+                length = int(command.get("length") or FS_FILE_SIZE)
+                data = _fs_content(path, offset, max(0, min(length, FS_FILE_SIZE - offset)))
+                replies.append("<get_file><data>%s</data></get_file>" % base64.b64encode(data).decode())
+            else:
+                replies.append("<%s/>" % command.tag)
+        return "<commands>%s</commands>" % "".join(replies)
+
+    def _sci_cli(self, device, payload):
+        if not payload:
+            return SCI_ERROR % "Invalid CLI request"
+        request = payload[0]
+        device_id = device["devConnectwareId"]
+        session_id = request.get("session_id")
+        if request.tag == "initialize":
+            session_id = uuid.uuid4().hex
+            with self._lock:
+                self._cli_sessions[session_id] = device_id
+            return "<initialize session_id=\"%s\"/>" % session_id
+        with self._lock:
+            known = self._cli_sessions.get(session_id) == device_id
+            if request.tag == "terminate":
+                self._cli_sessions.pop(session_id, None)
+        if not known:
+            return SCI_ERROR % "Invalid session"
+        topic = "CLIEvent/%s/%s" % (device_id, session_id)
+        if request.tag == "start":
+            self._publish(topic, [{"type": "start"}])
+            self._publish(topic, [_cli_data("Welcome to %s\r\n# " % device["dpName"])])
+        elif request.tag == "write":
+            data = base64.b64decode(request.text or "").decode(errors="replace")
+            echo = data.replace("\r", "\r\n# ").replace("\n", "")
+            self._publish(topic, [_cli_data(echo)])
+        elif request.tag == "terminate":
+            self._publish(topic, [{"type": "terminate", "session_id": session_id}])
+        return "<%s/>" % request.tag
+
+    def _sci_reboot(self, device, payload):
+        device_id = device["devConnectwareId"]
+        device["dpConnectionStatus"] = "0"
+        self._publish_device_event(device_id, "disconnected")
+
+        def _reconnect():
+            device["dpConnectionStatus"] = "1"
+            self._publish_device_event(device_id, "connected")
+
+        threading.Timer(1.0, _reconnect).start()
+        return "<reboot/>"
+
+    def _v1_firmware_updates(self, method, parts, query, body):
+        now = time.time()
+        if method == "POST" and parts[:1] == ["inventory"]:
+            request = json.loads(body or b"{}")
+            for device_id in request.get("targets", {}).get("devices", []):
+                with self._lock:
+                    self._fw_updates[device_id] = {"start": now, "canceled": False}
+            return _json({"count": 1, "list": [request]})
+        if method == "POST" and parts[:1] == ["cancel"] and len(parts) > 1:
+            with self._lock:
+                update = self._fw_updates.get(parts[1])
+                if update is None:
+                    return _json({"error_message": "No update in progress"}, 404)
+                update["canceled"] = True
+            return _json({})
+        if parts[:1] == ["inventory"] and len(parts) > 1:
+            return _json(self._fw_update_json(parts[1], now))
+        if parts[:1] == ["inventory"]:
+            entries = [self._fw_update_json(device_id, now)
+                       for device_id in _query_ids(query.get("query", ""))]
+            if not query.get("query"):
+                entries = [self._fw_update_json(device_id, now) for device_id in list(self._fw_updates)]
+            return _json({"count": len(entries), "size": len(entries), "list": entries})
+        if parts[:1] == ["progress"] and len(parts) > 1:
+            entry = self._fw_update_json(parts[1], now)
+            progress = []
+            if entry["status"] == STATUS_ACTIVE:
+                progress.append({"status": entry["progress"], "message": "Updating firmware"})
+            return _json({"id": parts[1], "progress": progress})
+        return _not_found()
+
+    def _v1_firmware(self, method, parts, query, body):
+        if method != "GET":
+            return _json({})
+        device_type = parts[-1] if parts else self.config.device_type
+        files = [{
+            "firmware_version": version,
+            "filename": "dey-image-%s-%s.swu" % (device_type, version),
+            "file_size": 350 * 1024 * 1024,
+            "production": True,
+            "security_related": "none",
+            "information_link": "",
+            "deprecated": False,
+        } for version in FW_VERSIONS]
+        return _json({"count": len(files), "size": len(files), "list": files})
+
+    def _v1_files(self, method, parts, query, body):
+        if method != "GET":
+            return _json({})
+        if len(parts) > 2:
+            return _not_found()
+        file_set = parts[1] if len(parts) > 1 else "fileset"
+        files = [{"name": "%s/image-%d.swu" % (file_set, index), "size": 128 * 1024 * 1024,
+                  "last_modified": _iso(time.time() - index * 86400)} for index in range(5)]
+        return _json({"count": len(files), "size": len(files), "list": files})
+
+    def _v1_reports(self, method, parts, query, body):
+        report = parts[-1] if parts else ""
+        if report == "data_summary":
+            return _json({"count": 1, "list": [{
+                "total_data_usage_mb": round(len(self._devices) * 1.5 + 10, 3),
+                "device_data_usage_mb": round(len(self._devices) * 1.5, 3),
+                "web_service_data_usage_mb": 10.0,
+            }]})
+        if report == "data_details":
+            entries = [{"device_id": device["devConnectwareId"], "usage": 1 + index % 7 * 0.25}
+                       for index, device in enumerate(self._devices)]
+            entries.append({"service_description": "WebService messaging", "usage": 8.0})
+            entries.append({"service_description": "Push Monitoring", "usage": 2.0})
+            return _json({"count": len(entries), "list": entries})
+        return _not_found()
+
+    def _v1_alerts(self, method, parts, query, body):
+        if method == "POST":
+            alert = json.loads(body or b"{}")
+            alert.setdefault("id", self.config.random.randint(1, 100000))
+            return _json({"count": 1, "list": [alert]})
+        if method in ("PUT", "DELETE"):
+            return _json({})
+        return _json({"count": 0, "size": 0, "list": []})
+
+    def _stream_json(self, device_id, stream):
+        stream_id = "%s/%s" % (device_id, stream)
+        timestamp = time.time() // self.config.datapoint_period * self.config.datapoint_period
+        return {
+            "streamId": stream_id,
+            "dataType": _stream_type(stream),
+            "units": "",
+            "currentValue": {
+                "id": "%s-%d" % (stream_id, timestamp),
+                "data": str(_stream_value(stream_id, timestamp)),
+                "timestampISO": _iso(timestamp),
+                "serverTimestampISO": _iso(timestamp),
+            },
+        }
+
+    def _monitor_json(self, monitor):
+        return {key: value for key, value in monitor.items()
+                if key != "sockets" and value is not None}
+
+    def _fw_update_json(self, device_id, now):
+        with self._lock:
+            update = self._fw_updates.get(device_id)
+        if update is None:
+            return {"id": device_id, "status": STATUS_SUCCESSFUL, "message": "No update"}
+        if update["canceled"]:
+            return {"id": device_id, "status": STATUS_CANCELED, "error_message": "Canceled by user"}
+        progress = int(min(100, (now - update["start"]) * 100 / max(1, self.config.fw_update_duration)))
+        if progress >= 100:
+            return {"id": device_id, "status": STATUS_SUCCESSFUL, "message": "Update complete"}
+        return {"id": device_id, "status": STATUS_ACTIVE, "message": "Updating", "progress": progress}
+
+    def _publish_device_event(self, device_id, status):
+        self._publish("devices/%s" % device_id, [{"device_id": device_id, "status": status}])
+
+    def _publish(self, topic, message):
+        with self._lock:
+            sockets = [sock for monitor in self._monitors.values()
+                       if monitor["monTopic"] == topic for sock in monitor["sockets"]]
+        for sock in sockets:
+            self._send_publish(sock, message)
+
+    def _send_publish(self, sock, message):
+        with self._lock:
+            self._block_id = (self._block_id + 1) % 0x10000
+            block_id = self._block_id
+        payload = zlib.compress(json.dumps(message).encode())
+        data = struct.pack("!HHBBL", block_id, 1, 0x01, 0x00, len(payload)) + payload
+        with self._lock:
+            sock_lock = self._socket_locks.setdefault(sock, threading.Lock())
+        try:
+            with sock_lock:
+                sock.sendall(struct.pack("!HI", PUSH_PUBLISH_MESSAGE, len(data)) + data)
+        except OSError:
+            pass
+
+    def _push_datapoints(self):
+        while not self._stop.wait(self.config.push_interval or 1):
+            if not self.config.push_interval:
+                continue
+            with self._lock:
+                monitors = [(monitor["monTopic"], monitor["monSchemaData"], list(monitor["sockets"]))
+                            for monitor in self._monitors.values() if monitor["sockets"]]
+            now = time.time()
+            for topic, schema, sockets in monitors:
+                devices = _datapoint_topic_devices(topic, self._devices)
+                if not devices:
+                    continue
+                for device in devices:
+                    points = [("%s/%s" % (device["devConnectwareId"], stream),
+                               _stream_value("%s/%s" % (device["devConnectwareId"], stream), now))
+                              for stream in self.config.streams]
+                    if schema:
+                        # Output of the data point schemas: the stream without the
+                        # device ID and the first path component.
+                        messages = [[{"stream": stream_id.split("/", 2)[-1], "value": value}
+                                     for stream_id, value in points] + [{"a": 0}]]
+                    else:
+                        messages = [{"Document": {"Msg": {"DataPoint": {
+                            "streamId": stream_id, "data": value, "timestamp": int(now * 1000)}}}}
+                            for stream_id, value in points]
+                    for message in messages:
+                        for sock in sockets:
+                            self._send_publish(sock, message)
+
+    def _accept_push_sessions(self):
+        while not self._stop.is_set():
+            try:
+                sock, _ = self._push.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve_push_session, args=(sock,), daemon=True).start()
+
+    def _serve_push_session(self, sock):
+        try:
+            header = _recv_exact(sock, 6)
+            message_type, length = struct.unpack("!HL", header)
+            payload = _recv_exact(sock, length)
+            if message_type != PUSH_CONNECTION_REQUEST:
+                raise OSError("Unexpected push message type %d" % message_type)
+            username_length = struct.unpack("!H", payload[2:4])[0]
+            password_length = struct.unpack("!H", payload[4 + username_length:6 + username_length])[0]
+            monitor_id = struct.unpack("!L", payload[6 + username_length + password_length:][:4])[0]
+            self.count("Monitor/push")
+            with self._lock:
+                monitor = self._monitors.get(monitor_id)
+                status = PUSH_STATUS_OK if monitor is not None else PUSH_STATUS_UNAUTHORIZED
+            sock.sendall(struct.pack("!HLHH", PUSH_CONNECTION_RESPONSE, 4, status, 0))
+            if monitor is None:
+                raise OSError("Unknown monitor %d" % monitor_id)
+            with self._lock:
+                monitor["sockets"].append(sock)
+                monitor["monStatus"] = "ACTIVE"
+            # Consume the publish acknowledgements until the client disconnects.
+            while sock.recv(4096):
+                pass
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                for monitor in self._monitors.values():
+                    if sock in monitor["sockets"]:
+                        monitor["sockets"].remove(sock)
+                        if not monitor["sockets"]:
+                            monitor["monStatus"] = "INACTIVE"
+                self._socket_locks.pop(sock, None)
+            _close_socket(sock)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler of the fake Remote Manager web services.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._serve("GET")
+
+    def do_POST(self):
+        self._serve("POST")
+
+    def do_PUT(self):
+        self._serve("PUT")
+
+    def do_DELETE(self):
+        self._serve("DELETE")
+
+    def log_message(self, *_args):
+        pass
+
+    def _serve(self, method):
+        drm = self.server.drm
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        if url.path.startswith("/%s/" % ENDPOINT_CONTROL):
+            return self._serve_control(drm, method, url.path)
+
+        if not url.path.startswith("/ws/"):
+            return self._respond(*_not_found())
+        if not self.headers.get("Authorization"):
+            return self._respond(401, CONTENT_TYPE_XML, b"<error>Unauthorized</error>")
+
+        path = url.path[len("/ws/"):]
+        endpoint = _endpoint_name(path, body)
+        drm.count(endpoint)
+        latency = drm.config.get_latency(endpoint)
+        if latency:
+            time.sleep(latency)
+        if drm.config.should_fail(endpoint):
+            if endpoint.startswith("v1/"):
+                return self._respond(500, CONTENT_TYPE_JSON,
+                                     json.dumps({"error_message": ERROR_SIMULATED}).encode())
+            return self._respond(500, CONTENT_TYPE_XML, ("<error>%s</error>" % ERROR_SIMULATED).encode())
+
+        try:
+            self._respond(*drm.handle(method, path, query, body))
+        except Exception as exc:
+            self._respond(500, CONTENT_TYPE_XML, ("<error>%s</error>" % escape(str(exc))).encode())
+
+    def _serve_control(self, drm, method, path):
+        if path == "/%s/stats" % ENDPOINT_CONTROL:
+            return self._respond(200, CONTENT_TYPE_JSON, json.dumps(drm.stats()).encode())
+        if path == "/%s/reset" % ENDPOINT_CONTROL and method == "POST":
+            drm.reset_stats()
+            return self._respond(200, CONTENT_TYPE_JSON, b"{}")
+        return self._respond(*_not_found())
+
+    def _respond(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _lookup_endpoint(values, endpoint, default):
+    """
+    Returns the value configured for the given endpoint, its prefix or all
+    the endpoints.
+    """
+    if endpoint in values:
+        return values[endpoint]
+    prefix = endpoint.split("/")[0]
+    if prefix in values:
+        return values[prefix]
+    return values.get(ENDPOINT_ALL, default)
+
+
+def _endpoint_name(path, body):
+    """
+    Returns the endpoint name used for the statistics of the given request.
+    """
+    parts = [part for part in path.split("/") if part]
+    if not parts:
+        return ""
+    if parts[0] == "v1" and len(parts) > 1:
+        return "v1/%s" % parts[1]
+    if parts[0] == "sci":
+        try:
+            return "sci/%s" % et.fromstring(body)[0].tag
+        except (et.ParseError, IndexError):
+            return "sci"
+    return parts[0]
+
+
+def _build_fleet(config):
+    """
+    Builds the DeviceCore JSON of the devices of the account.
+    """
+    devices = []
+    for index in range(config.fleet_size):
+        group = config.groups[index % len(config.groups)]
+        devices.append({
+            "id": {"devId": str(100000 + index), "devVersion": "0"},
+            "devConnectwareId": DEVICE_ID_FORMAT % index,
+            "devMac": "00:04:F3:%02X:%02X:%02X" % ((index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF),
+            "devRecordStartDate": "2024-01-01T00:00:00.000Z",
+            "cstId": "1000",
+            "grpId": str(2000 + config.groups.index(group)),
+            "grpPath": group,
+            "dpName": "device-%d" % index,
+            "dpDeviceType": config.device_type,
+            "dpConnectionStatus": "1",
+            "dpFirmwareLevelDesc": FW_VERSIONS[index % len(FW_VERSIONS)],
+            "dpLastKnownIp": "192.168.%d.%d" % ((index >> 8) & 0xFF, index & 0xFF),
+            "dpMapLat": "%.6f" % (41.65 + (index % 100) * 0.001),
+            "dpMapLong": "%.6f" % (-0.88 - (index // 100) * 0.001),
+        })
+    return devices
+
+
+def _xbee_answer(device, request):
+    """
+    Returns the answer of the XBee network of the given device to a
+    'zigbee' do_command: the discovery of `XBEE_NODES` stations or the
+    LX/LY location of each station in the 'radio_command' elements.
+    """
+    index = int(device["devConnectwareId"][-6:], 16)
+    answers = []
+    for command in request:
+        if command.tag == "discover":
+            answers.append("<discover>%s</discover>"
+                           % "".join(XBEE_NODE % (node, index, node) for node in range(XBEE_NODES)))
+        elif command.tag == "radio_command" and command.get("id") in ("LX", "LY"):
+            node = int(normalize_address(command.get("addr", ""))[8:10] or "0", 16)
+            if command.get("id") == "LX":
+                value = 41.65 + (index % 100) * 0.001 + node * 0.0001
+            else:
+                value = -0.88 - (index // 100) * 0.001 - node * 0.0001
+            answers.append("<radio_command addr=%s id=%s>%.6f</radio_command>"
+                           % (quoteattr(command.get("addr", "")), quoteattr(command.get("id")), value))
+        else:
+            answers.append("<%s><error>Unsupported command</error></%s>" % (command.tag, command.tag))
+    return "".join(answers)
+
+
+def normalize_address(address):
+    """
+    Returns the given XBee address without separators.
+    """
+    return address.replace(":", "").replace("!", "")
+
+
+def _page(items, query):
+    """
+    Returns the legacy paged JSON answer for the given items.
+    """
+    start = int(query.get("start") or 0)
+    size = int(query.get("size") or 1000)
+    page = items[start:start + size]
+    return {
+        "resultTotalRows": str(len(items)),
+        "requestedStartRow": str(start),
+        "resultSize": str(len(page)),
+        "requestedSize": str(size),
+        "remainingSize": str(max(0, len(items) - start - len(page))),
+        "items": page,
+    }
+
+
+def _match_condition(device, condition):
+    """
+    Returns whether the device matches the given condition. Only the
+    equalities, 'like' and '>' comparisons joined with 'and' are supported,
+    other terms are ignored.
+    """
+    for term in condition.split(" and "):
+        match = re.match(r"\s*\(?\s*(\w+)\s*(=|>| like )\s*'?(.*?)'?\s*\)?\s*$", term)
+        if match is None:
+            continue
+        name, operator, value = match.groups()
+        if name not in device:
+            continue
+        field = str(device[name])
+        if operator == "=" and field != value:
+            return False
+        if operator == ">" and not field > value:
+            return False
+        if operator == " like " and not fnmatch.fnmatchcase(field.lower(), value.lower().replace("%", "*")):
+            return False
+    return True
+
+
+def _query_ids(query):
+    """
+    Returns the device IDs of a v1 "id='a' or id='b'" query.
+    """
+    ids = []
+    for term in query.split(" or "):
+        name, _, value = term.partition("=")
+        if name.strip() == "id":
+            ids.append(value.strip().strip("'"))
+    return ids
+
+
+def _datapoint_topic_devices(topic, devices):
+    """
+    Returns the devices whose data points are delivered to the given topic.
+    """
+    if topic.startswith("DataPoint/"):
+        device_id = topic.split("/")[1]
+        return [device for device in devices if device["devConnectwareId"] == device_id]
+    if topic.startswith("[group=") and topic.endswith("]DataPoint"):
+        group = topic[len("[group="):-len("]DataPoint")]
+        return [device for device in devices if device["grpPath"].strip("/") == group.strip("/")]
+    if topic == "DataPoint":
+        return devices
+    return []
+
+
+def _stream_type(stream):
+    """
+    Returns the data type of the given stream.
+    """
+    return "INTEGER" if stream.endswith(("state", "valve")) else "FLOAT"
+
+
+def _stream_value(stream_id, timestamp):
+    """
+    Returns a deterministic value of the given stream at the given time.
+    """
+    seed = zlib.crc32(stream_id.encode())
+    if _stream_type(stream_id) == "INTEGER":
+        return (seed + int(timestamp) // 600) % 2
+    phase = (seed % 1000) / 1000 * 2 * math.pi
+    return round(50 + 40 * math.sin(timestamp / 3600 + phase), 2)
+
+
+def _device_request_answer(device, target, data):
+    """
+    Returns the answer of the device to a data service device request.
+    """
+    if target == "device_info":
+        index = int(device["id"]["devId"]) - 100000
+        return json.dumps({
+            "uboot_version": "2023.04", "kernel_version": "6.1.55",
+            "dey_version": "4.0-r5", "serial_number": "%010d" % index,
+            "device_type": device["dpDeviceType"], "module_variant": "0x01",
+            "board_variant": "0x02", "board_id": "0x03",
+            "mca_hw_version": "0x1", "mca_fw_version": "1.20",
+            "total_mem": 1024 * 1024, "total_st": 8 * 1024 * 1024, "resolution": "1280x800",
+            "bt-mac": device["devMac"],
+            "wlan0": {"mac": device["devMac"], "ip": device["dpLastKnownIp"]},
+            "eth0": {"mac": device["devMac"], "ip": device["dpLastKnownIp"]},
+        })
+    if target in ("cccsd_get_config", "get_config"):
+        return json.dumps({"system_monitor_sample_rate": 30, "system_monitor_upload_samples_size": 10})
+    return "OK"
+
+
+def _rci_state(device):
+    """
+    Returns the RCI 'query_state' answer of the device.
+    """
+    return ("<device_info><uboot_version>2023.04</uboot_version><kernel_version>6.1.55</kernel_version>"
+            "<dey_version>4.0-r5</dey_version><hardware>SN=%s MACHINE=%s VARIANT=0x01 "
+            "SBC_VARIANT=0x02 BOARD_ID=0x03</hardware><kinetis>HW_VERSION=0x1 FW_VERSION=1.20</kinetis>"
+            "</device_info>" % (device["id"]["devId"], device["dpDeviceType"]))
+
+
+def _fs_listing(path):
+    """
+    Returns the 'ls' answer of the synthetic file system for the given path.
+    """
+    path = "/" + path.strip("/")
+    depth = len([part for part in path.split("/") if part])
+    base = path.rstrip("/")
+    entries = []
+    modified = int(time.time()) // 86400 * 86400
+    if depth < FS_MAX_DEPTH:
+        for index in range(FS_DIRS_PER_DIR):
+            entries.append("<dir path=%s last_modified=\"%d\"/>" % (quoteattr("%s/dir%d" % (base, index)), modified))
+    for index in range(FS_FILES_PER_DIR):
+        entries.append("<file path=%s last_modified=\"%d\" size=\"%d\" hash=\"none\"/>"
+                       % (quoteattr("%s/file%d.txt" % (base, index)), modified, FS_FILE_SIZE))
+    return "".join(entries)
+
+
+def _fs_content(path, offset, length):
+    """
+    Returns a chunk of the content of a synthetic file.
+    """
+    line = ("%s\n" % path).encode()
+    content = line * (FS_FILE_SIZE // len(line) + 1)
+    return content[offset:offset + length]
+
+
+def _cli_data(text):
+    """
+    Returns the CLI monitor event for the given output text.
+    """
+    return {"type": "data", "data": base64.b64encode(text.encode()).decode()}
+
+
+def _parse_time(value, default):
+    """
+    Returns the epoch of the given ISO 8601 value.
+    """
+    if not value:
+        return default
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return default
+
+
+def _iso(timestamp):
+    """
+    Returns the ISO 8601 representation of the given epoch.
+    """
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _json(data, status=200):
+    """
+    Returns a JSON response.
+    """
+    return status, CONTENT_TYPE_JSON, json.dumps(data).encode()
+
+
+def _xml(data, status=200):
+    """
+    Returns an XML response.
+    """
+    return status, CONTENT_TYPE_XML, data.encode()
+
+
+def _not_found():
+    """
+    Returns a 404 response.
+    """
+    return 404, CONTENT_TYPE_JSON, json.dumps({"error_message": "Not found"}).encode()
+
+
+def _recv_exact(sock, length):
+    """
+    Reads exactly the given number of bytes from the socket.
+    """
+    data = b""
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if not chunk:
+            raise OSError("Connection closed")
+        data += chunk
+    return data
+
+
+def _close_socket(sock):
+    """
+    Closes the given socket, unblocking any thread reading from it.
+    """
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    sock.close()
+
+
+def parse_endpoint_values(values, value_type=float):
+    """
+    Parses a list of 'endpoint=value' command line arguments.
+
+    Args:
+        values (List): The arguments, the value can be 'mean:jitter'.
+        value_type (Type, optional): The type of the values.
+
+    Returns:
+        Dictionary: The values indexed by endpoint.
+    """
+    answer = {}
+    for value in values or []:
+        endpoint, _, number = value.rpartition("=")
+        if ":" in number:
+            mean, jitter = number.split(":", 1)
+            answer[endpoint or ENDPOINT_ALL] = (value_type(mean), value_type(jitter))
+        else:
+            answer[endpoint or ENDPOINT_ALL] = value_type(number)
+    return answer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for Digi Remote Manager.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP port")
+    parser.add_argument("--push-port", type=int, default=PUSH_OPEN_PORT, help="monitors push port")
+    parser.add_argument("--fleet-size", type=int, default=10, help="number of devices")
+    parser.add_argument("--group", action="append", dest="groups", help="device group (repeatable)")
+    parser.add_argument("--device-type", default=DEFAULT_DEVICE_TYPE, help="device type")
+    parser.add_argument("--stream", action="append", dest="streams", help="device stream (repeatable)")
+    parser.add_argument("--latency", action="append", metavar="ENDPOINT=SECONDS[:JITTER]",
+                        help="endpoint latency (repeatable)")
+    parser.add_argument("--failure-rate", action="append", metavar="ENDPOINT=RATE",
+                        help="endpoint failure rate (repeatable)")
+    parser.add_argument("--push-interval", type=float, default=5.0, help="seconds between data point pushes")
+    args = parser.parse_args()
+
+    config = FakeDRMConfig(fleet_size=args.fleet_size, groups=args.groups, device_type=args.device_type,
+                           streams=args.streams, latency=parse_endpoint_values(args.latency),
+                           failure_rate=parse_endpoint_values(args.failure_rate),
+                           push_interval=args.push_interval)
+    server = FakeDRMServer(config, host=args.host, port=args.port, push_port=args.push_port)
+    server.start()
+    print("Fake Remote Manager listening on %s (push port %s)" % (server.url, args.push_port))
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -82,6 +82,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'connectcorecore.metrics.DRMMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'connectcorecommon.urls'
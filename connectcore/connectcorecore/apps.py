@@ -16,4 +16,5 @@ from django.apps import AppConfig
 
 
 class ConnectcoreCoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
     name = 'connectcorecore'
@@ -12,6 +12,7 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
+import json
 import time
 
 from asgiref.sync import async_to_sync
@@ -19,6 +20,7 @@ from channels.generic.websocket import WebsocketConsumer
 
 from connectcorecore import drm_requests
 
+ERROR_CLI_NOT_SUBSCRIBED = "ERROR: CLI session not subscribed"
 ERROR_REGISTER_CLI_MONITOR = "ERROR: could not register CLI monitor - %s"
 ERROR_REGISTER_DATAPOINT_MONITOR = "ERROR: could not register data point monitor - %s"
 ERROR_REGISTER_DEVICE_MONITOR = "ERROR: could not register device monitor - %s"
@@ -26,8 +28,14 @@ ERROR_START_CLI_SESSION = "ERROR: could not start CLI session - %s"
 
 GROUP_UPLOAD_PROGRESS = "upload_progress.{}"
 
+CLI_TYPE_DATA = "data"
+
+MESSAGE_SUBSCRIBE = "Subscribe monitor"
+
+ID_DATA = "data"
 ID_ERROR = "error"
 ID_MONITOR_ID = "monitor_id"
+ID_TYPE = "type"
 
 REGISTER_MONITOR_RETRIES = 5
 
@@ -49,6 +57,8 @@ class WsCLIConsumer(WebsocketConsumer):
         self._monitor_id = -1
         self._device_id = -1
         self._session_id = -1
+        self._input = None
+        self._subscribed = False
 
     def connect(self):
         session = self.scope["session"]
@@ -61,7 +71,38 @@ class WsCLIConsumer(WebsocketConsumer):
         self.accept()
 
     def receive(self, text_data=None, bytes_data=None):
-        if self._monitor_id != -1:
+        # Only the first subscribe message starts the subscription.
+        if text_data == MESSAGE_SUBSCRIBE:
+            if not self._subscribed:
+                self._subscribed = True
+                self._subscribe()
+            return
+
+        # Terminal input.
+        try:
+            message = json.loads(text_data) if text_data else None
+        except ValueError:
+            return
+        if not isinstance(message, dict) or message.get(ID_TYPE) != CLI_TYPE_DATA:
+            return
+        if self._input is None:
+            # Return the input so the client sends it through AJAX.
+            self.send(text_data=json.dumps({ID_TYPE: CLI_TYPE_DATA, ID_ERROR: ERROR_CLI_NOT_SUBSCRIBED,
+                                            ID_DATA: message.get(ID_DATA)}))
+            return
+        self._input.write(message.get(ID_DATA))
+
+    def _subscribe(self):
+        """
+        Attaches to the pooled CLI session or subscribes the CLI monitor and
+        starts the CLI session.
+        """
+        # Use the CLI session prepared by the pool, already started and monitored.
+        monitor_id = drm_requests.get_cli_session_pool().attach(self._session_id, self)
+        if monitor_id is not None:
+            self._monitor_id = monitor_id
+            self._input = drm_requests.CLIInputSequencer(self.scope["session"], self._device_id,
+                                                         self._session_id, self)
             return
 
         # Subscribe CLI monitor.
@@ -81,6 +122,8 @@ class WsCLIConsumer(WebsocketConsumer):
             self.send(text_data=TEMPLATE_ERROR % ERROR_REGISTER_CLI_MONITOR % answer[ID_ERROR])
             return
         self._monitor_id = answer[ID_MONITOR_ID]
+        self._input = drm_requests.CLIInputSequencer(self.scope["session"], self._device_id,
+                                                     self._session_id, self)
 
         # Start CLI session.
         try:
@@ -92,6 +135,9 @@ class WsCLIConsumer(WebsocketConsumer):
             self.send(text_data=TEMPLATE_ERROR % (ERROR_START_CLI_SESSION % str(exc)))
 
     def disconnect(self, _code):
+        if self._input is not None:
+            self._input.close()
+            self._input = None
         if self._monitor_id != -1:
             # Unsubscribe CLI monitor.
             drm_requests.remove_cli_monitor(
@@ -174,6 +220,44 @@ class FileUploadProgressConsumer(WebsocketConsumer):
         self.send(text_data=TEMPLATE_PROGRESS % event["data"])
 
 
+class FirmwareUpdateProgressConsumer(WebsocketConsumer):
+    """
+    Class to manage web socket connection for firmware update progress of a device.
+    """
+    def __init__(self):
+        WebsocketConsumer.__init__(self)
+        self._device_id = None
+        self._unique_group_name = ""
+
+    def connect(self):
+        session = self.scope["session"]
+        self._device_id = self.scope["url_route"]["kwargs"]["device_id"]
+
+        if session is None or self._device_id is None:
+            return
+
+        self._unique_group_name = drm_requests.get_firmware_progress_group(drm_requests.get_account_id(session),
+                                                                           self._device_id)
+        async_to_sync(self.channel_layer.group_add)(self._unique_group_name, self.channel_name)
+
+        self.accept()
+
+        # Send the last known state, if any, to the new viewer.
+        state = drm_requests.get_firmware_progress_tracker().subscribe(session, self._device_id)
+        if state is not None:
+            self.send(text_data=json.dumps(state))
+
+    def disconnect(self, _close_code):
+        if not self._unique_group_name:
+            return
+        async_to_sync(self.channel_layer.group_discard)(self._unique_group_name, self.channel_name)
+        drm_requests.get_firmware_progress_tracker().unsubscribe(self.scope["session"], self._device_id)
+        self._unique_group_name = ""
+
+    def firmware_progress(self, event):
+        self.send(text_data=json.dumps(event["data"]))
+
+
 class DeviceConsumer(WebsocketConsumer):
     """
     Class to manage web socket connection for device connections.
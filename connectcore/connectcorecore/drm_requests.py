@@ -12,27 +12,56 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
+import base64
+import hashlib
 import json
 import re
+import tarfile
 import textwrap
+import threading
+import time
+import uuid
 import xml.etree.ElementTree as et
+import zlib
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
 from xml.etree.ElementTree import ParseError
+from xml.parsers import expat
 
 from asgiref.sync import async_to_sync
 
 from channels.layers import get_channel_layer
-from devicecloud import DeviceCloud, DeviceCloudHttpException, DeviceCloudException
+from devicecloud import DeviceCloud, DeviceCloudConnection, DeviceCloudHttpException, DeviceCloudException
+from devicecloud.conditions import Attribute
+from devicecloud.devicecore import Device, dev_connectware_id, group_path
 from devicecloud.monitor import MonitorAPI, TCPDeviceCloudMonitor, MON_TRANSPORT_TYPE_ATTR
 from devicecloud.monitor_tcp import TCPClientManager
 from devicecloud.sci import DeviceTarget
-from devicecloud.file_system_service import ErrorInfo, FileSystemServiceException
+from devicecloud.file_system_service import ErrorInfo, FileSystemServiceException, FileSystemServiceCommandBlock, \
+    LsCommand, PutCommand, DeleteCommand
+from django.db import DatabaseError, close_old_connections
 from django.http import JsonResponse
 
 from login.auth import DeviceCloudUser
 
-from connectcorecore.models import ConnectCoreDevice
+from connectcorecore.metrics import get_drm_metrics
+from connectcorecore.models import ConnectCoreDevice, DeviceHardwareInfo
+
+ATTRIBUTE_CONNECTION_STATUS = Attribute("dpConnectionStatus")
+ATTRIBUTE_DEVICE_TYPE = Attribute("dpDeviceType")
+ATTRIBUTE_NAME = Attribute("dpName")
+
+CLI_INPUT_COALESCE_TIME = 0.02
+CLI_INPUT_MAX_WRITE = 4096
+
+CLI_OUTPUT_COALESCE_TIME = 0.01
+CLI_OUTPUT_MAX_BUFFER = 1024 * 1024
+CLI_OUTPUT_MAX_FRAME = 64 * 1024
+CLI_OUTPUT_TRUNCATED = b"\r\n[... output truncated ...]\r\n"
 
 CLI_TYPE_DATA = "data"
 CLI_TYPE_START = "start"
@@ -44,6 +73,9 @@ CONTENT_TYPE_OCTET_STREAM = "application/octet-stream"
 DATA_POINTS_BUFFER_DURATION = 5
 DATA_POINTS_BUFFER_SIZE = 10
 
+DATA_USAGE_CACHE_TTL = 300
+DATA_USAGE_PAGE_SIZE = 50
+
 DEFAULT_FLASH_SIZE = "0"
 DEFAULT_IP = "0.0.0.0"
 DEFAULT_MEMORY_TOTAL = "0"
@@ -52,6 +84,11 @@ DEFAULT_N_SAMPLES = "6"
 DEFAULT_SAMPLE_RATE = "10"
 DEFAULT_VIDEO_RESOLUTION = "No video device found"
 
+DEVICES_MAX_PAGE_SIZE = 1000
+DEVICES_PAGE_SIZE = 100
+
+DEVICE_INFO_CACHE_TTL = 600
+
 DUMMY_FILE_CONTENT = "Ignore me"
 DUMMY_FILE_NAME = "dummy_file_for_dir_creation"
 
@@ -65,8 +102,15 @@ ERROR_DEVICE_NOT_ANSWER = "Device did not answer. Make sure the application is r
 ERROR_DEVICE_NOT_SUPPORT_RCI = "Device does not support configuration through RCI"
 ERROR_DOWNLOAD_FILE = "Error '%s' downloading file: %s"
 ERROR_DRM_REQUEST = "Error in the DRM request: {}."
+ERROR_FW_ROLLOUT_FAILURE_RATE = "Rollout stopped: failure rate %d%% exceeds the %d%% limit"
+ERROR_FW_ROLLOUT_NO_TARGETS = "There are no devices to update"
+ERROR_FW_ROLLOUT_NOT_FOUND = "Firmware rollout '%s' not found"
+ERROR_FW_ROLLOUT_NO_STATUS = "No update status received in %d seconds"
+ERROR_FS_OPERATIONS = "Error '%s' executing file system operations: %s"
 ERROR_GET_CONFIG = "Error reading configuration: %s"
 ERROR_GET_DATA_USAGE = "Error reading account data usage: %s"
+ERROR_INVALID_CURSOR = "Invalid devices list cursor"
+ERROR_INVALID_HISTORY = "Invalid history request"
 ERROR_LIST_DIR = "Error '%s' listing directory: %s"
 ERROR_LIST_FW_REPO = "Error listing firmware repository files: %s"
 ERROR_LIST_FILESET = "Error listing fileset files: %s"
@@ -83,11 +127,45 @@ ERROR_UNRECOGNIZED_ANSWER = "unrecognized answer"
 ERROR_UPDATE_FW_REQUEST = "Error sending firmware update request: %s"
 ERROR_UPLOAD_FILE = "Error '%s' uploading file: %s"
 
+FS_ARCHIVE_CHUNK_SIZE = 64 * 1024
+FS_ARCHIVE_ERRORS_FILE = "archive_errors.txt"
+FS_ARCHIVE_LIST_BATCH = 16
+FS_ARCHIVE_MAX_DEPTH = 16
+FS_ARCHIVE_WORKERS = 4
+
+FS_COMMANDS = {LsCommand.command_name: LsCommand,
+               PutCommand.command_name: PutCommand,
+               DeleteCommand.command_name: DeleteCommand}
+
+FS_LISTING_CACHE_TTL = 30
+FS_PREFETCH_MAX_DIRS = 8
+FS_PREFETCH_WORKERS = 2
+
+FS_OPERATION_LIST = LsCommand.command_name
+FS_OPERATION_PUT = PutCommand.command_name
+FS_OPERATION_REMOVE = DeleteCommand.command_name
+
 FS_TYPE_DIRECTORY = "dir"
 FS_TYPE_FILE = "file"
 
+FW_PROGRESS_ACTIVE_INTERVAL = 5
+FW_PROGRESS_IDLE_INTERVAL = 30
+
+FW_ROLLOUT_DEVICE_TIMEOUT = 3600
+FW_ROLLOUT_MAX_FAILURE_RATE = 0.2
+FW_ROLLOUT_MAX_IN_FLIGHT = 25
+FW_ROLLOUT_MIN_FINISHED = 5
+FW_ROLLOUT_POLL_INTERVAL = 15
+FW_ROLLOUT_QUERY_BATCH = 50
+FW_ROLLOUT_RETENTION = 24 * 3600
+
+GROUP_FIRMWARE_PROGRESS = "firmware_progress.{}"
 GROUP_UPLOAD_PROGRESS = "upload_progress.{}"
 
+HISTORY_MAX_SERIES = 20
+HISTORY_MAX_WORKERS = 8
+
+ID_ALIGN = "align"
 ID_ANY_LEVEL = ".//"
 ID_BOARD_ID = "board_id"
 ID_BOARD_VARIANT = "board_variant"
@@ -95,7 +173,9 @@ ID_BLUETOOTH_MAC = "bluetooth_mac"
 ID_BT_MAC = "bt-mac"
 ID_CANCEL = "cancel"
 ID_CONTENT_TYPE = "content-type"
+ID_COUNT = "count"
 ID_CURRENT_DIRECTORY = "current_dir"
+ID_CURSOR = "cursor"
 ID_DATA = "data"
 ID_DATA_DETAILS = "data_details"
 ID_DATA_SUMMARY = "data_summary"
@@ -120,8 +200,11 @@ ID_FILES = "files"
 ID_FILE_SIZE = "file_size"
 ID_FLASH_SIZE = "flash_size"
 ID_FW_VERSION = "firmware_version"
+ID_GROUP = "group"
 ID_HARDWARE = "hardware"
+ID_ID = "id"
 ID_INFO = "information_link"
+ID_INFO_UPDATED = "information_updated"
 ID_INITIALIZE = "initialize"
 ID_INTERVAL = "interval"
 ID_INVENTORY = "inventory"
@@ -131,6 +214,8 @@ ID_KINETIS = "kinetis"
 ID_LAST_MODIFIED = "last_modified"
 ID_LIST = "list"
 ID_MAC = "mac"
+ID_MAX_FAILURE_RATE = "max_failure_rate"
+ID_MAX_IN_FLIGHT = "max_in_flight"
 ID_MCA_FW_VERSION = "mca_fw_version"
 ID_MCA_HW_VERSION = "mca_hw_version"
 ID_MEMORY_TOTAL = "memory_total"
@@ -141,22 +226,35 @@ ID_NAME = "name"
 ID_N_DP_UPLOAD = "n_dp_upload"
 ID_N_DP_UPLOAD_CCCSD = "system_monitor_upload_samples_size"
 ID_NUM_SAMPLES_UPLOAD = "num_samples_upload"
+ID_OPERATION = "operation"
+ID_PAGE = "page"
+ID_PAGE_SIZE = "page_size"
 ID_PATH = "path"
 ID_PLAY = "play"
 ID_PRODUCTION = "production"
 ID_PROGRESS = "progress"
+ID_QUERY = "query"
 ID_RESOLUTION = "resolution"
+ID_RESULTS = "results"
+ID_ROLLOUT_ID = "rollout_id"
 ID_SAMPLE_RATE = "sample_rate"
 ID_SAMPLE_RATE_CCCSD = "system_monitor_sample_rate"
+ID_SEARCH = "search"
 ID_SECURITY = "security_related"
 ID_SERIAL_NUMBER = "serial_number"
+ID_SERIES = "series"
 ID_SERVICE_DESCRIPTION = "service_description"
 ID_SESSION_ID = "session_id"
 ID_SIZE = "size"
+ID_SORT = "sort"
+ID_START = "start"
+ID_STATE = "state"
 ID_STATUS = "status"
 ID_STREAM = "stream"
+ID_SUMMARY = "summary"
 ID_TARGETS = "targets"
 ID_TIMESTAMP = "timestamp"
+ID_TIMESTAMPS = "timestamps"
 ID_TOTAL_DATA_USAGE_DEVICES_MB = "device_data_usage_mb"
 ID_TOTAL_DATA_USAGE_MB = "total_data_usage_mb"
 ID_TOTAL_DATA_USAGE_WS_MB = "web_service_data_usage_mb"
@@ -170,6 +268,7 @@ ID_VALID = "valid"
 ID_VALUE = "value"
 ID_VERSION = "version"
 ID_VIDEO_RESOLUTION = "video_resolution"
+ID_WAVE = "wave"
 ID_WIFI_IP = "wifi_ip"
 ID_WIFI_MAC = "wifi_mac"
 
@@ -179,6 +278,7 @@ NUM_ETHERNET_INTERFACES = 2
 
 OPERATION_CLI = "cli"
 OPERATION_DATA_SERVICE = "data_service"
+OPERATION_FILE_SYSTEM = "file_system"
 OPERATION_REBOOT = "reboot"
 OPERATION_SEND_MESSAGE = "send_message"
 
@@ -188,12 +288,20 @@ PROVISION_TYPE_ID = "id"
 PROVISION_TYPE_IMEI = "imei"
 PROVISION_TYPE_MAC = "mac"
 
-REGEX_DEV_REQUEST_RESPONSE = ".*<device_request .*>(.*)<\\/device_request>.*"
-REGEX_DO_CMD_RESPONSE = ".*<do_command target=[^>]*>(.*)<\\/do_command>.*"
+ROLLOUT_STATE_CANCELED = "canceled"
+ROLLOUT_STATE_COMPLETED = "completed"
+ROLLOUT_STATE_RUNNING = "running"
+ROLLOUT_STATE_STOPPED = "stopped"
+
+RCI_DEVICE_STATE_FIELDS = (ID_UBOOT_VERSION, ID_KERNEL_VERSION, ID_DEY_VERSION, ID_HARDWARE, ID_KINETIS)
+
+REGEX_DEVICE_ID = "[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{8}){3}"
 REGEX_INFO_HW = "SN=([0-9a-zA-Z-_:\\/]+) MACHINE=([0-9a-zA-Z-_:\\/]+) VARIANT=([0-9a-zA-Z\\/]+) " \
                 "SBC_VARIANT=([0-9a-zA-Z\\/]+) BOARD_ID=([0-9a-zA-Z\\/]+)"
 REGEX_INFO_KINETIS = "HW_VERSION=([0-9a-zA-Z-_:\\/]+) FW_VERSION=([0-9a-zA-Z-_:\\/]+)"
 REGEX_MONITOR_ERROR = ".*<error>(.*)<\\/error>.*"
+REGEX_SCI_OPERATION = "<sci_request[^>]*>\\s*<(\\w+)"
+REGEX_SCI_TARGET = "<device id=[\"']([^\"']+)[\"']"
 
 REQ_CLI_INITIALIZE = "<initialize/>"
 REQ_CLI_SEND_DATA = "<write session_id='{}' format='base64'>{}</write>"
@@ -281,6 +389,8 @@ SERVICE_MONITOR = "Push Monitoring"
 STATUS_ACTIVE = "active"
 STATUS_CANCELED = "canceled"
 STATUS_FAILED = "failed"
+STATUS_PENDING = "pending"
+STATUS_SUCCESSFUL = "successful"
 
 STREAMS_LIST = ["wlan0/state", "wlan0/rx_bytes", "wlan0/tx_bytes",
                 "hci0/state", "hci0/rx_bytes", "hci0/tx_bytes",
@@ -290,6 +400,13 @@ STREAMS_LIST = ["wlan0/state", "wlan0/rx_bytes", "wlan0/tx_bytes",
                 "uptime", "frequency", "cpu_temperature", "cpu_load",
                 "used_memory", "free_memory"]
 
+TAG_DEVICE = "device"
+TAG_DEVICE_REQUEST = "device_request"
+TAG_DO_COMMAND = "do_command"
+TAG_ERROR = "error"
+TAG_ERROR_DESC = "desc"
+TAG_ERROR_HINT = "hint"
+
 TARGET_DEVICE_INFO = "device_info"
 TARGET_GET_CONFIG = "get_config"
 TARGET_GET_CCCSD_CONFIG = "cccsd_get_config"
@@ -301,6 +418,7 @@ TARGET_SET_LED = "user_led"
 TARGET_SET_VIDEO_BRIGHTNESS = "set_video_brightness"
 
 WS_DATA_USAGE_API = "/ws/v1/reports/usage/{}"
+WS_DEVICECORE = "/ws/DeviceCore"
 WS_FILES_API = "/ws/v1/files/{}"
 WS_FW_REPOSITORY_API = "/ws/v1/firmware/inventory/FE080003/{}"
 WS_FIRMWARE_UPDATES_API = "/ws/v1/firmware_updates/{}"
@@ -308,8 +426,12 @@ WS_MONITOR_API = "/ws/Monitor/{}"
 
 CLI_SESSION_TIMEOUT = 300
 
+CLI_POOL_CHECK_INTERVAL = 30
+CLI_POOL_MAX_IDLE = CLI_SESSION_TIMEOUT - 2 * CLI_POOL_CHECK_INTERVAL
+
 # Variables.
 monitor_managers = {}
+cli_output_streams = {}
 
 
 def is_authenticated(request):
@@ -362,8 +484,60 @@ def get_device_cloud_session(session):
     if user is None:
         return None
     user_serialized = DeviceCloudUser.from_json(json.loads(user))
-    return DeviceCloud(user_serialized.username, user_serialized.password,
-                       base_url=user_serialized.server)
+    return InstrumentedDeviceCloud(user_serialized.username, user_serialized.password,
+                                   base_url=user_serialized.server)
+
+
+def _get_drm_call_tags(url, params, data):
+    """
+    Returns the DRM API and the target device of a DRM request.
+
+    Args:
+        url (String): The URL of the request.
+        params (Dictionary): The query parameters of the request.
+        data (String): The body of the request.
+
+    Returns:
+        Tuple: The DRM API (`DeviceCore`, `sci/<operation>`, `v1/<api>`...)
+            and the ID of the target device, `None` if there is no single
+            target device.
+    """
+    parts = [part for part in urlparse(url).path.split("/") if part]
+    if "ws" in parts:
+        parts = parts[parts.index("ws") + 1:]
+    if not parts:
+        return "/", None
+
+    if parts[0] == "sci" and isinstance(data, str):
+        match = re.search(REGEX_SCI_OPERATION, data)
+        # Only look for targets in the header, before the payload.
+        end = data.find("</targets>")
+        targets = re.findall(REGEX_SCI_TARGET, data[:end]) if end != -1 else []
+        return ("sci/%s" % match.group(1) if match else "sci",
+                targets[0] if len(targets) == 1 else None)
+
+    api = "v1/%s" % parts[1] if parts[0] == "v1" and len(parts) > 1 else parts[0]
+    match = re.search(REGEX_DEVICE_ID, url) or (re.search(REGEX_DEVICE_ID, str(params)) if params else None)
+    return api, match.group(0).upper() if match else None
+
+
+def get_account_id(session):
+    """
+    Returns a string identifying the DRM account of the given session.
+
+    Args:
+         session (:class:`.SessionStore`): The Django session containing the
+            user and server of the DRM account.
+
+    Returns:
+        String: The account identifier, `None` if there is no user in the
+            session.
+    """
+    user = session.get("user")
+    if user is None:
+        return None
+    user_serialized = DeviceCloudUser.from_json(json.loads(user))
+    return "%s@%s" % (user_serialized.username, user_serialized.server)
 
 
 def check_ajax_request(request):
@@ -456,11 +630,8 @@ def send_request(dc_session, device_id, target, data=None):
     if resp.status_code != 200:
         raise DeviceCloudHttpException(resp)
 
-    re_search = re.search(REGEX_DEV_REQUEST_RESPONSE, resp.text, re.IGNORECASE)
-    if re_search:
-        return re_search.group(1)
-
-    return None
+    answer = _get_single_device_response(parse_sci_response(resp.text, TAG_DEVICE_REQUEST))
+    return answer.payload if answer is not None else None
 
 
 def send_do_command(dc_session, device_id, target, data=None):
@@ -490,51 +661,228 @@ def send_do_command(dc_session, device_id, target, data=None):
     if resp.status_code != 200:
         raise DeviceCloudHttpException(resp)
 
-    re_search = re.search(REGEX_DO_CMD_RESPONSE, resp.text, re.IGNORECASE)
-    if re_search:
-        return re_search.group(1)
+    answer = _get_single_device_response(parse_sci_response(resp.text, TAG_DO_COMMAND, xml_payload=True))
+    return answer.payload if answer is not None else None
 
-    return None
+
+def parse_sci_response(text, payload_tag=None, xml_payload=False):
+    """
+    Parses an SCI response in a single pass, extracting the payload and the
+    error of each device.
+
+    Args:
+        text (String): The SCI response.
+        payload_tag (String, optional): The tag of the element whose content
+            is the payload of each device (`device_request`, `do_command`...).
+        xml_payload (Boolean, optional): `True` to return the payload as the
+            XML of the children of the payload element, `False` to return
+            its text.
+
+    Returns:
+        Dictionary: The :class:`.SCIDeviceResponse` of each device ID. Errors
+            reported outside any device are stored with the `None` key.
+    """
+    return SCIResponseParser(payload_tag, xml_payload).parse(text)
+
+
+def _get_single_device_response(responses):
+    """
+    Returns the response of the only device targeted by an SCI request or,
+    if there is none or the request failed as a whole, the response outside
+    any device.
+    """
+    response = responses.get(None)
+    if response is not None and response.error is not None:
+        return response
+    for device_id, device_response in responses.items():
+        if device_id is not None:
+            return device_response
+    return response
 
 
-def get_cc_devices(request):
+def get_cc_devices(request, cursor=None, search=None, group=None, page_size=DEVICES_PAGE_SIZE):
     """
-    Returns a list containing the ConnectCore devices of the DRM account.
+    Returns a page of the ConnectCore devices of the DRM account, the online
+    devices first, each ordered by name.
+
+    The type, group and name filters are evaluated by DeviceCore, so only
+    the devices of the page are transferred. DeviceCore sorts by a single
+    field, so the online and the offline devices are read with a query each.
 
     Args:
          request (:class:`.WSGIRequest`): The request used to generate the
             Device Cloud instance.
+         cursor (String, optional): The cursor returned with the previous
+            page. It keeps the filters of the first page, so the other
+            filters are ignored when it is given.
+         search (String, optional): Text the name of the devices must contain.
+         group (String, optional): Group path the devices must belong to.
+         page_size (Integer, optional): Maximum number of devices of the page.
 
     Returns:
-        :class:`.HttpResponse`: An HTTP response with the list of the
-            ConnectCore devices within the DRM account in JSON format.
+        Dictionary: Dictionary with the ConnectCore devices of the page, the
+            total number of devices matching the filters and the cursor of
+            the next page, `None` if this is the last one.
+
+    Raises:
+        ValueError: If the cursor is not valid.
     """
+    if cursor:
+        query = _decode_devices_cursor(cursor)
+    else:
+        query = {ID_START: 0, ID_SEARCH: search or None, ID_GROUP: group or None}
+    page_size = max(1, min(int(page_size), DEVICES_MAX_PAGE_SIZE))
+
+    dc_session = get_device_cloud(request)
+    condition = _get_cc_devices_condition(query[ID_SEARCH], query[ID_GROUP])
     cc_devices = []
+    count = 0
+    for status_condition in (ATTRIBUTE_CONNECTION_STATUS > 0, ATTRIBUTE_CONNECTION_STATUS == 0):
+        # Rows of this query before the start of the page.
+        start = max(0, query[ID_START] - count)
+        size = page_size - len(cc_devices)
+        params = {
+            "embed": "true",
+            "condition": (condition & status_condition).compile(),
+            "orderby": ATTRIBUTE_NAME.name,
+            "start": start,
+            # The page is full, read a single device to get the total.
+            "size": size if size > 0 else 1,
+        }
+        resp = dc_session.get_connection().get_json(WS_DEVICECORE, params=params)
+        total = int(resp.get("resultTotalRows", start + len(resp.get("items", []))))
+        if size > 0 and start < total:
+            page = [_build_cc_device(Device(dc_session.get_connection(), dc_session.sci, device_json))
+                    for device_json in resp.get("items", [])]
+            # DeviceCore does not define the order of the devices with the same name.
+            page.sort(key=_cc_device_sort_key)
+            cc_devices.extend(page)
+        count += total
+
+    next_cursor = None
+    if query[ID_START] + len(cc_devices) < count:
+        next_cursor = _encode_devices_cursor(dict(query, **{ID_START: query[ID_START] + len(cc_devices)}))
+
+    return {
+        ID_DEVICES: cc_devices,
+        ID_COUNT: count,
+        ID_CURSOR: next_cursor,
+    }
+
+
+def get_cc_device(request, device_id):
+    """
+    Returns the ConnectCore device with the given ID.
+
+    Args:
+         request (:class:`.WSGIRequest`): The request used to generate the
+            Device Cloud instance.
+         device_id (String): The ID of the device.
+
+    Returns:
+        :class:`.ConnectCoreDevice`: The ConnectCore device, `None` if it does
+            not exist in the DRM account or it is not a ConnectCore device.
+    """
     dc_session = get_device_cloud(request)
-    devices = list(dc_session.devicecore.get_devices())
-    for device in devices:
-        # Get the type of the device and verify it is a ConnectCore device.
-        if (device.get_device_type() == ""
-                or not device.get_device_type().startswith(PREFIX_VALID_DEVICE)):
-            continue
+    condition = _get_cc_devices_condition() & (dev_connectware_id == device_id)
+    for device in dc_session.devicecore.get_devices(condition):
+        return _build_cc_device(device)
+    return None
+
+
+def _get_cc_devices_condition(search=None, group=None):
+    """
+    Returns the DeviceCore condition matching the ConnectCore devices.
+
+    Args:
+        search (String, optional): Text the name of the devices must contain.
+        group (String, optional): Group path the devices must belong to.
+
+    Returns:
+        :class:`.Expression`: The DeviceCore condition.
+    """
+    if PREFIX_VALID_DEVICE:
+        condition = ATTRIBUTE_DEVICE_TYPE.like("%s%%" % PREFIX_VALID_DEVICE)
+    else:
+        # Any device with a type.
+        condition = ATTRIBUTE_DEVICE_TYPE > ""
+    if group:
+        condition = condition & (group_path == group.strip("/"))
+    if search:
+        # Conditions do not escape their values, match the wildcards literally.
+        search = search.replace("'", "").replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        condition = condition & ATTRIBUTE_NAME.like("%%%s%%" % search)
+    return condition
+
+
+def _build_cc_device(device):
+    """
+    Returns the ConnectCore device of the given DeviceCore device.
+
+    Args:
+        device (:class:`.Device`): The DeviceCore device.
+
+    Returns:
+        :class:`.ConnectCoreDevice`: The ConnectCore device.
+    """
+    device_json = device.get_device_json()
+    cc_device = ConnectCoreDevice(device.get_connectware_id(), device.get_device_type(),
+                                  device_json.get(ID_DPNAME, ""))
+    # Set the online property to the device.
+    cc_device.is_online = device.is_connected()
+    # If the location of the device is valid, set it to the device.
+    lat, lon = device.get_latlon()
+    if lat is not None and lon is not None:
+        cc_device.location = (lat, lon)
+    return cc_device
+
+
+def _cc_device_sort_key(cc_device):
+    """
+    Returns the key to sort the ConnectCore devices by name, type and ID.
+
+    Args:
+        cc_device (:class:`.ConnectCoreDevice`): The ConnectCore device.
+
+    Returns:
+        Tuple: The sort key.
+    """
+    return cc_device.name, cc_device.type, cc_device.id
+
+
+def _encode_devices_cursor(query):
+    """
+    Returns the opaque cursor of the given devices query.
+
+    Args:
+        query (Dictionary): The start row and the filters of the query.
+
+    Returns:
+        String: The cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(query).encode()).decode()
+
+
+def _decode_devices_cursor(cursor):
+    """
+    Returns the devices query of the given cursor.
 
-        cc_device = ConnectCoreDevice(device.get_connectware_id(), device.get_device_type(),
-                                      device.get_device_json()[ID_DPNAME] if ID_DPNAME in device.get_device_json()
-                                      else "")
-        cc_devices.append(cc_device)
-        # Set the online property to the farm.
-        cc_device.is_online = device.is_connected()
-        # If the location of the device is valid, set it to the farm.
-        lat, lon = device.get_latlon()
-        if lat is not None and lon is not None:
-            cc_device.location = (lat, lon)
+    Args:
+        cursor (String): The cursor.
 
-    # Sort list.
-    cc_devices.sort(key=lambda element: element.type)
-    cc_devices.sort(key=lambda element: element.name)
-    cc_devices.sort(key=lambda element: element.is_online, reverse=True)
+    Returns:
+        Dictionary: The start row and the filters of the query.
 
-    return cc_devices
+    Raises:
+        ValueError: If the cursor is not valid.
+    """
+    try:
+        query = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if isinstance(query[ID_START], int) and query[ID_START] >= 0:
+            return {ID_START: query[ID_START], ID_SEARCH: query.get(ID_SEARCH), ID_GROUP: query.get(ID_GROUP)}
+    except (ValueError, TypeError, KeyError):
+        pass
+    raise ValueError(ERROR_INVALID_CURSOR)
 
 
 def provision_device(request, provision_value, provision_type):
@@ -698,12 +1046,81 @@ def get_data_points(request, stream_name):
 
     dc_session = get_device_cloud(request)
     data = json.loads(request.body.decode(request.encoding))
-    device_id = data[ID_DEVICE_ID]
-    interval = data[ID_INTERVAL]
-    if interval is None:
-        interval = 1
-    else:
-        interval = int(data[ID_INTERVAL])
+
+    return {ID_DATA: _read_data_points(dc_session, data[ID_DEVICE_ID], stream_name, data[ID_INTERVAL])}
+
+
+def get_history(request, series, align=False):
+    """
+    Reads the data points of several data streams concurrently.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+        series (List): the series to read, dictionaries with the device ID,
+            the stream name and the interval in hours.
+        align (Boolean, optional): `True` to return the values of all the
+            series for the same list of timestamps, `None` where a series
+            has no value.
+
+    Returns:
+        Dictionary: the data points or the error of each series, in the
+            order of the given list, and the list of timestamps if they are
+            aligned.
+    """
+    dc_session = get_device_cloud(request)
+
+    with ThreadPoolExecutor(max_workers=min(len(series), HISTORY_MAX_WORKERS),
+                            thread_name_prefix="history") as executor:
+        futures = [executor.submit(copy_context().run, _read_history_series, dc_session, spec)
+                   for spec in series]
+        results = [future.result() for future in futures]
+
+    if not align:
+        return {ID_SERIES: results}
+
+    timestamps = sorted({point[ID_TIMESTAMP] for result in results for point in result.get(ID_DATA, [])})
+    for result in results:
+        if ID_DATA in result:
+            values = {point[ID_TIMESTAMP]: point[ID_DATA] for point in result[ID_DATA]}
+            result[ID_DATA] = [values.get(timestamp) for timestamp in timestamps]
+    return {ID_TIMESTAMPS: timestamps, ID_SERIES: results}
+
+
+def _read_history_series(dc_session, spec):
+    """
+    Reads a series of a history request.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        spec (Dictionary): The device ID, stream name and interval of the
+            series.
+
+    Returns:
+        Dictionary: The data points of the series or the error.
+    """
+    try:
+        return {ID_DATA: _read_data_points(dc_session, spec[ID_DEVICE_ID], spec[ID_STREAM],
+                                           spec.get(ID_INTERVAL))}
+    except DeviceCloudHttpException as exc:
+        return {ID_ERROR: ERROR_DRM_REQUEST.format(exc.response.text)}
+    except Exception as exc:
+        return {ID_ERROR: str(exc)}
+
+
+def _read_data_points(dc_session, device_id, stream_name, interval):
+    """
+    Reads the data points of the given data stream.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The ID of the device.
+        stream_name (String): The data stream name.
+        interval (Integer): The number of hours to read, `None` for one.
+
+    Returns:
+        List: The timestamp and value of each data point.
+    """
+    interval = 1 if interval is None else int(interval)
 
     stream_id = "{}/{}".format(device_id, stream_name)
 
@@ -732,7 +1149,7 @@ def get_data_points(request, stream_name):
             ID_DATA: (d_point.get_data() / 1024) if "memory" in stream_name else d_point.get_data()
         })
 
-    return {ID_DATA: datapoints}
+    return datapoints
 
 
 def query_rci_device_state(request, device_id):
@@ -744,11 +1161,24 @@ def query_rci_device_state(request, device_id):
             Device Cloud instance.
         device_id (String): The device ID of the ConnectCore DRM device.
 
+    Return:
+        Dictionary: Dictionary containing the device information.
+    """
+    return _query_rci_device_state(get_device_cloud(request), device_id)
+
+
+def _query_rci_device_state(dc_session, device_id):
+    """
+    Obtains the state information of the device using RCI.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The device ID of the ConnectCore DRM device.
+
     Return:
         Dictionary: Dictionary containing the device information.
     """
     info = {}
-    dc_session = get_device_cloud(request)
 
     resp = dc_session.sci.send_sci(OPERATION_SEND_MESSAGE,
                                    DeviceTarget(device_id),
@@ -762,33 +1192,25 @@ def query_rci_device_state(request, device_id):
         raise DeviceCloudHttpException(resp)
 
     try:
-        root = et.fromstring(resp.content)
-        errors = root.findall("%s%s" % (ID_ANY_LEVEL, ID_ERROR))
-        if errors:
-            desc_element = errors[0].findall("%s%s" % (ID_ANY_LEVEL, ID_DESC))
-            info[ID_ERROR] = desc_element[0].text if desc_element else ERROR_TIMEOUT
+        elements, error = _find_rci_elements(resp.content, RCI_DEVICE_STATE_FIELDS)
+        if error is not None:
+            info[ID_ERROR] = error
             return info
-        uboot_version = root.findall("%s%s" % (ID_ANY_LEVEL, ID_UBOOT_VERSION))
-        if uboot_version:
-            info[ID_UBOOT_VERSION] = uboot_version[0].text
-        kernel_version = root.findall("%s%s" % (ID_ANY_LEVEL, ID_KERNEL_VERSION))
-        if kernel_version:
-            info[ID_KERNEL_VERSION] = kernel_version[0].text
-        dey_version = root.findall("%s%s" % (ID_ANY_LEVEL, ID_DEY_VERSION))
-        if dey_version:
-            info[ID_DEY_VERSION] = dey_version[0].text
-        hardware = root.findall("%s%s" % (ID_ANY_LEVEL, ID_HARDWARE))
-        if hardware:
-            re_search = re.search(REGEX_INFO_HW, hardware[0].text, re.IGNORECASE)
+        for field in (ID_UBOOT_VERSION, ID_KERNEL_VERSION, ID_DEY_VERSION):
+            if field in elements:
+                info[field] = elements[field].text
+        hardware = elements.get(ID_HARDWARE)
+        if hardware is not None:
+            re_search = re.search(REGEX_INFO_HW, hardware.text, re.IGNORECASE)
             if re_search and len(re_search.groups()) >= 5:
                 info[ID_SERIAL_NUMBER] = re_search.group(1)
                 info[ID_DEVICE_TYPE] = re_search.group(2)
                 info[ID_MODULE_VARIANT] = re_search.group(3)
                 info[ID_BOARD_VARIANT] = re_search.group(4)
                 info[ID_BOARD_ID] = re_search.group(5)
-        kinetis = root.findall("%s%s" % (ID_ANY_LEVEL, ID_KINETIS))
-        if kinetis:
-            re_search = re.search(REGEX_INFO_KINETIS, kinetis[0].text, re.IGNORECASE)
+        kinetis = elements.get(ID_KINETIS)
+        if kinetis is not None:
+            re_search = re.search(REGEX_INFO_KINETIS, kinetis.text, re.IGNORECASE)
             if re_search and len(re_search.groups()) >= 2:
                 info[ID_MCA_HW_VERSION] = re_search.group(1)
                 info[ID_MCA_FW_VERSION] = re_search.group(2)
@@ -798,10 +1220,47 @@ def query_rci_device_state(request, device_id):
     return info
 
 
+def _find_rci_elements(content, tags=()):
+    """
+    Returns the first element with each of the given tags in the given RCI
+    response and the description of its first error, walking the tree once.
+
+    Args:
+        content (Bytes): The RCI response.
+        tags (Tuple, optional): The tags of the elements to find.
+
+    Returns:
+        Tuple: A dictionary with the first element found for each tag and the
+            description of the first error, `None` if there is no error.
+
+    Raises:
+        ParseError: If the response is not valid XML.
+    """
+    elements = {}
+    error = None
+    for element in et.fromstring(content).iter():
+        if element.tag == ID_ERROR:
+            if error is None:
+                error = element
+        elif element.tag in tags and element.tag not in elements:
+            elements[element.tag] = element
+
+    if error is None:
+        return elements, None
+    # Errors are small, look for the description only in their subtree.
+    desc = error.find("%s%s" % (ID_ANY_LEVEL, ID_DESC))
+    return elements, desc.text if desc is not None else ERROR_TIMEOUT
+
+
 def get_device_information(request, device_id):
     """
     Obtains the information of the device.
 
+    The information that only changes with a firmware update is served from
+    the device information cache, so the device is only asked for it when it
+    is not cached, it is invalid or the firmware version changed. The sample
+    rate is read from the device when it is connected.
+
     Args:
         request (:class:`.WSGIRequest`): The request used to generate the
             Device Cloud instance.
@@ -810,8 +1269,80 @@ def get_device_information(request, device_id):
     Return:
         Dictionary: Dictionary containing the device information.
     """
-    info = {}
     dc_session = get_device_cloud(request)
+    account = get_account_id(request.session)
+    cache = get_device_info_cache()
+
+    # Get firmware version and connection status.
+    device = _get_devicecore_device(dc_session, device_id)
+    fw_version = device.get_firmware_level_description() if device is not None else "-"
+    connected = device is not None and device.is_connected()
+
+    entry = cache.get(account, device_id, fw_version)
+    if entry is None:
+        info = _read_device_information(dc_session, device_id)
+        if ID_ERROR in info:
+            return info
+        cache.store(account, device_id, info, fw_version)
+    else:
+        info, updated = entry
+        if datetime.now(timezone.utc) - updated > timedelta(seconds=cache.ttl):
+            cache.refresh(account, dc_session, device_id)
+        info[ID_INFO_UPDATED] = updated.isoformat()
+    info[ID_FW_VERSION] = fw_version
+
+    # Do not wait for a disconnected device, use the last known settings.
+    if entry is not None and not connected and ID_SAMPLE_RATE in info:
+        return info
+
+    # Send request to retrieve device information from system monitor settings.
+    try:
+        resp = get_system_monitor_settings(request, device_id)
+        error = resp.get(ID_ERROR)
+    except DeviceCloudHttpException as exc:
+        resp = {}
+        error = exc.response.text
+    if error:
+        if ID_SAMPLE_RATE not in info:
+            info[ID_ERROR] = error
+        return info
+
+    settings = {ID_SAMPLE_RATE: resp[ID_SAMPLE_RATE], ID_NUM_SAMPLES_UPLOAD: resp[ID_NUM_SAMPLES_UPLOAD]}
+    if any(info.get(key) != value for key, value in settings.items()):
+        info.update(settings)
+        cache.update(account, device_id, settings)
+
+    return info
+
+
+def _get_devicecore_device(dc_session, device_id):
+    """
+    Returns the DeviceCore entry of the device with the given ID.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The device ID of the DRM device.
+
+    Returns:
+        :class:`.Device`: The DeviceCore device, `None` if it does not exist.
+    """
+    for device in dc_session.devicecore.get_devices(dev_connectware_id == device_id):
+        return device
+    return None
+
+
+def _read_device_information(dc_session, device_id):
+    """
+    Reads the hardware and software information of the device.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The device ID of the ConnectCore DRM device.
+
+    Return:
+        Dictionary: Dictionary containing the device information.
+    """
+    info = {}
 
     try:
         resp = send_request(dc_session, device_id, TARGET_DEVICE_INFO, data="")
@@ -819,6 +1350,8 @@ def get_device_information(request, device_id):
             info[ID_ERROR] = ERROR_DEVICE_NOT_ANSWER
             return info
         if "CCAPI Error" in resp:
+            # The device could not read its information, do not trust the cached one.
+            get_device_info_cache().invalidate(device_id)
             info[ID_ERROR] = resp
             return info
         information = json.loads(resp)
@@ -875,17 +1408,9 @@ def get_device_information(request, device_id):
         info[ID_ERROR] = exc.response.text
         return info
 
-    # Get firmware version
-    info[ID_FW_VERSION] = "-"
-    devices = list(dc_session.devicecore.get_devices())
-    for device in devices:
-        if device.get_connectware_id() != device_id:
-            continue
-        info[ID_FW_VERSION] = device.get_firmware_level_description()
-
     # Check if we have all the required information.
     if not info.get(ID_UBOOT_VERSION, None):
-        information = query_rci_device_state(request, device_id)
+        information = _query_rci_device_state(dc_session, device_id)
         error = information.get(ID_ERROR, None)
         if error:
             if ERROR_DEVICE_NOT_SUPPORT_RCI in error:
@@ -902,18 +1427,6 @@ def get_device_information(request, device_id):
         info[ID_MCA_HW_VERSION] = information.get(ID_MCA_HW_VERSION, None)
         info[ID_MCA_FW_VERSION] = information.get(ID_MCA_FW_VERSION, None)
 
-    # Send request to retrieve device information from system monitor settings.
-    try:
-        resp = get_system_monitor_settings(request, device_id)
-        if ID_ERROR in resp:
-            info[ID_ERROR] = resp[ID_ERROR]
-            return info
-        info[ID_SAMPLE_RATE] = resp[ID_SAMPLE_RATE]
-        info[ID_NUM_SAMPLES_UPLOAD] = resp[ID_NUM_SAMPLES_UPLOAD]
-    except DeviceCloudHttpException as exc:
-        info[ID_ERROR] = exc.response.text
-        return info
-
     return info
 
 
@@ -954,11 +1467,25 @@ def initialize_cli_session(request, device_id):
         device_id (String): The ID of the ConnectCore device to initialize
             the CLI session with.
 
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    return _initialize_cli_session(get_device_cloud(request), device_id)
+
+
+def _initialize_cli_session(dc_session, device_id):
+    """
+    Initializes a CLI session with the given device ID.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The ID of the ConnectCore device to initialize
+            the CLI session with.
+
     Returns:
         Dictionary: Dictionary containing the answer.
     """
     answer = {}
-    dc_session = get_device_cloud(request)
 
     resp = dc_session.sci.send_sci(OPERATION_CLI,
                                    DeviceTarget(device_id),
@@ -969,16 +1496,13 @@ def initialize_cli_session(request, device_id):
         raise DeviceCloudHttpException(resp)
 
     try:
-        root = et.fromstring(resp.content)
-        errors = root.findall("%s%s" % (ID_ANY_LEVEL, ID_ERROR))
-        if errors:
-            desc_element = errors[0].findall("%s%s" % (ID_ANY_LEVEL, ID_DESC))
-            answer[ID_ERROR] = desc_element[0].text if desc_element else ERROR_TIMEOUT
+        elements, error = _find_rci_elements(resp.content, (ID_INITIALIZE,))
+        if error is not None:
+            answer[ID_ERROR] = error
             return answer
-        initialize_element = root.findall("%s%s" % (ID_ANY_LEVEL, ID_INITIALIZE))
-        if initialize_element is not None and initialize_element[0] is not None \
-                and initialize_element[0].attrib[ID_SESSION_ID] is not None:
-            answer[ID_SESSION_ID] = initialize_element[0].attrib[ID_SESSION_ID]
+        initialize_element = elements.get(ID_INITIALIZE)
+        if initialize_element is not None and initialize_element.get(ID_SESSION_ID) is not None:
+            answer[ID_SESSION_ID] = initialize_element.get(ID_SESSION_ID)
         else:
             answer[ID_ERROR] = ERROR_NO_SESSION_ID
     except ParseError:
@@ -1014,11 +1538,9 @@ def start_cli_session(session, device_id, session_id):
         raise DeviceCloudHttpException(resp)
 
     try:
-        root = et.fromstring(resp.content)
-        errors = root.findall("%s%s" % (ID_ANY_LEVEL, ID_ERROR))
-        if errors:
-            desc_element = errors[0].findall("%s%s" % (ID_ANY_LEVEL, ID_DESC))
-            answer[ID_ERROR] = desc_element[0].text if desc_element else ERROR_TIMEOUT
+        _, error = _find_rci_elements(resp.content)
+        if error is not None:
+            answer[ID_ERROR] = error
             return answer
     except ParseError:
         answer[ID_ERROR] = ERROR_PARSING
@@ -1037,11 +1559,26 @@ def stop_cli_session(request, device_id, session_id):
             the CLI session with.
         session_id (String): The ID of CLI session to stop.
 
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    return _stop_cli_session(get_device_cloud(request), device_id, session_id)
+
+
+def _stop_cli_session(dc_session, device_id, session_id):
+    """
+    Stops a CLI session with the given ID for the given device ID.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The ID of the ConnectCore device to stop
+            the CLI session with.
+        session_id (String): The ID of CLI session to stop.
+
     Returns:
         Dictionary: Dictionary containing the answer.
     """
     answer = {}
-    dc_session = get_device_cloud(request)
 
     resp = dc_session.sci.send_sci(OPERATION_CLI,
                                    DeviceTarget(device_id),
@@ -1052,11 +1589,9 @@ def stop_cli_session(request, device_id, session_id):
         raise DeviceCloudHttpException(resp)
 
     try:
-        root = et.fromstring(resp.content)
-        errors = root.findall("%s%s" % (ID_ANY_LEVEL, ID_ERROR))
-        if errors:
-            desc_element = errors[0].findall("%s%s" % (ID_ANY_LEVEL, ID_DESC))
-            answer[ID_ERROR] = desc_element[0].text if desc_element else ERROR_TIMEOUT
+        _, error = _find_rci_elements(resp.content)
+        if error is not None:
+            answer[ID_ERROR] = error
             return answer
     except ParseError:
         answer[ID_ERROR] = ERROR_PARSING
@@ -1079,23 +1614,37 @@ def send_cli_data(request, device_id, session_id, data):
     Returns:
         Dictionary: Dictionary containing the answer.
     """
-    answer = {}
-    dc_session = get_device_cloud(request)
+    return _send_cli_data(get_device_cloud(request), device_id, session_id, data)
 
-    resp = dc_session.sci.send_sci(OPERATION_CLI,
-                                   DeviceTarget(device_id),
-                                   REQ_CLI_SEND_DATA.format(session_id, data),
-                                   wait_for_reconnect=False,
-                                   sync_timeout=5)
-    if resp.status_code != 200:
-        raise DeviceCloudHttpException(resp)
 
-    try:
-        root = et.fromstring(resp.content)
-        errors = root.findall("%s%s" % (ID_ANY_LEVEL, ID_ERROR))
-        if errors:
-            desc_element = errors[0].findall("%s%s" % (ID_ANY_LEVEL, ID_DESC))
-            answer[ID_ERROR] = desc_element[0].text if desc_element else ERROR_TIMEOUT
+def _send_cli_data(dc_session, device_id, session_id, data):
+    """
+    Sends CLI data to the given device ID using the given CLI session ID.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The ID of the ConnectCore device to send
+            CLI data to.
+        session_id (String): The ID of CLI session.
+        data (String): Base64 encoded data to send.
+
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    answer = {}
+
+    resp = dc_session.sci.send_sci(OPERATION_CLI,
+                                   DeviceTarget(device_id),
+                                   REQ_CLI_SEND_DATA.format(session_id, data),
+                                   wait_for_reconnect=False,
+                                   sync_timeout=5)
+    if resp.status_code != 200:
+        raise DeviceCloudHttpException(resp)
+
+    try:
+        _, error = _find_rci_elements(resp.content)
+        if error is not None:
+            answer[ID_ERROR] = error
             return answer
     except ParseError:
         answer[ID_ERROR] = ERROR_PARSING
@@ -1112,7 +1661,8 @@ def register_cli_monitor(session, device_id, session_id, consumer):
         session (:class:`.SessionStore`): The Django session.
         device_id (String): ID of the device to subscribe the CLI session to.
         session_id (String): ID of CLI session.
-        consumer (:class:`.WsConsumer`): The web socket consumer.
+        consumer (:class:`.WsConsumer`): The web socket consumer, `None` to
+            hold the CLI output until a consumer is attached.
 
     Returns:
         Dictionary: Dictionary containing the answer.
@@ -1137,19 +1687,25 @@ def register_cli_monitor(session, device_id, session_id, consumer):
     try:
         monitor = monitor_manager.create_tcp_monitor_with_schema([topic], SCHEMA_MONITOR_CLI)
 
+        # Get or create the output stream that delivers the CLI data to the consumer.
+        if session_id in cli_output_streams:
+            output_stream = cli_output_streams.get(session_id)
+        else:
+            output_stream = CLIOutputStream(consumer)
+            cli_output_streams[session_id] = output_stream
+
         def monitor_callback(json_data):
             for cli_event in json_data:
                 payload = {ID_TYPE: cli_event[ID_TYPE]}
                 if cli_event[ID_TYPE] == CLI_TYPE_START:
-                    consumer.send(text_data=json.dumps(payload))
+                    output_stream.send_event(payload)
                 elif cli_event[ID_TYPE] == CLI_TYPE_DATA:
-                    payload[ID_DATA] = cli_event[ID_DATA]
-                    consumer.send(text_data=json.dumps(payload))
+                    output_stream.write(base64.b64decode(cli_event[ID_DATA]))
                 elif cli_event[ID_TYPE] == CLI_TYPE_TERMINATE:
-                    remove_cli_monitor(session, cli_event[ID_SESSION_ID], monitor.get_id())
                     if ID_ERROR in cli_event:
                         payload[ID_ERROR] = cli_event[ID_ERROR]
-                    consumer.send(text_data=json.dumps(payload))
+                    output_stream.send_event(payload)
+                    remove_cli_monitor(session, cli_event[ID_SESSION_ID], monitor.get_id())
             return True
 
         monitor.add_callback(monitor_callback)
@@ -1180,6 +1736,10 @@ def remove_cli_monitor(session, session_id, monitor_id):
 
     global monitor_managers
 
+    output_stream = cli_output_streams.pop(session_id, None)
+    if output_stream is not None:
+        output_stream.close()
+
     if session_id not in monitor_managers:
         return
     monitor_manager = monitor_managers.pop(session_id)
@@ -1196,6 +1756,10 @@ def list_directory(request, device_id, directory):
     """
     Lists the contents of the given directory for the given device ID.
 
+    Listings are served from the directory listing cache while they are
+    fresh. Once a listing is read from the device, its child directories are
+    prefetched in the background.
+
     Args:
         request (:class:`.WSGIRequest`): The request used to generate the
             Device Cloud instance.
@@ -1206,45 +1770,82 @@ def list_directory(request, device_id, directory):
     Returns:
         Dictionary: Dictionary containing the answer.
     """
-    answer = {}
+    listing_cache = get_directory_listing_cache()
+    account_id = get_account_id(request.session)
+
+    answer = listing_cache.get(account_id, device_id, directory)
+    if answer is not None:
+        return answer
+
     dc_session = get_device_cloud(request)
+    answer = _read_directory(dc_session, device_id, directory)
+    if ID_ERROR not in answer:
+        listing_cache.put(account_id, device_id, directory, answer)
+        listing_cache.prefetch(dc_session, account_id, device_id, answer)
+
+    return answer
+
+
+def _read_directory(dc_session, device_id, directory):
+    """
+    Reads the contents of the given directory from the device.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): the Device Cloud instance.
+        device_id (String): The ID of the ConnectCore device to list the
+            directory contents from.
+        directory (String): The directory to list its contents.
 
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
     try:
         resp = dc_session.file_system_service.list_files(DeviceTarget(device_id), directory)
         for _, dev_data in resp.items():
-            if isinstance(dev_data, ErrorInfo):
-                if dev_data.message is not None:
-                    answer[ID_ERROR] = ERROR_LIST_DIR % (dev_data.errno, dev_data.message)
-                else:
-                    answer[ID_ERROR] = ERROR_LIST_DIR % dev_data.errno
-                break
-            # It's of type LsInfo
-            answer[ID_CURRENT_DIRECTORY] = directory
-            answer[ID_FILES] = []
-            # Look at all the directories
-            for dinfo in dev_data.directories:
-                directory = {ID_TYPE: FS_TYPE_DIRECTORY,
-                             ID_NAME: dinfo.path,
-                             ID_LAST_MODIFIED: dinfo.last_modified}
-                answer[ID_FILES].append(directory)
-            # Look at all the files
-            for finfo in dev_data.files:
-                file = {ID_TYPE: FS_TYPE_FILE,
-                        ID_NAME: finfo.path,
-                        ID_SIZE: finfo.size,
-                        ID_LAST_MODIFIED: finfo.last_modified}
-                answer[ID_FILES].append(file)
-
-        def sort_name(entry):
-            return entry[ID_NAME]
-
-        def sort_type(entry):
-            return entry[ID_TYPE]
-
-        answer[ID_FILES].sort(key=sort_name)
-        answer[ID_FILES].sort(key=sort_type)
+            return _build_directory_answer(directory, dev_data)
     except FileSystemServiceException:
-        answer[ID_ERROR] = ERROR_LIST_DIR % (ERROR_UNKNOWN, ERROR_UNRECOGNIZED_ANSWER)
+        pass
+
+    return {ID_ERROR: ERROR_LIST_DIR % (ERROR_UNKNOWN, ERROR_UNRECOGNIZED_ANSWER)}
+
+
+def _build_directory_answer(directory, dev_data):
+    """
+    Builds the list directory answer from the given 'ls' result.
+
+    Args:
+        directory (String): The listed directory.
+        dev_data (:class:`.LsInfo` or :class:`.ErrorInfo`): The 'ls' result.
+
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    answer = {}
+
+    if isinstance(dev_data, ErrorInfo):
+        if dev_data.message is not None:
+            answer[ID_ERROR] = ERROR_LIST_DIR % (dev_data.errno, dev_data.message)
+        else:
+            answer[ID_ERROR] = ERROR_LIST_DIR % dev_data.errno
+        return answer
+
+    # It's of type LsInfo
+    answer[ID_CURRENT_DIRECTORY] = directory
+    answer[ID_FILES] = []
+    # Look at all the directories
+    for dinfo in dev_data.directories:
+        answer[ID_FILES].append({ID_TYPE: FS_TYPE_DIRECTORY,
+                                 ID_NAME: dinfo.path,
+                                 ID_LAST_MODIFIED: dinfo.last_modified})
+    # Look at all the files
+    for finfo in dev_data.files:
+        answer[ID_FILES].append({ID_TYPE: FS_TYPE_FILE,
+                                 ID_NAME: finfo.path,
+                                 ID_SIZE: finfo.size,
+                                 ID_LAST_MODIFIED: finfo.last_modified})
+
+    # Directories first ('dir' < 'file'), then by name.
+    answer[ID_FILES].sort(key=lambda entry: (entry[ID_TYPE], entry[ID_NAME]))
 
     return answer
 
@@ -1279,6 +1880,9 @@ def remove_file(request, device_id, path, _is_file):
     except FileSystemServiceException:
         answer[ID_ERROR] = ERROR_REMOVE_FILE % (ERROR_UNKNOWN, ERROR_UNRECOGNIZED_ANSWER)
 
+    get_directory_listing_cache().invalidate(get_account_id(request.session), device_id,
+                                             path, recursive=True)
+
     return answer
 
 
@@ -1314,6 +1918,8 @@ def upload_file(request, device_id, path, content):
     except FileSystemServiceException:
         answer[ID_ERROR] = ERROR_UPLOAD_FILE % (ERROR_UNKNOWN, ERROR_UNRECOGNIZED_ANSWER)
 
+    get_directory_listing_cache().invalidate(get_account_id(request.session), device_id, path)
+
     return answer
 
 
@@ -1365,21 +1971,374 @@ def create_dir(request, device_id, path):
     Returns:
         Dictionary: Dictionary containing the answer.
     """
-    # Create a dummy file in the given path.
+    # Create a dummy file in the given path and remove it in the same request.
     dummy_file_path = "%s/%s" % (path, DUMMY_FILE_NAME)
-    answer = upload_file(request, device_id, dummy_file_path,
-                         DUMMY_FILE_CONTENT.encode(encoding='ascii'))
-    if ID_ERROR in answer:
-        answer[ID_ERROR] = ERROR_CREATE_DIRECTORY
-        return answer
-    # Remove the dummy file.
-    answer = remove_file(request, device_id, dummy_file_path, True)
-    if ID_ERROR in answer:
-        answer[ID_ERROR] = ERROR_CREATE_DIRECTORY
+    answer = execute_file_operations(request, device_id, [
+        {ID_OPERATION: FS_OPERATION_PUT, ID_PATH: dummy_file_path,
+         ID_DATA: DUMMY_FILE_CONTENT.encode(encoding='ascii')},
+        {ID_OPERATION: FS_OPERATION_REMOVE, ID_PATH: dummy_file_path}
+    ])
+    if ID_ERROR in answer or any(ID_ERROR in result for result in answer[ID_RESULTS]):
+        return {ID_ERROR: ERROR_CREATE_DIRECTORY}
+
+    # The dummy file operations only invalidate the new directory itself.
+    get_directory_listing_cache().invalidate(get_account_id(request.session), device_id, path)
+
+    return {}
+
+
+def execute_file_operations(request, device_id, operations):
+    """
+    Executes the given file system operations in the given device ID using a
+    single request.
+
+    Args:
+        request (:class:`.WSGIRequest`): The request used to generate the
+            Device Cloud instance.
+        device_id (String): The ID of the ConnectCore device to execute the
+            operations in.
+        operations (List): List of dictionaries with the 'operation' ('ls',
+            'put_file' or 'rm') and the 'path' of each operation. 'put_file'
+            operations also contain the file 'data' (six.binary_type).
+
+    Returns:
+        Dictionary: Dictionary containing the answer, with the list of
+            'results' in the same order as the operations.
+    """
+    dc_session = get_device_cloud(request)
+    listing_cache = get_directory_listing_cache()
+    account_id = get_account_id(request.session)
+
+    commands = []
+    for operation in operations:
+        if operation[ID_OPERATION] == FS_OPERATION_LIST:
+            commands.append(LsCommand(operation[ID_PATH]))
+        elif operation[ID_OPERATION] == FS_OPERATION_PUT:
+            commands.append(PutCommand(operation[ID_PATH], file_data=operation[ID_DATA],
+                                       truncate=True))
+        elif operation[ID_OPERATION] == FS_OPERATION_REMOVE:
+            commands.append(DeleteCommand(operation[ID_PATH]))
+        else:
+            return {ID_ERROR: ERROR_FS_OPERATIONS % (ERROR_UNKNOWN, operation[ID_OPERATION])}
+
+    try:
+        results = _send_file_system_commands(dc_session, device_id, commands)
+    except DeviceCloudHttpException as exc:
+        return {ID_ERROR: ERROR_FS_OPERATIONS % (exc.response.status_code, exc.response.text)}
+    if isinstance(results, ErrorInfo):
+        return {ID_ERROR: _format_error_info(ERROR_FS_OPERATIONS, results)}
+
+    answer = {ID_RESULTS: []}
+    for operation, result in zip(operations, results):
+        path = operation[ID_PATH]
+        if operation[ID_OPERATION] == FS_OPERATION_LIST:
+            result = _build_directory_answer(path, result)
+            if ID_ERROR not in result:
+                listing_cache.put(account_id, device_id, path, dict(result))
+        else:
+            listing_cache.invalidate(account_id, device_id, path,
+                                     recursive=operation[ID_OPERATION] == FS_OPERATION_REMOVE)
+            if isinstance(result, ErrorInfo):
+                result = {ID_ERROR: _format_error_info(
+                    ERROR_UPLOAD_FILE if operation[ID_OPERATION] == FS_OPERATION_PUT
+                    else ERROR_REMOVE_FILE, result)}
+            else:
+                result = {}
+        result[ID_OPERATION] = operation[ID_OPERATION]
+        result[ID_PATH] = path
+        answer[ID_RESULTS].append(result)
 
     return answer
 
 
+def _send_file_system_commands(dc_session, device_id, commands):
+    """
+    Sends the given file system commands to the given device ID in a single
+    SCI request.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): the Device Cloud instance.
+        device_id (String): The ID of the ConnectCore device to send the
+            commands to.
+        commands (List): List of :class:`.FileSystemServiceCommandABC`.
+
+    Returns:
+        List: The parsed result of each command, in the same order, or an
+            :class:`.ErrorInfo` if the whole request failed.
+
+    Raises:
+        DeviceCloudHttpException: if there is any error sending the request.
+    """
+    command_block = FileSystemServiceCommandBlock()
+    for command in commands:
+        command_block.add_command(command)
+
+    resp = dc_session.sci.send_sci(OPERATION_FILE_SYSTEM, DeviceTarget(device_id),
+                                   command_block.get_command_string())
+    if resp.status_code != 200:
+        raise DeviceCloudHttpException(resp)
+
+    try:
+        root = et.fromstring(resp.content)
+    except ParseError:
+        return ErrorInfo(0, ERROR_PARSING)
+
+    device = root.find("./%s/device" % OPERATION_FILE_SYSTEM)
+    if device is None:
+        return ErrorInfo(0, ERROR_UNRECOGNIZED_ANSWER)
+    error = device.find("./%s" % ID_ERROR)
+    if error is not None:
+        desc = error.find("./%s" % ID_DESC)
+        return ErrorInfo(error.get("id", 0), error.text or (desc.text if desc is not None else None))
+
+    results = []
+    commands_element = device.find("./commands")
+    for response in (commands_element if commands_element is not None else []):
+        command_class = FS_COMMANDS.get(response.tag.lower())
+        if command_class is not None:
+            results.append(command_class.parse_response(
+                response, device_id=device_id, fssapi=dc_session.file_system_service))
+    if len(results) != len(commands):
+        return ErrorInfo(0, ERROR_UNRECOGNIZED_ANSWER)
+
+    return results
+
+
+def _format_error_info(error_format, error_info):
+    """
+    Formats the given file system error with the given error format.
+
+    Args:
+        error_format (String): The error format, with the error number and
+            message placeholders.
+        error_info (:class:`.ErrorInfo`): The file system error.
+
+    Returns:
+        String: The formatted error.
+    """
+    return error_format % (error_info.errno,
+                           error_info.message if error_info.message is not None else ERROR_UNKNOWN)
+
+
+def download_directory_archive(request, device_id, directory, compress=False):
+    """
+    Returns an iterator that generates a tar archive with the contents of the
+    given directory for the given device ID.
+
+    The directory tree is listed one level at a time and the files are read
+    in chunks by several workers, so the archive is generated while the
+    contents are still arriving. Only a bounded number of chunks are kept in
+    memory at the same time.
+
+    Args:
+        request (:class:`.WSGIRequest`): The request used to generate the
+            Device Cloud instance.
+        device_id (String): The ID of the ConnectCore device to download the
+            directory from.
+        directory (String): The directory to download.
+        compress (Boolean, optional): `True` to compress the archive with gzip.
+
+    Returns:
+        Iterator: Iterator generating the archive bytes.
+    """
+    dc_session = get_device_cloud(request)
+    archive = _iter_tar_archive(dc_session, device_id, directory)
+    if not compress:
+        return archive
+    return _iter_gzip(archive)
+
+
+def _walk_directory(dc_session, device_id, directory, errors):
+    """
+    Yields the entries of the given directory tree, one level at a time.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): the Device Cloud instance.
+        device_id (String): The ID of the ConnectCore device.
+        directory (String): The root directory to walk.
+        errors (List): List to append the listing errors to.
+
+    Yields:
+        Dictionary: Each directory or file entry, as in the list directory
+            answer.
+    """
+    level = [DirectoryListingCache.normalize_path(directory)]
+    for _ in range(FS_ARCHIVE_MAX_DEPTH + 1):
+        next_level = []
+        for index in range(0, len(level), FS_ARCHIVE_LIST_BATCH):
+            batch = level[index:index + FS_ARCHIVE_LIST_BATCH]
+            try:
+                results = _send_file_system_commands(
+                    dc_session, device_id, [LsCommand(path) for path in batch])
+            except DeviceCloudHttpException as exc:
+                results = ErrorInfo(exc.response.status_code, exc.response.text)
+            if isinstance(results, ErrorInfo):
+                errors.append(_format_error_info(ERROR_LIST_DIR, results))
+                continue
+            for path, result in zip(batch, results):
+                answer = _build_directory_answer(path, result)
+                if ID_ERROR in answer:
+                    errors.append("%s: %s" % (path, answer[ID_ERROR]))
+                    continue
+                for entry in answer[ID_FILES]:
+                    if entry[ID_NAME].rstrip("/").split("/")[-1] in (".", ".."):
+                        continue
+                    if entry[ID_TYPE] == FS_TYPE_DIRECTORY:
+                        next_level.append(entry[ID_NAME])
+                    yield entry
+        if not next_level:
+            return
+        level = next_level
+    errors.append("Maximum depth reached, deeper directories were not included")
+
+
+def _read_file_chunk(dc_session, device_id, path, offset, length):
+    """
+    Reads a chunk of the given file from the device.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): the Device Cloud instance.
+        device_id (String): The ID of the ConnectCore device.
+        path (String): The file path.
+        offset (Integer): The offset to read from.
+        length (Integer): The number of bytes to read.
+
+    Returns:
+        The read bytes or an error string.
+    """
+    try:
+        resp = dc_session.file_system_service.get_file(DeviceTarget(device_id), path,
+                                                       offset=offset, length=length)
+        for _, dev_data in resp.items():
+            if isinstance(dev_data, ErrorInfo):
+                return "%s: %s" % (path, _format_error_info(ERROR_DOWNLOAD_FILE, dev_data))
+            return dev_data
+    except DeviceCloudHttpException as exc:
+        return "%s: %s" % (path, ERROR_DOWNLOAD_FILE % (exc.response.status_code, exc.response.text))
+    except FileSystemServiceException:
+        pass
+    return "%s: %s" % (path, ERROR_DOWNLOAD_FILE % (ERROR_UNKNOWN, ERROR_UNRECOGNIZED_ANSWER))
+
+
+def _iter_tar_archive(dc_session, device_id, directory):
+    """
+    Generates a tar archive with the contents of the given directory.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): the Device Cloud instance.
+        device_id (String): The ID of the ConnectCore device.
+        directory (String): The directory to archive.
+
+    Yields:
+        Bytes: The archive contents.
+    """
+    directory = DirectoryListingCache.normalize_path(directory)
+    # Entries are stored relative to the parent of the archived directory.
+    base_len = len(DirectoryListingCache.parent_path(directory).rstrip("/")) + 1
+    errors = []
+
+    def chunks():
+        # Splits every file in chunk read requests, in archive order.
+        for entry in _walk_directory(dc_session, device_id, directory, errors):
+            size = entry.get(ID_SIZE, 0)
+            if entry[ID_TYPE] == FS_TYPE_DIRECTORY or size == 0:
+                yield entry, 0, 0
+                continue
+            for offset in range(0, size, FS_ARCHIVE_CHUNK_SIZE):
+                yield entry, offset, min(FS_ARCHIVE_CHUNK_SIZE, size - offset)
+
+    executor = ThreadPoolExecutor(max_workers=FS_ARCHIVE_WORKERS, thread_name_prefix="fs_archive")
+    window = deque()
+    pending = chunks()
+    try:
+        if directory[base_len:]:
+            yield _tar_header(directory[base_len:], FS_TYPE_DIRECTORY, 0, None)
+        while True:
+            # Keep the workers busy without holding more than a bounded
+            # number of chunks in memory.
+            while len(window) < FS_ARCHIVE_WORKERS * 2:
+                item = next(pending, None)
+                if item is None:
+                    break
+                entry, offset, length = item
+                future = (executor.submit(_read_file_chunk, dc_session, device_id,
+                                          entry[ID_NAME], offset, length) if length else None)
+                window.append((entry, offset, length, future))
+            if not window:
+                break
+
+            entry, offset, length, future = window.popleft()
+            if offset == 0:
+                yield _tar_header(entry[ID_NAME][base_len:], entry[ID_TYPE],
+                                  entry.get(ID_SIZE, 0), entry[ID_LAST_MODIFIED])
+            if not length:
+                continue
+            data = future.result()
+            if isinstance(data, str):
+                errors.append(data)
+                data = b""
+            # The header size is already sent, so adjust the data to it.
+            yield data[:length].ljust(length, tarfile.NUL)
+            if offset + length == entry[ID_SIZE] and entry[ID_SIZE] % tarfile.BLOCKSIZE:
+                yield tarfile.NUL * (tarfile.BLOCKSIZE - entry[ID_SIZE] % tarfile.BLOCKSIZE)
+
+        if errors:
+            data = "\n".join(errors).encode("utf-8")
+            yield _tar_header(FS_ARCHIVE_ERRORS_FILE, FS_TYPE_FILE, len(data), int(time.time()))
+            yield data
+            if len(data) % tarfile.BLOCKSIZE:
+                yield tarfile.NUL * (tarfile.BLOCKSIZE - len(data) % tarfile.BLOCKSIZE)
+        yield tarfile.NUL * (tarfile.BLOCKSIZE * 2)
+    finally:
+        for _, _, _, future in window:
+            if future is not None:
+                future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _tar_header(name, entry_type, size, last_modified):
+    """
+    Returns the tar header block(s) of the given entry.
+
+    Args:
+        name (String): The entry name inside the archive.
+        entry_type (String): The entry type ('dir' or 'file').
+        size (Integer): The file size.
+        last_modified (Integer): The last modification time, in seconds
+            since the epoch.
+
+    Returns:
+        Bytes: The tar header.
+    """
+    info = tarfile.TarInfo(name.lstrip("/"))
+    info.mtime = last_modified if last_modified else int(time.time())
+    if entry_type == FS_TYPE_DIRECTORY:
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755
+    else:
+        info.size = size
+        info.mode = 0o644
+    return info.tobuf(tarfile.GNU_FORMAT, "utf-8", "surrogateescape")
+
+
+def _iter_gzip(chunks):
+    """
+    Compresses the given chunks with gzip as they are generated.
+
+    Args:
+        chunks (Iterator): Iterator generating the bytes to compress.
+
+    Yields:
+        Bytes: The compressed bytes.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
 def reboot_remote_device(request, device_id):
     """
     Reboots the remote device with the given device ID.
@@ -1404,14 +2363,15 @@ def reboot_remote_device(request, device_id):
         raise DeviceCloudHttpException(resp)
 
     try:
-        root = et.fromstring(resp.content)
-        errors = root.findall("%s%s" % (ID_ANY_LEVEL, ID_ERROR))
-        if errors:
-            desc_element = errors[0].findall("%s%s" % (ID_ANY_LEVEL, ID_DESC))
-            answer[ID_ERROR] = desc_element[0].text if desc_element else ERROR_TIMEOUT
+        _, error = _find_rci_elements(resp.content)
+        if error is not None:
+            answer[ID_ERROR] = error
             return answer
     except ParseError:
         answer[ID_ERROR] = ERROR_PARSING
+        return answer
+
+    get_device_info_cache().invalidate(device_id)
 
     return answer
 
@@ -1581,25 +2541,9 @@ def update_remote_firmware(request, device_id, version):
     Returns:
         Dictionary: Dictionary containing the answer.
     """
-    answer = {}
-    dc_session = get_device_cloud(request)
-    request_url = WS_FIRMWARE_UPDATES_API.format(ID_INVENTORY)
-    request_data = {ID_TARGETS: {ID_DEVICES: [device_id]}, ID_VERSION: version}
-    headers = {ID_CONTENT_TYPE: CONTENT_TYPE_PRETTY_JSON}
-
-    try:
-        resp = dc_session.get_connection().post(
-            request_url, data=json.dumps(request_data), headers=headers)
-        if resp.status_code != 200:
-            if resp.text:
-                answer[ID_ERROR] = ERROR_UPDATE_FW_REQUEST % json.loads(resp.text)[ID_ERROR_MESSAGE]
-            else:
-                answer[ID_ERROR] = ERROR_UPDATE_FW_REQUEST % resp.status_code
-    except DeviceCloudHttpException as exc:
-        if exc.response.text:
-            answer[ID_ERROR] = ERROR_UPDATE_FW_REQUEST % json.loads(exc.response.text)[ID_ERROR_MESSAGE]
-        else:
-            answer[ID_ERROR] = ERROR_UPDATE_FW_REQUEST % exc.response.status_code
+    answer = _submit_firmware_update(get_device_cloud(request), [device_id], ID_VERSION, version)
+    if ID_ERROR not in answer:
+        firmware_progress_tracker.refresh(device_id)
 
     return answer
 
@@ -1615,13 +2559,33 @@ def update_remote_firmware_from_fileset(request, device_id, file):
             firmware of.
         file (String): The complete path to the firmware file to use.
 
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    answer = _submit_firmware_update(get_device_cloud(request), [device_id], ID_FILE, file)
+    if ID_ERROR not in answer:
+        firmware_progress_tracker.refresh(device_id)
+
+    return answer
+
+
+def _submit_firmware_update(dc_session, device_ids, image_type, image):
+    """
+    Sends a single firmware update request targeting all the given devices.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_ids (List): The IDs of the devices to update.
+        image_type (String): `ID_VERSION` to update to a firmware version of
+            the repository or `ID_FILE` to update from a file set file.
+        image (String): The firmware version or the path of the file.
+
     Returns:
         Dictionary: Dictionary containing the answer.
     """
     answer = {}
-    dc_session = get_device_cloud(request)
     request_url = WS_FIRMWARE_UPDATES_API.format(ID_INVENTORY)
-    request_data = {ID_TARGETS: {ID_DEVICES: [device_id]}, ID_FILE: file}
+    request_data = {ID_TARGETS: {ID_DEVICES: list(device_ids)}, image_type: image}
     headers = {ID_CONTENT_TYPE: CONTENT_TYPE_PRETTY_JSON}
 
     try:
@@ -1671,23 +2635,41 @@ def check_remote_firmware_update_status(request, device_id):
         device_id (String): The ID of the ConnectCore device to check the
             firmware update status for.
 
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    state = firmware_progress_tracker.get_state(get_account_id(request.session), device_id)
+    if state is not None and ID_ERROR not in state:
+        return {ID_STATUS: state[ID_STATUS], ID_MESSAGE: state[ID_MESSAGE]}
+
+    return _check_firmware_update_status(get_device_cloud(request), device_id)
+
+
+def _check_firmware_update_status(dc_session, device_id):
+    """
+    Checks the firmware update status for the device with the given device ID.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The ID of the device to check the firmware
+            update status for.
+
     Returns:
         Dictionary: Dictionary containing the answer.
     """
     answer = {}
-    dc_session = get_device_cloud(request)
     request_url = WS_FIRMWARE_UPDATES_API.format("%s/%s" % (ID_INVENTORY, device_id))
 
     try:
         resp = dc_session.get_connection().get(request_url)
         if resp.status_code == 200:
-            status = json.loads(resp.text)[ID_STATUS]
+            entry = json.loads(resp.text)
+            status = entry[ID_STATUS]
             answer[ID_STATUS] = status
             if status in (STATUS_FAILED, STATUS_CANCELED):
-                answer[ID_MESSAGE] = json.loads(resp.text)[ID_ERROR_MESSAGE]
+                answer[ID_MESSAGE] = entry[ID_ERROR_MESSAGE]
             else:
-                answer[ID_MESSAGE] = json.loads(resp.text)[ID_MESSAGE] if \
-                    ID_MESSAGE in json.loads(resp.text) else ""
+                answer[ID_MESSAGE] = entry.get(ID_MESSAGE, "")
         elif resp.text:
             answer[ID_ERROR] = ERROR_CHECK_FW_UPDATE_STATUS % json.loads(resp.text)[ID_ERROR_MESSAGE]
         else:
@@ -1711,19 +2693,34 @@ def check_remote_firmware_update_progress(request, device_id):
         device_id (String): The ID of the ConnectCore device to check the
             firmware update progress for.
 
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    return _check_firmware_update_progress(get_device_cloud(request), device_id)
+
+
+def _check_firmware_update_progress(dc_session, device_id):
+    """
+    Checks the firmware update progress for the device with the given device ID.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The ID of the device to check the firmware
+            update progress for.
+
     Returns:
         Dictionary: Dictionary containing the answer.
     """
     answer = {}
-    dc_session = get_device_cloud(request)
     request_url = WS_FIRMWARE_UPDATES_API.format("%s/%s" % (ID_PROGRESS, device_id))
 
     try:
         resp = dc_session.get_connection().get(request_url)
         if resp.status_code == 200:
-            if ID_PROGRESS in json.loads(resp.text):
-                answer[ID_PROGRESS] = json.loads(resp.text)[ID_PROGRESS][0][ID_STATUS]
-                answer[ID_MESSAGE] = json.loads(resp.text)[ID_PROGRESS][0][ID_MESSAGE]
+            progress = json.loads(resp.text).get(ID_PROGRESS)
+            if progress:
+                answer[ID_PROGRESS] = progress[0][ID_STATUS]
+                answer[ID_MESSAGE] = progress[0][ID_MESSAGE]
             else:
                 answer[ID_ERROR] = ERROR_CHECK_FW_UPDATE_PROGRESS % ERROR_NO_PROGRESS_INFO
         elif resp.text:
@@ -1739,6 +2736,32 @@ def check_remote_firmware_update_progress(request, device_id):
     return answer
 
 
+def _read_firmware_update_state(dc_session, device_id):
+    """
+    Reads the firmware update status of the given device and, if the update
+    is running, its progress.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The ID of the device.
+
+    Returns:
+        Dictionary: Dictionary with the status, message, progress and
+            whether the update is running.
+    """
+    state = _check_firmware_update_status(dc_session, device_id)
+    if ID_ERROR in state:
+        return state
+
+    state[ID_UPDATE_RUNNING] = state[ID_STATUS] == STATUS_ACTIVE
+    if state[ID_UPDATE_RUNNING]:
+        progress = _check_firmware_update_progress(dc_session, device_id)
+        if ID_ERROR not in progress:
+            state.update(progress)
+
+    return state
+
+
 def cancel_remote_firmware_update(request, device_id):
     """
     Cancels the firmware update process for the remote device with the given device ID.
@@ -1752,17 +2775,34 @@ def cancel_remote_firmware_update(request, device_id):
     Returns:
         Dictionary: Dictionary containing the answer.
     """
-    answer = {}
-    dc_session = get_device_cloud(request)
-    request_url = WS_FIRMWARE_UPDATES_API.format("%s/%s" % (ID_CANCEL, device_id))
+    answer = _cancel_firmware_update(get_device_cloud(request), device_id)
+    firmware_progress_tracker.refresh(device_id)
 
-    try:
-        resp = dc_session.get_connection().post(request_url, data="")
-        if resp.status_code != 200:
-            if resp.text:
-                answer[ID_ERROR] = ERROR_CANCEL_FW_UPDATE % json.loads(resp.text)[ID_ERROR_MESSAGE]
-            else:
-                answer[ID_ERROR] = ERROR_CANCEL_FW_UPDATE % resp.status_code
+    return answer
+
+
+def _cancel_firmware_update(dc_session, device_id):
+    """
+    Cancels the firmware update process for the device with the given device ID.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_id (String): The ID of the device to cancel the firmware
+            update process for.
+
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    answer = {}
+    request_url = WS_FIRMWARE_UPDATES_API.format("%s/%s" % (ID_CANCEL, device_id))
+
+    try:
+        resp = dc_session.get_connection().post(request_url, data="")
+        if resp.status_code != 200:
+            if resp.text:
+                answer[ID_ERROR] = ERROR_CANCEL_FW_UPDATE % json.loads(resp.text)[ID_ERROR_MESSAGE]
+            else:
+                answer[ID_ERROR] = ERROR_CANCEL_FW_UPDATE % resp.status_code
     except DeviceCloudHttpException as exc:
         if exc.response.text:
             answer[ID_ERROR] = ERROR_CANCEL_FW_UPDATE % json.loads(exc.response.text)[ID_ERROR_MESSAGE]
@@ -1772,6 +2812,147 @@ def cancel_remote_firmware_update(request, device_id):
     return answer
 
 
+def start_firmware_rollout(request, device_ids=None, group=None, version=None, file=None,
+                           max_in_flight=FW_ROLLOUT_MAX_IN_FLIGHT,
+                           max_failure_rate=FW_ROLLOUT_MAX_FAILURE_RATE):
+    """
+    Starts a firmware rollout campaign over the given devices or the devices
+    of the given group.
+
+    Devices are updated in waves so that no more than `max_in_flight`
+    updates are running at the same time. Each wave is submitted with a
+    single firmware update request and its status is read in bulk. The
+    rollout stops submitting waves once the failure rate goes over
+    `max_failure_rate`.
+
+    Args:
+        request (:class:`.WSGIRequest`): The request used to generate the
+            Device Cloud instance.
+        device_ids (List, optional): The IDs of the devices to update.
+        group (String, optional): The DRM group path whose devices to update.
+        version (String, optional): The firmware version in the custom
+            firmware repository to use in the update.
+        file (String, optional): The complete path to the firmware file to
+            use, if no `version` is given.
+        max_in_flight (Integer, optional): Maximum number of updates running
+            at the same time.
+        max_failure_rate (Float, optional): Ratio (0 to 1) of failed updates
+            that stops the rollout.
+
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    dc_session = get_device_cloud(request)
+    targets = list(dict.fromkeys(device_ids or []))
+    if group:
+        targets.extend(device_id for device_id in _get_group_devices(dc_session, group)
+                       if device_id not in targets)
+    if not targets:
+        return {ID_ERROR: ERROR_FW_ROLLOUT_NO_TARGETS}
+
+    if version:
+        image_type, image = ID_VERSION, version
+    else:
+        image_type, image = ID_FILE, file
+    rollout = FirmwareRollout(dc_session, targets, image_type, image,
+                              max(1, int(max_in_flight)), float(max_failure_rate))
+    firmware_rollout_manager.add(get_account_id(request.session), rollout)
+    rollout.start()
+
+    return {ID_ROLLOUT_ID: rollout.id}
+
+
+def get_firmware_rollout_status(request, rollout_id):
+    """
+    Returns the aggregated status of the firmware rollout with the given ID.
+
+    Args:
+        request (:class:`.WSGIRequest`): The request used to generate the
+            Device Cloud instance.
+        rollout_id (String): The ID of the firmware rollout.
+
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    rollout = firmware_rollout_manager.get(get_account_id(request.session), rollout_id)
+    if rollout is None:
+        return {ID_ERROR: ERROR_FW_ROLLOUT_NOT_FOUND % rollout_id}
+
+    return rollout.to_json()
+
+
+def cancel_firmware_rollout(request, rollout_id):
+    """
+    Cancels the firmware rollout with the given ID. Pending devices are not
+    updated and running updates are canceled.
+
+    Args:
+        request (:class:`.WSGIRequest`): The request used to generate the
+            Device Cloud instance.
+        rollout_id (String): The ID of the firmware rollout.
+
+    Returns:
+        Dictionary: Dictionary containing the answer.
+    """
+    rollout = firmware_rollout_manager.get(get_account_id(request.session), rollout_id)
+    if rollout is None:
+        return {ID_ERROR: ERROR_FW_ROLLOUT_NOT_FOUND % rollout_id}
+
+    rollout.cancel()
+
+    return {}
+
+
+def _get_group_devices(dc_session, group):
+    """
+    Returns the IDs of the devices that belong to the given DRM group.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        group (String): The group path.
+
+    Returns:
+        List: The IDs of the devices of the group.
+    """
+    return [device.get_connectware_id()
+            for device in dc_session.devicecore.get_devices(group_path == group.strip("/"))]
+
+
+def _read_firmware_update_statuses(dc_session, device_ids):
+    """
+    Reads the firmware update status of the given devices in bulk.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        device_ids (List): The IDs of the devices to read the status of.
+
+    Returns:
+        Dictionary: Dictionary with the status and message of each device,
+            indexed by device ID.
+
+    Raises:
+        DeviceCloudHttpException: If the status could not be read.
+    """
+    statuses = {}
+    request_url = WS_FIRMWARE_UPDATES_API.format(ID_INVENTORY)
+    device_ids = list(device_ids)
+
+    for i in range(0, len(device_ids), FW_ROLLOUT_QUERY_BATCH):
+        batch = device_ids[i:i + FW_ROLLOUT_QUERY_BATCH]
+        query = " or ".join("%s='%s'" % (ID_ID, device_id) for device_id in batch)
+        resp = dc_session.get_connection().get(
+            request_url, params={ID_QUERY: query, ID_SIZE: len(batch)})
+        for entry in json.loads(resp.text).get(ID_LIST, []):
+            status = entry.get(ID_STATUS)
+            if status in (STATUS_FAILED, STATUS_CANCELED):
+                message = entry.get(ID_ERROR_MESSAGE, "")
+            else:
+                message = entry.get(ID_MESSAGE, "")
+            statuses[entry.get(ID_ID)] = (status, message)
+
+    return statuses
+
+
 def list_fileset(request, file_set):
     """
     Lists all the files of the Remote Manager account contained in the given file set.
@@ -1958,18 +3139,16 @@ def query_rci_system_monitor_settings(request, device_id):
         raise DeviceCloudHttpException(resp)
 
     try:
-        root = et.fromstring(resp.content)
-        errors = root.findall("%s%s" % (ID_ANY_LEVEL, ID_ERROR))
-        if errors:
-            desc_element = errors[0].findall("%s%s" % (ID_ANY_LEVEL, ID_DESC))
-            answer[ID_ERROR] = desc_element[0].text if desc_element else ERROR_TIMEOUT
+        elements, error = _find_rci_elements(resp.content, (ID_SAMPLE_RATE, ID_N_DP_UPLOAD))
+        if error is not None:
+            answer[ID_ERROR] = error
             return answer
 
-        sample_rate = root.findall("%s%s" % (ID_ANY_LEVEL, ID_SAMPLE_RATE))
-        answer[ID_SAMPLE_RATE] = sample_rate[0].text if sample_rate else DEFAULT_SAMPLE_RATE
+        sample_rate = elements.get(ID_SAMPLE_RATE)
+        answer[ID_SAMPLE_RATE] = sample_rate.text if sample_rate is not None else DEFAULT_SAMPLE_RATE
 
-        n_samples = root.findall("%s%s" % (ID_ANY_LEVEL, ID_N_DP_UPLOAD))
-        answer[ID_NUM_SAMPLES_UPLOAD] = n_samples[0].text if n_samples else DEFAULT_N_SAMPLES
+        n_samples = elements.get(ID_N_DP_UPLOAD)
+        answer[ID_NUM_SAMPLES_UPLOAD] = n_samples.text if n_samples is not None else DEFAULT_N_SAMPLES
     except ParseError:
         answer[ID_ERROR] = ERROR_PARSING
 
@@ -2063,11 +3242,9 @@ def set_rci_system_monitor_settings(request, device_id, sample_rate, samples_buf
         raise DeviceCloudHttpException(resp)
 
     try:
-        root = et.fromstring(resp.content)
-        errors = root.findall("%s%s" % (ID_ANY_LEVEL, ID_ERROR))
-        if errors:
-            desc_element = errors[0].findall("%s%s" % (ID_ANY_LEVEL, ID_DESC))
-            answer[ID_ERROR] = desc_element[0].text if desc_element else ERROR_TIMEOUT
+        _, error = _find_rci_elements(resp.content)
+        if error is not None:
+            answer[ID_ERROR] = error
     except ParseError:
         answer[ID_ERROR] = ERROR_PARSING
 
@@ -2130,61 +3307,105 @@ def set_system_monitor_settings(request, device_id, sample_rate, samples_buffer)
         return {ID_ERROR: exc.response.text}
 
 
-def get_account_data_usage(request):
+def get_account_data_usage(request, device_id=None, sort=ID_USAGE, descending=True, page=0,
+                           page_size=DATA_USAGE_PAGE_SIZE):
     """
     Returns the DRM account data usage.
 
+    The report is read once and cached per account for
+    `DATA_USAGE_CACHE_TTL` seconds. The usage of the devices is returned
+    sorted and paged.
+
     Args:
         request (:class:`.WSGIRequest`): The request used to generate the
             Device Cloud instance.
+        device_id (String, optional): ID of a device to return the usage of.
+        sort (String, optional): `ID_USAGE` to sort the devices by usage or
+            `ID_DEVICE_ID` to sort them by ID.
+        descending (Boolean, optional): `True` to sort in descending order.
+        page (Integer, optional): The page of devices to return, starting
+            at 0.
+        page_size (Integer, optional): The number of devices per page.
 
     Returns:
         Dictionary: Dictionary containing the answer.
     """
-    answer = {}
-    dc_session = get_device_cloud(request)
-    request_url = WS_DATA_USAGE_API.format(ID_DATA_SUMMARY)
+    report = data_usage_cache.get(get_account_id(request.session), get_device_cloud(request))
+    if ID_ERROR in report:
+        return {ID_ERROR: report[ID_ERROR]}
+
+    answer = {key: value for key, value in report.items() if key not in (ID_DEVICES, ID_DEVICE_ID)}
+    devices = report[ID_DEVICES][sort if sort in report[ID_DEVICES] else ID_USAGE]
+    if not descending:
+        devices = devices[::-1]
+    answer[ID_COUNT] = len(devices)
+    answer[ID_DEVICES] = devices[page * page_size:(page + 1) * page_size]
+    if device_id is not None:
+        answer[ID_USAGE] = report[ID_DEVICE_ID].get(device_id.lower(), 0)
+
+    return answer
+
+
+def _read_data_usage_report(dc_session, report):
+    """
+    Reads the given data usage report of the DRM account.
+
+    Args:
+        dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+        report (String): `ID_DATA_SUMMARY` or `ID_DATA_DETAILS`.
 
+    Returns:
+        Dictionary: The parsed report, or a dictionary with the error.
+    """
     try:
-        resp = dc_session.get_connection().get(request_url)
+        resp = dc_session.get_connection().get(WS_DATA_USAGE_API.format(report))
         if resp.status_code == 200:
-            json_answer = json.loads(resp.text)
-            answer[ID_DATA_USAGE_TOTAL] = json_answer[ID_LIST][0][ID_TOTAL_DATA_USAGE_MB]
-            answer[ID_DATA_USAGE_DEVICES] = json_answer[ID_LIST][0][ID_TOTAL_DATA_USAGE_DEVICES_MB]
-            answer[ID_DATA_USAGE_WEB] = json_answer[ID_LIST][0][ID_TOTAL_DATA_USAGE_WS_MB]
-            # Get usage details
-            request_url = WS_DATA_USAGE_API.format(ID_DATA_DETAILS)
-            resp = dc_session.get_connection().get(request_url)
-            if resp.status_code == 200:
-                answer[ID_DEVICES] = []
-                for entry in json.loads(resp.text)[ID_LIST]:
-                    if ID_DEVICE_ID in entry:
-                        device = {
-                            ID_DEVICE_ID: entry[ID_DEVICE_ID],
-                            ID_USAGE: entry[ID_USAGE]
-                        }
-                        answer[ID_DEVICES].append(device)
-                    elif entry[ID_SERVICE_DESCRIPTION] == SERVICE_WEB_SERVICE:
-                        answer[ID_DATA_USAGE_WEB_SERVICES] = entry[ID_USAGE]
-                    elif entry[ID_SERVICE_DESCRIPTION] == SERVICE_MONITOR:
-                        answer[ID_DATA_USAGE_MONITORS] = entry[ID_USAGE]
-            else:
-                if resp.text:
-                    answer[ID_ERROR] = ERROR_GET_DATA_USAGE % json.loads(resp.text)[ID_ERROR_MESSAGE]
-                else:
-                    answer[ID_ERROR] = ERROR_GET_DATA_USAGE % resp.status_code
-        else:
-            if resp.text:
-                answer[ID_ERROR] = ERROR_GET_DATA_USAGE % json.loads(resp.text)[ID_ERROR_MESSAGE]
-            else:
-                answer[ID_ERROR] = ERROR_GET_DATA_USAGE % resp.status_code
+            return json.loads(resp.text)
+        if resp.text:
+            return {ID_ERROR: ERROR_GET_DATA_USAGE % json.loads(resp.text)[ID_ERROR_MESSAGE]}
+        return {ID_ERROR: ERROR_GET_DATA_USAGE % resp.status_code}
     except DeviceCloudHttpException as exc:
         if exc.response.text:
-            answer[ID_ERROR] = ERROR_GET_DATA_USAGE % json.loads(exc.response.text)[ID_ERROR_MESSAGE]
-        else:
-            answer[ID_ERROR] = ERROR_GET_DATA_USAGE % exc.response.status_code
+            return {ID_ERROR: ERROR_GET_DATA_USAGE % json.loads(exc.response.text)[ID_ERROR_MESSAGE]}
+        return {ID_ERROR: ERROR_GET_DATA_USAGE % exc.response.status_code}
 
-    return answer
+
+def _build_data_usage_report(summary, details):
+    """
+    Builds the data usage report from the summary and details reports.
+
+    The usage of the devices is indexed by device ID and pre-sorted by
+    usage (descending) and by device ID (descending).
+
+    Args:
+        summary (Dictionary): The parsed data summary report.
+        details (Dictionary): The parsed data details report.
+
+    Returns:
+        Dictionary: The data usage report.
+    """
+    report = {}
+    totals = summary[ID_LIST][0]
+    report[ID_DATA_USAGE_TOTAL] = totals[ID_TOTAL_DATA_USAGE_MB]
+    report[ID_DATA_USAGE_DEVICES] = totals[ID_TOTAL_DATA_USAGE_DEVICES_MB]
+    report[ID_DATA_USAGE_WEB] = totals[ID_TOTAL_DATA_USAGE_WS_MB]
+
+    devices = []
+    for entry in details[ID_LIST]:
+        if ID_DEVICE_ID in entry:
+            devices.append({ID_DEVICE_ID: entry[ID_DEVICE_ID], ID_USAGE: entry[ID_USAGE]})
+        elif entry[ID_SERVICE_DESCRIPTION] == SERVICE_WEB_SERVICE:
+            report[ID_DATA_USAGE_WEB_SERVICES] = entry[ID_USAGE]
+        elif entry[ID_SERVICE_DESCRIPTION] == SERVICE_MONITOR:
+            report[ID_DATA_USAGE_MONITORS] = entry[ID_USAGE]
+
+    report[ID_DEVICE_ID] = {device[ID_DEVICE_ID].lower(): device[ID_USAGE] for device in devices}
+    report[ID_DEVICES] = {
+        ID_USAGE: sorted(devices, key=lambda device: device[ID_USAGE], reverse=True),
+        ID_DEVICE_ID: sorted(devices, key=lambda device: device[ID_DEVICE_ID], reverse=True)
+    }
+
+    return report
 
 
 def is_device_online(request, device_id):
@@ -2403,6 +3624,162 @@ def remove_inactive_monitors(dc_session):
             monitor.delete()
 
 
+class SCIDeviceResponse:
+    """
+    Payload and error of a device in an SCI response.
+    """
+
+    def __init__(self, device_id):
+        """
+        Class constructor. Instantiates a new ``SCIDeviceResponse``.
+
+        Args:
+            device_id (String): The ID of the device, `None` for the errors
+                outside any device.
+        """
+        self.device_id = device_id
+        self.payload = None
+        self.error = None
+        self.error_id = None
+
+
+class SCIResponseParser:
+    """
+    Single pass parser of SCI responses.
+
+    The response goes through the expat parser once, without building a
+    tree: the text of the payloads and errors is collected by the element
+    handlers and XML payloads are sliced from the response using the parser
+    offsets, so the time is linear in the size of the response.
+    """
+
+    def __init__(self, payload_tag=None, xml_payload=False):
+        """
+        Class constructor. Instantiates a new ``SCIResponseParser``.
+
+        Args:
+            payload_tag (String, optional): The tag of the element whose
+                content is the payload of each device.
+            xml_payload (Boolean, optional): `True` to return the payload as
+                XML, `False` to return its text.
+        """
+        self._payload_tag = payload_tag
+        self._xml_payload = xml_payload
+        self._data = None
+        self._parser = None
+        self._responses = None
+        self._device_id = None
+        self._payload_depth = 0
+        self._payload_start = 0
+        self._payload_text = None
+        self._error = None
+        self._error_field = None
+
+    def parse(self, text):
+        """
+        Parses the given SCI response.
+
+        Args:
+            text (String): The SCI response.
+
+        Returns:
+            Dictionary: The :class:`.SCIDeviceResponse` of each device ID.
+        """
+        self._data = text.encode("utf-8") if isinstance(text, str) else text
+        self._responses = {}
+        self._device_id = None
+        self._payload_depth = 0
+        self._error = None
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._parser.CharacterDataHandler = self._character_data
+        try:
+            self._parser.Parse(self._data, True)
+        except expat.ExpatError:
+            # Not a valid SCI response, return what was extracted so far.
+            pass
+        finally:
+            self._data = None
+            self._parser = None
+        return self._responses
+
+    def _get_response(self):
+        """
+        Returns the response of the current device.
+        """
+        response = self._responses.get(self._device_id)
+        if response is None:
+            response = self._responses[self._device_id] = SCIDeviceResponse(self._device_id)
+        return response
+
+    def _start_element(self, name, attrs):
+        if self._payload_depth:
+            if name == self._payload_tag:
+                self._payload_depth += 1
+        elif name == self._payload_tag:
+            self._payload_depth = 1
+            if self._xml_payload:
+                # The payload starts after the end of the start tag.
+                self._payload_start = self._data.index(b">", self._parser.CurrentByteIndex) + 1
+            else:
+                self._payload_text = []
+        elif name == TAG_DEVICE and "id" in attrs:
+            self._device_id = attrs["id"]
+            self._get_response()
+
+        if name == TAG_ERROR and self._error is None:
+            self._error = {"id": attrs.get("id"), TAG_ERROR: [], TAG_ERROR_DESC: None, TAG_ERROR_HINT: None}
+            self._error_field = TAG_ERROR
+        elif self._error is not None and name in (TAG_ERROR_DESC, TAG_ERROR_HINT):
+            self._error[name] = []
+            self._error_field = name
+
+    def _end_element(self, name):
+        if self._payload_depth and name == self._payload_tag:
+            self._payload_depth -= 1
+            if not self._payload_depth:
+                if self._xml_payload:
+                    end = max(self._parser.CurrentByteIndex, self._payload_start)
+                    payload = self._data[self._payload_start:end].decode("utf-8")
+                else:
+                    payload = "".join(self._payload_text)
+                    self._payload_text = None
+                self._get_response().payload = payload
+        elif name == TAG_DEVICE and not self._payload_depth:
+            self._device_id = None
+
+        if self._error is not None:
+            if name == TAG_ERROR:
+                response = self._get_response()
+                # Keep the first error of each device.
+                if response.error is None:
+                    response.error_id = self._error["id"]
+                    response.error = self._get_error_message()
+                self._error = None
+                self._error_field = None
+            elif name in (TAG_ERROR_DESC, TAG_ERROR_HINT):
+                self._error_field = TAG_ERROR
+
+    def _character_data(self, data):
+        if self._payload_text is not None:
+            self._payload_text.append(data)
+        if self._error_field is not None:
+            self._error[self._error_field].append(data)
+
+    def _get_error_message(self):
+        """
+        Returns the message of the current error, built from its description
+        and hint or, if it has none, from its text.
+        """
+        if self._error[TAG_ERROR_DESC] is None:
+            return "".join(self._error[TAG_ERROR]).strip()
+        desc = "".join(self._error[TAG_ERROR_DESC])
+        hint = "".join(self._error[TAG_ERROR_HINT] or [])
+        return "%s: %s" % (desc, hint) if hint else desc
+
+
 class IterableToFileAdapter:
     def __init__(self, iterable, name):
         self.iterator = iter(iterable)
@@ -2454,6 +3831,390 @@ class IterableToFileAdapter:
         return self.length
 
 
+class CLIInputSequencer:
+    """
+    Sends the terminal input of a CLI session to the device.
+
+    Input received while a write is in progress, or within a short window,
+    is merged into a single write. Writes are sent one after the other, so
+    the input reaches the device in the same order it was typed.
+    """
+
+    def __init__(self, session, device_id, session_id, consumer):
+        """
+        Class constructor. Instantiates a new ``CLIInputSequencer``.
+
+        Args:
+            session (:class:`.SessionStore`): The Django session.
+            device_id (String): The ID of the device of the CLI session.
+            session_id (String): The ID of the CLI session.
+            consumer (:class:`.WsConsumer`): The web socket consumer to
+                notify write errors to.
+        """
+        self._dc_session = get_device_cloud_session(session)
+        self._device_id = device_id
+        self._session_id = session_id
+        self._consumer = consumer
+        self._pending = []
+        self._closed = False
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, name="cli_input", daemon=True).start()
+
+    def write(self, data):
+        """
+        Queues the given terminal input to be sent.
+
+        Args:
+            data (String): The terminal input.
+        """
+        if not data:
+            return
+        with self._condition:
+            if self._closed:
+                return
+            self._pending.append(data)
+            self._condition.notify()
+
+    def close(self):
+        """
+        Stops the sequencer. Pending input is discarded.
+        """
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            self._condition.notify()
+
+    def _run(self):
+        """
+        Waits for input and sends it once the coalescing time has elapsed.
+        """
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            time.sleep(CLI_INPUT_COALESCE_TIME)
+            with self._condition:
+                data = "".join(self._pending).encode("utf-8")
+                self._pending.clear()
+            for offset in range(0, len(data), CLI_INPUT_MAX_WRITE):
+                chunk = base64.b64encode(data[offset:offset + CLI_INPUT_MAX_WRITE]).decode("ascii")
+                try:
+                    answer = _send_cli_data(self._dc_session, self._device_id, self._session_id, chunk)
+                except Exception as exc:
+                    answer = {ID_ERROR: str(exc)}
+                if ID_ERROR in answer:
+                    try:
+                        self._consumer.send(text_data=json.dumps({ID_TYPE: CLI_TYPE_DATA,
+                                                                  ID_ERROR: answer[ID_ERROR]}))
+                    except Exception as exc:
+                        print(exc)
+                    break
+
+
+class CLIOutputStream:
+    """
+    Delivers the output of a CLI session to its web socket consumer.
+
+    Data is merged for a few milliseconds and sent as binary frames. The
+    pending data is bounded: when the device produces output faster than it
+    can be delivered, the oldest data is discarded. Frames produced while no
+    consumer is attached are held and sent once one is attached; the held
+    data is bounded too, but the held events are never discarded. Discarded
+    data is replaced by a truncation marker.
+    """
+
+    def __init__(self, consumer):
+        """
+        Class constructor. Instantiates a new ``CLIOutputStream``.
+
+        Args:
+            consumer (:class:`.WsConsumer`): The web socket consumer, `None`
+                to hold the output until a consumer is attached.
+        """
+        self._consumer = consumer
+        self._held = deque()
+        self._held_size = 0
+        self._held_truncated = False
+        self._chunks = deque()
+        self._size = 0
+        self._truncated = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        threading.Thread(target=self._run, name="cli_output", daemon=True).start()
+
+    def write(self, data):
+        """
+        Queues the given CLI output to be sent.
+
+        Args:
+            data (Bytes): The decoded CLI output.
+        """
+        if not data:
+            return
+        with self._condition:
+            if self._closed:
+                return
+            self._chunks.append(data)
+            self._size += len(data)
+            while self._size > CLI_OUTPUT_MAX_BUFFER and len(self._chunks) > 1:
+                self._size -= len(self._chunks.popleft())
+                self._truncated = True
+            self._condition.notify()
+
+    def send_event(self, payload):
+        """
+        Sends the given CLI event after any pending output.
+
+        Args:
+            payload (Dictionary): The CLI event.
+        """
+        with self._send_lock:
+            self._flush()
+            self._send(text_data=json.dumps(payload))
+
+    def attach(self, consumer):
+        """
+        Attaches the given consumer and sends it the held frames.
+
+        Args:
+            consumer (:class:`.WsConsumer`): The web socket consumer.
+        """
+        with self._send_lock:
+            self._consumer = consumer
+            while self._held:
+                text_data, bytes_data = self._held.popleft()
+                if bytes_data is not None and self._held_truncated:
+                    # The discarded data was older than this frame.
+                    self._send(bytes_data=CLI_OUTPUT_TRUNCATED)
+                    self._held_truncated = False
+                self._send(text_data=text_data, bytes_data=bytes_data)
+            self._held_size = 0
+
+    @property
+    def closed(self):
+        """
+        Returns whether the stream is closed.
+
+        Returns:
+            Boolean: `True` if the stream is closed, `False` otherwise.
+        """
+        return self._closed
+
+    def close(self):
+        """
+        Stops the stream. Pending output is discarded.
+        """
+        with self._condition:
+            self._closed = True
+            self._chunks.clear()
+            self._size = 0
+            self._condition.notify()
+
+    def _run(self):
+        """
+        Waits for output and sends it once the coalescing time has elapsed.
+        """
+        while True:
+            with self._condition:
+                while not self._chunks and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            time.sleep(CLI_OUTPUT_COALESCE_TIME)
+            with self._send_lock:
+                self._flush()
+
+    def _flush(self):
+        """
+        Sends all the pending output in frames of up to `CLI_OUTPUT_MAX_FRAME` bytes.
+        """
+        with self._condition:
+            data = b"".join(self._chunks)
+            if self._truncated:
+                data = CLI_OUTPUT_TRUNCATED + data
+            self._chunks.clear()
+            self._size = 0
+            self._truncated = False
+        for offset in range(0, len(data), CLI_OUTPUT_MAX_FRAME):
+            self._send(bytes_data=data[offset:offset + CLI_OUTPUT_MAX_FRAME])
+
+    def _send(self, text_data=None, bytes_data=None):
+        """
+        Sends a frame to the consumer, or holds it if there is no consumer.
+        """
+        if self._consumer is None:
+            self._hold(text_data, bytes_data)
+            return
+        try:
+            self._consumer.send(text_data=text_data, bytes_data=bytes_data)
+        except Exception as exc:
+            print(exc)
+
+    def _hold(self, text_data, bytes_data):
+        """
+        Holds a frame until a consumer is attached, discarding the oldest held
+        data frames if they exceed `CLI_OUTPUT_MAX_BUFFER` bytes.
+        """
+        self._held.append((text_data, bytes_data))
+        if bytes_data is None:
+            return
+        self._held_size += len(bytes_data)
+        while self._held_size > CLI_OUTPUT_MAX_BUFFER:
+            for frame in self._held:
+                if frame[1] is not None:
+                    self._held.remove(frame)
+                    self._held_size -= len(frame[1])
+                    self._held_truncated = True
+                    break
+
+
+class CLISessionPool:
+    """
+    Pool of started CLI sessions, one per device being viewed, ready to be
+    handed to a terminal.
+
+    Each pooled session is initialized, started and has its monitor
+    registered. Its output is held until a terminal attaches to it. Sessions
+    not used are terminated before the device closes them due to inactivity.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._claimed = {}
+        self._warming = set()
+        self._lock = threading.Lock()
+        self._checker = None
+
+    def prewarm(self, session, device_id):
+        """
+        Prepares a CLI session for the given device in the background, if
+        there is not one ready already.
+
+        Args:
+            session (:class:`.SessionStore`): The Django session.
+            device_id (String): The ID of the device.
+        """
+        key = (get_account_id(session), device_id)
+        with self._lock:
+            if key[0] is None or key in self._entries or key in self._warming:
+                return
+            self._warming.add(key)
+            if self._checker is None:
+                self._checker = threading.Thread(target=self._check_idle, name="cli_pool", daemon=True)
+                self._checker.start()
+        threading.Thread(target=self._warm, args=(key, session, device_id),
+                         name="cli_prewarm_%s" % device_id, daemon=True).start()
+
+    def acquire(self, session, device_id):
+        """
+        Takes the ready CLI session of the given device, if any.
+
+        Args:
+            session (:class:`.SessionStore`): The Django session.
+            device_id (String): The ID of the device.
+
+        Returns:
+            String: The ID of the CLI session, `None` if there is no session
+                ready for the device.
+        """
+        key = (get_account_id(session), device_id)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            stream = cli_output_streams.get(entry[ID_SESSION_ID])
+            if stream is not None and not stream.closed \
+                    and time.monotonic() - entry[ID_TIMESTAMP] <= CLI_POOL_MAX_IDLE:
+                self._claimed[entry[ID_SESSION_ID]] = entry
+                return entry[ID_SESSION_ID]
+        # The session is about to expire or was closed by the device.
+        threading.Thread(target=self._reclaim, args=(entry,), daemon=True).start()
+        return None
+
+    def attach(self, session_id, consumer):
+        """
+        Attaches the given consumer to the acquired CLI session with the
+        given ID, sending it the output held so far.
+
+        Args:
+            session_id (String): The ID of the CLI session.
+            consumer (:class:`.WsConsumer`): The web socket consumer.
+
+        Returns:
+            Integer: The ID of the monitor of the CLI session, `None` if the
+                session does not come from the pool.
+        """
+        with self._lock:
+            entry = self._claimed.pop(session_id, None)
+        if entry is None:
+            return None
+        stream = cli_output_streams.get(session_id)
+        if stream is None:
+            return None
+        stream.attach(consumer)
+        return entry[ID_MONITOR_ID]
+
+    def _warm(self, key, session, device_id):
+        """
+        Initializes and starts a CLI session for the given device and
+        registers its monitor.
+        """
+        try:
+            dc_session = get_device_cloud_session(session)
+            answer = _initialize_cli_session(dc_session, device_id)
+            if ID_ERROR in answer:
+                return
+            session_id = answer[ID_SESSION_ID]
+            answer = register_cli_monitor(session, device_id, session_id, None)
+            if answer == -1 or ID_ERROR in answer:
+                _stop_cli_session(dc_session, device_id, session_id)
+                return
+            entry = {"session": session, ID_DEVICE_ID: device_id, ID_SESSION_ID: session_id,
+                     ID_MONITOR_ID: answer[ID_MONITOR_ID], ID_TIMESTAMP: time.monotonic()}
+            answer = start_cli_session(session, device_id, session_id)
+            if answer == -1 or ID_ERROR in answer:
+                self._reclaim(entry)
+                return
+            with self._lock:
+                self._entries[key] = entry
+        except Exception as exc:
+            print(exc)
+        finally:
+            with self._lock:
+                self._warming.discard(key)
+
+    def _check_idle(self):
+        """
+        Periodically terminates the sessions that have not been used.
+        """
+        while True:
+            time.sleep(CLI_POOL_CHECK_INTERVAL)
+            now = time.monotonic()
+            expired = []
+            with self._lock:
+                for entries in (self._entries, self._claimed):
+                    for key, entry in list(entries.items()):
+                        if now - entry[ID_TIMESTAMP] > CLI_POOL_MAX_IDLE:
+                            expired.append(entries.pop(key))
+            for entry in expired:
+                self._reclaim(entry)
+
+    @staticmethod
+    def _reclaim(entry):
+        """
+        Terminates the given pooled session and removes its monitor.
+        """
+        try:
+            _stop_cli_session(get_device_cloud_session(entry["session"]),
+                              entry[ID_DEVICE_ID], entry[ID_SESSION_ID])
+        except Exception as exc:
+            print(exc)
+        remove_cli_monitor(entry["session"], entry[ID_SESSION_ID], entry[ID_MONITOR_ID])
+
+
 class MonitorManager(MonitorAPI):
     """
     Class used to manage the use of Device Cloud monitors.
@@ -2506,17 +4267,891 @@ class MonitorManager(MonitorAPI):
         return TCPDeviceCloudMonitor(self._conn, monitor_id, self._tcp_client_manager)
 
 
-class CancelRequestManager:
+class InstrumentedConnection(DeviceCloudConnection):
     """
-    Dictionary of cancel requests with corresponding callback.
+    Device Cloud connection that records every request in the DRM metrics,
+    tagged by API, status and target device.
     """
 
-    def __init__(self):
-        self.callbacks = {}
+    def __init__(self, conn):
+        """
+        Class constructor. Instantiates a new ``InstrumentedConnection``.
 
-    def add_callback(self, request_id, callback):
+        Args:
+            conn (:class:`.DeviceCloudConnection`): The connection to take
+                the credentials and settings from.
         """
-        Adds a callback to the dictionary.
+        DeviceCloudConnection.__init__(self, conn._auth, conn._base_url,
+                                       throttle_retries=conn._throttle_retries,
+                                       throttle_delay_init=conn._throttle_delay_init,
+                                       throttle_delay_max=conn._throttle_delay_max,
+                                       throttle_delay_backoff_coefficient=conn._throttle_delay_backoff_coefficient)
+
+    def _make_request(self, method, url, **kwargs):
+        data = kwargs.get("data")
+        api, device = _get_drm_call_tags(url, kwargs.get("params"), data)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        sent = len(data) if isinstance(data, bytes) else 0
+        response = None
+        start = time.monotonic()
+        try:
+            response = DeviceCloudConnection._make_request(self, method, url, **kwargs)
+            return response
+        except DeviceCloudHttpException as exc:
+            response = exc.response
+            raise
+        finally:
+            duration = time.monotonic() - start
+            status = "error"
+            received = 0
+            if response is not None:
+                status = str(response.status_code)
+                # Do not consume streamed responses.
+                received = (int(response.headers.get("Content-Length", 0)) if kwargs.get("stream")
+                            else len(response.content))
+            get_drm_metrics().observe_call(api, method, status, duration, sent, received, device)
+
+
+class InstrumentedDeviceCloud(DeviceCloud):
+    """
+    Device Cloud instance whose requests are recorded in the DRM metrics.
+    """
+
+    def __init__(self, username, password, base_url=None):
+        """
+        Class constructor. Instantiates a new ``InstrumentedDeviceCloud``.
+
+        Args:
+            username (String): The DRM user name.
+            password (String): The DRM password.
+            base_url (String, optional): The DRM server URL.
+        """
+        DeviceCloud.__init__(self, username, password, base_url=base_url)
+        self._conn = InstrumentedConnection(self._conn)
+
+
+class DirectoryListingCache:
+    """
+    Cache of device directory listings, indexed by account, device ID and
+    directory path.
+    """
+
+    def __init__(self, ttl=FS_LISTING_CACHE_TTL, prefetch_workers=FS_PREFETCH_WORKERS):
+        """
+        Class constructor. Instantiates a new ``DirectoryListingCache``.
+
+        Args:
+            ttl (Integer): Seconds a listing is considered fresh.
+            prefetch_workers (Integer): Maximum number of background threads
+                prefetching directory listings.
+        """
+        self._ttl = ttl
+        self._entries = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=prefetch_workers,
+                                            thread_name_prefix="fs_prefetch")
+
+    @staticmethod
+    def normalize_path(path):
+        """
+        Returns the given directory path without trailing separators.
+
+        Args:
+            path (String): The directory path.
+
+        Returns:
+            String: The normalized path.
+        """
+        path = path.rstrip("/")
+        return path if path else "/"
+
+    @staticmethod
+    def parent_path(path):
+        """
+        Returns the parent directory of the given path.
+
+        Args:
+            path (String): The file or directory path.
+
+        Returns:
+            String: The normalized parent directory path.
+        """
+        path = DirectoryListingCache.normalize_path(path)
+        return DirectoryListingCache.normalize_path(path[:path.rfind("/") + 1])
+
+    def get(self, account_id, device_id, directory):
+        """
+        Returns the cached listing of the given directory if it is still fresh.
+
+        Args:
+            account_id (String): The DRM account identifier.
+            device_id (String): The device ID.
+            directory (String): The directory path.
+
+        Returns:
+            Dictionary: The cached listing, `None` if not cached or expired.
+        """
+        key = (account_id, device_id, self.normalize_path(directory))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self._ttl:
+                self._entries.pop(key, None)
+                return None
+            answer = dict(entry[1])
+        # Keep the path format of the request.
+        answer[ID_CURRENT_DIRECTORY] = directory
+        return answer
+
+    def put(self, account_id, device_id, directory, answer):
+        """
+        Stores the listing of the given directory.
+
+        Args:
+            account_id (String): The DRM account identifier.
+            device_id (String): The device ID.
+            directory (String): The directory path.
+            answer (Dictionary): The listing answer.
+        """
+        key = (account_id, device_id, self.normalize_path(directory))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer)
+
+    def invalidate(self, account_id, device_id, path, recursive=False):
+        """
+        Invalidates the listings affected by a change in the given path.
+
+        Args:
+            account_id (String): The DRM account identifier.
+            device_id (String): The device ID.
+            path (String): The created, modified or removed path.
+            recursive (Boolean): `True` to also invalidate the listings of the
+                path itself and all its subdirectories.
+        """
+        path = self.normalize_path(path)
+        prefix = path if path.endswith("/") else path + "/"
+        parent_key = (account_id, device_id, self.parent_path(path))
+        with self._lock:
+            # Drop in-flight prefetches too, so they do not store stale data.
+            for entries in (self._entries, self._pending):
+                entries.pop(parent_key, None)
+                if not recursive:
+                    continue
+                for key in list(entries):
+                    if (key[0] == account_id and key[1] == device_id
+                            and (key[2] == path or key[2].startswith(prefix))):
+                        del entries[key]
+
+    def prefetch(self, dc_session, account_id, device_id, answer):
+        """
+        Reads in the background the listings of the child directories of the
+        given listing that are not already cached.
+
+        Args:
+            dc_session (:class:`.DeviceCloud`): the Device Cloud instance.
+            account_id (String): The DRM account identifier.
+            device_id (String): The device ID.
+            answer (Dictionary): The parent directory listing.
+        """
+        directories = []
+        for entry in answer.get(ID_FILES, []):
+            if len(directories) >= FS_PREFETCH_MAX_DIRS:
+                break
+            if entry[ID_TYPE] != FS_TYPE_DIRECTORY:
+                continue
+            if entry[ID_NAME].rstrip("/").split("/")[-1] in (".", ".."):
+                continue
+            directories.append(entry[ID_NAME])
+
+        tokens = {}
+        with self._lock:
+            for directory in directories:
+                key = (account_id, device_id, self.normalize_path(directory))
+                if key in self._pending or key in self._entries:
+                    continue
+                tokens[directory] = self._pending[key] = object()
+        if tokens:
+            self._executor.submit(self._prefetch_directories, dc_session, account_id,
+                                  device_id, tokens)
+
+    def _prefetch_directories(self, dc_session, account_id, device_id, tokens):
+        """
+        Reads and stores the listings of the given directories using a single
+        request.
+
+        Args:
+            dc_session (:class:`.DeviceCloud`): the Device Cloud instance.
+            account_id (String): The DRM account identifier.
+            device_id (String): The device ID.
+            tokens (Dictionary): The directories to read and the token
+                identifying the prefetch of each one.
+        """
+        directories = list(tokens)
+        results = None
+        try:
+            results = _send_file_system_commands(
+                dc_session, device_id, [LsCommand(directory) for directory in directories])
+        except Exception as exc:
+            print(exc)
+        if isinstance(results, ErrorInfo):
+            results = None
+
+        with self._lock:
+            for index, directory in enumerate(directories):
+                key = (account_id, device_id, self.normalize_path(directory))
+                # Only store the listing if it was not invalidated meanwhile.
+                if self._pending.get(key) is not tokens[directory]:
+                    continue
+                del self._pending[key]
+                if results is None:
+                    continue
+                answer = _build_directory_answer(directory, results[index])
+                if ID_ERROR not in answer:
+                    self._entries[key] = (time.monotonic(), answer)
+
+
+class DataUsageCache:
+    """
+    Cache of the data usage reports, indexed by account.
+    """
+
+    def __init__(self, ttl=DATA_USAGE_CACHE_TTL):
+        """
+        Class constructor. Instantiates a new ``DataUsageCache``.
+
+        Args:
+            ttl (Integer): Seconds a report is considered fresh.
+        """
+        self._ttl = ttl
+        self._entries = {}
+        self._account_locks = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="data_usage")
+
+    def get(self, account, dc_session):
+        """
+        Returns the data usage report of the given account, reading it from
+        DRM if there is no fresh report cached.
+
+        Concurrent requests for the same account wait for a single read.
+
+        Args:
+            account (String): The account identifier.
+            dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+
+        Returns:
+            Dictionary: The data usage report, or a dictionary with the error.
+        """
+        report = self._get_fresh(account)
+        if report is not None:
+            return report
+
+        with self._lock:
+            account_lock = self._account_locks.setdefault(account, threading.Lock())
+        with account_lock:
+            report = self._get_fresh(account)
+            if report is not None:
+                return report
+            # Read both reports at the same time.
+            details = self._executor.submit(copy_context().run, _read_data_usage_report,
+                                            dc_session, ID_DATA_DETAILS)
+            summary = _read_data_usage_report(dc_session, ID_DATA_SUMMARY)
+            details = details.result()
+            for answer in (summary, details):
+                if ID_ERROR in answer:
+                    return answer
+            report = _build_data_usage_report(summary, details)
+            with self._lock:
+                self._entries[account] = (time.monotonic(), report)
+        return report
+
+    def _get_fresh(self, account):
+        """
+        Returns the cached report of the given account if it is fresh.
+        """
+        with self._lock:
+            entry = self._entries.get(account)
+            if entry is not None and time.monotonic() - entry[0] < self._ttl:
+                return entry[1]
+        return None
+
+
+class DeviceInfoCache:
+    """
+    Cache of the device information that only changes with a firmware
+    update, persisted in the database and indexed by account and device.
+
+    Entries are invalidated when a firmware update finishes, the device is
+    rebooted or it fails to read its information, and they are read again
+    in the background when they get older than the TTL.
+    """
+
+    def __init__(self, ttl=DEVICE_INFO_CACHE_TTL):
+        """
+        Class constructor. Instantiates a new ``DeviceInfoCache``.
+
+        Args:
+            ttl (Integer): Seconds an entry is considered fresh.
+        """
+        self._ttl = ttl
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="device_info")
+
+    @property
+    def ttl(self):
+        """
+        Returns the seconds an entry is considered fresh.
+
+        Returns:
+            Integer: The TTL of the entries.
+        """
+        return self._ttl
+
+    def get(self, account, device_id, fw_version):
+        """
+        Returns the cached information of the given device.
+
+        Args:
+            account (String): The account identifier.
+            device_id (String): The ID of the device.
+            fw_version (String): The current firmware version of the device.
+
+        Returns:
+            Tuple: The information dictionary and the time it was read from
+                the device, `None` if it is not cached, it is invalid or it
+                was read with a different firmware version.
+        """
+        try:
+            entry = DeviceHardwareInfo.objects.filter(account=account, device_id=device_id, valid=True).first()
+        except DatabaseError as exc:
+            print(exc)
+            return None
+        if entry is None or entry.firmware_version != fw_version:
+            return None
+        return dict(entry.information), entry.updated
+
+    def store(self, account, device_id, information, fw_version):
+        """
+        Stores the information read from the given device.
+
+        Args:
+            account (String): The account identifier.
+            device_id (String): The ID of the device.
+            information (Dictionary): The device information.
+            fw_version (String): The firmware version of the device.
+        """
+        try:
+            DeviceHardwareInfo.objects.update_or_create(
+                account=account, device_id=device_id,
+                defaults={"information": information, "firmware_version": fw_version,
+                          "updated": datetime.now(timezone.utc), "valid": True})
+        except DatabaseError as exc:
+            print(exc)
+
+    def update(self, account, device_id, values):
+        """
+        Updates some values of the cached information of the given device,
+        keeping the time it was read.
+
+        Args:
+            account (String): The account identifier.
+            device_id (String): The ID of the device.
+            values (Dictionary): The values to update.
+        """
+        try:
+            entry = DeviceHardwareInfo.objects.filter(account=account, device_id=device_id).first()
+            if entry is None:
+                return
+            entry.information.update(values)
+            entry.save(update_fields=["information"])
+        except DatabaseError as exc:
+            print(exc)
+
+    def invalidate(self, device_id):
+        """
+        Invalidates the cached information of the given device for all the
+        accounts.
+
+        Args:
+            device_id (String): The ID of the device.
+        """
+        try:
+            DeviceHardwareInfo.objects.filter(device_id=device_id).update(valid=False)
+        except DatabaseError as exc:
+            print(exc)
+
+    def refresh(self, account, dc_session, device_id):
+        """
+        Reads the information of the given device again in the background.
+
+        Args:
+            account (String): The account identifier.
+            dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+            device_id (String): The ID of the device.
+        """
+        key = (account, device_id)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, dc_session)
+
+    def _refresh(self, key, dc_session):
+        """
+        Reads the information of a device and stores it if the device
+        answered, keeping the last known settings.
+        """
+        account, device_id = key
+        try:
+            device = _get_devicecore_device(dc_session, device_id)
+            if device is None:
+                return
+            info = _read_device_information(dc_session, device_id)
+            if ID_ERROR in info:
+                return
+            previous = DeviceHardwareInfo.objects.filter(account=account, device_id=device_id).first()
+            if previous is not None:
+                for key_name in (ID_SAMPLE_RATE, ID_NUM_SAMPLES_UPLOAD):
+                    if key_name in previous.information:
+                        info[key_name] = previous.information[key_name]
+            self.store(account, device_id, info, device.get_firmware_level_description())
+        except Exception as exc:
+            print(exc)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+            close_old_connections()
+
+
+def get_firmware_progress_group(account, device_id):
+    """
+    Returns the name of the channel layer group that receives the firmware
+    update state of the given device for the given account.
+
+    Args:
+        account (String): The account identifier.
+        device_id (String): The ID of the device.
+
+    Returns:
+        String: The name of the group.
+    """
+    key = "%s|%s" % (account, device_id)
+    return GROUP_FIRMWARE_PROGRESS.format(hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+
+class FirmwareProgressTracker:
+    """
+    Tracks the firmware update state of the devices watched by any WebSocket,
+    polling DRM once per account and device regardless of the number of
+    viewers and pushing the changes to the group of the account and device.
+    """
+
+    def __init__(self):
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, session, device_id):
+        """
+        Adds a viewer of the firmware update state of the given device and
+        starts polling DRM for it if it is the first one of the account.
+
+        Args:
+            session (:class:`.SessionStore`): The Django session of the viewer.
+            device_id (String): The ID of the device.
+
+        Returns:
+            Dictionary: The last known state of the device, `None` if it has
+                not been read yet.
+        """
+        key = (get_account_id(session), device_id)
+        with self._lock:
+            entry = self._devices.get(key)
+            if entry is None:
+                entry = {"account": key[0],
+                         "dc_session": get_device_cloud_session(session),
+                         "viewers": 0, "state": None, "event": threading.Event()}
+                self._devices[key] = entry
+                threading.Thread(target=self._run, args=(key, entry),
+                                 name="fw_progress_%s" % device_id, daemon=True).start()
+            entry["viewers"] += 1
+            return dict(entry["state"]) if entry["state"] is not None else None
+
+    def unsubscribe(self, session, device_id):
+        """
+        Removes a viewer of the firmware update state of the given device and
+        stops polling DRM if it was the last one of the account.
+
+        Args:
+            session (:class:`.SessionStore`): The Django session of the viewer.
+            device_id (String): The ID of the device.
+        """
+        key = (get_account_id(session), device_id)
+        with self._lock:
+            entry = self._devices.get(key)
+            if entry is None:
+                return
+            entry["viewers"] -= 1
+            if entry["viewers"] <= 0:
+                del self._devices[key]
+                entry["event"].set()
+
+    def refresh(self, device_id):
+        """
+        Reads the state of the given device right away for every account
+        tracking it.
+
+        Args:
+            device_id (String): The ID of the device.
+        """
+        with self._lock:
+            entries = [entry for key, entry in self._devices.items() if key[1] == device_id]
+            for entry in entries:
+                # Do not serve the previous state until it is read again.
+                entry["state"] = None
+        for entry in entries:
+            entry["event"].set()
+
+    def get_state(self, account, device_id):
+        """
+        Returns the last known firmware update state of the given device.
+
+        Args:
+            account (String): The account identifier of the requester.
+            device_id (String): The ID of the device.
+
+        Returns:
+            Dictionary: The state, `None` if the device is not being tracked
+                for the given account.
+        """
+        with self._lock:
+            entry = self._devices.get((account, device_id))
+            if entry is None or entry["state"] is None:
+                return None
+            return dict(entry["state"])
+
+    def _run(self, key, entry):
+        """
+        Polls the firmware update state of the device while it has viewers.
+
+        Args:
+            key (Tuple): The account identifier and the ID of the device.
+            entry (Dictionary): The tracking entry of the device.
+        """
+        account, device_id = key
+        channel_layer = get_channel_layer()
+        while True:
+            entry["event"].clear()
+            try:
+                state = _read_firmware_update_state(entry["dc_session"], device_id)
+            except Exception as exc:
+                print(exc)
+                state = {ID_ERROR: str(exc)}
+            with self._lock:
+                if self._devices.get(key) is not entry:
+                    return
+                changed = state != entry["state"]
+                finished = entry["state"] is not None and entry["state"].get(ID_UPDATE_RUNNING) \
+                    and state.get(ID_STATUS) == STATUS_SUCCESSFUL
+                entry["state"] = state
+            if finished:
+                get_device_info_cache().invalidate(device_id)
+                get_device_info_cache().refresh(account, entry["dc_session"], device_id)
+                close_old_connections()
+            if changed:
+                async_to_sync(channel_layer.group_send)(
+                    get_firmware_progress_group(account, device_id),
+                    {ID_TYPE: "firmware.progress", ID_DATA: state}
+                )
+            interval = FW_PROGRESS_ACTIVE_INTERVAL if state.get(ID_UPDATE_RUNNING) \
+                else FW_PROGRESS_IDLE_INTERVAL
+            entry["event"].wait(interval)
+
+
+class FirmwareRollout:
+    """
+    Firmware update campaign over a set of devices, submitted in waves.
+    """
+
+    def __init__(self, dc_session, device_ids, image_type, image, max_in_flight, max_failure_rate):
+        """
+        Class constructor. Instantiates a new ``FirmwareRollout``.
+
+        Args:
+            dc_session (:class:`.DeviceCloud`): The Device Cloud session.
+            device_ids (List): The IDs of the devices to update.
+            image_type (String): `ID_VERSION` or `ID_FILE`.
+            image (String): The firmware version or the path of the file.
+            max_in_flight (Integer): Maximum number of updates running at
+                the same time.
+            max_failure_rate (Float): Ratio of failed updates that stops
+                the rollout.
+        """
+        self._id = uuid.uuid4().hex
+        self._dc_session = dc_session
+        self._image_type = image_type
+        self._image = image
+        self._max_in_flight = max_in_flight
+        self._max_failure_rate = max_failure_rate
+        self._devices = {device_id: {ID_STATUS: STATUS_PENDING, ID_MESSAGE: "", ID_WAVE: None}
+                         for device_id in device_ids}
+        self._pending = deque(device_ids)
+        self._in_flight = set()
+        self._deadlines = {}
+        self._waves = 0
+        self._state = ROLLOUT_STATE_RUNNING
+        self._error = None
+        self._finish_time = None
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+
+    @property
+    def id(self):
+        """
+        Returns the ID of the rollout.
+
+        Returns:
+             String: The ID of the rollout.
+        """
+        return self._id
+
+    @property
+    def finish_time(self):
+        """
+        Returns the monotonic time at which the rollout finished.
+
+        Returns:
+             Float: The finish time, `None` if the rollout is running.
+        """
+        return self._finish_time
+
+    def start(self):
+        """
+        Starts processing the rollout in a background thread.
+        """
+        threading.Thread(target=self._run, name="fw_rollout_%s" % self._id, daemon=True).start()
+
+    def cancel(self):
+        """
+        Requests the cancellation of the rollout.
+        """
+        self._cancel_event.set()
+
+    def to_json(self):
+        """
+        Returns the aggregated status of the rollout in JSON format.
+
+        Returns:
+            Dictionary: The rollout status.
+        """
+        with self._lock:
+            summary = {}
+            for device in self._devices.values():
+                summary[device[ID_STATUS]] = summary.get(device[ID_STATUS], 0) + 1
+            answer = {
+                ID_ROLLOUT_ID: self._id,
+                ID_STATE: self._state,
+                ID_WAVE: self._waves,
+                ID_SUMMARY: summary,
+                ID_DEVICES: {device_id: dict(device) for device_id, device in self._devices.items()}
+            }
+            if self._error:
+                answer[ID_ERROR] = self._error
+        return answer
+
+    def _run(self):
+        """
+        Submits the waves and tracks their progress until the rollout
+        finishes, stops or is canceled.
+        """
+        try:
+            while not self._cancel_event.is_set():
+                if self._state == ROLLOUT_STATE_RUNNING:
+                    self._submit_wave()
+                if not self._in_flight and (not self._pending or self._state != ROLLOUT_STATE_RUNNING):
+                    break
+                if self._cancel_event.wait(FW_ROLLOUT_POLL_INTERVAL):
+                    break
+                self._refresh_wave()
+                self._check_failure_rate()
+            if self._cancel_event.is_set():
+                self._cancel_devices()
+        except Exception as exc:
+            print(exc)
+            with self._lock:
+                self._error = str(exc)
+                self._state = ROLLOUT_STATE_STOPPED
+        finally:
+            with self._lock:
+                if self._state == ROLLOUT_STATE_RUNNING:
+                    self._state = ROLLOUT_STATE_COMPLETED
+                self._finish_time = time.monotonic()
+
+    def _submit_wave(self):
+        """
+        Submits a single update request for as many pending devices as free
+        slots are available.
+        """
+        wave = []
+        while self._pending and len(self._in_flight) + len(wave) < self._max_in_flight:
+            wave.append(self._pending.popleft())
+        if not wave:
+            return
+
+        answer = _submit_firmware_update(self._dc_session, wave, self._image_type, self._image)
+        with self._lock:
+            self._waves += 1
+            for device_id in wave:
+                device = self._devices[device_id]
+                device[ID_WAVE] = self._waves
+                if ID_ERROR in answer:
+                    device[ID_STATUS] = STATUS_FAILED
+                    device[ID_MESSAGE] = answer[ID_ERROR]
+                else:
+                    device[ID_STATUS] = STATUS_ACTIVE
+                    self._in_flight.add(device_id)
+                    self._deadlines[device_id] = time.monotonic() + FW_ROLLOUT_DEVICE_TIMEOUT
+                    firmware_progress_tracker.refresh(device_id)
+
+    def _refresh_wave(self):
+        """
+        Reads the status of all the running updates in bulk.
+
+        Updates without any status for `FW_ROLLOUT_DEVICE_TIMEOUT` seconds
+        are marked as failed, so they do not hold a slot of the wave forever.
+        """
+        if not self._in_flight:
+            return
+
+        try:
+            statuses = _read_firmware_update_statuses(self._dc_session, self._in_flight)
+        except DeviceCloudHttpException as exc:
+            # Keep the previous status and try again in the next poll.
+            print(exc)
+            return
+
+        updated = []
+        now = time.monotonic()
+        with self._lock:
+            for device_id, (status, message) in statuses.items():
+                if device_id not in self._in_flight or status is None:
+                    continue
+                self._devices[device_id][ID_STATUS] = status
+                self._devices[device_id][ID_MESSAGE] = message
+                self._deadlines[device_id] = now + FW_ROLLOUT_DEVICE_TIMEOUT
+                if status != STATUS_ACTIVE:
+                    self._in_flight.discard(device_id)
+                    self._deadlines.pop(device_id, None)
+                if status == STATUS_SUCCESSFUL:
+                    updated.append(device_id)
+            for device_id in [device_id for device_id in self._in_flight if self._deadlines[device_id] < now]:
+                self._devices[device_id][ID_STATUS] = STATUS_FAILED
+                self._devices[device_id][ID_MESSAGE] = ERROR_FW_ROLLOUT_NO_STATUS % FW_ROLLOUT_DEVICE_TIMEOUT
+                self._in_flight.discard(device_id)
+                self._deadlines.pop(device_id)
+        for device_id in updated:
+            device_info_cache.invalidate(device_id)
+        if updated:
+            close_old_connections()
+
+    def _check_failure_rate(self):
+        """
+        Stops submitting new waves if the failure rate is over the limit.
+        """
+        with self._lock:
+            if self._state != ROLLOUT_STATE_RUNNING:
+                return
+            finished = [device[ID_STATUS] for device in self._devices.values()
+                        if device[ID_STATUS] not in (STATUS_PENDING, STATUS_ACTIVE)]
+            if len(finished) < min(FW_ROLLOUT_MIN_FINISHED, len(self._devices)):
+                return
+            failure_rate = finished.count(STATUS_FAILED) / len(finished)
+            if failure_rate > self._max_failure_rate:
+                self._state = ROLLOUT_STATE_STOPPED
+                self._error = ERROR_FW_ROLLOUT_FAILURE_RATE % (failure_rate * 100,
+                                                               self._max_failure_rate * 100)
+
+    def _cancel_devices(self):
+        """
+        Cancels the running updates and marks the pending devices as canceled.
+        """
+        for device_id in list(self._in_flight):
+            answer = _cancel_firmware_update(self._dc_session, device_id)
+            with self._lock:
+                if ID_ERROR in answer:
+                    self._devices[device_id][ID_MESSAGE] = answer[ID_ERROR]
+                else:
+                    self._devices[device_id][ID_STATUS] = STATUS_CANCELED
+        with self._lock:
+            while self._pending:
+                self._devices[self._pending.popleft()][ID_STATUS] = STATUS_CANCELED
+            self._in_flight.clear()
+            self._deadlines.clear()
+            self._state = ROLLOUT_STATE_CANCELED
+
+
+class FirmwareRolloutManager:
+    """
+    Registry of the firmware rollouts of every DRM account.
+    """
+
+    def __init__(self):
+        self._rollouts = {}
+        self._lock = threading.Lock()
+
+    def add(self, account, rollout):
+        """
+        Registers the given rollout for the given account.
+
+        Args:
+            account (String): The account identifier.
+            rollout (:class:`.FirmwareRollout`): The rollout to register.
+        """
+        with self._lock:
+            self._purge()
+            self._rollouts[rollout.id] = (account, rollout)
+
+    def get(self, account, rollout_id):
+        """
+        Returns the rollout with the given ID if it belongs to the given account.
+
+        Args:
+            account (String): The account identifier.
+            rollout_id (String): The ID of the rollout.
+
+        Returns:
+            :class:`.FirmwareRollout`: The rollout, `None` if not found.
+        """
+        with self._lock:
+            entry = self._rollouts.get(rollout_id)
+        if entry is None or entry[0] != account:
+            return None
+        return entry[1]
+
+    def _purge(self):
+        """
+        Removes the rollouts that finished more than the retention time ago.
+        """
+        now = time.monotonic()
+        for rollout_id, (_, rollout) in list(self._rollouts.items()):
+            if rollout.finish_time is not None and now - rollout.finish_time > FW_ROLLOUT_RETENTION:
+                del self._rollouts[rollout_id]
+
+
+class CancelRequestManager:
+    """
+    Dictionary of cancel requests with corresponding callback.
+    """
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def add_callback(self, request_id, callback):
+        """
+        Adds a callback to the dictionary.
         """
         self.callbacks[request_id] = callback
 
@@ -2541,5 +5176,59 @@ def get_cancel_request_manager():
     return cancel_request_manager
 
 
+def get_cli_session_pool():
+    """
+    Returns the CLI session pool.
+    """
+    return cli_session_pool
+
+
+def get_data_usage_cache():
+    """
+    Returns the data usage cache.
+    """
+    return data_usage_cache
+
+
+def get_device_info_cache():
+    """
+    Returns the device information cache.
+    """
+    return device_info_cache
+
+
+def get_directory_listing_cache():
+    """
+    Returns the directory listing cache.
+    """
+    return directory_listing_cache
+
+
+def get_firmware_progress_tracker():
+    """
+    Returns the firmware update progress tracker.
+    """
+    return firmware_progress_tracker
+
+
+def get_firmware_rollout_manager():
+    """
+    Returns the firmware rollout manager.
+    """
+    return firmware_rollout_manager
+
+
 # Default global instance of the cancel requests manager.
 cancel_request_manager = CancelRequestManager()
+# Default global instance of the CLI session pool.
+cli_session_pool = CLISessionPool()
+# Default global instance of the data usage cache.
+data_usage_cache = DataUsageCache()
+# Default global instance of the device information cache.
+device_info_cache = DeviceInfoCache()
+# Default global instance of the directory listing cache.
+directory_listing_cache = DirectoryListingCache()
+# Default global instance of the firmware update progress tracker.
+firmware_progress_tracker = FirmwareProgressTracker()
+# Default global instance of the firmware rollout manager.
+firmware_rollout_manager = FirmwareRolloutManager()
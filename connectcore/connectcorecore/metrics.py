@@ -0,0 +1,262 @@
+# Copyright 2025, Digi International Inc.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import threading
+
+from contextvars import ContextVar
+
+BUCKETS_CALLS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BUCKETS_DURATION = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_SIZE = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE_METRICS = "text/plain; version=0.0.4; charset=utf-8"
+
+DEVICE_OTHER = "other"
+
+HEADER_SERVER_TIMING = "Server-Timing"
+
+METRIC_DEVICE_REQUESTS = "drm_device_requests_total"
+METRIC_REQUESTS = "drm_requests_total"
+METRIC_REQUEST_DURATION = "drm_request_duration_seconds"
+METRIC_RESPONSE_SIZE = "drm_response_size_bytes"
+METRIC_SENT_BYTES = "drm_request_sent_bytes_total"
+METRIC_VIEW_CALLS = "drm_view_calls"
+METRIC_VIEW_DURATION = "drm_view_duration_seconds"
+
+METRICS_MAX_DEVICES = 100
+
+SERVER_TIMING_DRM = "drm"
+
+VIEW_BACKGROUND = "background"
+VIEW_UNRESOLVED = "unresolved"
+
+_current_trace = ContextVar("drm_trace", default=None)
+
+
+class DRMTrace:
+    """
+    DRM calls made while serving a single view request.
+    """
+
+    def __init__(self, view):
+        """
+        Class constructor. Instantiates a new ``DRMTrace``.
+
+        Args:
+            view (String): The name of the view being served.
+        """
+        self.view = view
+        self.calls = 0
+        self.duration = 0.0
+        self.apis = {}
+        self._lock = threading.Lock()
+
+    def add(self, api, duration):
+        """
+        Adds a DRM call to the trace.
+
+        Args:
+            api (String): The DRM API called.
+            duration (Float): The duration of the call in seconds.
+        """
+        with self._lock:
+            self.calls += 1
+            self.duration += duration
+            calls, total = self.apis.get(api, (0, 0.0))
+            self.apis[api] = (calls + 1, total + duration)
+
+    def server_timing(self):
+        """
+        Returns the value of the ``Server-Timing`` header for the trace.
+
+        Returns:
+            String: The total DRM time followed by the time of each API.
+        """
+        with self._lock:
+            entries = ['%s;dur=%.1f;desc="%d calls"' % (SERVER_TIMING_DRM, self.duration * 1000, self.calls)]
+            for api, (calls, total) in sorted(self.apis.items()):
+                name = "%s-%s" % (SERVER_TIMING_DRM, api.replace("/", "-"))
+                entries.append('%s;dur=%.1f;desc="%d calls"' % (name, total * 1000, calls))
+        return ", ".join(entries)
+
+
+class DRMMetrics:
+    """
+    Registry of the DRM call metrics, rendered in the Prometheus text
+    exposition format.
+
+    Only the first `METRICS_MAX_DEVICES` devices get their own series of
+    device requests, the requests to the rest are counted together.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._devices = set()
+        self._lock = threading.Lock()
+
+    def observe_call(self, api, method, status, duration, sent, received, device=None):
+        """
+        Records a DRM call, attributed to the view of the current trace.
+
+        Args:
+            api (String): The DRM API called.
+            method (String): The HTTP method.
+            status (String): The HTTP status code, or `error` if there was
+                no response.
+            duration (Float): The duration of the call in seconds.
+            sent (Integer): The number of bytes sent.
+            received (Integer): The number of bytes received.
+            device (String, optional): The ID of the target device.
+        """
+        trace = _current_trace.get()
+        view = trace.view if trace is not None else VIEW_BACKGROUND
+        if trace is not None:
+            trace.add(api, duration)
+        with self._lock:
+            self._inc(METRIC_REQUESTS, (("view", view), ("api", api), ("method", method), ("status", status)))
+            self._inc(METRIC_SENT_BYTES, (("view", view), ("api", api)), sent)
+            if device is not None:
+                if device not in self._devices:
+                    if len(self._devices) < METRICS_MAX_DEVICES:
+                        self._devices.add(device)
+                    else:
+                        device = DEVICE_OTHER
+                self._inc(METRIC_DEVICE_REQUESTS, (("device", device), ("api", api)))
+            self._observe(METRIC_REQUEST_DURATION, BUCKETS_DURATION, (("view", view), ("api", api)), duration)
+            self._observe(METRIC_RESPONSE_SIZE, BUCKETS_SIZE, (("view", view), ("api", api)), received)
+
+    def observe_view(self, trace):
+        """
+        Records the DRM calls and time spent by a finished view request.
+
+        Args:
+            trace (:class:`.DRMTrace`): The trace of the view request.
+        """
+        labels = (("view", trace.view),)
+        with self._lock:
+            self._observe(METRIC_VIEW_CALLS, BUCKETS_CALLS, labels, trace.calls)
+            self._observe(METRIC_VIEW_DURATION, BUCKETS_DURATION, labels, trace.duration)
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+
+        Returns:
+            String: The metrics.
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append("# TYPE %s counter" % name)
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append("%s%s %s" % (name, _format_labels(labels), _format_value(value)))
+            for name in sorted(self._histograms):
+                lines.append("# TYPE %s histogram" % name)
+                for labels, (buckets, counts, total, count) in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(buckets, counts):
+                        cumulative += bucket_count
+                        bucket_labels = labels + (("le", _format_value(bound)),)
+                        lines.append("%s_bucket%s %d" % (name, _format_labels(bucket_labels), cumulative))
+                    lines.append("%s_bucket%s %d" % (name, _format_labels(labels + (("le", "+Inf"),)), count))
+                    lines.append("%s_sum%s %s" % (name, _format_labels(labels), _format_value(total)))
+                    lines.append("%s_count%s %d" % (name, _format_labels(labels), count))
+        lines.append("")
+        return "\n".join(lines)
+
+    def _inc(self, name, labels, value=1):
+        """
+        Increments a counter. Must be called with the lock held.
+        """
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def _observe(self, name, buckets, labels, value):
+        """
+        Adds an observation to a histogram. Must be called with the lock held.
+        """
+        series = self._histograms.setdefault(name, {})
+        entry = series.get(labels)
+        if entry is None:
+            entry = series[labels] = [buckets, [0] * len(buckets), 0, 0]
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                entry[1][index] += 1
+                break
+        entry[2] += value
+        entry[3] += 1
+
+
+class DRMMetricsMiddleware:
+    """
+    Traces the DRM calls made by every view, records them in the metrics and
+    reports them to the browser in the ``Server-Timing`` header of the AJAX
+    responses.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace = DRMTrace(VIEW_UNRESOLVED)
+        token = _current_trace.set(trace)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_trace.reset(token)
+        if trace.view != VIEW_UNRESOLVED:
+            get_drm_metrics().observe_view(trace)
+        if request.META.get('HTTP_X_REQUESTED_WITH') == 'XMLHttpRequest':
+            response[HEADER_SERVER_TIMING] = trace.server_timing()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        trace = _current_trace.get()
+        if trace is not None and request.resolver_match is not None:
+            trace.view = request.resolver_match.url_name or request.resolver_match.view_name
+        return None
+
+
+def _format_labels(labels):
+    """
+    Returns the given labels in the Prometheus format.
+    """
+    if not labels:
+        return ""
+    return "{%s}" % ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"')
+                                          .replace("\n", "\\n")) for key, value in labels)
+
+
+def _format_value(value):
+    """
+    Returns the given number in the Prometheus format.
+    """
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+# Metrics of the DRM calls.
+drm_metrics = DRMMetrics()
+
+
+def get_drm_metrics():
+    """
+    Returns the metrics of the DRM calls.
+
+    Returns:
+        :class:`.DRMMetrics`: The DRM metrics.
+    """
+    return drm_metrics
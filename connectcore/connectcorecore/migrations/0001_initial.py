@@ -0,0 +1,30 @@
+# Generated by Django 4.0.4 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceHardwareInfo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.CharField(max_length=255)),
+                ('device_id', models.CharField(max_length=64)),
+                ('information', models.JSONField(default=dict)),
+                ('firmware_version', models.CharField(blank=True, max_length=255)),
+                ('updated', models.DateTimeField()),
+                ('valid', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='devicehardwareinfo',
+            constraint=models.UniqueConstraint(fields=('account', 'device_id'), name='unique_account_device_info'),
+        ),
+    ]
@@ -12,6 +12,8 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
+from django.db import models
+
 DEFAULT_LOCATION = (33.813980, -117.923089)  # Batuu (Star Wars Galaxy's Edge)
 
 
@@ -119,3 +121,22 @@ class ConnectCoreDevice:
             "online": self._online,
         }
         return json_dict
+
+
+class DeviceHardwareInfo(models.Model):
+    """
+    Information of a ConnectCore device that only changes with a firmware
+    update, as last read from the device by a DRM account.
+    """
+
+    account = models.CharField(max_length=255)
+    device_id = models.CharField(max_length=64)
+    information = models.JSONField(default=dict)
+    firmware_version = models.CharField(max_length=255, blank=True)
+    updated = models.DateTimeField()
+    valid = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "device_id"], name="unique_account_device_info"),
+        ]
@@ -26,5 +26,6 @@ websocket_urlpatterns = [
     re_path(r'%sws/cli/(?P<device_id>[\w-]+)/(?P<cli_session_id>[\w-]+)$' % ROOT_DIR, consumers.WsCLIConsumer.as_asgi()),
     re_path(r'%sws/datapoints/(?P<device_id>[\w-]+)$' % ROOT_DIR, consumers.DataPointConsumer.as_asgi()),
     re_path(r'%sws/file_upload_progress/(?P<file_name>[\w\.-]+)$' % ROOT_DIR, consumers.FileUploadProgressConsumer.as_asgi()),
+    re_path(r'%sws/firmware_update_progress/(?P<device_id>[\w-]+)$' % ROOT_DIR, consumers.FirmwareUpdateProgressConsumer.as_asgi()),
     re_path(r'%sws/device/(?P<device_id>[\w-]+)$' % ROOT_DIR, consumers.DeviceConsumer.as_asgi()),
 ]
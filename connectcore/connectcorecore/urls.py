@@ -23,6 +23,7 @@ urlpatterns = [
     path('network/', views.network, name='network'),
     path('management/', views.management, name='management'),
     path('history/', views.history, name='history'),
+    path('metrics', views.metrics, name='metrics'),
     path('ajax/register_device', views.register_device, name="register_device"),
     path('ajax/get_device_status', views.get_device_status, name="get_device_status"),
     path('ajax/get_devices', views.get_devices, name='get_devices'),
@@ -36,12 +37,16 @@ urlpatterns = [
     path('ajax/cli_terminate_session', views.cli_terminate_session, name="cli_terminate_session"),
     path('ajax/fs_list_directory', views.fs_list_directory, name="fs_list_directory"),
     path('ajax/fs_remove_file', views.fs_remove_file, name="fs_remove_file"),
+    path('ajax/fs_remove_files', views.fs_remove_files, name="fs_remove_files"),
     path('ajax/fs_upload_file', views.fs_upload_file, name="fs_upload_file"),
+    path('ajax/fs_upload_files', views.fs_upload_files, name="fs_upload_files"),
     path('ajax/fs_download_file', views.fs_download_file, name="fs_download_file"),
+    path('ajax/fs_download_directory', views.fs_download_directory, name="fs_download_directory"),
     path('ajax/fs_create_dir', views.fs_create_dir, name="fs_create_dir"),
     path('ajax/history_temperature', views.history_temperature, name="history_temperature"),
     path('ajax/history_cpu', views.history_cpu, name="history_cpu"),
     path('ajax/history_memory', views.history_memory, name="history_memory"),
+    path('ajax/history_series', views.history_series, name="history_series"),
     path('ajax/reboot_device', views.reboot_device, name="reboot_device"),
     path('ajax/upload_firmware', views.upload_firmware, name="upload_firmware"),
     path('ajax/upload_firmware_to_fileset', views.upload_firmware_to_fileset, name="upload_firmware_to_fileset"),
@@ -51,6 +56,9 @@ urlpatterns = [
     path('ajax/check_firmware_update_running', views.check_firmware_update_running, name="check_firmware_update_running"),
     path('ajax/check_firmware_update_status', views.check_firmware_update_status, name="check_firmware_update_status"),
     path('ajax/check_firmware_update_progress', views.check_firmware_update_progress, name="check_firmware_update_progress"),
+    path('ajax/start_rollout', views.start_rollout, name="start_rollout"),
+    path('ajax/check_rollout_status', views.check_rollout_status, name="check_rollout_status"),
+    path('ajax/cancel_rollout', views.cancel_rollout, name="cancel_rollout"),
     path('ajax/list_repo_files', views.list_repo_files, name="list_repo_files"),
     path('ajax/list_fileset_files', views.list_fileset_files, name="list_fileset_files"),
     path('ajax/get_config', views.get_config, name="get_config"),
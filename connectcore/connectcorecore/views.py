@@ -12,20 +12,30 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
+import hmac
 import os
 
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.template.response import TemplateResponse
 
 from connectcorecore.drm_requests import *
+from connectcorecore.metrics import CONTENT_TYPE_METRICS
 
 ANSWER_SUCCESS = "OK"
 ANSWER_TARGET_NOT_REGISTERED = "not registered"
 
+ARCHIVE_EXTENSION_GZIP = ".tar.gz"
+ARCHIVE_EXTENSION_TAR = ".tar"
+
+CONTENT_TYPE_GZIP = "application/gzip"
+CONTENT_TYPE_TAR = "application/x-tar"
+
+ERROR_CANCEL_FW_ROLLOUT = "Could not cancel firmware rollout."
 ERROR_CANCEL_FW_UPDATE = "Could not cancel firmware update"
 ERROR_CHECK_FW_UPDATE_STATUS = "Could not check firmware update status."
 ERROR_CHECK_FIRMWARE_UPDATE_PROGRESS = "Could not check firmware update progress."
+ERROR_CHECK_FW_ROLLOUT_STATUS = "Could not check firmware rollout status."
 ERROR_CLI_INITIALIZE = "Could not initialize the CLI session."
 ERROR_CLI_SEND_DATA = "Could send data to CLI."
 ERROR_CLI_TERMINATE = "Could not terminate the CLI session."
@@ -46,10 +56,13 @@ ERROR_UPDATE_FIRMWARE = "Could not update firmware."
 ERROR_UPLOAD_FILE = "Could not upload file"
 ERROR_UPLOAD_FIRMWARE = "Could not upload firmware file."
 ERROR_SET_CONFIG = "Could not save configuration"
+ERROR_START_FW_ROLLOUT = "Could not start firmware rollout."
 ERROR_SET_SAMPLE_RATE = "Could not set system monitor settings"
 ERROR_TARGET_NOT_REGISTERED = "Target not registered. Make sure the application is running in the device."
 
+ID_COMPRESS = "compress"
 ID_CONFIGURATION = "configuration"
+ID_DESCENDING = "descending"
 ID_DEVICE_NAME = "device_name"
 ID_DIRECTORY = "directory"
 ID_ELEMENTS = "elements"
@@ -61,6 +74,7 @@ ID_FILE_SET = "file_set"
 ID_IS_FILE = "is_file"
 ID_LED_NAME = "led_name"
 ID_MUSIC_FILE = "music_file"
+ID_PATHS = "paths"
 ID_REDIRECT = "redirect"
 ID_PROVISION_TYPE = "provision_type"
 ID_PROVISION_VALUE = "provision_value"
@@ -81,6 +95,9 @@ TITLE_NO_DEVICES = "No ConnectCore devices found."
 SUBDIR = os.getenv('SUBDIR', None)
 ROOT_DIR = "/" if not SUBDIR else "/%s/" % SUBDIR
 
+# Token required to read the metrics, they are disabled if it is not set.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', None)
+
 
 def dashboard(request):
     if not request_has_params(request):
@@ -88,8 +105,11 @@ def dashboard(request):
 
     if is_authenticated(request):
         if request.method == "GET":
-            return TemplateResponse(request, 'dashboard.html',
-                                    get_request_data(request))
+            data = get_request_data(request)
+            # Prepare a CLI session so the console opens right away.
+            if ID_DEVICE_ID in data:
+                get_cli_session_pool().prewarm(request.session, data[ID_DEVICE_ID])
+            return TemplateResponse(request, 'dashboard.html', data)
     else:
         return redirect_login(request)
 
@@ -139,6 +159,43 @@ def devices(request):
         return redirect_login(request)
 
 
+def metrics(request):
+    """
+    Returns the DRM call metrics in the Prometheus text exposition format.
+
+    The metrics cover the DRM accounts of all the users, so they are only
+    returned to requests with the ``Authorization: Bearer <METRICS_TOKEN>``
+    header. The endpoint is disabled if the ``METRICS_TOKEN`` environment
+    variable is not set.
+
+    Args:
+        request (:class:`.WSGIRequest`): the HTTP request.
+
+    Returns:
+        An HTTP response with the metrics.
+    """
+    if not has_metrics_token(request):
+        return HttpResponse(status=401)
+    return HttpResponse(get_drm_metrics().render(), content_type=CONTENT_TYPE_METRICS)
+
+
+def has_metrics_token(request):
+    """
+    Returns whether the given request carries the metrics token.
+
+    Args:
+        request (:class:`.WSGIRequest`): the HTTP request.
+
+    Returns:
+        Boolean: `True` if the metrics token is configured and the request
+            carries it, `False` otherwise.
+    """
+    if not METRICS_TOKEN:
+        return False
+    authorization = request.META.get('HTTP_AUTHORIZATION', "")
+    return hmac.compare_digest(authorization.encode("utf-8"), ("Bearer %s" % METRICS_TOKEN).encode("utf-8"))
+
+
 def verify_parameters(request):
     """
     Verifies the URL parameters to check if the given device ID matches an actual
@@ -152,10 +209,6 @@ def verify_parameters(request):
          value, if the parameters were not successfully verified.
     """
     if is_authenticated(request):
-        cc_devices = get_cc_devices(request)
-        if len(cc_devices) == 0:
-            return JsonResponse({ID_REDIRECT: ROOT_DIR})
-
         # Get the device ID and device name from the POST request.
         data = json.loads(request.body.decode(request.encoding))
         device_id = data[ID_DEVICE_ID]
@@ -165,13 +218,7 @@ def verify_parameters(request):
 
         # Find out if the supplied parameters correspond to an actual device, if
         # not redirect to the devices page.
-        found = False
-        for device in cc_devices:
-            if device.id == device_id:
-                found = True
-                break
-
-        if not found:
+        if get_cc_device(request, device_id) is None:
             return JsonResponse({ID_REDIRECT: ROOT_DIR})
         return JsonResponse({ID_VALID: True}, status=200)
 
@@ -223,7 +270,8 @@ def register_device(request):
 
 def get_devices(request):
     """
-    Returns a JSON response containing the ConnectCore devices of the DRM account.
+    Returns a JSON response containing a page of the ConnectCore devices of
+    the DRM account.
 
     Args:
          request (:class:`.WSGIRequest`): The request used to check if the
@@ -231,19 +279,30 @@ def get_devices(request):
 
     Returns:
         :class:`.JsonResponse`: A JSON response with the list of the ConnectCore
-            devices within the DRM account.
+            devices of the page, the total number of devices and the cursor
+            of the next page.
     """
     error = check_ajax_request(request)
     if error:
         return error
 
-    cc_devices = get_cc_devices(request)
-    if len(cc_devices) > 0:
-        return JsonResponse({ID_DEVICES: [device.to_json() for device in cc_devices]},
-                            status=200)
-    return JsonResponse({ID_ERROR_TITLE: TITLE_NO_DEVICES,
-                         ID_ERROR_MSG: MESSAGE_NO_DEVICES,
-                         ID_ERROR_GUIDE: MESSAGE_SETUP_MODULES})
+    data = json.loads(request.body.decode(request.encoding)) if request.body else {}
+
+    try:
+        page = get_cc_devices(request, cursor=data.get(ID_CURSOR), search=data.get(ID_SEARCH),
+                              group=data.get(ID_GROUP),
+                              page_size=int(data.get(ID_PAGE_SIZE, DEVICES_PAGE_SIZE)))
+    except Exception as exc:
+        return get_exception_response(exc)
+
+    filtered = data.get(ID_CURSOR) or data.get(ID_SEARCH) or data.get(ID_GROUP)
+    if page[ID_COUNT] == 0 and not filtered:
+        return JsonResponse({ID_ERROR_TITLE: TITLE_NO_DEVICES,
+                             ID_ERROR_MSG: MESSAGE_NO_DEVICES,
+                             ID_ERROR_GUIDE: MESSAGE_SETUP_MODULES})
+    return JsonResponse({ID_DEVICES: [device.to_json() for device in page[ID_DEVICES]],
+                         ID_COUNT: page[ID_COUNT],
+                         ID_CURSOR: page[ID_CURSOR]}, status=200)
 
 
 def get_device_info(request):
@@ -459,6 +518,10 @@ def cli_init_session(request):
     device_id = data[ID_DEVICE_ID]
 
     try:
+        # Use the session prepared for the device, if any.
+        session_id = get_cli_session_pool().acquire(request.session, device_id)
+        if session_id is not None:
+            return JsonResponse({ID_SESSION_ID: session_id}, status=200)
         answer = initialize_cli_session(request, device_id)
         if answer is not None:
             if ID_SESSION_ID in answer:
@@ -621,6 +684,76 @@ def fs_upload_file(request):
         return get_exception_response(exc)
 
 
+def fs_remove_files(request):
+    """
+    Removes the files for the device ID and paths contained in the request
+    using a single request to the device.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+         :class:`.JsonResponse`: a JSON with the result of each removal.
+    """
+    error = check_ajax_request(request)
+    if error:
+        return error
+
+    data = json.loads(request.body.decode(request.encoding))
+    device_id = data[ID_DEVICE_ID]
+    paths = data[ID_PATHS]
+
+    try:
+        answer = execute_file_operations(
+            request, device_id,
+            [{ID_OPERATION: FS_OPERATION_REMOVE, ID_PATH: path} for path in paths])
+        if answer is not None:
+            if ID_ERROR in answer:
+                return JsonResponse({ID_ERROR: answer[ID_ERROR]}, status=400)
+            return JsonResponse(answer, status=200)
+        return JsonResponse({ID_ERROR: ERROR_REMOVE_FILE}, status=400)
+    except Exception as exc:
+        return get_exception_response(exc)
+
+
+def fs_upload_files(request):
+    """
+    Uploads the files for the device ID and directory contained in the
+    request using a single request to the device.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+         :class:`.JsonResponse`: a JSON with the result of each upload.
+    """
+    error = check_ajax_request(request)
+    if error:
+        return error
+
+    device_id = request.POST[ID_DEVICE_ID]
+    directory = request.POST[ID_DIRECTORY]
+    if not directory.endswith("/"):
+        directory = directory + "/"
+
+    operations = []
+    for file in request.FILES.getlist(ID_FILE):
+        operations.append({ID_OPERATION: FS_OPERATION_PUT,
+                           ID_PATH: directory + file.name,
+                           ID_DATA: file.file.getvalue() if not file.multiple_chunks()
+                           else file.read()})
+
+    try:
+        answer = execute_file_operations(request, device_id, operations)
+        if answer is not None:
+            if ID_ERROR in answer:
+                return JsonResponse({ID_ERROR: answer[ID_ERROR]}, status=400)
+            return JsonResponse(answer, status=200)
+        return JsonResponse({ID_ERROR: ERROR_UPLOAD_FILE}, status=400)
+    except Exception as exc:
+        return get_exception_response(exc)
+
+
 def fs_download_file(request):
     """
     Downloads the file for the device ID and path contained in the request.
@@ -650,6 +783,39 @@ def fs_download_file(request):
         return get_exception_response(exc)
 
 
+def fs_download_directory(request):
+    """
+    Downloads the directory for the device ID and path contained in the
+    request as a tar archive, optionally compressed with gzip.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+         :class:`.StreamingHttpResponse`: the archive streamed as it is
+            generated.
+    """
+    error = check_ajax_request(request)
+    if error:
+        return error
+
+    data = json.loads(request.body.decode(request.encoding))
+    device_id = data[ID_DEVICE_ID]
+    path = data[ID_PATH]
+    compress = data.get(ID_COMPRESS, False)
+
+    try:
+        archive = download_directory_archive(request, device_id, path, compress=compress)
+        file_name = (path.rstrip("/").split("/")[-1] or device_id) + \
+            (ARCHIVE_EXTENSION_GZIP if compress else ARCHIVE_EXTENSION_TAR)
+        response = StreamingHttpResponse(archive, status=200,
+                                         content_type=CONTENT_TYPE_GZIP if compress else CONTENT_TYPE_TAR)
+        response["Content-Disposition"] = "attachment; filename=\"%s\"" % file_name
+        return response
+    except Exception as exc:
+        return get_exception_response(exc)
+
+
 def fs_create_dir(request):
     """
     Creates a directory for the device ID and path contained in the request.
@@ -742,6 +908,35 @@ def history_memory(request):
         return get_exception_response(exc)
 
 
+def history_series(request):
+    """
+    Returns the history of several data streams in a single response.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+         :class:`.JsonResponse`: a JSON with the data points of each series.
+    """
+    error = check_ajax_request(request)
+    if error:
+        return error
+
+    try:
+        data = json.loads(request.body.decode(request.encoding))
+        series = data[ID_SERIES]
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({ID_ERROR: ERROR_INVALID_HISTORY}, status=400)
+    if not isinstance(series, list) or not 0 < len(series) <= HISTORY_MAX_SERIES \
+            or not all(isinstance(spec, dict) and ID_DEVICE_ID in spec and ID_STREAM in spec for spec in series):
+        return JsonResponse({ID_ERROR: ERROR_INVALID_HISTORY}, status=400)
+
+    try:
+        return JsonResponse(get_history(request, series, bool(data.get(ID_ALIGN))), status=200)
+    except Exception as exc:
+        return get_exception_response(exc)
+
+
 def reboot_device(request):
     """
     Reboots the device with the device ID contained in the request.
@@ -1005,6 +1200,95 @@ def cancel_firmware_update(request):
         return get_exception_response(exc)
 
 
+def start_rollout(request):
+    """
+    Starts a firmware rollout over the devices or the group contained in the
+    request.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+         :class:`.JsonResponse`: a JSON with the result.
+    """
+    error = check_ajax_request(request)
+    if error:
+        return error
+
+    data = json.loads(request.body.decode(request.encoding))
+
+    try:
+        answer = start_firmware_rollout(
+            request, device_ids=data.get(ID_DEVICES), group=data.get(ID_GROUP),
+            version=data.get(ID_FW_VERSION), file=data.get(ID_FILE),
+            max_in_flight=data.get(ID_MAX_IN_FLIGHT, FW_ROLLOUT_MAX_IN_FLIGHT),
+            max_failure_rate=data.get(ID_MAX_FAILURE_RATE, FW_ROLLOUT_MAX_FAILURE_RATE))
+        if answer is not None:
+            if ID_ERROR in answer:
+                return JsonResponse({ID_ERROR: answer[ID_ERROR]}, status=400)
+            return JsonResponse(answer, status=200)
+        return JsonResponse({ID_ERROR: ERROR_START_FW_ROLLOUT}, status=400)
+    except Exception as exc:
+        return get_exception_response(exc)
+
+
+def check_rollout_status(request):
+    """
+    Returns the aggregated status of the firmware rollout with the ID
+    contained in the request.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+         :class:`.JsonResponse`: a JSON with the result.
+    """
+    error = check_ajax_request(request)
+    if error:
+        return error
+
+    data = json.loads(request.body.decode(request.encoding))
+    rollout_id = data[ID_ROLLOUT_ID]
+
+    try:
+        answer = get_firmware_rollout_status(request, rollout_id)
+        if answer is not None:
+            if ID_ERROR in answer and ID_STATE not in answer:
+                return JsonResponse({ID_ERROR: answer[ID_ERROR]}, status=400)
+            return JsonResponse(answer, status=200)
+        return JsonResponse({ID_ERROR: ERROR_CHECK_FW_ROLLOUT_STATUS}, status=400)
+    except Exception as exc:
+        return get_exception_response(exc)
+
+
+def cancel_rollout(request):
+    """
+    Cancels the firmware rollout with the ID contained in the request.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+         :class:`.JsonResponse`: a JSON with the result.
+    """
+    error = check_ajax_request(request)
+    if error:
+        return error
+
+    data = json.loads(request.body.decode(request.encoding))
+    rollout_id = data[ID_ROLLOUT_ID]
+
+    try:
+        answer = cancel_firmware_rollout(request, rollout_id)
+        if answer is not None:
+            if ID_ERROR in answer:
+                return JsonResponse({ID_ERROR: answer[ID_ERROR]}, status=400)
+            return JsonResponse(answer, status=200)
+        return JsonResponse({ID_ERROR: ERROR_CANCEL_FW_ROLLOUT}, status=400)
+    except Exception as exc:
+        return get_exception_response(exc)
+
+
 def list_repo_files(request):
     """
     Lists all the firmware files belonging to the device type specified in the request.
@@ -1191,8 +1475,14 @@ def get_data_usage(request):
     if error:
         return error
 
+    data = json.loads(request.body.decode(request.encoding)) if request.body else {}
+
     try:
-        answer = get_account_data_usage(request)
+        answer = get_account_data_usage(request, device_id=data.get(ID_DEVICE_ID),
+                                        sort=data.get(ID_SORT, ID_USAGE),
+                                        descending=data.get(ID_DESCENDING, True),
+                                        page=int(data.get(ID_PAGE, 0)),
+                                        page_size=int(data.get(ID_PAGE_SIZE, DATA_USAGE_PAGE_SIZE)))
         if answer is not None:
             if ID_ERROR in answer:
                 return JsonResponse({ID_ERROR: answer[ID_ERROR]}, status=400)
@@ -43,6 +43,7 @@ const ID_CPU_LOAD = "cpu_load";
 const ID_CPU_TEMPERATURE = "cpu_temperature";
 const ID_CPU_UPTIME = "cpu_uptime";
 const ID_CURRENT_DIR = "current_dir";
+const ID_CURSOR = "cursor";
 const ID_DATA = "data";
 const ID_DATA_USAGE_DEVICES = "data_usage_devices";
 const ID_DATA_USAGE_MONITORS = "data_usage_monitors";
@@ -116,8 +117,10 @@ const ID_PATH = "path";
 const ID_PRODUCTION = "production";
 const ID_PROGRESS = "progress";
 const ID_SAMPLE_RATE = "sample_rate";
+const ID_SEARCH = "search";
 const ID_SECURITY = "security_related";
 const ID_SERIAL_NUMBER = "serial_number";
+const ID_SERIES = "series";
 const ID_SESSION_ID = "session_id";
 const ID_SIZE = "size";
 const ID_STATUS = "status";
@@ -45,6 +45,7 @@ const ERROR_SESSION_CLOSING = "Previous console session is closing, please wait
 var term;
 var cliSessionID;
 var cliSocket;
+var cliSocketInput = true;
 var cliSessionTerminating = false;
 var fitAddon;
 var commandsToSend = [];
@@ -229,6 +230,15 @@ function sendCLIData(data) {
     // Check if CLI session exists.
     if (cliSessionID == null)
         return;
+    // Send the data through the CLI web socket if it is open. The server
+    // merges the input received in a short window into a single write.
+    if (cliSocket != null && cliSocket != "undefined" && cliSocket.readyState == WebSocket.OPEN && cliSocketInput) {
+        cliSocket.send(JSON.stringify({
+            "type": CLI_MESSAGE_TYPE_DATA,
+            "data": data
+        }));
+        return;
+    }
     // Add the command to the buffer.
     commandsToSend.push(data);
     // If the send timer is scheduled and there is enough data to send,
@@ -348,19 +358,33 @@ function subscribeCLISession(sessionID) {
     // Create the web socket.
     var socketPrefix = window.location.protocol == "https:" ? "wss" : "ws";
     cliSocket = new WebSocket(socketPrefix + "://" + window.location.host + getAppPath() + "ws/cli/" + device.getDeviceID() + "/" + sessionID);
+    cliSocketInput = true;
+    // CLI output is received as binary frames.
+    cliSocket.binaryType = "arraybuffer";
     // Define the callback to be notified when data is received in the web socket.
     cliSocket.onmessage = function(e) {
         if (!isDashboardShowing() || term == null || term == "undefined")
             return;
 
+        // Binary frames contain the CLI output.
+        if (e.data instanceof ArrayBuffer) {
+            if (isConsoleShowing())
+                term.write(new Uint8Array(e.data));
+            return;
+        }
+
         var event = JSON.parse(e.data);
         var type = event[ID_TYPE];
         switch (type) {
             case CLI_MESSAGE_TYPE_DATA:
-                var data = event[ID_DATA];
-                var decodedData = atob(data);
-                if (isConsoleShowing())
-                    term.write(decodedData);
+                // The socket did not accept the input, send it through AJAX.
+                if (event[ID_DATA] != null) {
+                    cliSocketInput = false;
+                    sendCLIData(event[ID_DATA]);
+                    break;
+                }
+                // Error writing the terminal input.
+                checkErrorResponse(event, false);
                 break;
             case CLI_MESSAGE_TYPE_TERMINATE:
             case CLI_MESSAGE_TYPE_ERROR:
@@ -86,6 +86,9 @@ function readDataUsage() {
     // Send request to change the LED status.
     $.post(
         "../ajax/get_data_usage",
+        JSON.stringify({
+            "device_id": getDeviceID()
+        }),
         function(data) {
             // Process only if the panel is showing.
             if (!isDataUsageShowing())
@@ -126,7 +129,7 @@ function updateDataUsageValues(response) {
     var dataUsageDevices = response[ID_DATA_USAGE_DEVICES];
     var dataUsageDevicesPercent = 0;
     var dataUsageWebPercent = 0;
-    var dataUsageCurrentDevice = 0;
+    var dataUsageCurrentDevice = response[ID_USAGE];
     var graphicDevicesElement = document.getElementById(ID_DATA_USAGE_GRAPHIC_DEVICES);
     var graphicWebElement = document.getElementById(ID_DATA_USAGE_GRAPHIC_WEB);
     // Calculate percent for data devices.
@@ -137,13 +140,6 @@ function updateDataUsageValues(response) {
     // Calculate values for totals.
     dataUsageDevices = sizeToHumanRead(dataUsageDevices * 1000 * 1000);  // This usage is given in MB.
     dataUsageWeb = sizeToHumanRead(dataUsageWeb * 1000 * 1000);  // This usage is given in MB.
-    // Retrieve the data usage for the current device.
-    for (var device in response[ID_DEVICES]) {
-        if (response[ID_DEVICES][device][ID_DEVICE_ID].toLowerCase() == getDeviceID().toLowerCase()) {
-            dataUsageCurrentDevice = response[ID_DEVICES][device][ID_USAGE];
-            break;
-        }
-    }
     // Set percentage size of graphics.
     graphicDevicesElement.style.width = dataUsageDevicesPercent + "%";
     graphicWebElement.style.width = dataUsageWebPercent + "%";
@@ -29,6 +29,7 @@ const ID_ADD_DEVICE_DIALOG_ERROR = "add_device_error";
 const ID_ADD_DEVICE_DIALOG_INPUT = "add_device_input";
 const ID_CONTINUE_BUTTON = "continue-button";
 const ID_DEVICES_LIST = "devices-list";
+const ID_DEVICES_SEARCH = "devices-search";
 const ID_REFRESH_BUTTON = "refresh-button";
 
 const MESSAGE_LOADING_DEVICES = "Loading devices..."
@@ -42,6 +43,10 @@ const REGEX_DEVICE_ID = "^(?:[a-fA-F0-9]{8}-){3}[a-fA-F0-9]{8}$";
 const REGEX_DEVICE_MAC = "^(?:[a-fA-F0-9]{2}:?){5}[a-fA-F0-9]{2}$";
 const REGEX_DEVICE_IMEI = "^[0-9]{15}$";
 
+const SCROLL_LOAD_MARGIN = 100;
+
+const SEARCH_DELAY = 400;
+
 const TEMPLATE_COMPONENT_DATA = "" +
     "{" +
     "   \"" + ID_VISIBLE + "\" : {0}," +
@@ -74,6 +79,10 @@ const TEMPLATE_DEVICE_LIST_ENTRY = "" +
 
 // Variables.
 var devices = [];
+var devicesCursor = null;
+var devicesRequest = 0;
+var loadingDevices = false;
+var searchTimer = null;
 
 // Lists DRM devices.
 function listDevices() {
@@ -87,10 +96,33 @@ function listDevices() {
     showInfoPopup(false);
     // Show loading dialog.
     showLoadingPopup(true, MESSAGE_LOADING_DEVICES);
+    // Read the first page.
+    readDevicesPage(null);
+}
+
+// Lists the next page of DRM devices, if any.
+function listMoreDevices() {
+    if (devicesCursor == null || loadingDevices)
+        return;
+    readDevicesPage(devicesCursor);
+}
+
+// Reads a page of DRM devices, the first one if the cursor is null.
+function readDevicesPage(cursor) {
+    // Answers of previous searches are discarded.
+    let request = ++devicesRequest;
+    loadingDevices = true;
     // Send the request.
     $.post(
         getPostURL("ajax/get_devices"),
+        JSON.stringify({
+            "cursor": cursor,
+            "search": document.getElementById(ID_DEVICES_SEARCH).value
+        }),
         function(data) {
+            if (request != devicesRequest)
+                return;
+            loadingDevices = false;
             // Hide the loading panel.
             showLoadingPopup(false);
             // Process answer.
@@ -101,6 +133,9 @@ function listDevices() {
             updateContinueButton();
         }
     ).fail(function(response) {
+        if (request != devicesRequest)
+            return;
+        loadingDevices = false;
         // Hide the loading panel.
         showLoadingPopup(false);
         // Process error.
@@ -110,6 +145,23 @@ function listDevices() {
     });
 }
 
+// Lists the devices matching the search text after the user stops typing.
+function searchDevices() {
+    if (searchTimer != null)
+        window.clearTimeout(searchTimer);
+    searchTimer = window.setTimeout(function() {
+        searchTimer = null;
+        listDevices();
+    }, SEARCH_DELAY);
+}
+
+// Lists the next page of devices when the list is scrolled to the bottom.
+function onDevicesListScroll(event) {
+    let list = event.target;
+    if (list.scrollTop + list.clientHeight >= list.scrollHeight - SCROLL_LOAD_MARGIN)
+        listMoreDevices();
+}
+
 // Processes the answer of the list devices request.
 function processListDevicesAnswer(response) {
     // Check if there was any error in the request.
@@ -117,6 +169,8 @@ function processListDevicesAnswer(response) {
         // Do not continue.
         return;
     }
+    // Save the cursor of the next page.
+    devicesCursor = response[ID_CURSOR];
     // Get the devices from the JSON response.
     let readDevices = response[ID_DEVICES];
     // Check if the list of devices contains any device.
@@ -146,6 +200,7 @@ function processListDevicesAnswer(response) {
 function clearDevices() {
     unselectDevices();
     devices = [];
+    devicesCursor = null;
     $("#" + ID_DEVICES_LIST).html("");
 }
 
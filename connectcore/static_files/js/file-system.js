@@ -31,6 +31,7 @@ const ID_FILE_SYSTEM_PANEL = "filesystem_panel";
 const ID_FILE_SYSTEM_REMOVE_FILE_BUTTON = "filesystem_remove_file_button";
 const ID_FILE_SYSTEM_TOOLBAR = "filesystem_toolbar";
 const ID_FILE_TO_UPLOAD = "file_to_upload";
+const ID_RESULTS = "results";
 
 const CLASS_FA_FILE = "fa-file";
 const CLASS_FILE_SYSTEM_BUTTON_DISABLED = "filesystem-button-disabled";
@@ -44,9 +45,12 @@ const FS_TYPE_DIRECTORY = "dir";
 const TITLE_CONFIRM_REMOVE = "Confirm Remove";
 
 const MESSAGE_CONFIRM_REMOVE = "Are you sure you want to remove the selected file?";
+const MESSAGE_CONFIRM_REMOVE_FILES = "Are you sure you want to remove the {0} selected files?";
 
 const PREFIX_FS = "fs_";
 
+const ARCHIVE_EXTENSION = ".tar.gz";
+
 const REGEX_DIRECTORY_NAME = '^[^\\s^\x00-\x1f\\?*:"";<>|\\/.][^\x00-\x1f\\?*:"";<>|\\/]*[^\\s^\x00-\x1f\\?*:"";<>|\\/.]+$';
 
 const TEMPLATE_DIRECTORY = "" +
@@ -57,7 +61,7 @@ const TEMPLATE_DIRECTORY = "" +
     "    <div class='filesystem-entry-last-modified'>{4}</div>" +
     "</div>";
 const TEMPLATE_FILE = "" +
-    "<div id='fs_{0}' class='filesystem-entry' title='{1}' onclick='selectFileSystemEntry(\"fs_{2}\")' ondblclick='downloadFile(\"{3}\")'>" +
+    "<div id='fs_{0}' class='filesystem-entry' title='{1}' onclick='selectFileSystemEntry(\"fs_{2}\", event)' ondblclick='downloadFile(\"{3}\")'>" +
     "    <div class='fas fa-file fa-lg filesystem-entry-icon'></div>" +
     "    <div class='filesystem-entry-name'>{4}</div>" +
     "    <div class='filesystem-entry-size'>{5}</div>" +
@@ -72,6 +76,7 @@ const ROOT_DIRECTORY = "/";
 // Variables.
 var currentDirectory = null;
 var selectedFileSystemEntry = null;
+var selectedFileSystemEntries = [];
 var filesystemResizeObserver = null;
 
 // Opens the file system panel.
@@ -171,36 +176,56 @@ function clearFileSystemEntries() {
 }
 
 // Enables/disabled the file system buttons.
-function enableFileSystemButtons(enable) {
+function enableFileSystemButtons(enable, enableDownload=enable) {
     // Initialize variables.
     var downloadButton = document.getElementById(ID_FILE_SYSTEM_DOWNLOAD_FILE_BUTTON);
     var removeButton = document.getElementById(ID_FILE_SYSTEM_REMOVE_FILE_BUTTON);
     // Apply enable state.
     if (!enable) {
-        downloadButton.disabled = true;
         removeButton.disabled = true;
-        downloadButton.classList.add(CLASS_FILE_SYSTEM_BUTTON_DISABLED)
         removeButton.classList.add(CLASS_FILE_SYSTEM_BUTTON_DISABLED)
     } else {
-        downloadButton.disabled = false;
         removeButton.disabled = false;
-        downloadButton.classList.remove(CLASS_FILE_SYSTEM_BUTTON_DISABLED)
         removeButton.classList.remove(CLASS_FILE_SYSTEM_BUTTON_DISABLED)
     }
+    // Only one file can be downloaded at a time.
+    if (!enableDownload) {
+        downloadButton.disabled = true;
+        downloadButton.classList.add(CLASS_FILE_SYSTEM_BUTTON_DISABLED)
+    } else {
+        downloadButton.disabled = false;
+        downloadButton.classList.remove(CLASS_FILE_SYSTEM_BUTTON_DISABLED)
+    }
 }
 
-// Selects the given file system entry.
-function selectFileSystemEntry(entryID) {
-    // Unselect all entries.
-    unselectFileSystemEntries();
-    // Set selected style to the selected device div.
+// Selects the given file system entry. With the Ctrl (or Cmd) key pressed,
+// the entry is added to or removed from the current selection.
+function selectFileSystemEntry(entryID, event=null) {
     var entryElement = document.getElementById(entryID)
-    if (entryElement != null)
-        entryElement.classList.add(CLASS_FILE_SYSTEM_ENTRY_SELECTED);
+    if (event != null && (event.ctrlKey || event.metaKey) && selectedFileSystemEntries.length > 0) {
+        // Toggle the entry.
+        var index = selectedFileSystemEntries.indexOf(entryID);
+        if (index >= 0) {
+            selectedFileSystemEntries.splice(index, 1);
+            if (entryElement != null)
+                entryElement.classList.remove(CLASS_FILE_SYSTEM_ENTRY_SELECTED);
+        } else {
+            selectedFileSystemEntries.push(entryID);
+            if (entryElement != null)
+                entryElement.classList.add(CLASS_FILE_SYSTEM_ENTRY_SELECTED);
+        }
+    } else {
+        // Unselect all entries.
+        unselectFileSystemEntries();
+        // Set selected style to the selected device div.
+        if (entryElement != null)
+            entryElement.classList.add(CLASS_FILE_SYSTEM_ENTRY_SELECTED);
+        selectedFileSystemEntries = [entryID];
+    }
     // Save selected entry.
-    selectedFileSystemEntry = entryID;
+    selectedFileSystemEntry = selectedFileSystemEntries.length == 1 ? selectedFileSystemEntries[0] : null;
     // Enable buttons.
-    enableFileSystemButtons(true);
+    enableFileSystemButtons(selectedFileSystemEntries.length > 0, selectedFileSystemEntry != null);
 }
 
 // Unselects all the file system entries.
@@ -213,8 +238,9 @@ function unselectFileSystemEntries() {
         var entry = children[i].children[0];
         entry.classList.remove(CLASS_FILE_SYSTEM_ENTRY_SELECTED);
     }
-    // Reset selected entry.
+    // Reset selected entries.
     selectedFileSystemEntry = null;
+    selectedFileSystemEntries = [];
     // Disable buttons.
     enableFileSystemButtons(false);
 }
@@ -381,8 +407,73 @@ function processDownloadFileResponse(response) {
     }
     // Obtain file name.
     var fileName = selectedFileSystemEntry.substring(PREFIX_FS.length)
-    // Convert the Byte Data to BLOB object.
-    var blob = new Blob([response], { type: "application/octetstream" });
+    // Convert the Byte Data to BLOB object and save it.
+    saveBlob(new Blob([response], { type: "application/octetstream" }), fileName);
+    // Hide the loading status.
+    showFileSystemLoading(false);
+}
+
+// Downloads the current directory as a compressed archive.
+function downloadCurrentDirectory() {
+    // Sanity checks.
+    if (currentDirectory == null)
+        return;
+    // Build archive name.
+    var directoryName = currentDirectory.replace(/\/+$/, "");
+    directoryName = directoryName.substring(directoryName.lastIndexOf("/") + 1);
+    if (directoryName == "")
+        directoryName = getDeviceID();
+    var archiveName = directoryName + ARCHIVE_EXTENSION;
+    // Show loading panel.
+    showFileSystemLoading(true);
+    // Prepare data.
+    var data = JSON.stringify({
+            "device_id": getDeviceID(),
+            "path": currentDirectory,
+            "compress": true
+        });
+    // Send request
+    $.ajax({
+        type: 'POST',
+        url: "../ajax/fs_download_directory",
+        data: data,
+        cache: false,
+        async: true,
+        xhr: function() {
+            var xhr = new XMLHttpRequest();
+            xhr.onreadystatechange = function () {
+                if (xhr.readyState == 2) {
+                    if (xhr.status == 200)
+                        xhr.responseType = "blob";
+                    else
+                        xhr.responseType = "text";
+                }
+            };
+            return xhr;
+        },
+        success: function(response) {
+            // Process only if the file system window is showing.
+            if (!isFileSystemShowing())
+                return;
+            // Save the archive.
+            saveBlob(new Blob([response], { type: "application/gzip" }), archiveName);
+            // Hide the loading status.
+            showFileSystemLoading(false);
+        },
+        error: function(response) {
+            // Process only if the file system window is showing.
+            if (!isFileSystemShowing())
+                return;
+            // Process error.
+            processAjaxErrorResponse(response);
+            // Hide the loading status.
+            showFileSystemLoading(false);
+        }
+    });
+}
+
+// Saves the given BLOB object with the given file name.
+function saveBlob(blob, fileName) {
     // Check the Browser type and download the File.
     var isIE = false || !!document.documentMode;
     if (isIE) {
@@ -397,13 +488,14 @@ function processDownloadFileResponse(response) {
         a[0].click();
         $("body").remove(a);
     }
-    // Hide the loading status.
-    showFileSystemLoading(false);
 }
 
 // Asks user to confirm file removal.
 function askRemoveFile() {
-    showConfirmDialog(TITLE_CONFIRM_REMOVE, MESSAGE_CONFIRM_REMOVE,
+    var message = MESSAGE_CONFIRM_REMOVE;
+    if (selectedFileSystemEntries.length > 1)
+        message = MESSAGE_CONFIRM_REMOVE_FILES.format(selectedFileSystemEntries.length);
+    showConfirmDialog(TITLE_CONFIRM_REMOVE, message,
         function() {
             // Remove the file.
             removeSelectedFile();
@@ -414,8 +506,13 @@ function askRemoveFile() {
     );
 }
 
-// Removes the selected file.
+// Removes the selected files.
 function removeSelectedFile() {
+    // Remove several files with a single request.
+    if (selectedFileSystemEntries.length > 1) {
+        removeFiles(selectedFileSystemEntries.map(entryID => entryID.substring(PREFIX_FS.length)));
+        return;
+    }
     // Sanity checks.
     if (selectedFileSystemEntry == null)
         return;
@@ -474,26 +571,72 @@ function processRemoveFileResponse(response) {
     }
 }
 
+// Attempts to remove the given file names with a single request.
+function removeFiles(fileNames) {
+    // Show loading panel.
+    showFileSystemLoading(true);
+    // Send request.
+    $.post(
+        "../ajax/fs_remove_files",
+        JSON.stringify({
+            "device_id": getDeviceID(),
+            "paths": fileNames.map(fileName => currentDirectory + fileName)
+        }),
+        function(data) {
+            // Process only if the file system window is showing.
+            if (!isFileSystemShowing())
+                return;
+            // Process answer.
+            processRemoveFilesResponse(data);
+        }
+    ).fail(function(response) {
+        // Process only if the file system window is showing.
+        if (!isFileSystemShowing())
+            return;
+        // Process error.
+        processAjaxErrorResponse(response);
+        // Hide the loading status.
+        showFileSystemLoading(false);
+    });
+}
+
+// Processes the remove files response.
+function processRemoveFilesResponse(response) {
+    // Check if there was any error in the request.
+    if (checkErrorResponse(response, false)) {
+        // Hide the loading status.
+        showFileSystemLoading(false);
+    } else {
+        // Check the result of each file.
+        for (var result of response[ID_RESULTS])
+            checkErrorResponse(result, false);
+        // List directory contents again.
+        listDirectory(currentDirectory);
+    }
+}
+
 // Opens the file browser.
 function openFileBrowser() {
     document.getElementById(ID_FILE_TO_UPLOAD).click();
 }
 
-// Attempts to upload the given file.
-function uploadFile(file) {
-    // Build file path.
-    var path = currentDirectory + file.name;
+// Attempts to upload the given files.
+function uploadFiles(files) {
+    // Sanity checks.
+    if (files == null || files.length == 0)
+        return;
     // Show loading panel.
     showFileSystemLoading(true);
     // Prepare data.
     var formData = new FormData();
     formData.append("device_id", getDeviceID());
-    formData.append("path", path);
-    formData.append("file", file);
+    formData.append("directory", currentDirectory);
+    for (var file of files)
+        formData.append("file", file);
     // Send request.
     $.ajax({
         type: 'POST',
-        url: "../ajax/fs_upload_file",
+        url: "../ajax/fs_upload_files",
         data: formData,
         cache: false,
         async: true,
@@ -505,7 +648,7 @@ function uploadFile(file) {
             if (!isFileSystemShowing())
                 return;
             // Process answer.
-            processUploadFileResponse(response);
+            processUploadFilesResponse(response);
         },
         error: function(response) {
             // Process only if the file system window is showing.
@@ -519,13 +662,16 @@ function uploadFile(file) {
     });
 }
 
-// Processes the upload file response.
-function processUploadFileResponse(response) {
+// Processes the upload files response.
+function processUploadFilesResponse(response) {
     // Check if there was any error in the request.
     if (checkErrorResponse(response, false)) {
         // Hide the loading status.
         showFileSystemLoading(false);
     } else {
+        // Check the result of each file.
+        for (var result of response[ID_RESULTS])
+            checkErrorResponse(result, false);
         // List directory contents again.
         listDirectory(currentDirectory);
     }
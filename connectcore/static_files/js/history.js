@@ -30,6 +30,10 @@ const TITLE_CPU_CHART = "CPU Usage";
 const TITLE_MEMORY_CHART = "Memory Usage";
 const TITLE_TEMPERATURE_CHART = "Temperature";
 
+const STREAM_CPU = "system_monitor/cpu_load";
+const STREAM_MEMORY = "system_monitor/used_memory";
+const STREAM_TEMPERATURE = "system_monitor/cpu_temperature";
+
 const UNITS_CPU_CHART = "%";
 const UNITS_MEMORY_CHART = "MB";
 const UNITS_TEMPERATURE_CHART = "°C";
@@ -65,110 +69,114 @@ function drawAllCharts(refresh=false, showProgress=true) {
     if (!isHistoryShowing())
         return;
     // Draw the charts.
-    drawTemperatureChart(refresh, showProgress);
-    drawCPUChart(refresh, showProgress);
-    drawMemoryChart(refresh, showProgress);
+    if (refresh) {
+        readCharts([ID_TEMPERATURE_CHART, ID_CPU_CHART, ID_MEMORY_CHART], showProgress);
+    } else {
+        drawTemperatureChart();
+        drawCPUChart();
+        drawMemoryChart();
+    }
 }
 
 // Draws the temperature chart.
 function drawTemperatureChart(refresh=false, showProgress=false) {
-    if (refresh) {
-        if (showProgress)
-            $("#" + ID_TEMPERATURE_CHART_LOADING).show();
-        $.post(
-            "../ajax/history_temperature",
-            JSON.stringify({
-                "device_id": getDeviceID(),
-                "interval": temperatureInterval
-            }),
-            function(response) {
-                // Process only if histograms page is showing.
-                if (!isHistoryShowing())
-                    return;
-                // Check for errors.
-                if (!checkErrorResponse(response, false)) {
-                    temperatureData = response.data;
-                    drawTemperatureChart();
-                    $("#" + ID_TEMPERATURE_CHART_LOADING).hide();
-                }
-            }
-        ).fail(function(response) {
-            // Process only if histograms page is showing.
-            if (!isHistoryShowing())
-                return;
-            // Process error.
-            processAjaxErrorResponse(response);
-        });
-    } else {
+    if (refresh)
+        readCharts([ID_TEMPERATURE_CHART], showProgress);
+    else
         drawChart(ID_TEMPERATURE_CHART, temperatureData, TITLE_TEMPERATURE_CHART, UNITS_TEMPERATURE_CHART, COLOR_TEMPERATURE_CHART);
-    }
 }
 
 // Draws the CPU chart.
 function drawCPUChart(refresh=false, showProgress=false) {
-    if (refresh) {
-        if (showProgress)
-            $("#" + ID_CPU_CHART_LOADING).show();
-        $.post(
-            "../ajax/history_cpu",
-            JSON.stringify({
-                "device_id": getDeviceID(),
-                "interval": cpuInterval
-            }),
-            function(response) {
-                // Process only if histograms page is showing.
-                if (!isHistoryShowing())
-                    return;
-                // Check for errors.
-                if (!checkErrorResponse(response, false)) {
-                    cpuData = response.data;
-                    drawCPUChart();
-                    $("#" + ID_CPU_CHART_LOADING).hide();
-                }
-            }
-        ).fail(function(response) {
-            // Process only if histograms page is showing.
-            if (!isHistoryShowing())
-                return;
-            // Process error.
-            processAjaxErrorResponse(response);
-        });
-    } else {
+    if (refresh)
+        readCharts([ID_CPU_CHART], showProgress);
+    else
         drawChart(ID_CPU_CHART, cpuData, TITLE_CPU_CHART, UNITS_CPU_CHART, COLOR_CPU_CHART);
-    }
 }
 
 // Draws the memory chart.
 function drawMemoryChart(refresh=false, showProgress=false) {
-    if (refresh) {
+    if (refresh)
+        readCharts([ID_MEMORY_CHART], showProgress);
+    else
+        drawChart(ID_MEMORY_CHART, memoryData, TITLE_MEMORY_CHART, UNITS_MEMORY_CHART, COLOR_MEMORY_CHART);
+}
+
+// Reads the data of the given charts in a single request and draws them.
+function readCharts(charts, showProgress=false) {
+    var series = [];
+    $.each(charts, function(k, chart) {
         if (showProgress)
-            $("#" + ID_MEMORY_CHART_LOADING).show();
-        $.post(
-            "../ajax/history_memory",
-            JSON.stringify({
-                "device_id": getDeviceID(),
-                "interval": memoryInterval
-            }),
-            function(response) {
-                // Process only if histograms page is showing.
-                if (!isHistoryShowing())
-                    return;
-                // Check for errors.
-                if (!checkErrorResponse(response, false)) {
-                    memoryData = response.data;
-                    drawMemoryChart();
-                    $("#" + ID_MEMORY_CHART_LOADING).hide();
-                }
-            }
-        ).fail(function(response) {
+            $("#" + chart + "-loading").show();
+        series.push({
+            "device_id": getDeviceID(),
+            "stream": getChartStream(chart),
+            "interval": getChartInterval(chart)
+        });
+    });
+    $.post(
+        "../ajax/history_series",
+        JSON.stringify({
+            "series": series
+        }),
+        function(response) {
             // Process only if histograms page is showing.
             if (!isHistoryShowing())
                 return;
-            // Process error.
-            processAjaxErrorResponse(response);
-        });
-    } else {
-        drawChart(ID_MEMORY_CHART, memoryData, TITLE_MEMORY_CHART, UNITS_MEMORY_CHART, COLOR_MEMORY_CHART);
+            // Check for errors.
+            if (checkErrorResponse(response, false))
+                return;
+            $.each(charts, function(k, chart) {
+                var result = response[ID_SERIES][k];
+                if (checkErrorResponse(result, false))
+                    return;
+                switch (chart) {
+                    case ID_TEMPERATURE_CHART:
+                        temperatureData = result[ID_DATA];
+                        drawTemperatureChart();
+                        break;
+                    case ID_CPU_CHART:
+                        cpuData = result[ID_DATA];
+                        drawCPUChart();
+                        break;
+                    case ID_MEMORY_CHART:
+                        memoryData = result[ID_DATA];
+                        drawMemoryChart();
+                        break;
+                }
+                $("#" + chart + "-loading").hide();
+            });
+        }
+    ).fail(function(response) {
+        // Process only if histograms page is showing.
+        if (!isHistoryShowing())
+            return;
+        // Process error.
+        processAjaxErrorResponse(response);
+    });
+}
+
+// Returns the data stream of the given chart.
+function getChartStream(chart) {
+    switch (chart) {
+        case ID_TEMPERATURE_CHART:
+            return STREAM_TEMPERATURE;
+        case ID_CPU_CHART:
+            return STREAM_CPU;
+        case ID_MEMORY_CHART:
+            return STREAM_MEMORY;
+    }
+}
+
+// Returns the interval of the given chart.
+function getChartInterval(chart) {
+    switch (chart) {
+        case ID_TEMPERATURE_CHART:
+            return temperatureInterval;
+        case ID_CPU_CHART:
+            return cpuInterval;
+        case ID_MEMORY_CHART:
+            return memoryInterval;
     }
 }
 
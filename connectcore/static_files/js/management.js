@@ -103,6 +103,8 @@ const UPDATE_SUCCESS = "success";
 
 const DEMO_FILE_SET = "ConnectCoreDemo";
 
+const FIRMWARE_UPDATE_FIRST_CHECK_DELAY = 2000;
+
 const TEMPLATE_FILESET_FILE = "" +
     "<div id='file_{0}' class='fileset-entry' title='{1}' onclick='selectFilesetEntry(\"file_{2}\")'>" +
     "    <div class='fas fa-file fa-lg fileset-entry-icon'></div>" +
@@ -123,12 +125,11 @@ const TEMPLATE_REPOSITORY_FILE = "" +
     "    <div class='repository-entry-info'><a href='{8}' target='_blank'>{9}</a></div>" +
     "</div>";
 
-const FIRMWARE_UPDATE_CHECK_INTERVAL = 10000;
-
 // Variables.
 var readingManagementInfo = false;
 var deviceRebooting = false;
 var updatingFirmware = false;
+var firmwareUpdateSocket = null;
 var firmwareUpdateTimer = null;
 var uploadProgressSocket = null;
 var uploadFirmwareAjaxRequest = null;
@@ -821,12 +822,8 @@ function processUpdateFirmwareResponse(response) {
         enableManagementButton(ID_CANCEL_FIRMWARE_UPDATE_BUTTON, true);
         // Update progress status.
         setFirmwareUpdateProgressInfo(100, MESSAGE_SENDING_FIRMWARE_UPDATE_REQUEST);
-        // Start timer to check firmware update status periodically.
-        startFirmwareUpdateTimer();
-        // Check first firmware update status in 2 seconds.
-        window.setTimeout(function () {
-            checkFirmwareUpdateStatus();
-        }, 2000);
+        // Subscribe to the firmware update progress once the new update is reported.
+        subscribeFirmwareUpdateProgress(FIRMWARE_UPDATE_FIRST_CHECK_DELAY);
     }
 }
 
@@ -881,61 +878,52 @@ function processUpdateFirmwareFromFileSetResponse(response) {
         enableManagementButton(ID_CANCEL_FIRMWARE_UPDATE_BUTTON, true);
         // Update progress status.
         setFirmwareUpdateProgressInfo(100, MESSAGE_SENDING_FIRMWARE_UPDATE_REQUEST);
-        // Start timer to check firmware update status periodically.
-        startFirmwareUpdateTimer();
-        // Check first firmware update status in 2 seconds.
-        window.setTimeout(function () {
-            checkFirmwareUpdateStatus();
-        }, 2000);
+        // Subscribe to the firmware update progress once the new update is reported.
+        subscribeFirmwareUpdateProgress(FIRMWARE_UPDATE_FIRST_CHECK_DELAY);
     }
 }
 
-// Starts a timer to check the firmware update status.
-function startFirmwareUpdateTimer() {
+// Subscribes to the firmware update progress of the device after the given delay (ms).
+function subscribeFirmwareUpdateProgress(delay=0) {
     // Sanity checks
-    if (!isManagementShowing() || firmwareUpdateTimer != null)
+    if (!isManagementShowing() || firmwareUpdateSocket != null || firmwareUpdateTimer != null)
         return;
-    // Start timer to check firmware update status.
-    firmwareUpdateTimer = setInterval(checkFirmwareUpdateStatus, FIRMWARE_UPDATE_CHECK_INTERVAL);
+    // Delay the first check so the status of a previous update is not processed.
+    if (delay > 0) {
+        firmwareUpdateTimer = window.setTimeout(function () {
+            firmwareUpdateTimer = null;
+            subscribeFirmwareUpdateProgress();
+        }, delay);
+        return;
+    }
+    // Create the web socket.
+    var socketPrefix = window.location.protocol == "https:" ? "wss" : "ws";
+    firmwareUpdateSocket = new WebSocket(socketPrefix + "://" + window.location.host + getAppPath() + "ws/firmware_update_progress/" + getDeviceID());
+    // Define the callback to be notified when the firmware update state changes.
+    firmwareUpdateSocket.onmessage = function(e) {
+        // Process only in the management page.
+        if (!isManagementShowing()) {
+            // Close the socket.
+            unsubscribeFirmwareUpdateProgress();
+            return;
+        }
+        // Process the firmware update state.
+        processCheckFirmwareUpdateStatusResponse(JSON.parse(e.data));
+    }
 }
 
-// Stops the timer to check the firmware update status.
-function stopFirmwareUpdateTimer() {
-    // Stop timer.
-    if (firmwareUpdateTimer != null && firmwareUpdateTimer != "undefined") {
-        clearInterval(firmwareUpdateTimer);
+// Unsubscribes from the firmware update progress of the device.
+function unsubscribeFirmwareUpdateProgress() {
+    // Cancel the pending subscription.
+    if (firmwareUpdateTimer != null) {
+        window.clearTimeout(firmwareUpdateTimer);
         firmwareUpdateTimer = null;
     }
-}
-
-// Checks the firmware update status.
-function checkFirmwareUpdateStatus() {
-    // Sanity checks
-    if (!isManagementShowing()) {
-        // Stop timer.
-        stopFirmwareUpdateTimer();
-        return;
+    // Close the socket.
+    if (firmwareUpdateSocket != null && firmwareUpdateSocket != "undefined") {
+        firmwareUpdateSocket.close();
+        firmwareUpdateSocket = null;
     }
-    // Send request to check firmware update status.
-    $.post(
-        "../ajax/check_firmware_update_status",
-        JSON.stringify({
-            "device_id": getDeviceID()
-        }),
-        function(data) {
-            // Process only in the management page.
-            if (!isManagementShowing())
-                return;
-            // Process check firmware update status answer.
-            processCheckFirmwareUpdateStatusResponse(data);
-        }
-    ).fail(function(response) {
-        // Process only in the management page.
-        if (!isManagementShowing())
-            return;
-        // Process error.
-        processAjaxErrorResponse(response);
-    });
 }
 
 // Processes the response of the check firmware update status request.
@@ -944,11 +932,12 @@ function processCheckFirmwareUpdateStatusResponse(response) {
     if (!checkErrorResponse(response, false)) {
         // Check if the firmware update is running.
         if (response[ID_STATUS] == VALUE_ACTIVE) {
-            // Check the firmware update progress.
-            checkFirmwareUpdateProgress();
+            // Update the firmware update progress.
+            if (response[ID_PROGRESS] != undefined)
+                setFirmwareUpdateProgressInfo(response[ID_PROGRESS], response[ID_MESSAGE]);
         } else if (response[ID_STATUS] == VALUE_FAILED || response[ID_STATUS] == VALUE_SUCCESSFUL || response[ID_STATUS] == VALUE_CANCELED) {
-            // Stop timer.
-            stopFirmwareUpdateTimer();
+            // Unsubscribe from the firmware update progress.
+            unsubscribeFirmwareUpdateProgress();
             // Flag the update variable.
             updatingFirmware = false;
             // Enable page controls.
@@ -1013,50 +1002,8 @@ function processCheckFirmwareUpdateRunningResponse(response) {
         showFirmwareUpdateProgress(true);
         // Update the firmware update progress.
         setFirmwareUpdateProgressInfo(0, "");
-        // Check the firmware update progress.
-        checkFirmwareUpdateProgress();
-        // Subscribe timer.
-        startFirmwareUpdateTimer();
-    }
-}
-
-// Checks the firmware update progress.
-function checkFirmwareUpdateProgress() {
-    // Sanity checks
-    if (!isManagementShowing())
-        return;
-    // Hide the info popup.
-    showInfoPopup(false);
-    // Hide the loading popup.
-    showLoadingPopup(false);
-    // Send request to check firmware update progress.
-    $.post(
-        "../ajax/check_firmware_update_progress",
-        JSON.stringify({
-            "device_id": getDeviceID()
-        }),
-        function(data) {
-            // Process only in the management page.
-            if (!isManagementShowing())
-                return;
-            // Process check firmware update progress answer.
-            processCheckFirmwareUpdateProgressResponse(data);
-        }
-    ).fail(function(response) {
-        // Process only in the management page.
-        if (!isManagementShowing())
-            return;
-        // Process error.
-        processAjaxErrorResponse(response);
-    });
-}
-
-// Processes the response of the firmware update progress.
-function processCheckFirmwareUpdateProgressResponse(response) {
-    // Check if there was any error in the request.
-    if (!checkErrorResponse(response, false)) {
-        // Update the firmware update progress.
-        setFirmwareUpdateProgressInfo(response[ID_PROGRESS], response[ID_MESSAGE]);
+        // Subscribe to the firmware update progress.
+        subscribeFirmwareUpdateProgress();
     }
 }
 
@@ -1152,8 +1099,8 @@ function processCancelFirmwareUpdateResponse(response) {
         enableManagementPageControls(true);
         // Hide firmware update progress.
         showFirmwareUpdateProgress(false);
-        // Stop the firmware update timer.
-        stopFirmwareUpdateTimer();
+        // Unsubscribe from the firmware update progress.
+        unsubscribeFirmwareUpdateProgress();
     }
 }
 
@@ -20,10 +20,17 @@ const TANK_ENTRY_CONTENT = "" +
     "    <label>@@NAME@@</label>" +
     "</div>";
 
+const SCHEDULED_CONFIGS_INTERVAL = 30000;
+
+const JOB_STATUS_CANCELED = "canceled";
+const JOB_STATUS_COMPLETE = "complete";
+
 var selectedMOValue;
 var checkedTanks;
 var selectedTankID;
 var tanks;
+var reportedJobs = null;
+var scheduledConfigsTimer = null;
 
 // Fills the list of tanks.
 function fillTanksList() {
@@ -49,6 +56,32 @@ function fillTanksList() {
             tankEntryDiv.innerHTML = tankEntryContent;
             $("#tanks-list").append(tankEntryDiv);
         }
+
+        // Mark the tanks whose configuration differs from the rest.
+        checkInstallationConfiguration();
+    }).fail(function(response) {
+        processErrorResponse(response);
+    });
+}
+
+// Reads the configuration of all the tanks and marks the ones that differ
+// from the configuration of the majority.
+function checkInstallationConfiguration() {
+    $.post("/ajax/get_installation_configuration", getJsonData(), function(response) {
+        let different = response["different"];
+        if (different == null)
+            return;
+
+        for (let tankEntry of document.getElementsByClassName("tank-entry")) {
+            let tankID = tankEntry.id.replace("-entry", "");
+            if (different.includes(tankID)) {
+                tankEntry.classList.add("tank-entry-different");
+                tankEntry.title = "The configuration of this tank differs from the rest of the installation";
+            } else {
+                tankEntry.classList.remove("tank-entry-different");
+                tankEntry.title = "";
+            }
+        }
     }).fail(function(response) {
         processErrorResponse(response);
     });
@@ -268,6 +301,10 @@ function getConfigurationCallback(response) {
     // Update the configuration of the selected tank with the MO and DF parameters.
     updateTankConfiguration(mo, df);
 
+    // Refresh the tanks that differ after saving a configuration.
+    if (scheduledConfigs != null)
+        checkInstallationConfiguration();
+
     // If any tank was offline and a scheduled configuration was issued, notify it.
     if (scheduledConfigs != null && scheduledConfigs.length > 0) {
         let infoMessage = "One or more tanks were offline and could not be configured.<br/><br/>" +
@@ -282,9 +319,71 @@ function getConfigurationCallback(response) {
             }
         }
         toastr.info(infoMessage);
+
+        // Follow the scheduled configuration until it finishes.
+        if (response["job_id"] != null)
+            checkScheduledConfigs();
     }
 }
 
+// Reads the status of the scheduled configurations and reports the ones
+// that finished. Keeps checking while any of them is pending.
+function checkScheduledConfigs() {
+    clearTimeout(scheduledConfigsTimer);
+    scheduledConfigsTimer = null;
+
+    $.post("/ajax/get_scheduled_configs", getJsonData(), function(response) {
+        let jobs = response["jobs"];
+        if (jobs == null)
+            return;
+
+        // The jobs finished before opening the page are not reported.
+        let firstCheck = reportedJobs == null;
+        if (firstCheck)
+            reportedJobs = new Set();
+
+        let pending = false;
+        for (let job of jobs) {
+            if (job["status"] !== JOB_STATUS_COMPLETE && job["status"] !== JOB_STATUS_CANCELED) {
+                pending = true;
+                continue;
+            }
+            if (reportedJobs.has(job["job_id"]))
+                continue;
+            reportedJobs.add(job["job_id"]);
+            if (!firstCheck)
+                reportScheduledConfig(job);
+        }
+
+        if (pending)
+            scheduledConfigsTimer = setTimeout(checkScheduledConfigs, SCHEDULED_CONFIGS_INTERVAL);
+    }).fail(function(response) {
+        processErrorResponse(response);
+    });
+}
+
+// Notifies the result of the given scheduled configuration.
+function reportScheduledConfig(job) {
+    let message = "The scheduled configuration of the following tanks has " +
+        (job["status"] === JOB_STATUS_COMPLETE ? "finished" : "been canceled") + ":<br/>";
+    for (let deviceID of job["devices"]) {
+        let name = deviceID;
+        if (tanks != null) {
+            for (let tank of tanks) {
+                if (tank["dev_id"] === deviceID) {
+                    name = tank["name"];
+                    break;
+                }
+            }
+        }
+        message = message + "<br/>- " + name;
+    }
+    if (job["status"] === JOB_STATUS_COMPLETE)
+        toastr.success(message);
+    else
+        toastr.warning(message);
+}
+
 // Updates the configuration of the tank with the given MO and DF parameters.
 function updateTankConfiguration(mo, df) {
     let mo_int = parseInt(mo);
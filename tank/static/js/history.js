@@ -14,6 +14,9 @@
  * OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
  */
 
+// Maximum number of series of a history request (HISTORY_MAX_SERIES in the server).
+const HISTORY_MAX_SERIES = 60;
+
 const TANK_CHART_HTML = "" +
     "<div class='row justify-content-lg-center'>" +
     "   <div class='col-lg-12 col-xl-12'>" +
@@ -148,11 +151,13 @@ function drawAllCharts(refresh=false, showProgress=true) {
     if (!isHistoryShowing())
         return;
 
-    for (devId in levelData) {
-        drawLevelChart(devId, refresh, showProgress);
-        drawTemperatureChart(devId, refresh, showProgress);
-        drawValveChart(devId, refresh, showProgress);
-    }
+    var charts = [];
+    for (devId in levelData)
+        charts.push(...getTankCharts(devId));
+    if (refresh)
+        readCharts(charts, showProgress);
+    else
+        charts.forEach(chart => drawStreamChart(chart["stream"], chart["devId"]));
 
     // Repeat the task every minute.
     setTimeout(function() {
@@ -178,13 +183,13 @@ function drawTanksCharts() {
         }
         $("#tanks-cards").html(html);
 
+        var charts = [];
         for (var tank of tanks) {
             var devId = tank["dev_id"];
             registerIntervalCallbacks(devId);
-            drawLevelChart(devId, true, true);
-            drawTemperatureChart(devId, true, true);
-            drawValveChart(devId, true, true);
+            charts.push(...getTankCharts(devId));
         }
+        readCharts(charts, true);
     }).fail(function(response) {
         processErrorResponse(response);
     });
@@ -208,55 +213,96 @@ function registerIntervalCallbacks(devId) {
     });
 }
 
-// Draws the water level chart.
-function drawLevelChart(devId, refresh=false, showProgress=false) {
-    if (refresh) {
+// Returns the charts of the given tank.
+function getTankCharts(devId) {
+    return ["level", "temperature", "valve"].map(stream => ({"stream": stream, "devId": devId}));
+}
+
+// Reads the data of the given charts in a single request and draws them.
+function readCharts(charts, showProgress=false) {
+    if (charts.length == 0)
+        return;
+    // Split the charts in requests the server accepts.
+    if (charts.length > HISTORY_MAX_SERIES) {
+        for (var i = 0; i < charts.length; i += HISTORY_MAX_SERIES)
+            readCharts(charts.slice(i, i + HISTORY_MAX_SERIES), showProgress);
+        return;
+    }
+
+    var series = [];
+    for (var chart of charts) {
+        var chartId = chart["stream"] + "-" + chart["devId"] + "-chart";
         if (showProgress)
-            $("#level-" + devId + "-chart-loading").show();
-        $.post("/ajax/get_level", getJsonData(levelInterval[devId], devId), function(response) {
-            levelData[devId] = response.data;
-            drawLevelChart(devId);
-            $("#level-" + devId + "-chart-loading").hide();
-        }).fail(function(response) {
-            processErrorResponse(response);
+            $("#" + chartId + "-loading").show();
+        var spec = {
+            "tank_id": chart["devId"],
+            "stream": chart["stream"],
+            "interval": getStreamInterval(chart["stream"])[chart["devId"]]
+        };
+        var width = $("#" + chartId).width();
+        if (width > 0)
+            spec["points"] = Math.round(width);
+        series.push(spec);
+    }
+
+    $.post("/ajax/get_history", getJsonData(JSON.stringify({"series": series})), function(response) {
+        $.each(response["series"], function(k, result) {
+            var chart = charts[k];
+            $("#" + chart["stream"] + "-" + chart["devId"] + "-chart-loading").hide();
+            if (result["error"] != null) {
+                toastr.error(result["error"]);
+                return;
+            }
+            getStreamData(chart["stream"])[chart["devId"]] = result["data"];
+            drawStreamChart(chart["stream"], chart["devId"]);
         });
-    } else {
+    }).fail(function(response) {
+        processErrorResponse(response);
+    });
+}
+
+// Returns the data of the charts of the given stream.
+function getStreamData(stream) {
+    return {"level": levelData, "temperature": temperatureData, "valve": valveData}[stream];
+}
+
+// Returns the intervals of the charts of the given stream.
+function getStreamInterval(stream) {
+    return {"level": levelInterval, "temperature": temperatureInterval, "valve": valveInterval}[stream];
+}
+
+// Draws the chart of the given stream.
+function drawStreamChart(stream, devId) {
+    if (stream == "level")
+        drawLevelChart(devId);
+    else if (stream == "temperature")
+        drawTemperatureChart(devId);
+    else
+        drawValveChart(devId);
+}
+
+// Draws the water level chart.
+function drawLevelChart(devId, refresh=false, showProgress=false) {
+    if (refresh)
+        readCharts([{"stream": "level", "devId": devId}], showProgress);
+    else
         drawChart("level-" + devId + "-chart", levelData[devId], "Water Level", "%", "#33CC66", 100);
-    }
 }
 
 // Draws the temperature chart.
 function drawTemperatureChart(devId, refresh=false, showProgress=false) {
-    if (refresh) {
-        if (showProgress)
-            $("#temperature-" + devId + "-chart-loading").show();
-        $.post("/ajax/get_temperature", getJsonData(temperatureInterval[devId], devId), function(response) {
-            temperatureData[devId] = response.data;
-            drawTemperatureChart(devId);
-            $("#temperature-" + devId + "-chart-loading").hide();
-        }).fail(function(response) {
-            processErrorResponse(response);
-        });
-    } else {
+    if (refresh)
+        readCharts([{"stream": "temperature", "devId": devId}], showProgress);
+    else
         drawChart("temperature-" + devId + "-chart", temperatureData[devId], "Temperature", "ºC", "#FF0000");
-    }
 }
 
 // Draws the valve status chart.
 function drawValveChart(devId, refresh=false, showProgress=false) {
-    if (refresh) {
-        if (showProgress)
-            $("#valve-" + devId + "-chart-loading").show();
-        $.post("/ajax/get_valve", getJsonData(valveInterval[devId], devId), function(response) {
-            valveData[devId] = response.data;
-            drawValveChart(devId);
-            $("#valve-" + devId + "-chart-loading").hide();
-        }).fail(function(response) {
-            processErrorResponse(response);
-        });
-    } else {
+    if (refresh)
+        readCharts([{"stream": "valve", "devId": devId}], showProgress);
+    else
         drawChart("valve-" + devId + "-chart", valveData[devId], "Valve", "Closed/Open", "#0000CC");
-    }
 }
 
 // Draws the chart with the given data.
@@ -152,3 +152,11 @@ if DEBUG:
 
 # Channels
 ASGI_APPLICATION = 'tankscommon.asgi.application'
+
+# The alert monitors are kept in this process, so their changes are
+# distributed to the web sockets with the in-memory channel layer.
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer"
+    },
+}
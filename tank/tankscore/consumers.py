@@ -12,6 +12,9 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
+import json
+
+from asgiref.sync import async_to_sync
 from channels.generic.websocket import WebsocketConsumer
 
 from tankscore import drm_requests
@@ -23,7 +26,8 @@ class WsConsumer(WebsocketConsumer):
     """
     def __init__(self):
         WebsocketConsumer.__init__(self)
-        self._monitor_id = -1
+        self._installation_name = None
+        self._unique_group_name = ""
 
     def connect(self):
         session = self.scope["session"]
@@ -31,14 +35,27 @@ class WsConsumer(WebsocketConsumer):
         if session is None or session.session_key is None or installation_name is None:
             return
 
+        account = drm_requests.get_account_id(session)
+        if account is None:
+            return
+
+        self._installation_name = installation_name
+        self._unique_group_name = drm_requests.get_alerts_group(account, installation_name)
+        async_to_sync(self.channel_layer.group_add)(self._unique_group_name, self.channel_name)
+
         # Accept the connection.
         self.accept()
 
         # Subscribe to any alert change.
-        self._monitor_id = drm_requests.subscribe_alerts(session, installation_name, self)
+        drm_requests.get_alert_monitors().subscribe(session, installation_name)
 
     def disconnect(self, close_code):
-        if self._monitor_id != -1:
-            # Unsubscribe from alert changes.
-            drm_requests.unsubscribe_alerts(self.scope["session"], self._monitor_id)
-            self._monitor_id = -1
+        if not self._unique_group_name:
+            return
+        async_to_sync(self.channel_layer.group_discard)(self._unique_group_name, self.channel_name)
+        # Unsubscribe from alert changes.
+        drm_requests.get_alert_monitors().unsubscribe(self.scope["session"], self._installation_name)
+        self._unique_group_name = ""
+
+    def alert_status(self, event):
+        self.send(text_data=json.dumps(event["data"]))
@@ -0,0 +1,160 @@
+# Copyright 2025, Digi International Inc.
+#
+# Permission to use, copy, modify, and/or distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+import numpy as np
+
+METHOD_LTTB = "lttb"
+METHOD_MIN_MAX = "min_max"
+
+
+def downsample(timestamps, values, points, method=METHOD_LTTB):
+    """
+    Reduces the given series to the given number of points.
+
+    Args:
+        timestamps (:class:`numpy.ndarray`): The timestamps of the series,
+            in ascending order.
+        values (:class:`numpy.ndarray`): The values of the series.
+        points (Integer): The maximum number of points to return.
+        method (String, optional): The downsampling method, `METHOD_LTTB`
+            to keep the shape of the series or `METHOD_MIN_MAX` to keep the
+            extremes of every bucket.
+
+    Returns:
+        Tuple: The timestamps and values of the downsampled series. The given
+            ones if they do not exceed the number of points.
+    """
+    if len(timestamps) <= points:
+        return timestamps, values
+    if method == METHOD_MIN_MAX:
+        return min_max(timestamps, values, points)
+    return lttb(timestamps, values, points)
+
+
+def lttb(x, y, points):
+    """
+    Downsamples the given series with the Largest-Triangle-Three-Buckets
+    algorithm.
+
+    The first and last points are kept and the rest are split in
+    ``points - 2`` buckets. From each bucket, the point that forms the
+    largest triangle with the point selected in the previous bucket and the
+    average of the next one is kept.
+
+    Args:
+        x (:class:`numpy.ndarray`): The X coordinates, in ascending order.
+        y (:class:`numpy.ndarray`): The Y coordinates.
+        points (Integer): The number of points to return.
+
+    Returns:
+        Tuple: The X and Y coordinates of the selected points.
+    """
+    length = len(x)
+    if points >= length or points < 3:
+        return x, y
+
+    # Bounds of the buckets of the inner points.
+    edges = np.linspace(1, length - 1, points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    # The third vertex of the last bucket is the last point.
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = length - 1
+    a = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        areas = np.abs((x[a] - next_x[bucket]) * (y[start:end] - y[a])
+                       - (x[a] - x[start:end]) * (next_y[bucket] - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[bucket + 1] = a
+    return x[selected], y[selected]
+
+
+def min_max(x, y, points):
+    """
+    Downsamples the given series keeping the minimum and maximum of every
+    bucket, so no peak is lost.
+
+    Args:
+        x (:class:`numpy.ndarray`): The X coordinates, in ascending order.
+        y (:class:`numpy.ndarray`): The Y coordinates.
+        points (Integer): The maximum number of points to return.
+
+    Returns:
+        Tuple: The X and Y coordinates of the selected points.
+    """
+    length = len(x)
+    buckets = points // 2
+    if points >= length or buckets < 1:
+        return x, y
+
+    bucket_ids = np.arange(length) * buckets // length
+    # Sort by bucket and value: the first point of each bucket is its minimum
+    # and the last one its maximum.
+    order = np.lexsort((y, bucket_ids))
+    firsts = np.flatnonzero(np.r_[True, bucket_ids[order][1:] != bucket_ids[order][:-1]])
+    lasts = np.r_[firsts[1:] - 1, length - 1]
+    selected = np.unique(np.concatenate((order[firsts], order[lasts])))
+    return x[selected], y[selected]
+
+
+def align(series, points, methods=None):
+    """
+    Places the given series on a shared grid of timestamps.
+
+    The time span of all the series is split in the given number of buckets
+    and every series gets the average of its values in each bucket, or the
+    maximum if it is downsampled with `METHOD_MIN_MAX`, so its values are
+    not mixed. The buckets without values in any series are dropped.
+
+    Args:
+        series (List): The timestamps and values of each series, as tuples
+            of :class:`numpy.ndarray`.
+        points (Integer): The number of buckets of the grid.
+        methods (List, optional): The downsampling method of each series,
+            `METHOD_LTTB` for all of them if not given.
+
+    Returns:
+        Tuple: The timestamps of the grid and the values of each series in
+            it, `NaN` where a series has no values.
+    """
+    lengths = [len(timestamps) for timestamps, _ in series]
+    if not any(lengths):
+        return np.empty(0), [np.empty(0) for _ in series]
+
+    start = min(timestamps[0] for timestamps, _ in series if len(timestamps))
+    end = max(timestamps[-1] for timestamps, _ in series if len(timestamps))
+    width = (end - start) / points or 1
+    grid = start + np.arange(points) * width
+
+    aligned = []
+    for index, (timestamps, values) in enumerate(series):
+        buckets = np.minimum(((timestamps - start) / width).astype(np.int64), points - 1)
+        if methods is not None and methods[index] == METHOD_MIN_MAX:
+            maximums = np.full(points, np.nan)
+            np.fmax.at(maximums, buckets, values)
+            aligned.append(maximums)
+            continue
+        counts = np.bincount(buckets, minlength=points)
+        sums = np.bincount(buckets, weights=values, minlength=points)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            aligned.append(sums / counts)
+
+    used = np.any([~np.isnan(values) for values in aligned], axis=0)
+    return grid[used], [values[used] for values in aligned]
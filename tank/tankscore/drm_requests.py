@@ -12,24 +12,40 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
+import hashlib
 import json
-import re
+import threading
+import time
+import xml.etree.ElementTree as et
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from xml.etree.ElementTree import ParseError
+from xml.parsers import expat
 
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
 from devicecloud import DeviceCloud, DeviceCloudHttpException
+from devicecloud.devicecore import group_path
 from devicecloud.monitor import MonitorAPI
 from devicecloud.monitor_tcp import TCPClientManager
 from devicecloud.sci import DeviceTarget
+from devicecloud.streams import ROLLUP_INTERVAL_DAY, ROLLUP_INTERVAL_HALF, ROLLUP_INTERVAL_HOUR, \
+    ROLLUP_INTERVAL_MONTH, ROLLUP_INTERVAL_WEEK, ROLLUP_METHOD_AVERAGE
+from devicecloud.util import isoformat
 from django.http import JsonResponse
+import numpy as np
 
 from login.auth import DeviceCloudUser
 from tankscore import views, models
+from tankscore.downsampling import METHOD_LTTB, METHOD_MIN_MAX, align, downsample
 from tankscore.models import SmartTank, SmartTankInstallation
 
 PARAM_DATA = "data"
 PARAM_MAC_ADDR = "mac_addr"
 PARAM_SELECTED = "selected"
 PARAM_INSTALLATION_NAME = "installation_name"
+PARAM_POINTS = "points"
 
 DATA_SEPARATOR = "@@"
 
@@ -74,16 +90,30 @@ ID_TANKS = "tanks"
 
 ID_ERROR = "error"
 
-REGEX_DEV_REQUEST_RESPONSE = ".*<device_request .*>(.*)<\\/device_request>.*"
-REGEX_DO_CMD_RESPONSE = ".*<do_command target=[^>]*>(.*)<\\/do_command>.*"
-REGEX_QUERY_SETTING_RESPONSE = ".*<query_setting>(.*)<\\/query_setting>.*"
-REGEX_SETTING_MO = ".*<MO>(.*)</MO>.*"
-REGEX_SETTING_DF = ".*<DF>(.*)</DF>.*"
-REGEX_ERROR = ".*<error id=\"(.*)\">(.*)</error>.*"
-REGEX_ERROR_TITLE = ".*<desc>(.*)</desc>.*"
-REGEX_ERROR_HINT = ".*<hint>(.*)</hint>.*"
-REGEX_ERROR_GENERAL = ".*<error>(.*)</error>.*"
-REGEX_REMOTE_MANAGER_GROUP = ".*<remote_manager>.*<\\/remote_manager>.*"
+ID_CONFIGURATIONS = "configurations"
+ID_DEVICES = "devices"
+ID_DIFFERENT = "different"
+ID_JOB_ID = "job_id"
+ID_JOBS = "jobs"
+ID_MAJORITY = "majority"
+ID_STATUS = "status"
+
+ID_ALIGN = "align"
+ID_INTERVAL = "interval"
+ID_SERIES = "series"
+ID_STREAM = "stream"
+ID_TIMESTAMPS = "timestamps"
+
+TAG_DEVICE = "device"
+TAG_DEVICE_REQUEST = "device_request"
+TAG_DO_COMMAND = "do_command"
+TAG_ERROR = "error"
+TAG_ERROR_DESC = "desc"
+TAG_ERROR_HINT = "hint"
+TAG_LOCATION = "location"
+TAG_QUERY_SETTING = "query_setting"
+TAG_SETTING_DF = "DF"
+TAG_SETTING_MO = "MO"
 
 TARGET_MICROPYTHON = "micropython"
 REQ_VALVE_ON = "VALVE_ON"
@@ -98,15 +128,59 @@ STREAM_FORMAT = "{}/{}"
 
 VALUE_UNDEFINED = "UNDEFINED"
 
+INSTALLATIONS_CACHE_TTL = 60
+
+CONFIGURATIONS_BATCH_SIZE = 50
+CONFIGURATIONS_CACHE_TTL = 600
+CONFIGURATIONS_MAX_WORKERS = 4
+
+HISTORY_DEFAULT_POINTS = 500
+HISTORY_MAX_POINTS = 2000
+HISTORY_MAX_SERIES = 60
+HISTORY_MAX_WORKERS = 8
+HISTORY_MIN_POINTS = 10
+HISTORY_PAGE_SIZE = 1000
+
+# Downsampling method of the streams that do not use LTTB.
+HISTORY_METHODS = {ID_VALVE: METHOD_MIN_MAX}
+
+# Rollup intervals of DRM and their approximate length in seconds.
+ROLLUP_INTERVALS = ((ROLLUP_INTERVAL_HALF, 1800), (ROLLUP_INTERVAL_HOUR, 3600), (ROLLUP_INTERVAL_DAY, 86400),
+                    (ROLLUP_INTERVAL_WEEK, 604800), (ROLLUP_INTERVAL_MONTH, 2592000))
+
+ALERT_DEFINITIONS_CACHE_TTL = 300
+
+ALERTS_MAX_WORKERS = 8
+
+ALERT_LOOKUP_MAX_WORKERS = 4
+ALERT_REMOVED_TTL = 300
+
 ALERT_NAME = "tank_level_{}"
 
+# Status of the DRM jobs and the ones that do not change anymore.
+JOB_STATUSES = {"0": "new", "1": "in_progress", "2": "complete", "3": "canceled"}
+JOB_STATUS_NEW = "new"
+JOB_STATUSES_FINISHED = ("complete", "canceled")
+
+JOB_STATUS_BATCH = 100
+JOB_STATUS_TTL = 15
+
+SCHEDULED_CONFIGS_TTL = 3600
+
+GROUP_ALERTS = "alerts.{}"
+
+MONITOR_TOPIC_ALERT = "[group={}]AlarmStatus/{}"
+
 WS_ALERTS_INVENTORY = "/ws/v1/alerts/inventory"
+WS_DATA_POINTS = "/ws/DataPoint/{}"
 WS_GET_ALERTS_SUMMARY = "/ws/v1/alerts/summary?query=name='{}'"
 WS_GET_ALERTS_INVENTORY = WS_ALERTS_INVENTORY + "?query=name='{}'"
 WS_GET_ALERT_DETAILS = "/ws/v1/alerts/summary?query=id={}"
+WS_JOB = "/ws/Job"
 WS_RESET_ALERT = "/ws/AlarmStatus"
 WS_REMOVE_ALERT = WS_ALERTS_INVENTORY + "/{}"
 WS_REMOVE_MONITOR = "/ws/Monitor/{}"
+WS_SCHEDULE = "/ws/Schedule"
 
 RESET_ALERT_XML = "<AlarmStatus><id><almId>{}</almId><almsSourceEntityId>{}</almsSourceEntityId></id>" \
                   "<almsStatus>0</almsStatus></AlarmStatus>"
@@ -139,12 +213,16 @@ CREATE_ALERT_JSON = '{{' \
                         '}}' \
                     '}}'
 
+ERROR_INVALID_ANSWER = "Invalid answer from the DRM device."
+ERROR_INVALID_HISTORY = "Invalid history request."
 ERROR_NOT_CONNECTED = "Device Not Connected"
+ERROR_NOT_NUMERIC = "The stream values are not numeric."
 
+SCHEDULE_TARGET = "<device id=\"{}\"/>"
 SCHEDULE_SAVE_TEMPLATE = "" \
                          "<Schedule on=\"IMMEDIATE\">" \
                          "  <targets>" \
-                         "    <device id=\"{}\"/> " \
+                         "    {}" \
                          "  </targets>" \
                          "  <task>" \
                          "    <description>Configure Reporting Frequency</description>" \
@@ -196,8 +274,6 @@ SCHEDULE_SAVE_TEMPLATE = "" \
                          "  </task>" \
                          "</Schedule>"
 
-monitor_managers = {}
-
 
 def is_authenticated(request):
     """
@@ -253,6 +329,25 @@ def get_device_cloud_session(session):
                        base_url=user_serialized.server)
 
 
+def get_account_id(session):
+    """
+    Returns a string identifying the DRM account of the given session.
+
+    Args:
+         session (:class:`.SessionStore`): The Django session containing the
+            user and server of the DRM account.
+
+    Returns:
+        String: The account identifier, `None` if there is no user in the
+            session.
+    """
+    user = session.get("user")
+    if user is None:
+        return None
+    user_serialized = DeviceCloudUser.from_json(json.loads(user))
+    return "%s@%s" % (user_serialized.username, user_serialized.server)
+
+
 def check_ajax_request(request):
     """
     Checks whether the given AJAX request is valid and the user is
@@ -283,9 +378,21 @@ def get_exception_response(e):
     Returns:
         A JSON response with the details of the exception.
     """
-    return JsonResponse({ID_ERROR: ("Error in the DRM request: {}.".format(e.response.text)
-                                    if isinstance(e, DeviceCloudHttpException) else str(e))},
-                        status=400)
+    return JsonResponse({ID_ERROR: get_exception_message(e)}, status=400)
+
+
+def get_exception_message(e):
+    """
+    Returns the error message contained in the given exception.
+
+    Args:
+        e (:class:`.Exception`): The exception.
+
+    Returns:
+        String: The error message.
+    """
+    return ("Error in the DRM request: {}.".format(e.response.text)
+            if isinstance(e, DeviceCloudHttpException) else str(e))
 
 
 def send_device_request(request, target):
@@ -348,11 +455,8 @@ def send_request(dc, device_id, target, data=None):
         raise DeviceCloudHttpException(resp)
 
     # Find and return the response (if any).
-    re_search = re.search(REGEX_DEV_REQUEST_RESPONSE, resp.text, re.IGNORECASE)
-    if re_search:
-        return re_search.group(1)
-
-    return None
+    answer = _get_single_device_response(parse_sci_response(resp.text, TAG_DEVICE_REQUEST))
+    return answer.payload if answer is not None else None
 
 
 def send_do_command(dc, device_id, target, data=None):
@@ -385,25 +489,58 @@ def send_do_command(dc, device_id, target, data=None):
         raise DeviceCloudHttpException(resp)
 
     # Find and return the response (if any).
-    re_search = re.search(REGEX_DO_CMD_RESPONSE, resp.text, re.IGNORECASE)
-    if re_search:
-        return re_search.group(1)
+    answer = _get_single_device_response(parse_sci_response(resp.text, TAG_DO_COMMAND, xml_payload=True))
+    return answer.payload if answer is not None else None
 
-    return None
+
+def parse_sci_response(text, payload_tag=None, xml_payload=False):
+    """
+    Parses an SCI response in a single pass, extracting the payload and the
+    error of each device.
+
+    Args:
+        text (String): the SCI response.
+        payload_tag (String, optional): the tag of the element whose content
+            is the payload of each device (`device_request`, `do_command`...).
+        xml_payload (Boolean, optional): `True` to return the payload as the
+            XML of the children of the payload element, `False` to return
+            its text.
+
+    Returns:
+        Dictionary: the :class:`.SCIDeviceResponse` of each device ID. Errors
+            reported outside any device are stored with the `None` key.
+    """
+    return SCIResponseParser(payload_tag, xml_payload).parse(text)
 
 
-def send_query_setting(dc, device_id, settings_group):
+def _get_single_device_response(responses):
     """
-    Sends a 'query_setting' request to the device with the given device ID
-    to get all the settings from the provided settings group.
+    Returns the response of the only device targeted by an SCI request or,
+    if there is none or the request failed as a whole, the response outside
+    any device.
+    """
+    response = responses.get(None)
+    if response is not None and response.error is not None:
+        return response
+    for device_id, device_response in responses.items():
+        if device_id is not None:
+            return device_response
+    return response
+
+
+def send_query_setting(dc, device_ids, settings_group):
+    """
+    Sends a single 'query_setting' request to the devices with the given
+    device IDs to get all the settings from the provided settings group.
 
     Args:
         dc (:class:`.DeviceCloud`): the Device Cloud instance.
-        device_id (String): the device ID of the DRM device.
+        device_ids (List): the device IDs of the DRM devices.
         settings_group (String): the name of the settings group to get.
 
     Returns:
-        String: The 'query_setting' XML response (if any).
+        Dictionary: the :class:`.SCIDeviceResponse` of each device ID, with
+            the XML of the settings group as payload.
 
     Raises:
         DeviceCloudHttpException: if there is any error sending the request.
@@ -412,33 +549,14 @@ def send_query_setting(dc, device_id, settings_group):
     request = REQ_QUERY_SETTING.format(settings_group)
 
     # Send the request and get the answer.
-    resp = dc.sci.send_sci(SCI_SEND_MESSAGE, DeviceTarget(device_id),
+    resp = dc.sci.send_sci(SCI_SEND_MESSAGE, [DeviceTarget(device_id) for device_id in device_ids],
                            request, cache=True)
 
     # If the status is not 200, throw an exception.
     if resp.status_code != 200:
         raise DeviceCloudHttpException(resp)
 
-    # Find and return the error (if any).
-    re_search = re.search(REGEX_ERROR, resp.text, re.IGNORECASE)
-    if re_search:
-        error_msg = ""
-        re_search = re.search(REGEX_ERROR_TITLE, resp.text, re.IGNORECASE)
-        if re_search:
-            error_msg = re_search.group(1)
-        re_search = re.search(REGEX_ERROR_HINT, resp.text, re.IGNORECASE)
-        if re_search:
-            error_msg += ": %s" % re_search.group(1)
-        return error_msg
-
-    # Find and return the response (if any).
-    re_search = re.search(REGEX_QUERY_SETTING_RESPONSE, resp.text,
-                          re.IGNORECASE)
-
-    if re_search:
-        return re_search.group(1)
-
-    return None
+    return parse_sci_response(resp.text, TAG_QUERY_SETTING, xml_payload=True)
 
 
 def send_set_drm_settings(dc, device_id, mo_value, df_value):
@@ -478,18 +596,8 @@ def send_set_drm_settings(dc, device_id, mo_value, df_value):
         raise DeviceCloudHttpException(resp)
 
     # Find and return the error (if any).
-    re_search = re.search(REGEX_ERROR, resp.text, re.IGNORECASE)
-    if re_search:
-        error_msg = ""
-        re_search = re.search(REGEX_ERROR_TITLE, resp.text, re.IGNORECASE)
-        if re_search:
-            error_msg = re_search.group(1)
-        re_search = re.search(REGEX_ERROR_HINT, resp.text, re.IGNORECASE)
-        if re_search:
-            error_msg += ": %s" % re_search.group(1)
-        return error_msg
-
-    return None
+    answer = _get_single_device_response(parse_sci_response(resp.text))
+    return answer.error if answer is not None else None
 
 
 def get_installations(request):
@@ -497,6 +605,9 @@ def get_installations(request):
     Returns a list containing the smart tank monitoring installations of the
     DRM account.
 
+    The installations are cached per account for a short time, as they are
+    read on every map load and parameters verification.
+
     Args:
          request (:class:`.WSGIRequest`): The request used to generate the
             Device Cloud instance.
@@ -505,35 +616,42 @@ def get_installations(request):
         :class:`.HttpResponse`: An HTTP response with the list of the Smart
             tank monitoring installations within the DRM account in JSON format.
     """
-    installations = []
-    dc = get_device_cloud(request)
-    devices = list(dc.devicecore.get_devices())
+    return get_installations_cache().get(get_account_id(request.session), get_device_cloud(request))
 
-    for device in devices:
+
+def read_installations(dc):
+    """
+    Reads the smart tank monitoring installations of the DRM account.
+
+    Args:
+        dc (:class:`.DeviceCloud`): the Device Cloud instance.
+
+    Returns:
+        List: List of :class:`.SmartTankInstallation`.
+    """
+    installations = {}
+
+    # Only read the devices of the installation groups.
+    for device in dc.devicecore.get_devices(group_path.like(models.SMART_TANKS_PREFIX + "%")):
         # Get the group name of the device and verify it is a tank installation.
         group = device.get_group_path()
         if group == "" or not group.startswith(models.SMART_TANKS_PREFIX):
             continue
 
-        # Get the tank installation from the list or create a new one.
-        installation = None
-        for inst in installations:
-            if inst.name == group.replace(models.SMART_TANKS_PREFIX, ""):
-                installation = inst
-                break
+        # Get the tank installation of the group or create a new one.
+        installation = installations.get(group)
         if installation is None:
-            installation = SmartTankInstallation(group)
-            installations.append(installation)
+            installation = installations[group] = SmartTankInstallation(group)
 
         # Add the device to the installation.
         installation.add_device(device.get_connectware_id())
 
-        # If the location of the device is valid, add it to the list.
+        # If the location of the device is valid, add it to the installation.
         lat, lon = device.get_latlon()
         if lat is not None and lon is not None:
             installation.add_device_location(lat, lon)
 
-    return installations
+    return list(installations.values())
 
 
 def get_smart_tanks(request, installation_name):
@@ -548,18 +666,31 @@ def get_smart_tanks(request, installation_name):
     Returns:
         list: A list with the Smart Tanks associated to the given installation.
 
+    Raises:
+        DeviceCloudHttpException: if there is any error sending the request.
+    """
+    return read_smart_tanks(get_device_cloud(request), installation_name)
+
+
+def read_smart_tanks(dc, installation_name):
+    """
+    Reads the list of Smart Tanks associated to the given installation.
+
+    Args:
+        dc (:class:`.DeviceCloud`): the Device Cloud instance.
+        installation_name (String): the name of the installation.
+
+    Returns:
+        list: A list with the Smart Tanks associated to the given installation.
+
     Raises:
         DeviceCloudHttpException: if there is any error sending the request.
     """
     tanks = []
-    dc = get_device_cloud(request)
-    devices = list(dc.devicecore.get_devices())
+    devices = dc.devicecore.get_devices(group_path == models.SMART_TANKS_PREFIX + installation_name)
 
     # Add the devices of the group.
     for device in devices:
-        if device.get_group_path() != (models.SMART_TANKS_PREFIX + installation_name):
-            continue
-
         tank = SmartTank(device.get_connectware_id(),
                          device.get_device_json().get("dpName"))
         tank.is_online = device.is_connected()
@@ -637,13 +768,17 @@ def get_current_data_point(dc, stream_id):
     return None
 
 
-def get_data_points(request, stream_name):
+def get_data_points(request, stream_name, method=METHOD_LTTB):
     """
     Returns the list of data points in JSON format of the given data stream.
 
+    The request may contain the number of points to return, usually the
+    width of the chart. Longer series are downsampled to that number.
+
     Args:
         request (:class:`.WSGIRequest`): the AJAX request.
         stream_name (String): the data stream name.
+        method (String, optional): the downsampling method.
 
     Returns:
         A JSON with the data points or the error.
@@ -658,21 +793,225 @@ def get_data_points(request, stream_name):
     tank_id = request.POST[views.PARAM_TANK_ID]
     interval = int(
         request.POST[PARAM_DATA]) if PARAM_DATA in request.POST else 1
+    points = get_history_points(request.POST.get(PARAM_POINTS))
 
     stream_id = STREAM_FORMAT.format(tank_id, stream_name)
 
-    strm = dc.streams.get_stream(stream_id)
-    datapoints = []
-
-    for dp in strm.read(
-            start_time=(datetime.now(timezone.utc) - timedelta(hours=interval)),
-            newest_first=False):
-        datapoints.append({"timestamp": dp.get_timestamp().timestamp() * 1000,
-                           "data": dp.get_data()})
+    try:
+        datapoints = read_history(dc, stream_id, interval, points, method)
+    except DeviceCloudHttpException as e:
+        # The stream does not exist until the tank uploads its first sample.
+        if e.response.status_code == 404:
+            datapoints = []
+        else:
+            return get_exception_response(e)
 
     return JsonResponse({"data": datapoints}, status=200)
 
 
+def get_history_points(value):
+    """
+    Returns the number of points to return for a chart.
+
+    Args:
+        value (String): the requested number of points, `None` to use the
+            default one.
+
+    Returns:
+        Integer: the number of points, within the allowed limits.
+    """
+    try:
+        points = int(float(value))
+    except (TypeError, ValueError):
+        return HISTORY_DEFAULT_POINTS
+    return min(max(points, HISTORY_MIN_POINTS), HISTORY_MAX_POINTS)
+
+
+def get_rollup_interval(seconds, points):
+    """
+    Returns the DRM rollup interval that gives a number of samples closest
+    to the given number of points over the given time window.
+
+    Args:
+        seconds (Integer): the length of the time window in seconds.
+        points (Integer): the number of points to return.
+
+    Returns:
+        String: the rollup interval, `None` to read the raw data points if
+            no rollup gives at least half of the points.
+    """
+    best = None
+    best_distance = None
+    for rollup_interval, length in ROLLUP_INTERVALS:
+        samples = seconds / length
+        if samples < points / 2:
+            break
+        distance = abs(np.log(samples / points))
+        if best_distance is None or distance < best_distance:
+            best = rollup_interval
+            best_distance = distance
+    return best
+
+
+def read_history(dc, stream_id, hours, points, method=METHOD_LTTB):
+    """
+    Reads the data points of the given stream of the last hours, reduced to
+    the given number of points.
+
+    The DRM rollup closest to the number of points is read, and the result
+    is downsampled if it still has more points than requested. The series
+    downsampled with `METHOD_MIN_MAX` are read raw, so their extremes are
+    not averaged.
+
+    Args:
+        dc (:class:`.DeviceCloud`): the Device Cloud instance.
+        stream_id (String): the data stream ID.
+        hours (Integer): the number of hours to read.
+        points (Integer): the maximum number of points to return.
+        method (String, optional): the downsampling method.
+
+    Returns:
+        List: the timestamp, in milliseconds, and value of each data point.
+
+    Raises:
+        DeviceCloudHttpException: if there is any error sending the request.
+    """
+    timestamps, values = _read_history_data_points(dc, stream_id, hours, points,
+                                                   rollup=method != METHOD_MIN_MAX)
+
+    try:
+        data = np.asarray(values, dtype=np.float64)
+    except ValueError:
+        # Series that are not numeric are returned as they are.
+        return [{"timestamp": timestamp, "data": value} for timestamp, value in zip(timestamps, values)]
+
+    timestamps, data = downsample(np.asarray(timestamps, dtype=np.float64), data, points, method)
+    return [{"timestamp": timestamp, "data": value} for timestamp, value in zip(timestamps.tolist(), data.tolist())]
+
+
+def get_history(request):
+    """
+    Returns the data points of several data streams in a single response.
+
+    The request data is a JSON with the list of series to read, each one
+    with the tank ID, the stream name, the interval in hours and,
+    optionally, the number of points. The series are read concurrently.
+    If 'align' is set, all the series are averaged on a shared grid of
+    timestamps with the number of points of the request.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+        A JSON with the data points or the error of each series, in the
+            order of the request.
+    """
+    # Check if the AJAX request is valid.
+    error = check_ajax_request(request)
+    if error is not None:
+        return error
+
+    try:
+        data = json.loads(request.POST[PARAM_DATA])
+        specs = data[ID_SERIES]
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({ID_ERROR: ERROR_INVALID_HISTORY}, status=400)
+    if not isinstance(specs, list) or not 0 < len(specs) <= HISTORY_MAX_SERIES \
+            or not all(isinstance(spec, dict) and views.PARAM_TANK_ID in spec and ID_STREAM in spec
+                       for spec in specs):
+        return JsonResponse({ID_ERROR: ERROR_INVALID_HISTORY}, status=400)
+
+    dc = get_device_cloud(request)
+    points = get_history_points(data.get(PARAM_POINTS))
+    aligned = bool(data.get(ID_ALIGN))
+
+    executor = get_history_executor()
+    futures = [executor.submit(_read_history_series, dc, spec, points, aligned) for spec in specs]
+    series = [future.result() for future in futures]
+
+    if not aligned:
+        return JsonResponse({ID_SERIES: series}, status=200)
+
+    # Align the series that could be read.
+    valid = [entry for entry in series if ID_ERROR not in entry]
+    methods = [HISTORY_METHODS.get(spec[ID_STREAM], METHOD_LTTB)
+               for spec, entry in zip(specs, series) if ID_ERROR not in entry]
+    timestamps, values = align([entry.pop("data") for entry in valid], points, methods)
+    for entry, entry_values in zip(valid, values):
+        entry["data"] = [None if np.isnan(value) else value for value in entry_values.tolist()]
+    return JsonResponse({ID_TIMESTAMPS: timestamps.tolist(), ID_SERIES: series}, status=200)
+
+
+def _read_history_series(dc, spec, points, aligned):
+    """
+    Reads a series of a history request.
+
+    Returns:
+        Dictionary: the data points of the series, as arrays of timestamps
+            and values if it will be aligned, or the error.
+    """
+    stream_name = spec[ID_STREAM]
+    stream_id = STREAM_FORMAT.format(spec[views.PARAM_TANK_ID], stream_name)
+    hours = int(spec.get(ID_INTERVAL) or 1)
+    try:
+        if not aligned:
+            series_points = get_history_points(spec.get(PARAM_POINTS, points))
+            return {"data": read_history(dc, stream_id, hours, series_points,
+                                         HISTORY_METHODS.get(stream_name, METHOD_LTTB))}
+        timestamps, values = _read_history_data_points(
+            dc, stream_id, hours, points, rollup=HISTORY_METHODS.get(stream_name) != METHOD_MIN_MAX)
+        return {"data": (np.asarray(timestamps, dtype=np.float64), np.asarray(values, dtype=np.float64))}
+    except DeviceCloudHttpException as e:
+        # The stream does not exist until the tank uploads its first sample.
+        if e.response.status_code == 404:
+            return {"data": [] if not aligned else (np.empty(0), np.empty(0))}
+        return {ID_ERROR: get_exception_message(e)}
+    except ValueError:
+        return {ID_ERROR: ERROR_NOT_NUMERIC}
+    except Exception as e:
+        return {ID_ERROR: str(e)}
+
+
+def _read_history_data_points(dc, stream_id, hours, points, rollup=True):
+    """
+    Reads the data points of the given stream of the last hours, using the
+    DRM rollup closest to the given number of points unless `rollup` is
+    `False`.
+
+    Returns:
+        Tuple: the list of timestamps, in milliseconds, and the list of
+            values.
+    """
+    params = {"timeline": "client", "order": "ascending", "size": HISTORY_PAGE_SIZE,
+              "startTime": isoformat(datetime.now(timezone.utc) - timedelta(hours=hours))}
+    rollup_interval = get_rollup_interval(hours * 3600, points) if rollup else None
+    if rollup_interval is not None:
+        params["rollupInterval"] = rollup_interval
+        params["rollupMethod"] = ROLLUP_METHOD_AVERAGE
+
+    timestamps = []
+    values = []
+    while True:
+        result = dc.get_connection().get_json(WS_DATA_POINTS.format(stream_id), params=params)
+        for item in result.get("items", []):
+            timestamps.append(_get_data_point_timestamp(item))
+            values.append(item["data"])
+        if int(result["resultSize"]) < HISTORY_PAGE_SIZE or "pageCursor" not in result:
+            break
+        params["pageCursor"] = result["pageCursor"]
+    return timestamps, values
+
+
+def _get_data_point_timestamp(item):
+    """
+    Returns the timestamp in milliseconds of the given data point JSON.
+    """
+    # Raw data points may only include the timestamp in ISO format.
+    if "timestamp" in item:
+        return int(item["timestamp"])
+    return datetime.fromisoformat(item["timestampISO"].replace("Z", "+00:00")).timestamp() * 1000
+
+
 def set_tank_valve_value(request, device_id, value):
     """
     Sets the value of the tank valve.
@@ -746,37 +1085,128 @@ def get_tank_configuration_request(request, device_id):
     Returns:
         A JSON with the tank configuration or the error.
     """
-    dc = get_device_cloud(request)
-    mo_value = ""
-    df_value = ""
+    try:
+        configuration = get_configurations_cache().get(get_account_id(request.session), get_device_cloud(request),
+                                                       [device_id])[device_id]
+    except DeviceCloudHttpException as e:
+        return get_exception_response(e)
+
+    if ID_ERROR in configuration:
+        return JsonResponse({ID_ERROR: configuration[ID_ERROR]}, status=400)
+    return JsonResponse({"configuration": configuration}, status=200)
+
+
+def get_installation_configuration_request(request, installation_name):
+    """
+    Returns the DRM configuration of all the tanks of the given installation
+    and the tanks whose configuration differs from the majority.
 
+    Args:
+        request (:class:`.WSGIRequest`): The request used to generate the
+            Device Cloud instance.
+        installation_name (String): the name of the installation.
+
+    Returns:
+        A JSON with the configuration or the error of each tank, the
+            configuration of the majority and the tanks that differ from it.
+    """
+    dc = get_device_cloud(request)
     try:
-        xml_response = send_query_setting(dc, device_id,  SETTINGS_GROUP_DRM)
-        if xml_response is not None:
-            # If the response is not an XML structure, it is an error.
-            re_search = re.search(REGEX_REMOTE_MANAGER_GROUP, xml_response, re.IGNORECASE)
-            if re_search:
-                # Find and get the MO value.
-                re_search = re.search(REGEX_SETTING_MO, xml_response, re.IGNORECASE)
-                if re_search:
-                    mo_value = re_search.group(1)
-                # Find and get the DF value.
-                re_search = re.search(REGEX_SETTING_DF, xml_response, re.IGNORECASE)
-                if re_search:
-                    df_value = re_search.group(1)
-                return JsonResponse({"configuration": {"mo": mo_value, "df": df_value}}, status=200)
-            else:
-                return JsonResponse({ID_ERROR: xml_response}, status=400)
-        else:
-            return JsonResponse({ID_ERROR: "Invalid answer from the DRM device."}, status=400)
+        device_ids = [tank.dev_id for tank in read_smart_tanks(dc, installation_name)]
+        configurations = get_configurations_cache().get(get_account_id(request.session), dc, device_ids)
     except DeviceCloudHttpException as e:
         return get_exception_response(e)
 
+    majority, different = get_configuration_differences(configurations)
+    return JsonResponse({
+        ID_CONFIGURATIONS: configurations,
+        ID_MAJORITY: majority,
+        ID_DIFFERENT: different
+    }, status=200)
+
+
+def get_configuration_differences(configurations):
+    """
+    Returns the most common of the given configurations and the devices
+    whose configuration is different.
+
+    Args:
+        configurations (Dictionary): the configuration or the error of each
+            device ID.
+
+    Returns:
+        Tuple: the MO and DF values of the majority, `None` if no
+            configuration could be read, and the list of device IDs with a
+            different configuration.
+    """
+    values = Counter((configuration["mo"], configuration["df"]) for configuration in configurations.values()
+                     if ID_ERROR not in configuration)
+    if not values:
+        return None, []
+
+    majority = values.most_common(1)[0][0]
+    different = [device_id for device_id, configuration in configurations.items()
+                 if ID_ERROR not in configuration and (configuration["mo"], configuration["df"]) != majority]
+    return {"mo": majority[0], "df": majority[1]}, different
+
+
+def read_tanks_configuration(dc, device_ids):
+    """
+    Reads the DRM configuration of the given tanks.
+
+    The tanks are queried with one SCI request per `CONFIGURATIONS_BATCH_SIZE`
+    tanks, and the requests are sent at the same time.
+
+    Args:
+        dc (:class:`.DeviceCloud`): the Device Cloud instance.
+        device_ids (List): the device IDs of the DRM devices.
+
+    Returns:
+        Dictionary: the MO and DF values or the error of each device ID.
+
+    Raises:
+        DeviceCloudHttpException: if there is any error sending the requests.
+    """
+    batches = [device_ids[i:i + CONFIGURATIONS_BATCH_SIZE]
+               for i in range(0, len(device_ids), CONFIGURATIONS_BATCH_SIZE)]
+    futures = [get_configurations_executor().submit(send_query_setting, dc, batch, SETTINGS_GROUP_DRM)
+               for batch in batches]
+
+    configurations = {}
+    for batch, future in zip(batches, futures):
+        answers = future.result()
+        for device_id in batch:
+            configurations[device_id] = _parse_drm_settings(answers.get(device_id, answers.get(None)))
+    return configurations
+
+
+def _parse_drm_settings(answer):
+    """
+    Returns the MO and DF values contained in the given 'query_setting'
+    answer, or its error.
+    """
+    if answer is None or (answer.error is None and answer.payload is None):
+        return {ID_ERROR: ERROR_INVALID_ANSWER}
+    if answer.error is not None:
+        return {ID_ERROR: answer.error}
+
+    # If the response is not an XML structure, it is an error.
+    try:
+        settings = et.fromstring(answer.payload)
+    except ParseError:
+        settings = None
+    if settings is None or settings.tag != SETTINGS_GROUP_DRM:
+        return {ID_ERROR: answer.payload}
+    return {"mo": settings.findtext(TAG_SETTING_MO, ""), "df": settings.findtext(TAG_SETTING_DF, "")}
+
 
 def set_tanks_configuration_request(request, device_ids, mo_value, df_value):
     """
     Sets the DRM configuration of the tanks with the provided IDs.
 
+    The offline tanks are configured by a single DRM schedule, whose job is
+    tracked until it finishes.
+
     Args:
         request (:class:`.WSGIRequest`): The request used to generate the
             Device Cloud instance.
@@ -788,6 +1218,7 @@ def set_tanks_configuration_request(request, device_ids, mo_value, df_value):
         A JSON with the new configuration or the error.
     """
     scheduled_configs = []
+    error_response = None
     dc = get_device_cloud(request)
 
     # Configure all the devices one by one. Stop at the first error unless it is a "Device not connected" error.
@@ -797,19 +1228,30 @@ def set_tanks_configuration_request(request, device_ids, mo_value, df_value):
             error_msg = send_set_drm_settings(dc, device_id, mo_value, df_value)
             if error_msg is not None:
                 if error_msg.lower() == ERROR_NOT_CONNECTED.lower():
-                    # Schedule a configuration
-                    schedule_tank_configuration(dc, device_id, mo_value, df_value)
                     scheduled_configs.append(device_id)
                 else:
-                    return JsonResponse({ID_ERROR: error_msg})
+                    error_response = JsonResponse({ID_ERROR: error_msg})
+                    break
+        except DeviceCloudHttpException as e:
+            error_response = get_sci_exception_response(e)
+            break
+
+    # Schedule the configuration of the offline devices found before any error.
+    job_id = None
+    if scheduled_configs:
+        try:
+            job_id = schedule_tank_configuration(dc, scheduled_configs, mo_value, df_value)
+            if job_id:
+                get_scheduled_configurations().add(get_account_id(request.session), job_id, scheduled_configs,
+                                                   mo_value, df_value)
         except DeviceCloudHttpException as e:
-            error_msg = e.response.text
-            re_search = re.search(REGEX_ERROR_GENERAL, error_msg, re.IGNORECASE)
-            if re_search:
-                error_msg = re_search.group(1)
-            return JsonResponse(
-                {ID_ERROR: "Error in the DRM request: {}".format(error_msg)},
-                status=400)
+            if error_response is None:
+                error_response = get_sci_exception_response(e)
+
+    # The configuration of the devices is read again the next time.
+    get_configurations_cache().invalidate(get_account_id(request.session), device_ids)
+    if error_response is not None:
+        return error_response
 
     # If all devices were configured successfully, return the current configuration.
     return JsonResponse( {
@@ -817,22 +1259,47 @@ def set_tanks_configuration_request(request, device_ids, mo_value, df_value):
             "mo": mo_value,
             "df": df_value
         },
-        "scheduled_configs": scheduled_configs
+        "scheduled_configs": scheduled_configs,
+        ID_JOB_ID: job_id
     }, status=200)
 
 
-def schedule_tank_configuration(dc, device_id, mo_value, df_value):
+def get_sci_exception_response(e):
     """
-    Schedules the DRM configuration of the tank with the provided ID. This
-    method should be used when the device is not connected to DRM.
+    Returns the JSON response with the first device error of the SCI
+    response contained in the given exception.
+
+    Args:
+        e (:class:`.DeviceCloudHttpException`): The exception.
+
+    Returns:
+        A JSON response with the details of the exception.
+    """
+    error_msg = e.response.text
+    errors = [answer.error for answer in parse_sci_response(error_msg).values()
+              if answer.error is not None]
+    if errors:
+        error_msg = errors[0]
+    return JsonResponse(
+        {ID_ERROR: "Error in the DRM request: {}".format(error_msg)},
+        status=400)
+
+
+def schedule_tank_configuration(dc, device_ids, mo_value, df_value):
+    """
+    Schedules the DRM configuration of the tanks with the provided IDs. This
+    method should be used when the devices are not connected to DRM.
 
     Args:
         dc (:class:`.DeviceCloud`): The Device Cloud instance to use.
-        device_id (String): the device ID of the DRM device associated to
-            the selected tank.
+        device_ids (List): the device IDs of the DRM devices associated to
+            the tanks to configure.
         mo_value (String): the new value of the MO setting.
         df_value (String): the new value of the DF setting.
 
+    Returns:
+        String: the ID of the DRM job of the schedule.
+
     Raises:
         DeviceCloudHttpException: if there is any error sending the schedule.
     """
@@ -846,10 +1313,61 @@ def schedule_tank_configuration(dc, device_id, mo_value, df_value):
         settings += REQ_SETTING_DF.format(df_value)
 
     # Generate the request message.
-    schedule_message = SCHEDULE_SAVE_TEMPLATE.format(device_id, settings)
+    targets = "".join(SCHEDULE_TARGET.format(device_id) for device_id in device_ids)
+    schedule_message = SCHEDULE_SAVE_TEMPLATE.format(targets, settings)
 
     # Post the schedule. If the post fails, it will raise an exception.
-    dc_connection.post("/ws/Schedule", schedule_message)
+    response = dc_connection.post(WS_SCHEDULE, schedule_message)
+
+    # The location of the schedule ends with the ID of its job.
+    return et.fromstring(response.text).findtext(TAG_LOCATION, "").rsplit("/", 1)[-1]
+
+
+def get_scheduled_configs_request(request):
+    """
+    Returns the DRM jobs that configure the offline tanks of the account and
+    their status.
+
+    Args:
+        request (:class:`.WSGIRequest`): The request used to generate the
+            Device Cloud instance.
+
+    Returns:
+        A JSON with the jobs or the error.
+    """
+    try:
+        jobs = get_scheduled_configurations().get(get_account_id(request.session), get_device_cloud(request))
+        return JsonResponse({ID_JOBS: jobs}, status=200)
+    except DeviceCloudHttpException as e:
+        return get_exception_response(e)
+
+
+def read_job_statuses(dc, job_ids):
+    """
+    Reads the status of the given DRM jobs, in batches of
+    `JOB_STATUS_BATCH` jobs per request.
+
+    Args:
+        dc (:class:`.DeviceCloud`): The Device Cloud instance to use.
+        job_ids (List): the IDs of the jobs.
+
+    Returns:
+        Dictionary: the status of each job found, by job ID.
+
+    Raises:
+        DeviceCloudHttpException: if there is any error reading the jobs.
+    """
+    statuses = {}
+    for i in range(0, len(job_ids), JOB_STATUS_BATCH):
+        batch = job_ids[i:i + JOB_STATUS_BATCH]
+        result = dc.get_connection().get_json(WS_JOB, params={
+            "condition": "jobId in ({})".format(",".join(batch)),
+            "size": len(batch)
+        })
+        for item in result.get("items", []):
+            status = str(item.get("jobStatus"))
+            statuses[str(item.get("jobId"))] = JOB_STATUSES.get(status, status)
+    return statuses
 
 
 def get_alerts_request(request, installation_name):
@@ -857,6 +1375,9 @@ def get_alerts_request(request, installation_name):
     Returns the fired alerts, alert definitions and list of tanks of the given
     installation.
 
+    The tanks, the fired alerts and the alert definitions are read at the
+    same time, and the definitions are cached until they are modified.
+
     Args:
         request (:class:`.WSGIRequest`): The AJAX request.
         installation_name (String): The installation name.
@@ -866,22 +1387,29 @@ def get_alerts_request(request, installation_name):
             installation.
     """
     dc = get_device_cloud(request)
+    account = get_account_id(request.session)
+    executor = get_alerts_executor()
 
     response = {}
 
-    tanks = get_smart_tanks(request, installation_name)
-    response[ID_TANKS] = [tank.to_json() for tank in tanks]
-
     try:
+        tanks = executor.submit(read_smart_tanks, dc, installation_name)
+        definitions = executor.submit(get_alert_definitions_cache().get, account, dc, installation_name)
+
         # Get the fired alerts.
-        fired_alerts = []
         ws = WS_GET_ALERTS_SUMMARY.format(ALERT_NAME.format(installation_name))
         resp = dc.get_connection().get(ws)
+
+        tanks = tanks.result()
+        response[ID_TANKS] = [tank.to_json() for tank in tanks]
+        tank_names = {tank.dev_id: tank.name for tank in tanks}
+
         if resp.status_code == 200:
+            fired_alerts = []
             data = json.loads(resp.content.decode(resp.encoding))
             for alert in data["list"]:
                 tank_id = alert["device_id"]
-                tank_name = get_tank_name(tank_id, tanks)
+                tank_name = tank_names.get(tank_id)
                 # Only add the alert if it belongs to a known tank and its status is fired.
                 if tank_name is None or alert["status"] != "fired":
                     continue
@@ -891,22 +1419,44 @@ def get_alerts_request(request, installation_name):
             response["alerts"] = fired_alerts
 
         # Get the alert definitions.
-        alert_definitions = []
-        ws = WS_GET_ALERTS_INVENTORY.format(ALERT_NAME.format(installation_name))
-        resp = dc.get_connection().get(ws)
-        if resp.status_code == 200:
-            data = json.loads(resp.content.decode(resp.encoding))
-            for alert in data["list"]:
-                if "parameters" in alert["fire"]:
-                    alert_definitions.append({"id": alert["id"], "description": alert["description"],
-                                             "threshold": alert["fire"]["parameters"]["thresholdValue"]})
-            response["definitions"] = alert_definitions
+        definitions = definitions.result()
+        if definitions is not None:
+            response["definitions"] = definitions
 
         return JsonResponse({"data": response}, status=200)
     except DeviceCloudHttpException as e:
         return get_exception_response(e)
 
 
+def read_alert_definitions(dc, installation_name):
+    """
+    Reads the alert definitions of the given installation.
+
+    Args:
+        dc (:class:`.DeviceCloud`): The Device Cloud instance.
+        installation_name (String): The installation name.
+
+    Returns:
+        List: The ID, description and threshold of each alert definition,
+            `None` if they could not be read.
+
+    Raises:
+        DeviceCloudHttpException: if there is any error sending the request.
+    """
+    ws = WS_GET_ALERTS_INVENTORY.format(ALERT_NAME.format(installation_name))
+    resp = dc.get_connection().get(ws)
+    if resp.status_code != 200:
+        return None
+
+    alert_definitions = []
+    data = json.loads(resp.content.decode(resp.encoding))
+    for alert in data["list"]:
+        if "parameters" in alert["fire"]:
+            alert_definitions.append({"id": alert["id"], "description": alert["description"],
+                                      "threshold": alert["fire"]["parameters"]["thresholdValue"]})
+    return alert_definitions
+
+
 def get_alert_details(dc, alert_id, tank_id):
     """
     Returns the details of the alert with the given ID.
@@ -980,6 +1530,9 @@ def remove_alert_definition_request(request, alert_id):
     try:
         # Remove the alert.
         dc.get_connection().delete(ws)
+        get_alert_definitions_cache().invalidate(get_account_id(request.session))
+        get_alert_index().remove_definition(get_account_id(request.session), alert_id)
+        get_alerts_executor().submit(get_alert_monitors().refresh, get_account_id(request.session))
 
         return JsonResponse({"valid": True}, status=200)
     except DeviceCloudHttpException as e:
@@ -1008,10 +1561,15 @@ def create_alert_definition_request(request, installation_name, threshold, auto_
         resp = dc.get_connection().post(WS_ALERTS_INVENTORY,
                                         CREATE_ALERT_JSON.format(ALERT_NAME.format(installation_name), threshold,
                                                                  threshold if auto_reset else 1000))
+        get_alert_definitions_cache().invalidate(get_account_id(request.session), installation_name)
 
         if resp.status_code == 201:
             data = json.loads(resp.content.decode(resp.encoding))
             alert = data["list"][0]
+            get_alert_index().add_definitions(get_account_id(request.session), ALERT_NAME.format(installation_name),
+                                              [alert])
+            get_alerts_executor().submit(get_alert_monitors().refresh, get_account_id(request.session),
+                                         installation_name)
             return JsonResponse({"id": alert["id"], "description": alert["description"],
                                  "threshold": alert["fire"]["parameters"]["thresholdValue"]}, status=200)
 
@@ -1020,131 +1578,902 @@ def create_alert_definition_request(request, installation_name, threshold, auto_
         return get_exception_response(e)
 
 
-def get_tank_name(device_id, tanks):
+def get_alerts_group(account, installation_name):
     """
-    Returns the name of the tank with the given ID contained in the given list.
+    Returns the name of the channel layer group that receives the alert
+    changes of the given installation.
 
     Args:
-        device_id (String): The device ID of the tank to find.
-        tanks (List): The list with tanks.
+        account (String): The account identifier.
+        installation_name (String): The name of the installation.
 
     Returns:
-        The name of the tank if it is found, `None` otherwise.
+        String: The name of the group.
     """
-    for tank in tanks:
-        if tank.dev_id == device_id:
-            return tank.name
-    return None
+    key = "%s|%s" % (account, installation_name)
+    return GROUP_ALERTS.format(hashlib.sha1(key.encode("utf-8")).hexdigest())
 
 
-def subscribe_alerts(session, installation_name, consumer):
+class SCIDeviceResponse:
+    """
+    Payload and error of a device in an SCI response.
     """
-    Creates a Device Cloud monitor to be notified when an alert of the given
-    installation is fired.
 
-    Args:
-        session (:class:`.SessionStore`): The Django session.
-        installation_name (String): The name of the installation.
-        consumer (:class:`.WsConsumer`): The web socket consumer.
+    def __init__(self, device_id):
+        """
+        Class constructor. Instantiates a new ``SCIDeviceResponse``.
 
-    Returns:
-        The ID of the created monitor.
+        Args:
+            device_id (String): the ID of the device, `None` for the errors
+                outside any device.
+        """
+        self.device_id = device_id
+        self.payload = None
+        self.error = None
+        self.error_id = None
+
+
+class SCIResponseParser:
     """
-    dc = get_device_cloud_session(session)
-    if dc is None:
-        return -1
+    Single pass parser of SCI responses.
 
-    global monitor_managers
+    The response goes through the expat parser once, without building a
+    tree: the text of the payloads and errors is collected by the element
+    handlers and XML payloads are sliced from the response using the parser
+    offsets, so the time is linear in the size of the response.
+    """
 
-    # Get or create the monitor manager for the given session.
-    session_key = session.session_key
-    if session_key in monitor_managers:
-        monitor_manager = monitor_managers.get(session_key)
-    else:
-        monitor_manager = MonitorManager(dc.get_connection())
-        monitor_managers[session_key] = monitor_manager
-
-    # Create a monitor for the alarms.
-    monitor = monitor_manager.create_tcp_monitor(["AlarmStatus"])
-
-    # Define the monitor callback.
-    def monitor_callback(json_data):
-        alert_status = json_data["Document"]["Msg"]["AlarmStatus"]
-        alert_id = alert_status["id"]["almId"]
-        alert_src_id = alert_status["id"]["almsSourceEntityId"]
-        status = alert_status["almsStatus"]
-        last_update = alert_status["almsUpdateTime"]
-        tank_id = alert_status["devConnectwareId"] if "devConnectwareId" in alert_status else None
-
-        # Only process alerts that are for the tank level.
-        if tank_id is not None and alert_src_id == STREAM_FORMAT.format(tank_id, ID_LEVEL):
-            send_data_ws = False
-            # Check if the alert was fired or not.
-            if status == 1:
-                # Get the details of the fired alert.
-                try:
-                    alert = get_alert_details(dc, alert_id, tank_id)
-                except DeviceCloudHttpException as e:
-                    print(e)
-                    return True
-
-                # If the alert is none, its definition has been removed, so send it to the web socket for removal.
-                if alert is None:
-                    status = 0
-                    send_data_ws = True
-                # If the alert is for a tank of this installation, send it to the web socket to add it.
-                elif alert["device_id"] == tank_id and alert["name"] == ALERT_NAME.format(installation_name):
-                    send_data_ws = True
+    def __init__(self, payload_tag=None, xml_payload=False):
+        """
+        Class constructor. Instantiates a new ``SCIResponseParser``.
+
+        Args:
+            payload_tag (String, optional): the tag of the element whose
+                content is the payload of each device.
+            xml_payload (Boolean, optional): `True` to return the payload as
+                XML, `False` to return its text.
+        """
+        self._payload_tag = payload_tag
+        self._xml_payload = xml_payload
+        self._data = None
+        self._parser = None
+        self._responses = None
+        self._device_id = None
+        self._payload_depth = 0
+        self._payload_start = 0
+        self._payload_text = None
+        self._error = None
+        self._error_field = None
+
+    def parse(self, text):
+        """
+        Parses the given SCI response.
+
+        Args:
+            text (String): the SCI response.
+
+        Returns:
+            Dictionary: the :class:`.SCIDeviceResponse` of each device ID.
+        """
+        self._data = text.encode("utf-8") if isinstance(text, str) else text
+        self._responses = {}
+        self._device_id = None
+        self._payload_depth = 0
+        self._error = None
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._parser.CharacterDataHandler = self._character_data
+        try:
+            self._parser.Parse(self._data, True)
+        except expat.ExpatError:
+            # Not a valid SCI response, return what was extracted so far.
+            pass
+        finally:
+            self._data = None
+            self._parser = None
+        return self._responses
+
+    def _get_response(self):
+        """
+        Returns the response of the current device.
+        """
+        response = self._responses.get(self._device_id)
+        if response is None:
+            response = self._responses[self._device_id] = SCIDeviceResponse(self._device_id)
+        return response
+
+    def _start_element(self, name, attrs):
+        if self._payload_depth:
+            if name == self._payload_tag:
+                self._payload_depth += 1
+        elif name == self._payload_tag:
+            self._payload_depth = 1
+            if self._xml_payload:
+                # The payload starts after the end of the start tag.
+                self._payload_start = self._data.index(b">", self._parser.CurrentByteIndex) + 1
             else:
-                # The alert was acknowledged or reset, so send it to the web socket for removal.
-                send_data_ws = True
+                self._payload_text = []
+        elif name == TAG_DEVICE and "id" in attrs:
+            self._device_id = attrs["id"]
+            self._get_response()
+
+        if name == TAG_ERROR and self._error is None:
+            self._error = {"id": attrs.get("id"), TAG_ERROR: [], TAG_ERROR_DESC: None, TAG_ERROR_HINT: None}
+            self._error_field = TAG_ERROR
+        elif self._error is not None and name in (TAG_ERROR_DESC, TAG_ERROR_HINT):
+            self._error[name] = []
+            self._error_field = name
+
+    def _end_element(self, name):
+        if self._payload_depth and name == self._payload_tag:
+            self._payload_depth -= 1
+            if not self._payload_depth:
+                if self._xml_payload:
+                    end = max(self._parser.CurrentByteIndex, self._payload_start)
+                    payload = self._data[self._payload_start:end].decode("utf-8")
+                else:
+                    payload = "".join(self._payload_text)
+                    self._payload_text = None
+                self._get_response().payload = payload
+        elif name == TAG_DEVICE and not self._payload_depth:
+            self._device_id = None
+
+        if self._error is not None:
+            if name == TAG_ERROR:
+                response = self._get_response()
+                # Keep the first error of each device.
+                if response.error is None:
+                    response.error_id = self._error["id"]
+                    response.error = self._get_error_message()
+                self._error = None
+                self._error_field = None
+            elif name in (TAG_ERROR_DESC, TAG_ERROR_HINT):
+                self._error_field = TAG_ERROR
+
+    def _character_data(self, data):
+        if self._payload_text is not None:
+            self._payload_text.append(data)
+        if self._error_field is not None:
+            self._error[self._error_field].append(data)
+
+    def _get_error_message(self):
+        """
+        Returns the message of the current error, built from its description
+        and hint or, if it has none, from its text.
+        """
+        if self._error[TAG_ERROR_DESC] is None:
+            return "".join(self._error[TAG_ERROR]).strip()
+        desc = "".join(self._error[TAG_ERROR_DESC])
+        hint = "".join(self._error[TAG_ERROR_HINT] or [])
+        return "%s: %s" % (desc, hint) if hint else desc
 
-            if send_data_ws:
-                consumer.send(text_data=json.dumps({"id": alert_id, "tank_id": tank_id,
-                                                    "status": status, "last_update": last_update}))
-        return True
 
-    # Add the monitor callback.
-    monitor.add_callback(monitor_callback)
+class MonitorManager(MonitorAPI):
+    """
+    Class used to manage the use of Device Cloud monitors.
+    """
+    def __init__(self, conn):
+        MonitorAPI.__init__(self, conn)
+        self._tcp_client_manager = TCPClientManager(self._conn, secure=False)
 
-    return monitor.get_id()
 
+class AlertMonitors:
+    """
+    DRM monitors of the fired alerts, shared by the web sockets that show
+    the alerts of the same installation.
+
+    There is a monitor per account and installation. It only listens to the
+    alert definitions of the installation and to the devices of its group,
+    and forwards the alert changes to the channel layer group returned by
+    :func:`get_alerts_group`. The definitions are read again once they expire
+    in the cache and the monitor is created again if they changed.
+    """
 
-def unsubscribe_alerts(session, monitor_id):
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, session, installation_name):
+        """
+        Adds a viewer of the alerts of the given installation and creates the
+        monitor if it is the first one.
+
+        Args:
+            session (:class:`.SessionStore`): The Django session of the viewer.
+            installation_name (String): The name of the installation.
+        """
+        key = (get_account_id(session), installation_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            created = entry is None
+            if created:
+                entry = {"dc": get_device_cloud_session(session), "viewers": 0, "manager": None,
+                         "monitor_id": -1, "definition_ids": None, "timer": None, "lock": threading.Lock()}
+                self._entries[key] = entry
+            entry["viewers"] += 1
+        if created:
+            self._start(key, entry)
+
+    def unsubscribe(self, session, installation_name):
+        """
+        Removes a viewer of the alerts of the given installation and deletes
+        the monitor if it was the last one.
+
+        Args:
+            session (:class:`.SessionStore`): The Django session of the viewer.
+            installation_name (String): The name of the installation.
+        """
+        key = (get_account_id(session), installation_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry["viewers"] -= 1
+            if entry["viewers"] > 0:
+                return
+            del self._entries[key]
+        self._stop(entry)
+
+    def refresh(self, account, installation_name=None):
+        """
+        Creates again the monitors of the given installation, so they listen
+        to its current alert definitions.
+
+        Args:
+            account (String): The account identifier.
+            installation_name (String, optional): The name of the installation.
+                All the installations of the account if not given.
+        """
+        with self._lock:
+            entries = [(key, entry) for key, entry in self._entries.items()
+                       if key[0] == account and installation_name in (None, key[1])]
+        for key, entry in entries:
+            self._stop(entry)
+            self._start(key, entry)
+
+    def _start(self, key, entry):
+        """
+        Creates the monitor of the given entry if it still has viewers.
+        """
+        account, installation_name = key
+        with entry["lock"]:
+            with self._lock:
+                if self._entries.get(key) is not entry:
+                    return
+            dc = entry["dc"]
+            # Check the definitions again when they expire.
+            self._schedule_check(key, entry)
+            try:
+                definitions = get_alert_definitions_cache().get(account, dc, installation_name)
+            except DeviceCloudHttpException as e:
+                print(e)
+                return
+            entry["definition_ids"] = sorted(definition["id"] for definition in definitions)
+            # There is nothing to listen to until an alert is defined.
+            if not definitions:
+                return
+
+            group = models.SMART_TANKS_PREFIX + installation_name
+            manager = MonitorManager(dc.get_connection())
+            try:
+                monitor = manager.create_tcp_monitor([MONITOR_TOPIC_ALERT.format(group, definition["id"])
+                                                      for definition in definitions])
+            except DeviceCloudHttpException as e:
+                print(e)
+                return
+            monitor.add_callback(self._get_monitor_callback(account, dc, installation_name))
+            entry["manager"] = manager
+            entry["monitor_id"] = monitor.get_id()
+
+    def _stop(self, entry):
+        """
+        Stops and deletes the monitor of the given entry, if any.
+        """
+        with entry["lock"]:
+            if entry["timer"] is not None:
+                entry["timer"].cancel()
+                entry["timer"] = None
+            manager = entry["manager"]
+            if manager is None:
+                return
+            entry["manager"] = None
+
+            # Stop the monitor.
+            manager.stop_listeners()
+
+            # Delete the monitor.
+            try:
+                entry["dc"].get_connection().delete(WS_REMOVE_MONITOR.format(entry["monitor_id"]))
+            except DeviceCloudHttpException as e:
+                print(e)
+            entry["monitor_id"] = -1
+
+    def _schedule_check(self, key, entry):
+        """
+        Schedules the check of the alert definitions of the given entry. Must
+        be called with the entry lock held.
+        """
+        if entry["timer"] is not None:
+            entry["timer"].cancel()
+        entry["timer"] = threading.Timer(ALERT_DEFINITIONS_CACHE_TTL, self._check, args=(key, entry))
+        entry["timer"].daemon = True
+        entry["timer"].start()
+
+    def _check(self, key, entry):
+        """
+        Creates again the monitor of the given entry if the alert definitions
+        of its installation changed.
+        """
+        account, installation_name = key
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                return
+        try:
+            definitions = get_alert_definitions_cache().get(account, entry["dc"], installation_name)
+        except DeviceCloudHttpException as e:
+            print(e)
+            definitions = None
+        with entry["lock"]:
+            unchanged = definitions is None \
+                or sorted(definition["id"] for definition in definitions) == entry["definition_ids"]
+            if unchanged:
+                self._schedule_check(key, entry)
+                return
+        self._stop(entry)
+        self._start(key, entry)
+
+    @staticmethod
+    def _get_monitor_callback(account, dc, installation_name):
+        """
+        Returns the callback of the monitor of the given installation.
+        """
+        group = get_alerts_group(account, installation_name)
+        channel_layer = get_channel_layer()
+
+        def send_alert(alert_id, tank_id, status, last_update):
+            async_to_sync(channel_layer.group_send)(group, {
+                "type": "alert.status",
+                "data": {"id": alert_id, "tank_id": tank_id, "status": status, "last_update": last_update}
+            })
+
+        def monitor_callback(json_data):
+            alert_status = json_data["Document"]["Msg"]["AlarmStatus"]
+            alert_id = alert_status["id"]["almId"]
+            alert_src_id = alert_status["id"]["almsSourceEntityId"]
+            status = alert_status["almsStatus"]
+            last_update = alert_status["almsUpdateTime"]
+            tank_id = alert_status["devConnectwareId"] if "devConnectwareId" in alert_status else None
+
+            # Only process alerts that are for the tank level.
+            if tank_id is None or alert_src_id != STREAM_FORMAT.format(tank_id, ID_LEVEL):
+                return True
+
+            # The alert was acknowledged or reset, so send it to the web sockets for removal.
+            if status != 1:
+                send_alert(alert_id, tank_id, status, last_update)
+                return True
+
+            def alert_name_callback(name):
+                # If the name is none, its definition has been removed, so send it to the web sockets for removal.
+                if name is None:
+                    send_alert(alert_id, tank_id, 0, last_update)
+                # If the alert is for a tank of this installation, send it to the web sockets to add it.
+                elif name == ALERT_NAME.format(installation_name):
+                    send_alert(alert_id, tank_id, status, last_update)
+
+            # Get the name of the fired alert without blocking the monitor.
+            get_alert_index().get_name(account, dc, alert_id, tank_id, alert_name_callback)
+            return True
+
+        return monitor_callback
+
+
+class InstallationsCache:
+    """
+    Cache of the smart tank monitoring installations, indexed by account.
     """
-    Disconnects and deletes the Device Cloud monitor with the given ID that was
-    listening for alert changes.
 
-    Args:
-        session (:class:`.SessionStore`): The Django session.
-        monitor_id (int): The ID of the monitor to delete.
+    def __init__(self, ttl=INSTALLATIONS_CACHE_TTL):
+        """
+        Class constructor. Instantiates a new ``InstallationsCache``.
+
+        Args:
+            ttl (Integer): Seconds the installations are considered fresh.
+        """
+        self._ttl = ttl
+        self._entries = {}
+        self._account_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, account, dc):
+        """
+        Returns the installations of the given account, reading them from
+        DRM if they are not cached or they are too old.
+
+        Concurrent requests for the same account wait for a single read.
+
+        Args:
+            account (String): The account identifier.
+            dc (:class:`.DeviceCloud`): the Device Cloud instance.
+
+        Returns:
+            List: List of :class:`.SmartTankInstallation`.
+        """
+        installations = self._get_fresh(account)
+        if installations is not None:
+            return installations
+
+        with self._lock:
+            account_lock = self._account_locks.setdefault(account, threading.Lock())
+        with account_lock:
+            installations = self._get_fresh(account)
+            if installations is not None:
+                return installations
+            installations = read_installations(dc)
+            with self._lock:
+                self._entries[account] = (time.monotonic(), installations)
+        return installations
+
+    def _get_fresh(self, account):
+        """
+        Returns the cached installations of the given account if they are
+        fresh.
+        """
+        with self._lock:
+            entry = self._entries.get(account)
+            if entry is not None and time.monotonic() - entry[0] < self._ttl:
+                return entry[1]
+        return None
+
+
+class AlertDefinitionsCache:
+    """
+    Cache of the alert definitions, indexed by account and installation.
     """
-    dc = get_device_cloud_session(session)
-    if dc is None:
-        return
 
-    global monitor_managers
+    def __init__(self, ttl=ALERT_DEFINITIONS_CACHE_TTL):
+        """
+        Class constructor. Instantiates a new ``AlertDefinitionsCache``.
+
+        Args:
+            ttl (Integer): Seconds the definitions are considered fresh.
+        """
+        self._ttl = ttl
+        self._entries = {}
+        self._generations = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, account, dc, installation_name):
+        """
+        Returns the alert definitions of the given installation, reading them
+        from DRM if they are not cached or they are too old.
+
+        Args:
+            account (String): The account identifier.
+            dc (:class:`.DeviceCloud`): the Device Cloud instance.
+            installation_name (String): The installation name.
+
+        Returns:
+            List: The ID, description and threshold of each alert definition,
+                `None` if they could not be read.
+        """
+        key = (account, installation_name)
+        definitions = self._get_fresh(key)
+        if definitions is not None:
+            return definitions
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            definitions = self._get_fresh(key)
+            if definitions is not None:
+                return definitions
+            with self._lock:
+                generation = self._generations.get(account, 0)
+            definitions = read_alert_definitions(dc, installation_name)
+            if definitions is not None:
+                get_alert_index().add_definitions(account, ALERT_NAME.format(installation_name), definitions)
+                with self._lock:
+                    # Do not store the definitions if they were modified while reading them.
+                    if self._generations.get(account, 0) == generation:
+                        self._entries[key] = (time.monotonic(), definitions)
+        return definitions
+
+    def invalidate(self, account, installation_name=None):
+        """
+        Removes the cached alert definitions of the given installation.
+
+        Args:
+            account (String): The account identifier.
+            installation_name (String, optional): The installation name. All
+                the installations of the account if not given.
+        """
+        with self._lock:
+            self._generations[account] = self._generations.get(account, 0) + 1
+            for key in list(self._entries):
+                if key[0] == account and installation_name in (None, key[1]):
+                    del self._entries[key]
+
+    def _get_fresh(self, key):
+        """
+        Returns the cached alert definitions of the given key if they are
+        fresh.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self._ttl:
+                return entry[1]
+        return None
 
-    # Get or create the monitor manager for the given session.
-    session_key = session.session_key
-    if session_key not in monitor_managers:
-        return
-    monitor_manager = monitor_managers.pop(session_key)
 
-    # Stop the monitor.
-    monitor_manager.stop_listeners()
+class AlertIndex:
+    """
+    Index of the names of the alert definitions, indexed by account and
+    alert ID, used to process the fired alert events without asking DRM.
 
-    # Delete the monitor.
-    try:
-        dc.get_connection().delete(WS_REMOVE_MONITOR.format(monitor_id))
-    except DeviceCloudHttpException as e:
-        print(e)
+    The names are learned from the alert definitions read or created by the
+    application and from the alert summaries of the fired alerts. Removed
+    definitions are remembered for a while so their events do not require
+    a request either.
+    """
 
+    def __init__(self, removed_ttl=ALERT_REMOVED_TTL, max_workers=ALERT_LOOKUP_MAX_WORKERS):
+        """
+        Class constructor. Instantiates a new ``AlertIndex``.
+
+        Args:
+            removed_ttl (Integer): Seconds a removed definition is remembered.
+            max_workers (Integer): Maximum number of concurrent requests to
+                read the unknown alerts.
+        """
+        self._removed_ttl = removed_ttl
+        self._names = {}
+        self._removed = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="alert_index")
+
+    def add_definitions(self, account, name, definitions):
+        """
+        Adds the given alert definitions to the index.
+
+        Args:
+            account (String): The account identifier.
+            name (String): The name of the alert definitions.
+            definitions (List): The alert definitions, with their IDs.
+        """
+        with self._lock:
+            for definition in definitions:
+                key = (account, str(definition["id"]))
+                self._names[key] = name
+                self._removed.pop(key, None)
+
+    def remove_definition(self, account, alert_id):
+        """
+        Marks the given alert definition as removed.
+
+        Args:
+            account (String): The account identifier.
+            alert_id (int): The ID of the removed alert definition.
+        """
+        key = (account, str(alert_id))
+        with self._lock:
+            self._names.pop(key, None)
+            self._removed[key] = time.monotonic()
+
+    def get_name(self, account, dc, alert_id, tank_id, callback):
+        """
+        Calls the given callback with the name of the given alert, or `None`
+        if its definition has been removed.
+
+        The callback is called right away if the alert is indexed. If not,
+        its summary is read in a worker thread and the callback is called
+        from it; concurrent requests for the same alert share that read.
+
+        Args:
+            account (String): The account identifier.
+            dc (:class:`.DeviceCloud`): The Device Cloud instance.
+            alert_id (int): The ID of the alert.
+            tank_id (String): The ID of the tank associated to the alert.
+            callback (Function): The function to call with the name.
+        """
+        key = (account, str(alert_id))
+        with self._lock:
+            if key in self._names:
+                name = self._names[key]
+            elif time.monotonic() - self._removed.get(key, -self._removed_ttl) < self._removed_ttl:
+                name = None
+            else:
+                callbacks = self._pending.get(key)
+                if callbacks is None:
+                    self._pending[key] = [callback]
+                    self._executor.submit(self._read_name, key, dc, alert_id, tank_id)
+                else:
+                    callbacks.append(callback)
+                return
+        callback(name)
+
+    def _read_name(self, key, dc, alert_id, tank_id):
+        """
+        Reads the summary of an alert that is not indexed and calls the
+        callbacks waiting for its name.
+        """
+        try:
+            alert = get_alert_details(dc, alert_id, tank_id)
+        except DeviceCloudHttpException as e:
+            print(e)
+            with self._lock:
+                self._pending.pop(key, None)
+            return
+
+        with self._lock:
+            callbacks = self._pending.pop(key, [])
+            if alert is None:
+                self._removed[key] = time.monotonic()
+                name = None
+            else:
+                name = self._names[key] = alert["name"]
+        for callback in callbacks:
+            try:
+                callback(name)
+            except Exception as e:
+                print(e)
 
-class MonitorManager(MonitorAPI):
+
+class ConfigurationsCache:
     """
-    Class used to manage the use of Device Cloud monitors.
+    Cache of the DRM configuration of the tanks, indexed by account and
+    device ID.
     """
-    def __init__(self, conn):
-        MonitorAPI.__init__(self, conn)
-        self._tcp_client_manager = TCPClientManager(self._conn, secure=False)
+
+    def __init__(self, ttl=CONFIGURATIONS_CACHE_TTL):
+        """
+        Class constructor. Instantiates a new ``ConfigurationsCache``.
+
+        Args:
+            ttl (Integer): Seconds the configurations are considered fresh.
+        """
+        self._ttl = ttl
+        self._entries = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, account, dc, device_ids):
+        """
+        Returns the configuration of the given tanks, reading the ones that
+        are not cached or are too old from DRM.
+
+        The configurations that could not be read are not cached.
+
+        Args:
+            account (String): The account identifier.
+            dc (:class:`.DeviceCloud`): the Device Cloud instance.
+            device_ids (List): the device IDs of the tanks.
+
+        Returns:
+            Dictionary: the MO and DF values or the error of each device ID.
+
+        Raises:
+            DeviceCloudHttpException: if there is any error reading the
+                configurations.
+        """
+        configurations = {}
+        with self._lock:
+            generation = self._generations.get(account, 0)
+            for device_id in device_ids:
+                entry = self._entries.get((account, device_id))
+                if entry is not None and time.monotonic() - entry[0] < self._ttl:
+                    configurations[device_id] = entry[1]
+
+        missing = [device_id for device_id in device_ids if device_id not in configurations]
+        if missing:
+            read = read_tanks_configuration(dc, missing)
+            with self._lock:
+                # Do not store the configurations if they were modified while reading them.
+                if self._generations.get(account, 0) == generation:
+                    for device_id, configuration in read.items():
+                        if ID_ERROR not in configuration:
+                            self._entries[(account, device_id)] = (time.monotonic(), configuration)
+            configurations.update(read)
+        return configurations
+
+    def invalidate(self, account, device_ids):
+        """
+        Removes the cached configuration of the given tanks.
+
+        Args:
+            account (String): The account identifier.
+            device_ids (List): the device IDs of the tanks.
+        """
+        with self._lock:
+            self._generations[account] = self._generations.get(account, 0) + 1
+            for device_id in device_ids:
+                self._entries.pop((account, device_id), None)
+
+
+class ScheduledConfigurations:
+    """
+    Tracks the DRM jobs that configure the offline tanks, indexed by account.
+    """
+
+    def __init__(self, ttl=JOB_STATUS_TTL, keep=SCHEDULED_CONFIGS_TTL):
+        """
+        Class constructor. Instantiates a new ``ScheduledConfigurations``.
+
+        Args:
+            ttl (Integer): Seconds the status of the jobs is considered
+                fresh.
+            keep (Integer): Seconds the jobs are tracked after they are
+                scheduled.
+        """
+        self._ttl = ttl
+        self._keep = keep
+        self._jobs = {}
+        self._read_times = {}
+        self._account_locks = {}
+        self._lock = threading.Lock()
+
+    def add(self, account, job_id, device_ids, mo_value, df_value):
+        """
+        Starts tracking the given job.
+
+        Args:
+            account (String): The account identifier.
+            job_id (String): The ID of the DRM job.
+            device_ids (List): The IDs of the devices configured by the job.
+            mo_value (String): the MO setting of the job.
+            df_value (String): the DF setting of the job.
+        """
+        job = {
+            ID_JOB_ID: job_id,
+            ID_DEVICES: list(device_ids),
+            "configuration": {
+                "mo": mo_value,
+                "df": df_value
+            },
+            ID_STATUS: JOB_STATUS_NEW
+        }
+        with self._lock:
+            self._jobs.setdefault(account, {})[job_id] = (time.monotonic(), job)
+            # Read the status of the new job in the next request.
+            self._read_times.pop(account, None)
+
+    def get(self, account, dc):
+        """
+        Returns the tracked jobs of the given account.
+
+        The status of the unfinished jobs is read from DRM in a single
+        request if it is too old. Concurrent requests for the same account
+        share it.
+
+        Args:
+            account (String): The account identifier.
+            dc (:class:`.DeviceCloud`): the Device Cloud instance.
+
+        Returns:
+            List: The ID, devices, configuration and status of each job.
+
+        Raises:
+            DeviceCloudHttpException: if there is any error reading the jobs.
+        """
+        with self._lock:
+            account_lock = self._account_locks.setdefault(account, threading.Lock())
+        with account_lock:
+            with self._lock:
+                self._remove_old(account)
+                pending = self._get_pending(account)
+            if pending:
+                statuses = read_job_statuses(dc, pending)
+                with self._lock:
+                    self._read_times[account] = time.monotonic()
+                    for _, job in self._jobs.get(account, {}).values():
+                        job[ID_STATUS] = statuses.get(job[ID_JOB_ID], job[ID_STATUS])
+            with self._lock:
+                return [dict(job) for _, job in self._jobs.get(account, {}).values()]
+
+    def _get_pending(self, account):
+        """
+        Returns the IDs of the unfinished jobs of the given account if their
+        status is not fresh.
+        """
+        read_time = self._read_times.get(account)
+        if read_time is not None and time.monotonic() - read_time < self._ttl:
+            return []
+        return [job[ID_JOB_ID] for _, job in self._jobs.get(account, {}).values()
+                if job[ID_STATUS] not in JOB_STATUSES_FINISHED]
+
+    def _remove_old(self, account):
+        """
+        Stops tracking the jobs of the given account scheduled too long ago.
+        """
+        jobs = self._jobs.get(account, {})
+        for job_id, (created, _) in list(jobs.items()):
+            if time.monotonic() - created > self._keep:
+                del jobs[job_id]
+
+
+def get_alert_definitions_cache():
+    """
+    Returns the alert definitions cache.
+    """
+    return alert_definitions_cache
+
+
+def get_alert_index():
+    """
+    Returns the alert index.
+    """
+    return alert_index
+
+
+def get_alert_monitors():
+    """
+    Returns the shared alert monitors.
+    """
+    return alert_monitors
+
+
+def get_alerts_executor():
+    """
+    Returns the executor used to read the alerts information concurrently.
+    """
+    return alerts_executor
+
+
+def get_configurations_cache():
+    """
+    Returns the configurations cache.
+    """
+    return configurations_cache
+
+
+def get_configurations_executor():
+    """
+    Returns the executor used to read the tanks configuration concurrently.
+    """
+    return configurations_executor
+
+
+def get_history_executor():
+    """
+    Returns the executor used to read the history series concurrently.
+    """
+    return history_executor
+
+
+def get_installations_cache():
+    """
+    Returns the installations cache.
+    """
+    return installations_cache
+
+
+def get_scheduled_configurations():
+    """
+    Returns the scheduled configurations tracker.
+    """
+    return scheduled_configurations
+
+
+# Default global instance of the alert definitions cache.
+alert_definitions_cache = AlertDefinitionsCache()
+# Default global instance of the alert index.
+alert_index = AlertIndex()
+# Default global instance of the alert monitors.
+alert_monitors = AlertMonitors()
+# Default global instance of the alerts executor.
+alerts_executor = ThreadPoolExecutor(max_workers=ALERTS_MAX_WORKERS, thread_name_prefix="alerts")
+# Default global instance of the configurations cache.
+configurations_cache = ConfigurationsCache()
+# Default global instance of the configurations executor.
+configurations_executor = ThreadPoolExecutor(max_workers=CONFIGURATIONS_MAX_WORKERS,
+                                             thread_name_prefix="configurations")
+# Default global instance of the history executor.
+history_executor = ThreadPoolExecutor(max_workers=HISTORY_MAX_WORKERS, thread_name_prefix="history")
+# Default global instance of the installations cache.
+installations_cache = InstallationsCache()
+# Default global instance of the scheduled configurations tracker.
+scheduled_configurations = ScheduledConfigurations()
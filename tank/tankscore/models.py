@@ -28,8 +28,9 @@ class SmartTankInstallation:
         """
         self._name = name.replace(SMART_TANKS_PREFIX, "")
         self._devices = []
-        self._lats = []
-        self._lons = []
+        self._lat_sum = 0.0
+        self._lon_sum = 0.0
+        self._num_locations = 0
 
     @property
     def name(self):
@@ -50,9 +51,9 @@ class SmartTankInstallation:
              Tuple: Tuple containing the latitude and longitude coordinates of
                 the smart tank installation.
         """
-        if len(self._lats) == 0 or len(self._lons) == 0:
+        if self._num_locations == 0:
             return DEFAULT_LOCATION
-        return sum(self._lats) / len(self._lats), sum(self._lons) / len(self._lons)
+        return self._lat_sum / self._num_locations, self._lon_sum / self._num_locations
 
     @property
     def devices(self):
@@ -98,8 +99,9 @@ class SmartTankInstallation:
             lat (float): The device latitude.
             lon (float): The device longitude.
         """
-        self._lats.append(lat)
-        self._lons.append(lon)
+        self._lat_sum += lat
+        self._lon_sum += lon
+        self._num_locations += 1
 
     def to_json(self):
         """
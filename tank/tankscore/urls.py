@@ -29,9 +29,13 @@ urlpatterns = [
     path('ajax/get_level', views.get_level, name="get_level"),
     path('ajax/get_temperature', views.get_temperature, name="get_temperature"),
     path('ajax/get_valve', views.get_valve, name="get_valve"),
+    path('ajax/get_history', views.get_history_series, name="get_history"),
     path('ajax/verify_parameters', views.verify_parameters, name="verify_parameters"),
     path('ajax/get_tank_configuration', views.get_tank_configuration, name="get_tank_configuration"),
+    path('ajax/get_installation_configuration', views.get_installation_configuration,
+         name="get_installation_configuration"),
     path('ajax/set_tanks_configuration', views.set_tanks_configuration, name="set_tanks_configuration"),
+    path('ajax/get_scheduled_configs', views.get_scheduled_configs, name="get_scheduled_configs"),
     path('ajax/get_tanks_installations', views.get_tanks_installations, name='get_tanks_installations'),
     path('ajax/get_alerts', views.get_alerts, name="get_alerts"),
     path('ajax/reset_alert', views.reset_alert, name="reset_alert"),
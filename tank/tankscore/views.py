@@ -317,7 +317,20 @@ def get_valve(request):
     Returns:
         A JSON with the list of data points or the error.
     """
-    return get_data_points(request, ID_VALVE)
+    return get_data_points(request, ID_VALVE, METHOD_MIN_MAX)
+
+
+def get_history_series(request):
+    """
+    Returns the data of several history series of the installation.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+        A JSON with the list of data points of each series or the error.
+    """
+    return get_history(request)
 
 
 def get_tank_configuration(request):
@@ -342,6 +355,28 @@ def get_tank_configuration(request):
     return get_tank_configuration_request(request, tank_id)
 
 
+def get_installation_configuration(request):
+    """
+    Returns the configuration of all the tanks of the installation contained
+    in the request.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+        A JSON with the configuration of the tanks or the error.
+    """
+    # Check if the AJAX request is valid.
+    error = check_ajax_request(request)
+    if error is not None:
+        return error
+
+    # Get the installation name from the POST request.
+    installation_name = request.POST[PARAM_INSTALLATION_NAME]
+
+    return get_installation_configuration_request(request, installation_name)
+
+
 def set_tanks_configuration(request):
     """
     Sets the configuration of the tanks contained in the request and returns
@@ -369,6 +404,24 @@ def set_tanks_configuration(request):
                                            mo_value, df_value)
 
 
+def get_scheduled_configs(request):
+    """
+    Returns the status of the scheduled configurations of the offline tanks.
+
+    Args:
+        request (:class:`.WSGIRequest`): the AJAX request.
+
+    Returns:
+        A JSON with the scheduled configurations or the error.
+    """
+    # Check if the AJAX request is valid.
+    error = check_ajax_request(request)
+    if error is not None:
+        return error
+
+    return get_scheduled_configs_request(request)
+
+
 def get_tanks_installations(request):
     """
     Returns a JSON response containing the tanks installations of the DRM